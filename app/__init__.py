@@ -5,11 +5,16 @@ from flask_migrate import Migrate
 from config import Config
 import logging
 import os
+import sys
 
 # Initialisation des extensions
 db = SQLAlchemy()
 migrate = Migrate()
 
+def _is_cli_command():
+    """Indique une commande `flask` autre que `flask run` : aucun serveur web à préparer"""
+    return os.environ.get('FLASK_RUN_FROM_CLI') == 'true' and 'run' not in sys.argv[1:]
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -38,12 +43,18 @@ def create_app(config_class=Config):
     from app.routes.prediction_routes import prediction_bp
     from app.routes.whoscored_routes import whoscored_bp
     from app.routes.api_football_routes import api_football_bp
+    from app.routes.export_routes import export_bp
     
     app.register_blueprint(club_bp, url_prefix='/club')
     app.register_blueprint(player_bp, url_prefix='/player')
     app.register_blueprint(prediction_bp, url_prefix='/predict')
     app.register_blueprint(whoscored_bp, url_prefix='/whoscored')
     app.register_blueprint(api_football_bp, url_prefix='/api-football')
+    app.register_blueprint(export_bp, url_prefix='/export')
+    
+    # Enregistrement des commandes CLI
+    from app.commands import register_commands
+    register_commands(app)
     
     # Initialisation de l'API Football Client
     try:
@@ -54,6 +65,63 @@ def create_app(config_class=Config):
     except Exception as e:
         app.logger.error(f'Erreur lors de l\'initialisation de l\'API Football Client: {str(e)}')
     
+    # Client football-data.org partagé (session mutualisée et cache)
+    from app.services.football_data_client import football_data_client
+    football_data_client.init_app(app)
+    app.extensions['football_data'] = football_data_client
+    
+    # Client Ollama partagé (session mutualisée et concurrence bornée)
+    from app.services.ollama_client import ollama_client
+    ollama_client.init_app(app)
+    app.extensions['ollama'] = ollama_client
+    
+    # Cache des réponses d'Ollama sur disque
+    from app.services.prompt_cache import prompt_cache
+    prompt_cache.init_app(app)
+    app.extensions['prompt_cache'] = prompt_cache
+    
+    # Cache des pages WhoScored sur disque
+    from app.services.page_cache import page_cache
+    page_cache.init_app(app)
+    app.extensions['page_cache'] = page_cache
+    
+    # Corpus de pages WhoScored (pages en échec, benchmark hors ligne)
+    from app.services.parser_corpus import parser_corpus
+    parser_corpus.init_app(app)
+    app.extensions['parser_corpus'] = parser_corpus
+    
+    # Pool de navigateurs Chrome partagés par les scrapers WhoScored
+    from app.services.browser_pool import browser_pool
+    browser_pool.init_app(app)
+    app.extensions['browser_pool'] = browser_pool
+    
+    # Exécution des imports WhoScored en arrière-plan
+    from app.services.job_runner import job_runner
+    from app.services import whoscored_import  # Déclare les tâches d'import
+    from app.services import batch_predictor  # Déclare la tâche de prédiction par lots
+    job_runner.init_app(app)
+    app.extensions['job_runner'] = job_runner
+    
+    # Les commandes `flask` ne préchauffent pas les caches : ils seront
+    # construits à la première lecture si la commande en a besoin
+    warm_up = app.config.get('STARTUP_WARMUP', True) and not _is_cli_command()
+    
+    # Construction du cache analytique en colonnes
+    try:
+        from app.services.analytics_store import analytics_store
+        analytics_store.init_app(app, warm_up=warm_up)
+        app.extensions['analytics_store'] = analytics_store
+    except Exception as e:
+        app.logger.error(f'Erreur lors de l\'initialisation du cache analytique: {str(e)}')
+    
+    # Synchronisation du feature store des prédictions
+    try:
+        from app.services.feature_store import feature_store
+        feature_store.init_app(app, warm_up=warm_up)
+        app.extensions['feature_store'] = feature_store
+    except Exception as e:
+        app.logger.error(f'Erreur lors de l\'initialisation du feature store: {str(e)}')
+    
     # Route principale
     @app.route('/')
     def index():
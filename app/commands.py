@@ -0,0 +1,335 @@
+# app/commands.py
+"""
+Commandes en ligne de commande de l'application (flask <commande>)
+"""
+
+import click
+from flask import current_app
+
+def register_commands(app):
+    """Enregistre les commandes CLI auprès de l'application"""
+    app.cli.add_command(export_parquet)
+    app.cli.add_command(predict_round)
+    app.cli.add_command(rebuild_features)
+    app.cli.add_command(backtest)
+    app.cli.add_command(score_predictions)
+    app.cli.add_command(prompt_cache_command)
+    app.cli.add_command(simulate_season_command)
+    app.cli.add_command(parser_benchmark_command)
+    app.cli.add_command(page_cache_command)
+    app.cli.add_command(parser_corpus_command)
+    app.cli.add_command(corpus_benchmark_command)
+    app.cli.add_command(import_match_centre_command)
+    app.cli.add_command(import_league_command)
+    app.cli.add_command(import_api_players_command)
+    app.cli.add_command(resume_import_command)
+
+@click.command('export-parquet')
+@click.option('--output', default=None, help="Répertoire de sortie (EXPORT_PARQUET_DIR par défaut)")
+@click.option('--table', 'tables', multiple=True, help="Table à exporter (répétable, toutes par défaut)")
+@click.option('--full', is_flag=True, help="Ignorer le dernier export et tout réexporter")
+@click.option('--batch-size', default=50000, show_default=True, help="Lignes lues par lot")
+def export_parquet(output, tables, full, batch_size):
+    """Exporte les tables d'analyse en fichiers Parquet partitionnés"""
+    from app.services.parquet_exporter import ParquetExporter
+    
+    output = output or current_app.config['EXPORT_PARQUET_DIR']
+    exporter = ParquetExporter(output, batch_size=batch_size,
+                               safety_seconds=current_app.config.get('EXPORT_PARQUET_SAFETY_SECONDS', 300))
+    summary = exporter.export(tables=list(tables) or None, full=full)
+    
+    for name, result in summary.items():
+        click.echo(f"{name}: {result['rows']} lignes, {result['files']} fichiers, {result['seconds']}s")
+
+@click.command('predict-round')
+@click.option('--league', 'league_id', type=int, default=None, help="ID API-Football de la ligue")
+@click.option('--season', type=int, default=None, help="Saison API-Football (année de début)")
+@click.option('--round', 'round_name', default=None, help="Tour à prédire (tour en cours par défaut)")
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help="Date de début (matchs en base)")
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help="Date de fin, incluse")
+@click.option('--competition', default=None, help="Compétition (avec --from/--to)")
+@click.option('--batch-size', default=200, show_default=True, help="Prédictions calculées et écrites par transaction")
+def predict_round(league_id, season, round_name, date_from, date_to, competition, batch_size):
+    """Prédit tous les matchs d'une journée (--league/--season) ou d'une période (--from/--to)"""
+    from app.services.batch_predictor import fixtures_for_round, fixtures_for_dates, predict_fixtures
+    
+    if league_id and season:
+        client = current_app.extensions.get('api_football')
+        if client is None:
+            raise click.ClickException("Client API-Football indisponible")
+        fixtures = fixtures_for_round(client, league_id, season, round_name)
+    elif date_from:
+        fixtures = fixtures_for_dates(date_from, date_to or date_from, competition)
+    else:
+        raise click.UsageError("Préciser --league et --season, ou --from (et --to)")
+    
+    click.echo(f"{len(fixtures)} matchs à prédire")
+    
+    def show_progress(done, total, rate):
+        click.echo(f"  {done}/{total} prédictions ({rate:.1f}/s)")
+    
+    summary = predict_fixtures(fixtures, batch_size=batch_size, progress=show_progress)
+    click.echo(
+        f"{summary['predicted']} prédictions ({summary['created']} créées, {summary['updated']} mises à jour), "
+        f"{summary['skipped']} ignorées, {summary['seconds']}s, {summary['predictions_per_second']} prédictions/s"
+    )
+
+@click.command('rebuild-features')
+def rebuild_features():
+    """Reconstruit le feature store (forme, Elo, confrontations directes)"""
+    from app.services.feature_store import feature_store
+    
+    feature_store.rebuild()
+    click.echo("Feature store reconstruit")
+
+@click.command('backtest')
+@click.option('--competition', default=None, help="Compétition à rejouer (toutes par défaut)")
+@click.option('--season', 'seasons', multiple=True, help="Saison à rejouer (répétable, toutes par défaut)")
+@click.option('--refit-days', default=7, show_default=True, help="Jours entre deux ajustements du modèle")
+@click.option('--min-training', default=50, show_default=True, help="Matchs d'historique minimum avant d'évaluer")
+@click.option('--xi', type=float, default=None, help="Décroissance temporelle du modèle (par jour)")
+@click.option('--prior', type=float, default=None, help="Matchs fictifs de régularisation par club")
+def backtest(competition, seasons, refit_days, min_training, xi, prior):
+    """Rejoue les saisons passées avec le modèle local (hors ligne) et affiche ses métriques"""
+    from app.services.backtest import run_backtest
+    
+    model_options = {}
+    if xi is not None:
+        model_options['xi'] = xi
+    if prior is not None:
+        model_options['prior_matches'] = prior
+    
+    summary = run_backtest(competition=competition, seasons=list(seasons) or None, refit_days=refit_days,
+                           min_training_matches=min_training, **model_options)
+    
+    click.echo(f"Modèle {summary['model_version']} {summary['model_options'] or ''}")
+    click.echo(f"{summary['matches']} matchs évalués, {summary['skipped']} ignorés, {summary['fits']} ajustements")
+    click.echo(f"Précision {summary['accuracy']}, Brier {summary['brier']}, log-loss {summary['log_loss']}")
+    for season, metrics in summary['by_season'].items():
+        click.echo(f"  {season}: {metrics['matches']} matchs, précision {metrics['accuracy']}, "
+                   f"Brier {metrics['brier']}, log-loss {metrics['log_loss']}")
+    click.echo(f"{summary['predictions_per_second']} prédictions/s "
+               f"({summary['end_to_end_per_second']}/s avec les ajustements, {summary['seconds']}s)")
+
+@click.command('score-predictions')
+def score_predictions():
+    """Renseigne l'exactitude des prédictions enregistrées et affiche leurs métriques"""
+    from app.services.backtest import fill_prediction_outcomes, evaluate_saved_predictions
+    
+    filled = fill_prediction_outcomes()
+    click.echo(f"{filled} prédictions évaluées")
+    for version, metrics in evaluate_saved_predictions().items():
+        click.echo(f"{version}: {metrics['matches']} matchs, précision {metrics['accuracy']}, "
+                   f"Brier {metrics['brier']}, log-loss {metrics['log_loss']}")
+
+@click.command('prompt-cache')
+@click.option('--purge', is_flag=True, help="Supprimer les entrées expirées")
+@click.option('--clear', is_flag=True, help="Vider entièrement le cache")
+def prompt_cache_command(purge, clear):
+    """Affiche l'état du cache des réponses d'Ollama et le nettoie"""
+    from app.services.prompt_cache import prompt_cache
+    
+    if clear:
+        prompt_cache.clear()
+        click.echo("Cache des prompts vidé")
+    elif purge:
+        click.echo(f"{prompt_cache.purge_expired()} entrées expirées supprimées")
+    
+    stats = prompt_cache.stats()
+    click.echo(f"{stats['entries']} entrées, {stats['bytes'] / 1024:.1f} Ko / {stats['max_bytes'] / 1024 / 1024:.0f} Mo")
+
+@click.command('simulate-season')
+@click.option('--competition', required=True, help="Compétition")
+@click.option('--season', required=True, help="Saison")
+@click.option('--simulations', default=10000, show_default=True, help="Saisons simulées")
+@click.option('--processes', default=1, show_default=True, help="Processus de calcul")
+@click.option('--top', 'top_places', default=4, show_default=True, help="Places qualificatives")
+@click.option('--relegation', 'relegation_places', default=3, show_default=True, help="Places de relégation")
+@click.option('--seed', type=int, default=None, help="Graine du générateur aléatoire")
+def simulate_season_command(competition, season, simulations, processes, top_places, relegation_places, seed):
+    """Projette la fin d'une saison par simulation de Monte-Carlo"""
+    from app.services.season_simulator import simulate_season
+    
+    try:
+        projection = simulate_season(competition, season, simulations=simulations, processes=processes,
+                                     top_places=top_places, relegation_places=relegation_places,
+                                     seed=seed, use_cache=False)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    click.echo(f"{projection['simulations']} simulations, {projection['remaining_fixtures']} matchs restants, "
+               f"{projection['seconds']}s ({projection['simulations_per_second']} simulations/s)")
+    click.echo(f"{'Club':<30}{'Pts':>5}{'xPts':>8}{'Titre':>8}{'Top ' + str(top_places):>8}{'Relég.':>8}")
+    for team in projection['teams']:
+        click.echo(f"{(team['name'] or team['team_id'])!s:<30}{team['points']:>5}{team['expected_points']:>8.1f}"
+                   f"{team['title']:>8.1%}{team['top']:>8.1%}{team['relegation']:>8.1%}")
+
+@click.command('parser-benchmark')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--repeat', default=5, show_default=True, help="Analyses de chaque page par routine")
+def parser_benchmark_command(paths, repeat):
+    """Compare l'analyse lxml des pages WhoScored enregistrées avec l'ancienne analyse BeautifulSoup"""
+    import os
+    from app.services.parser_benchmark import compare_parsers
+    
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(root, name) for root, _, names in os.walk(path)
+                         for name in sorted(names) if name.endswith(('.html', '.htm')))
+        else:
+            files.append(path)
+    if not files:
+        raise click.ClickException("Aucune page HTML trouvée")
+    
+    pages = {}
+    for path in files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            pages[path] = f.read()
+    
+    click.echo(f"{len(pages)} pages, {repeat} analyses par routine")
+    click.echo(f"{'Routine':<22}{'BS4 p/s':>10}{'lxml p/s':>10}{'Gain':>8}{'Éléments BS4/lxml':>20}")
+    for row in compare_parsers(pages, repeat=repeat):
+        click.echo(f"{row['routine']:<22}{row['legacy_pages_per_second'] or '-':>10}{row['lxml_pages_per_second'] or '-':>10}"
+                   f"{(str(row['speedup']) + 'x') if row['speedup'] else '-':>8}"
+                   f"{str(row['legacy_items']) + ' / ' + str(row['lxml_items']):>20}")
+
+@click.command('page-cache')
+@click.option('--purge', is_flag=True, help="Supprimer les pages périmées")
+@click.option('--clear', is_flag=True, help="Vider entièrement le cache")
+def page_cache_command(purge, clear):
+    """Affiche l'état du cache des pages WhoScored et le nettoie"""
+    from app.services.page_cache import page_cache
+    
+    if clear:
+        page_cache.clear()
+        click.echo("Cache des pages vidé")
+    elif purge:
+        click.echo(f"{page_cache.purge_expired()} pages périmées supprimées")
+    
+    stats = page_cache.stats()
+    click.echo(f"{stats['entries']} pages, {stats['bytes'] / 1024 / 1024:.1f} Mo / {stats['max_bytes'] / 1024 / 1024:.0f} Mo"
+               f"{' (mode hors ligne)' if stats['offline'] else ''}")
+    for page_type, count in sorted(stats['by_type'].items()):
+        click.echo(f"  {page_type}: {count}")
+
+@click.command('parser-corpus')
+@click.option('--from-cache', is_flag=True, help="Copier dans le corpus les pages du cache des pages")
+@click.option('--limit', default=None, type=int, help="Pages copiées par type au plus (avec --from-cache)")
+def parser_corpus_command(from_cache, limit):
+    """Affiche le contenu du corpus de pages WhoScored et l'alimente depuis le cache des pages"""
+    from app.services.page_cache import page_cache
+    from app.services.parser_corpus import parser_corpus
+    
+    if from_cache:
+        copied = parser_corpus.import_page_cache(page_cache, limit=limit)
+        click.echo(f"{sum(copied.values())} pages copiées depuis le cache")
+    
+    stats = parser_corpus.stats()
+    click.echo(f"Corpus {stats['directory']}: {sum(stats['pages'].values())} pages, {stats['failures']} pages en échec à examiner")
+    for page_type, count in stats['pages'].items():
+        click.echo(f"  {page_type}: {count}")
+
+@click.command('corpus-benchmark')
+@click.option('--repeat', default=5, show_default=True, help="Analyses de chaque page par routine")
+def corpus_benchmark_command(repeat):
+    """Mesure le débit et la mémoire des routines d'analyse WhoScored sur le corpus de pages"""
+    from app.services.parser_corpus import parser_corpus
+    from app.services.parser_benchmark import benchmark_corpus
+    
+    try:
+        results = benchmark_corpus(parser_corpus, repeat=repeat)
+    except ValueError as e:
+        raise click.ClickException(f"{str(e)}, voir `flask parser-corpus --from-cache`")
+    
+    click.echo(f"{'Routine':<28}{'Pages':>7}{'Pages/s':>10}{'Éléments':>10}{'Ko/page':>10}{'RSS +Ko':>10}")
+    for row in results:
+        click.echo(f"{row['routine']:<28}{row['pages']:>7}{row['pages_per_second'] or '-':>10}{row['items']:>10}"
+                   f"{row['peak_kb_per_page']:>10}{row['max_rss_growth_kb']:>10}")
+
+@click.command('import-match-centre')
+@click.argument('match_ids', nargs=-1, required=True)
+@click.option('--competition', default=None, help="Compétition des matchs créés (lue dans la page sinon)")
+@click.option('--season', default=None, help="Saison des matchs créés, ex: 2023/2024 (lue dans la page sinon)")
+def import_match_centre_command(match_ids, competition, season):
+    """Importe les événements (avec coordonnées) et les performances des joueurs de matchs WhoScored"""
+    from app.services.whoscored_data_fetcher import WhoScoredDataFetcher
+    from app.services.whoscored_import import import_match_centre
+    
+    fetcher = WhoScoredDataFetcher()
+    for match_id in match_ids:
+        centre = fetcher.get_match_centre(match_id)
+        if centre is None:
+            click.echo(f"{match_id}: données du centre de match introuvables")
+            continue
+        try:
+            result = import_match_centre(centre, competition=competition, season=season)
+        except ValueError as e:
+            click.echo(f"{match_id}: {str(e)}")
+            continue
+        click.echo(f"{match_id}: match {result['match_id']}, {result['events']} événements, {result['players']} joueurs")
+
+@click.command('import-league')
+@click.argument('league_id')
+@click.argument('season_id')
+@click.option('--proxy', default=None, help="Proxy HTTP(S) à utiliser")
+@click.option('--resume', is_flag=True, help="Reprendre un import interrompu (sauter les équipes et joueurs déjà importés)")
+def import_league_command(league_id, season_id, proxy, resume):
+    """Importe les équipes, joueurs et statistiques d'une ligue WhoScored (ex: 252/2 9618)"""
+    from app.services.whoscored_data_fetcher import WhoScoredDataFetcher
+    from app.services.whoscored_import import pipeline_message
+    
+    stats = WhoScoredDataFetcher(proxy=proxy).import_league_data(
+        league_id, season_id, progress=lambda stats: click.echo(pipeline_message(stats)), resume=resume)
+    
+    click.echo(f"Terminé en {stats['elapsed']}s, {stats['batches']} lots écrits")
+    click.echo(f"{'Étape':<10}{'Traités':>10}{'Erreurs':>10}{'Par s':>10}{'Occupé (s)':>12}")
+    for name, stage in stats['stages'].items():
+        click.echo(f"{name:<10}{stage['processed']:>10}{stage['errors']:>10}{stage['per_second'] or '-':>10}"
+                   f"{stage['busy_seconds']:>12}")
+
+@click.command('import-api-players')
+@click.argument('league_id', type=int)
+@click.argument('season', type=int)
+@click.option('--resume', is_flag=True, help="Reprendre un import interrompu (sauter les pages déjà importées)")
+def import_api_players_command(league_id, season, resume):
+    """Importe toutes les pages de joueurs d'une ligue depuis API-Football (ex: 39 2023)"""
+    client = current_app.extensions['api_football']
+    result = client.import_league_players(league_id, season, resume=resume,
+                                          progress=lambda page, pages: click.echo(f"Page {page}/{pages}"))
+    click.echo(f"{result['imported']} pages importées, {result['skipped']} déjà faites : "
+               f"{result['players']} joueurs créés, {result['stats']} statistiques")
+
+@click.command('resume-import')
+@click.argument('job_id', type=int, required=False)
+def resume_import_command(job_id):
+    """Reprend une tâche d'import interrompue ; sans identifiant, liste les imports à reprendre"""
+    from app.models.import_job import ImportJob
+    from app.services.import_checkpoints import list_imports
+    from app.services.job_runner import job_runner
+    from app import db
+    
+    if job_id is None:
+        jobs = [job for job in ImportJob.query.order_by(ImportJob.created_at.desc()).limit(50).all()
+                if job_runner.is_resumable(job)]
+        click.echo("Tâches à reprendre :" if jobs else "Aucune tâche à reprendre")
+        for job in jobs:
+            click.echo(f"  {job.id:>5}  {job.kind:<12} {job.status:<12} {job.get_params()}  {job.message or ''}")
+        imports = list_imports()
+        if imports:
+            click.echo("Points de reprise :")
+        for entry in imports:
+            click.echo(f"  {entry['key']:<45} {entry['units']:>6} unités, dernière le "
+                       f"{entry['last_completed_at']:%d/%m/%Y %H:%M:%S}")
+        return
+    
+    try:
+        new_id = job_runner.resume(job_id, background=False)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    job = db.session.get(ImportJob, new_id)
+    click.echo(f"Tâche {new_id} : {job.status} - {job.message}")
+    if job.result:
+        click.echo(job.result)
+    if job.error:
+        click.echo(job.error)
@@ -7,4 +7,9 @@ from app.models.player_stats import PlayerStats
 from app.models.match_event import MatchEvent
 from app.models.player_performance import PlayerPerformance
 from app.models.player_position_heatmap import PlayerPositionHeatmap
-from app.models.prediction import Prediction
\ No newline at end of file
+from app.models.prediction import Prediction
+from app.models.team_features import TeamFeatures
+from app.models.head_to_head import HeadToHead
+from app.models.team_rating import TeamRating
+from app.models.import_job import ImportJob
+from app.models.import_checkpoint import ImportCheckpoint
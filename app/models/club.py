@@ -1,7 +1,20 @@
 # app/models/club.py
 from app import db
+from app.services.cache import MemoCache, on_match_change
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
+# Forme récente et prochains matchs mémorisés par club, invalidés à chaque
+# modification d'un match du club. La durée de vie couvre le passage des
+# matchs à venir dans le passé sans modification en base.
+_club_matches_cache = MemoCache(maxsize=2048, ttl=600)
+
+@on_match_change
+def _invalidate_club_matches(change):
+    """Supprime les résultats mémorisés des clubs concernés par un match"""
+    club_ids = change["club_ids"]
+    _club_matches_cache.invalidate_where(lambda key: key[0] in club_ids)
+
 class Club(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     api_id = db.Column(db.Integer, unique=True)  # ID de l'API externe
@@ -38,25 +51,38 @@ class Club(db.Model):
     
     def get_recent_form(self, limit=5):
         """Récupère les X derniers matchs d'un club avec leurs résultats"""
-        matches = self.get_all_matches()[:limit]
+        return _club_matches_cache.get_or_set(
+            (self.id, 'recent_form', limit),
+            lambda: self._compute_recent_form(limit)
+        )
+    
+    def _compute_recent_form(self, limit):
+        """Calcule la forme récente en une seule requête limitée"""
+        from app.models.match import Match
+        
+        matches = Match.query.options(
+            joinedload(Match.home_team),
+            joinedload(Match.away_team)
+        ).filter(
+            ((Match.home_team_id == self.id) | (Match.away_team_id == self.id)) &
+            (Match.status == 'FINISHED')
+        ).order_by(Match.date.desc()).limit(limit).all()
+        
         form = []
         
         for match in matches:
             # Déterminer si le club est l'équipe à domicile ou à l'extérieur
             is_home = (match.home_team_id == self.id)
-            
-            if match.status != 'FINISHED':
-                continue
                 
             # Calculer les buts marqués et encaissés
             if is_home:
-                team_goals = match.home_team_score
-                opponent_goals = match.away_team_score
-                opponent = match.away_team.name
+                team_goals = match.home_team_score or 0
+                opponent_goals = match.away_team_score or 0
+                opponent = match.away_team.name if match.away_team else "Équipe inconnue"
             else:
-                team_goals = match.away_team_score
-                opponent_goals = match.home_team_score
-                opponent = match.home_team.name
+                team_goals = match.away_team_score or 0
+                opponent_goals = match.home_team_score or 0
+                opponent = match.home_team.name if match.home_team else "Équipe inconnue"
             
             # Déterminer le résultat
             if team_goals > opponent_goals:
@@ -78,10 +104,20 @@ class Club(db.Model):
     
     def get_upcoming_matches(self, limit=5):
         """Récupère les prochains matchs programmés pour ce club"""
+        return _club_matches_cache.get_or_set(
+            (self.id, 'upcoming_matches', limit),
+            lambda: self._compute_upcoming_matches(limit)
+        )
+    
+    def _compute_upcoming_matches(self, limit):
+        """Calcule les prochains matchs en une seule requête limitée"""
         from app.models.match import Match
         now = datetime.utcnow()
         
-        upcoming = Match.query.filter(
+        upcoming = Match.query.options(
+            joinedload(Match.home_team),
+            joinedload(Match.away_team)
+        ).filter(
             ((Match.home_team_id == self.id) | (Match.away_team_id == self.id)) &
             (Match.date > now)
         ).order_by(Match.date.asc()).limit(limit).all()
@@ -89,19 +125,13 @@ class Club(db.Model):
         matches = []
         for match in upcoming:
             is_home = (match.home_team_id == self.id)
-            
-            if is_home:
-                opponent = match.away_team.name
-                opponent_logo = match.away_team.crest
-            else:
-                opponent = match.home_team.name
-                opponent_logo = match.home_team.crest
+            opponent_team = match.away_team if is_home else match.home_team
             
             matches.append({
                 "date": match.date,
                 "competition": match.competition,
-                "opponent": opponent,
-                "opponent_logo": opponent_logo,
+                "opponent": opponent_team.name if opponent_team else "Équipe inconnue",
+                "opponent_logo": opponent_team.crest if opponent_team else None,
                 "is_home": is_home
             })
         
@@ -0,0 +1,39 @@
+# app/models/head_to_head.py
+from app import db
+from datetime import datetime
+import json
+
+class HeadToHead(db.Model):
+    """Bilan des confrontations directes entre deux clubs (team_a_id < team_b_id)"""
+    team_a_id = db.Column(db.Integer, db.ForeignKey('club.id'), primary_key=True)
+    team_b_id = db.Column(db.Integer, db.ForeignKey('club.id'), primary_key=True)
+
+    total_matches = db.Column(db.Integer, default=0)
+    team_a_wins = db.Column(db.Integer, default=0)
+    draws = db.Column(db.Integer, default=0)
+    team_b_wins = db.Column(db.Integer, default=0)
+    last_match_date = db.Column(db.DateTime)
+
+    # Dernières confrontations, de la plus récente à la plus ancienne (format de compute_head_to_head)
+    last_matches = db.Column(db.Text)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<HeadToHead {self.team_a_id} vs {self.team_b_id} - {self.total_matches} matchs>'
+
+    @staticmethod
+    def key(team_id, opponent_id):
+        """Clé ordonnée d'une paire de clubs"""
+        return (team_id, opponent_id) if team_id < opponent_id else (opponent_id, team_id)
+
+    def get_last_matches(self):
+        """Retourne les dernières confrontations sous forme de liste"""
+        return json.loads(self.last_matches) if self.last_matches else []
+
+    def to_dict(self):
+        """Confrontations directes au format de ai_predictor.compute_head_to_head"""
+        return {
+            "total_matches": self.total_matches or 0,
+            "last_matches": self.get_last_matches()
+        }
@@ -0,0 +1,24 @@
+# app/models/import_checkpoint.py
+from app import db
+from datetime import datetime
+import json
+
+class ImportCheckpoint(db.Model):
+    """Unité d'un import long (page, équipe, joueur) déjà enregistrée en base"""
+    __table_args__ = (
+        db.UniqueConstraint('import_key', 'unit_type', 'unit_id', name='uq_import_checkpoint_unit'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_key = db.Column(db.String(120), nullable=False, index=True)  # ex: whoscored:league:252/2:9618
+    unit_type = db.Column(db.String(20), nullable=False)  # page, team, player
+    unit_id = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text)  # JSON : ce qu'il faut savoir de l'unité pour reprendre sans la refaire
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ImportCheckpoint {self.import_key} {self.unit_type}={self.unit_id}>'
+
+    def get_payload(self):
+        """Retourne les données de l'unité sous forme d'objet Python"""
+        return json.loads(self.payload) if self.payload else None
@@ -0,0 +1,69 @@
+# app/models/import_job.py
+from app import db
+from datetime import datetime
+import json
+
+class ImportJob(db.Model):
+    """Tâche d'import exécutée en arrière-plan (scraping WhoScored)"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # teams, players, player_stats, league_stats
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, running, succeeded, failed, cancelled, interrupted
+
+    # Avancement
+    progress_current = db.Column(db.Integer, default=0)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(255))
+    cancel_requested = db.Column(db.Boolean, default=False)
+    owner = db.Column(db.String(100), index=True)  # hôte:pid du processus qui exécute la tâche
+
+    # Issue
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Dernière nouvelle de la tâche
+
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled', 'interrupted')
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.kind} ({self.status})>'
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    def get_params(self):
+        """Retourne les paramètres de la tâche sous forme de dictionnaire"""
+        return json.loads(self.params) if self.params else {}
+
+    def get_result(self):
+        """Retourne le résultat de la tâche sous forme de dictionnaire"""
+        return json.loads(self.result) if self.result else None
+
+    def to_dict(self):
+        """Convertit la tâche en dictionnaire pour l'API"""
+        percent = None
+        if self.progress_total:
+            percent = round(100 * (self.progress_current or 0) / self.progress_total, 1)
+
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.get_params(),
+            'status': self.status,
+            'finished': self.finished,
+            'progress_current': self.progress_current or 0,
+            'progress_total': self.progress_total,
+            'percent': percent,
+            'message': self.message,
+            'cancel_requested': bool(self.cancel_requested),
+            'result': self.get_result(),
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
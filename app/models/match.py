@@ -1,5 +1,7 @@
 # app/models/match.py
 from app import db
+from app.services.cache import notify_match_change
+from sqlalchemy import event, inspect
 from datetime import datetime
 
 class Match(db.Model):
@@ -58,4 +60,36 @@ class Match(db.Model):
     def get_player_performances(self):
         """Récupère les performances des joueurs dans ce match"""
         from app.models.player_performance import PlayerPerformance
-        return PlayerPerformance.query.filter_by(match_id=self.id).all()
\ No newline at end of file
+        return PlayerPerformance.query.filter_by(match_id=self.id).all()
+
+def _changed_club_ids(match):
+    """Retourne les clubs concernés par un match, y compris les anciennes valeurs modifiées"""
+    club_ids = {match.home_team_id, match.away_team_id}
+    state = inspect(match)
+    for attr in ('home_team_id', 'away_team_id'):
+        club_ids.update(state.attrs[attr].history.deleted or ())
+    return club_ids
+
+@event.listens_for(Match, 'after_insert')
+@event.listens_for(Match, 'after_update')
+def _invalidate_match_caches(mapper, connection, target):
+    """Invalide les caches dépendant des matchs des clubs concernés"""
+    notify_match_change(
+        match_id=target.id,
+        club_ids=_changed_club_ids(target),
+        competition=target.competition,
+        season=target.season,
+        status=target.status
+    )
+
+@event.listens_for(Match, 'after_delete')
+def _invalidate_deleted_match_caches(mapper, connection, target):
+    """Invalide les caches dépendant d'un match supprimé"""
+    notify_match_change(
+        match_id=target.id,
+        club_ids=_changed_club_ids(target),
+        competition=target.competition,
+        season=target.season,
+        status=target.status,
+        deleted=True
+    )
\ No newline at end of file
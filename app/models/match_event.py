@@ -32,9 +32,20 @@ class MatchEvent(db.Model):
     # Description
     detail = db.Column(db.Text, nullable=True)
     
+    # Données du centre de match WhoScored
+    source_event_id = db.Column(db.BigInteger, nullable=True, index=True)  # ID de l'événement WhoScored
+    second = db.Column(db.Integer, nullable=True)
+    period = db.Column(db.String(20), nullable=True)  # FirstHalf, SecondHalf, etc.
+    x = db.Column(db.Float, nullable=True)  # Coordonnées en % du terrain, l'équipe attaquant vers x = 100
+    y = db.Column(db.Float, nullable=True)
+    end_x = db.Column(db.Float, nullable=True)  # Point d'arrivée (passes, tirs)
+    end_y = db.Column(db.Float, nullable=True)
+    is_successful = db.Column(db.Boolean, nullable=True)
+    qualifiers = db.Column(db.Text, nullable=True)  # Stocké en JSON
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<MatchEvent {self.type} - {self.player.name} - {self.minute}\'>'
\ No newline at end of file
+        return f'<MatchEvent {self.type} - {self.player.name if self.player else None} - {self.minute}\'>'
\ No newline at end of file
@@ -7,12 +7,29 @@ class Prediction(db.Model):
     match_id = db.Column(db.Integer, db.ForeignKey('match.id'))
     match = db.relationship('Match')
     
+    # Match prédit (renseigné même si le match n'existe pas encore en base)
+    home_team_id = db.Column(db.Integer, db.ForeignKey('club.id'), index=True)
+    away_team_id = db.Column(db.Integer, db.ForeignKey('club.id'), index=True)
+    match_date = db.Column(db.DateTime, index=True)
+    home_team = db.relationship('Club', foreign_keys=[home_team_id])
+    away_team = db.relationship('Club', foreign_keys=[away_team_id])
+    
     # Prédiction
     predicted_home_score = db.Column(db.Integer)
     predicted_away_score = db.Column(db.Integer)
     predicted_winner = db.Column(db.String(10))  # 'home', 'away', 'draw'
     confidence = db.Column(db.String(10))  # 'élevée', 'moyenne', 'faible'
     
+    # Sortie du modèle statistique
+    model_version = db.Column(db.String(50))
+    home_win_probability = db.Column(db.Float)
+    draw_probability = db.Column(db.Float)
+    away_win_probability = db.Column(db.Float)
+    expected_home_goals = db.Column(db.Float)
+    expected_away_goals = db.Column(db.Float)
+    feature_hash = db.Column(db.String(64), index=True)  # Empreinte des données d'entrée du modèle
+    has_narrative = db.Column(db.Boolean, default=False)  # Explication rédigée par Ollama
+    
     # Explicabilité
     explanation = db.Column(db.Text)
     key_factors = db.Column(db.Text)  # Stocké en JSON
@@ -25,7 +42,9 @@ class Prediction(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Prediction {self.match.home_team.name} vs {self.match.away_team.name} - {self.predicted_home_score}:{self.predicted_away_score}>'
+        home_team = self.home_team or (self.match.home_team if self.match else None)
+        away_team = self.away_team or (self.match.away_team if self.match else None)
+        return f'<Prediction {home_team.name if home_team else "?"} vs {away_team.name if away_team else "?"} - {self.predicted_home_score}:{self.predicted_away_score}>'
     
     def get_key_factors(self):
         """Convertit les facteurs clés JSON en liste Python"""
@@ -37,4 +56,34 @@ class Prediction(db.Model):
     def set_key_factors(self, factors):
         """Convertit la liste des facteurs clés en JSON pour le stockage"""
         import json
-        self.key_factors = json.dumps(factors)
\ No newline at end of file
+        self.key_factors = json.dumps(factors)
+    
+    def to_dict(self):
+        """Convertit la prédiction au format retourné par predict_match_result"""
+        return {
+            "id": self.id,
+            "home_team": self.home_team.name if self.home_team else None,
+            "away_team": self.away_team.name if self.away_team else None,
+            "home_team_id": self.home_team_id,
+            "away_team_id": self.away_team_id,
+            "home_team_logo": self.home_team.crest if self.home_team else None,
+            "away_team_logo": self.away_team.crest if self.away_team else None,
+            "match_date": self.match_date.strftime('%Y-%m-%d') if self.match_date else None,
+            "predicted_winner": self.predicted_winner,
+            "predicted_score": f"{self.predicted_home_score}-{self.predicted_away_score}",
+            "probabilities": {
+                "home": self.home_win_probability,
+                "draw": self.draw_probability,
+                "away": self.away_win_probability
+            },
+            "expected_goals": {
+                "home": self.expected_home_goals,
+                "away": self.expected_away_goals
+            },
+            "confidence": self.confidence,
+            "explanation": self.explanation,
+            "key_factors": self.get_key_factors(),
+            "model_version": self.model_version,
+            "feature_hash": self.feature_hash,
+            "narrative": bool(self.has_narrative)
+        }
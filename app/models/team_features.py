@@ -0,0 +1,60 @@
+# app/models/team_features.py
+from app import db
+from datetime import datetime
+import json
+
+class TeamFeatures(db.Model):
+    """Caractéristiques glissantes d'un club, tenues à jour par le feature store"""
+    team_id = db.Column(db.Integer, db.ForeignKey('club.id'), primary_key=True)
+    team = db.relationship('Club')
+
+    # Historique pris en compte
+    matches_played = db.Column(db.Integer, default=0)
+    last_match_id = db.Column(db.Integer)
+    last_match_date = db.Column(db.DateTime)
+    source_updated_at = db.Column(db.DateTime)  # updated_at du dernier match pris en compte
+
+    # Classement Elo
+    elo = db.Column(db.Float)
+
+    # Derniers matchs, du plus récent au plus ancien : [match_id, date, domicile, buts pour, buts contre]
+    recent_matches = db.Column(db.Text)
+    recent_home_matches = db.Column(db.Text)
+    recent_away_matches = db.Column(db.Text)
+
+    # Agrégats des derniers matchs (toutes rencontres, à domicile, à l'extérieur)
+    form_string = db.Column(db.String(20))
+    goals_for = db.Column(db.Integer, default=0)
+    goals_against = db.Column(db.Integer, default=0)
+    home_form_string = db.Column(db.String(20))
+    home_goals_for = db.Column(db.Integer, default=0)
+    home_goals_against = db.Column(db.Integer, default=0)
+    away_form_string = db.Column(db.String(20))
+    away_goals_for = db.Column(db.Integer, default=0)
+    away_goals_against = db.Column(db.Integer, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TeamFeatures {self.team_id} - {self.form_string} ({self.elo})>'
+
+    def get_recent_matches(self, side=None):
+        """Retourne les derniers matchs (tous, 'home' ou 'away') sous forme de liste"""
+        column = {None: self.recent_matches, 'home': self.recent_home_matches, 'away': self.recent_away_matches}[side]
+        return json.loads(column) if column else []
+
+    def recent_form(self, side=None):
+        """Forme récente au format de ai_predictor.compute_recent_form"""
+        recent = self.get_recent_matches(side)
+        form_string = {None: self.form_string, 'home': self.home_form_string, 'away': self.away_form_string}[side] or ""
+
+        return {
+            "matches_played": len(recent),
+            "wins": form_string.count("W"),
+            "draws": form_string.count("D"),
+            "losses": form_string.count("L"),
+            "goals_scored": sum(match[3] for match in recent),
+            "goals_conceded": sum(match[4] for match in recent),
+            "form_string": form_string,
+            "last_match_id": recent[0][0] if recent else None
+        }
@@ -0,0 +1,32 @@
+# app/models/team_rating.py
+from app import db
+from datetime import datetime
+
+class TeamRating(db.Model):
+    """Historique du classement Elo d'un club : une ligne par match terminé"""
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey('club.id'), nullable=False)
+    opponent_id = db.Column(db.Integer, db.ForeignKey('club.id'))
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'))
+    date = db.Column(db.DateTime)
+
+    rating = db.Column(db.Float)  # Classement après le match
+    change = db.Column(db.Float)  # Variation due au match
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_team_rating_team_date', 'team_id', 'date'),
+    )
+
+    def __repr__(self):
+        return f'<TeamRating {self.team_id} - {self.date}: {self.rating}>'
+
+    def to_dict(self):
+        return {
+            "match_id": self.match_id,
+            "opponent_id": self.opponent_id,
+            "date": self.date.strftime('%Y-%m-%d') if self.date else None,
+            "rating": self.rating,
+            "change": self.change
+        }
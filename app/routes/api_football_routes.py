@@ -220,8 +220,8 @@ def execute_task(task_id):
     """Exécuter immédiatement une tâche planifiée"""
     task = ScheduledTask.query.get_or_404(task_id)
     
-    # Vérifier si la tâche peut être exécutée
-    if task.status not in ['PENDING', 'SCHEDULED']:
+    # Vérifier si la tâche peut être exécutée (un import de joueurs en erreur reprend où il s'était arrêté)
+    if task.status not in ['PENDING', 'SCHEDULED'] and not (task.status == 'ERROR' and task.task_type == 'import_players'):
         flash('Impossible d\'exécuter une tâche déjà terminée', 'danger')
         return redirect(url_for('api_football.task_detail', task_id=task_id))
     
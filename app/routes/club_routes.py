@@ -4,6 +4,8 @@ from app.models.club import Club
 from app.models.match import Match
 from app.services.data_fetcher import get_club_stats, get_club_matches
 from app.services.data_processor import process_club_performance
+from app.services.feature_store import feature_store
+from app.services.elo import rating_history, elo_ranking
 from app import db
 import logging
 
@@ -49,17 +51,23 @@ def club_stats(club_id):
         "venue": club.venue,
         "founded": club.founded,
         "website": club.website,
-        # Ajouter des données par défaut pour les statistiques
-        "recent_form": [],
+        # Forme récente et calendrier (requêtes limitées et mémorisées par club)
+        "recent_form": club.get_recent_form(),
         "win_count": 0,
         "draw_count": 0,
         "loss_count": 0,
         "goals_scored": 0,
         "goals_conceded": 0,
         "goal_difference": 0,
-        "upcoming_matches": [],
+        "upcoming_matches": club.get_upcoming_matches(),
+        "elo": None,
     }
     
+    # Classement Elo courant (tenu à jour par le feature store)
+    features = feature_store.team_features([club.id]).get(club.id)
+    if features:
+        club_info["elo"] = features.elo
+    
     # Si nous avons des statistiques, les ajouter
     if stats:
         club_info["win_count"] = stats.wins
@@ -128,6 +136,33 @@ def club_performance(club_id):
             "timeline": []
         })
 
+@club_bp.route('/<int:club_id>/elo')
+def club_elo(club_id):
+    """Renvoie l'historique du classement Elo d'un club au format JSON"""
+    club = Club.query.get_or_404(club_id)
+    limit = request.args.get('limit', type=int)
+    
+    feature_store.ensure_current()
+    history = rating_history(club.id, limit=limit)
+    
+    return jsonify({
+        "clubId": club.id,
+        "name": club.name,
+        "current": history[-1].rating if history else None,
+        "history": [entry.to_dict() for entry in history]
+    })
+
+@club_bp.route('/elo-ranking')
+def club_elo_ranking():
+    """Renvoie le classement Elo des clubs au format JSON"""
+    feature_store.ensure_current()
+    ranking = elo_ranking(
+        competition=request.args.get('competition'),
+        season=request.args.get('season'),
+        limit=request.args.get('limit', type=int)
+    )
+    return jsonify(ranking)
+
 @club_bp.route('/<int:club_id>/matches')
 def club_matches(club_id):
     """Affiche les matchs d'un club"""
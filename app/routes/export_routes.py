@@ -0,0 +1,71 @@
+# app/routes/export_routes.py
+from flask import Blueprint, request, jsonify, current_app
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Création du Blueprint
+export_bp = Blueprint('export', __name__)
+
+# Un seul export à la fois par processus
+_export_lock = threading.Lock()
+_last_export = {"running": False, "summary": None, "error": None}
+
+def _run_export(app, tables, full):
+    """Exécute l'export Parquet dans un thread séparé"""
+    from app.services.parquet_exporter import ParquetExporter
+    
+    try:
+        with app.app_context():
+            exporter = ParquetExporter(app.config['EXPORT_PARQUET_DIR'],
+                                       safety_seconds=app.config.get('EXPORT_PARQUET_SAFETY_SECONDS', 300))
+            _last_export["summary"] = exporter.export(tables=tables, full=full)
+            _last_export["error"] = None
+    except Exception as e:
+        logger.error(f"Erreur lors de l'export Parquet: {str(e)}")
+        _last_export["error"] = str(e)
+    finally:
+        _last_export["running"] = False
+        _export_lock.release()
+
+@export_bp.route('/parquet', methods=['GET'])
+def parquet_status():
+    """Renvoie l'état du dernier export Parquet et les marqueurs par table"""
+    from app.services.parquet_exporter import ParquetExporter
+    
+    exporter = ParquetExporter(current_app.config['EXPORT_PARQUET_DIR'])
+    return jsonify({
+        "running": _last_export["running"],
+        "last_summary": _last_export["summary"],
+        "last_error": _last_export["error"],
+        "state": exporter.load_state()
+    })
+
+@export_bp.route('/parquet', methods=['POST'])
+def parquet_export():
+    """Lance un export Parquet incrémental en arrière-plan"""
+    from app.services.parquet_exporter import EXPORT_TABLES
+    
+    payload = request.get_json(silent=True) or request.form
+    tables = payload.get('tables') or None
+    if isinstance(tables, str):
+        tables = [name.strip() for name in tables.split(',') if name.strip()]
+    full = str(payload.get('full', '')).lower() in ('1', 'true', 'yes', 'on')
+    
+    unknown = [name for name in (tables or []) if name not in EXPORT_TABLES]
+    if unknown:
+        return jsonify({"error": f"Tables inconnues: {', '.join(unknown)}"}), 400
+    
+    if not _export_lock.acquire(blocking=False):
+        return jsonify({"error": "Un export est déjà en cours"}), 409
+    
+    _last_export["running"] = True
+    thread = threading.Thread(
+        target=_run_export,
+        args=(current_app._get_current_object(), tables, full),
+        daemon=True
+    )
+    thread.start()
+    
+    return jsonify({"status": "started", "tables": tables or list(EXPORT_TABLES.keys()), "full": full}), 202
@@ -4,10 +4,12 @@ from app.models.player import Player
 from app.models.player_stats import PlayerStats  # Ajouté pour le débogage
 from app.services.data_fetcher import get_player_stats, get_player_matches
 from app.services.data_processor import process_player_heatmap, process_player_performance
+from app.services.player_timeseries import build_player_timeseries, serialize_timeseries
 from app import db
 import logging
 import sys  # Ajouté pour le débogage
 import traceback  # Ajouté pour le débogage
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +119,31 @@ def player_performance(player_id):
     performance_data = process_player_performance(player, matches)
     return jsonify(performance_data)
 
+@player_bp.route('/timeseries')
+def players_timeseries():
+    """Renvoie les séries temporelles de performance d'un ou plusieurs joueurs
+    
+    Paramètres: ids (liste séparée par des virgules), from/to (YYYY-MM-DD, `to` exclu),
+    limit (matchs par joueur), window (taille des moyennes glissantes)
+    """
+    try:
+        player_ids = [int(pid) for pid in request.args.get('ids', '').split(',') if pid.strip()]
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        date_from = datetime.fromisoformat(date_from) if date_from else None
+        date_to = datetime.fromisoformat(date_to) if date_to else None
+        limit = request.args.get('limit', 50, type=int)
+        window = request.args.get('window', 5, type=int)
+    except ValueError as e:
+        return jsonify({"error": f"Paramètres invalides: {str(e)}"}), 400
+    
+    if not player_ids:
+        return jsonify({"error": "Aucun joueur spécifié"}), 400
+    
+    series = build_player_timeseries(player_ids, date_from=date_from, date_to=date_to,
+                                     limit=min(limit, 200), window=window)
+    return jsonify({"players": serialize_timeseries(series)})
+
 @player_bp.route('/compare/<int:player1_id>/<int:player2_id>')
 def compare_players(player1_id, player2_id):
     """Compare deux joueurs"""
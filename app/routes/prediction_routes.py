@@ -1,18 +1,213 @@
 # app/routes/prediction_routes.py
-from flask import Blueprint, render_template, request, jsonify
-from app.services.ai_predictor import predict_match_result
+import json
+from datetime import datetime
+from flask import Blueprint, Response, render_template, request, jsonify, current_app, stream_with_context, url_for
+from app.models.club import Club
+from app.models.import_job import ImportJob
+from app.services.ai_predictor import (
+    predict_match_result, prepare_match_data, build_prediction_prompt, save_narrative, analyse_llm_response
+)
+from app.services.ollama_client import ollama_client, OllamaBusyError, OllamaError
+from app.services.prompt_cache import prompt_cache
+from app.services.season_simulator import simulate_season
+from app.services.batch_predictor import fixtures_for_round, fixtures_for_dates, predict_fixtures, serialize_fixtures
+from app.services.job_runner import job_runner
+from app import db
 
 prediction_bp = Blueprint('predict', __name__)
 
 @prediction_bp.route('/', methods=['GET', 'POST'])
 def predict_match():
     """Interface de prédiction de match"""
+    teams = Club.query.order_by(Club.name).all()
+    
     if request.method == 'POST':
         home_team = request.form.get('home_team')
         away_team = request.form.get('away_team')
         match_date = request.form.get('match_date')
+        with_narrative = True if request.form.get('with_narrative') else None
+        
+        prediction = predict_match_result(home_team, away_team, match_date, with_narrative=with_narrative)
+        return render_template('predictions.html', prediction=prediction, teams=teams)
+    
+    return render_template('predictions.html', teams=teams)
+
+@prediction_bp.route('/batch', methods=['POST'])
+def predict_batch():
+    """Prédit tous les matchs d'une journée ou d'une période
+    
+    Corps JSON : {"league_id", "season", "round"} pour une journée API-Football,
+    ou {"date_from", "date_to", "competition"} pour les matchs en base.
+    
+    Au-delà de PREDICTION_BATCH_SYNC_MAX matchs, les prédictions sont calculées
+    en arrière-plan : la réponse (202) donne l'identifiant de la tâche.
+    """
+    params = request.get_json(silent=True) or {}
+    
+    try:
+        if params.get('league_id') and params.get('season'):
+            client = current_app.extensions.get('api_football')
+            if client is None:
+                return jsonify({"error": "Client API-Football indisponible"}), 503
+            fixtures = fixtures_for_round(client, params['league_id'], params['season'], params.get('round'))
+        elif params.get('date_from'):
+            date_from = datetime.strptime(params['date_from'], '%Y-%m-%d')
+            date_to = datetime.strptime(params.get('date_to') or params['date_from'], '%Y-%m-%d')
+            fixtures = fixtures_for_dates(date_from, date_to, params.get('competition'))
+        else:
+            return jsonify({"error": "Préciser league_id et season, ou date_from"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if len(fixtures) > current_app.config.get('PREDICTION_BATCH_SYNC_MAX', 50):
+        job_id = job_runner.submit('predictions', fixtures=serialize_fixtures(fixtures))
+        return jsonify({
+            "fixtures": len(fixtures),
+            "job_id": job_id,
+            "status_url": url_for('predict.job_status', job_id=job_id)
+        }), 202
+    
+    summary = predict_fixtures(fixtures)
+    return jsonify(summary)
+
+def _get_prediction_job(job_id):
+    """Tâche de prédiction par lots, ou None si l'identifiant désigne une autre tâche"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.kind != 'predictions':
+        return None
+    return job
+
+@prediction_bp.route('/jobs/<int:job_id>/status')
+def job_status(job_id):
+    """État d'une tâche de prédiction par lots au format JSON (avec le résumé une fois terminée)"""
+    job = _get_prediction_job(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    
+    data = job.to_dict()
+    data.pop('params')  # La liste des matchs soumis n'est pas renvoyée
+    return jsonify(data)
+
+@prediction_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Demande l'annulation d'une tâche de prédiction par lots"""
+    if _get_prediction_job(job_id) is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    
+    job = job_runner.cancel(job_id)
+    data = job.to_dict()
+    data.pop('params')
+    return jsonify(data)
+
+def _sse(event, data):
+    """Formate un évènement Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@prediction_bp.route('/narrative/stream')
+def stream_narrative():
+    """Rédige l'analyse d'une prédiction avec Ollama, transmise au fil de la génération
+    
+    Paramètres : home_team, away_team, match_date (YYYY-MM-DD).
+    Réponse text/event-stream : évènements `token` ({"text"}), puis `done`
+    ({"explanation"}) ou `error` ({"error"}). Si Ollama est déjà occupé par
+    OLLAMA_MAX_CONCURRENCY générations, la réponse est immédiatement un 503.
+    """
+    home_team = request.args.get('home_team')
+    away_team = request.args.get('away_team')
+    match_date = request.args.get('match_date')
+    if not (home_team and away_team and match_date):
+        return jsonify({"error": "Préciser home_team, away_team et match_date"}), 400
+    
+    prediction = predict_match_result(home_team, away_team, match_date, with_narrative=False)
+    if prediction.get("error"):
+        return jsonify({"error": prediction["error"]}), 502
+    
+    def replay(explanation):
+        yield _sse('token', {"text": explanation})
+        yield _sse('done', {"explanation": explanation})
+    
+    if prediction.get("narrative"):
+        # Analyse déjà rédigée : la renvoyer d'un bloc
+        return Response(replay(prediction["explanation"]), mimetype='text/event-stream')
+    
+    match_data = prepare_match_data(home_team, away_team, match_date)
+    prompt = build_prediction_prompt(match_data, prediction)
+    model = ollama_client.model
+    
+    cached = prompt_cache.get(model, prompt)
+    if cached is not None:
+        save_narrative(prediction, cached["response"])
+        return Response(replay(cached["response"]), mimetype='text/event-stream')
+    
+    try:
+        generation = ollama_client.stream(prompt)
+    except OllamaBusyError as e:
+        return jsonify({"error": str(e)}), 503
+    except OllamaError as e:
+        return jsonify({"error": str(e)}), 502
+    
+    def relay():
+        parts = []
+        try:
+            for token in generation:
+                parts.append(token)
+                yield _sse('token', {"text": token})
+        except OllamaError as e:
+            current_app.logger.warning(f"Analyse Ollama interrompue: {str(e)}")
+            yield _sse('error', {"error": str(e)})
+            return
+        finally:
+            generation.close()
         
-        prediction = predict_match_result(home_team, away_team, match_date)
-        return render_template('predictions.html', prediction=prediction)
+        narrative = "".join(parts).strip()
+        if narrative:
+            prompt_cache.set(model, prompt, analyse_llm_response(narrative))
+            save_narrative(prediction, narrative)
+        yield _sse('done', {"explanation": narrative or prediction.get("explanation")})
+    
+    response = Response(stream_with_context(relay()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@prediction_bp.route('/season')
+def season_projection():
+    """Projection de fin de saison par simulation de Monte-Carlo
+    
+    Paramètres : competition, season, simulations (SEASON_SIMULATIONS par
+    défaut), top (places qualificatives, 4), relegation (places de relégation, 3).
+    Les nombres de places sont ramenés au nombre de clubs de la compétition.
+    
+    Le calcul reste dans le worker, sauf si SEASON_SIMULATION_WEB_POOL autorise
+    un pool de SEASON_SIMULATION_PROCESSES processus.
+    """
+    competition = request.args.get('competition')
+    season = request.args.get('season')
+    if not (competition and season):
+        return jsonify({"error": "Préciser competition et season"}), 400
+    
+    try:
+        simulations = int(request.args.get('simulations', current_app.config.get('SEASON_SIMULATIONS', 10000)))
+        top_places = int(request.args.get('top', 4))
+        relegation_places = int(request.args.get('relegation', 3))
+    except ValueError:
+        return jsonify({"error": "simulations, top et relegation doivent être des entiers"}), 400
+    if top_places < 0 or relegation_places < 0:
+        return jsonify({"error": "top et relegation doivent être positifs"}), 400
+    simulations = max(1, min(simulations, current_app.config.get('SEASON_SIMULATIONS_MAX', 100000)))
+    
+    processes = 1
+    if current_app.config.get('SEASON_SIMULATION_WEB_POOL', False):
+        processes = current_app.config.get('SEASON_SIMULATION_PROCESSES', 1)
     
-    return render_template('predictions.html')
\ No newline at end of file
+    try:
+        projection = simulate_season(
+            competition, season,
+            simulations=simulations,
+            processes=processes,
+            top_places=top_places,
+            relegation_places=relegation_places
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(projection)
@@ -1,19 +1,15 @@
 # app/routes/whoscored_routes.py
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
-from app.services.whoscored_data_fetcher import WhoScoredDataFetcher
-from app.services.whoscored_scraper import WhoScoredSeleniumScraper
-from app.models.club import Club
 from app.models.player import Player
-from app.models.match import Match
 from app.models.player_stats import PlayerStats
+from app.models.import_job import ImportJob
+from app.services.csv_importer import import_player_stats_csv, import_matches_csv
+from app.services.job_runner import job_runner
+from app.services.whoscored_import import IMPORT_KINDS, league_stats_csv_path
 from app import db
-from datetime import datetime
 import logging
-import json
 import os
 import pandas as pd
-from io import StringIO
-import csv
 
 # Configuration du logger
 logger = logging.getLogger(__name__)
@@ -37,169 +33,109 @@ def index():
 
 @whoscored_bp.route('/import', methods=['GET', 'POST'])
 def import_data():
-    """Formulaire d'import des données depuis WhoScored"""
+    """Formulaire d'import des données depuis WhoScored, exécuté en arrière-plan"""
     if request.method == 'POST':
-        league_id = request.form.get('league')
-        season_id = request.form.get('season')
         import_type = request.form.get('import_type')
-        
-        # Récupérer les options Selenium
-        headless = 'headless' not in request.form  # Inversé pour correspondre à la logique du formulaire
-        chrome_path = request.form.get('chrome_path') or None
+        if import_type not in IMPORT_KINDS:
+            flash('Type d\'import non reconnu', 'danger')
+            return redirect(url_for('whoscored.import_data'))
+        
+        params = {
+            'league_id': request.form.get('league'),
+            'season_id': request.form.get('season'),
+            # Case cochée : navigateur sans interface graphique
+            'headless': 'headless' in request.form,
+            'chrome_path': request.form.get('chrome_path') or None,
+            'proxy': (request.form.get('proxy') or None) if 'use_proxy' in request.form else None
+        }
+        if import_type == 'league_stats':
+            params['category'] = request.form.get('stats_category') or 'Summary'
         
         try:
-            # Utiliser le scraper Selenium pour toutes les requêtes
-            scraper = WhoScoredSeleniumScraper(headless=headless, chrome_path=chrome_path)
-            if import_type == 'teams':
-                # Import des équipes
-                
-                teams = scraper.get_league_teams(league_id, season_id)
-                
-                # Enregistrer les équipes en base de données
-                for team in teams:
-                    db_team = Club.query.filter_by(api_id=team['id']).first()
-                    
-                    if not db_team:
-                        db_team = Club(
-                            api_id=team['id'],
-                            name=team['name'],
-                            short_name=team['name'],
-                            # Autres champs...
-                        )
-                        db.session.add(db_team)
-                
-                db.session.commit()
-                flash(f'{len(teams)} équipes importées avec succès', 'success')
-                
-            elif import_type == 'players':
-                # Import des joueurs pour toutes les équipes de la ligue
-                fetcher = WhoScoredDataFetcher(proxy=proxy)
-                teams = fetcher.get_league_teams(league_id, season_id)
-                
-                total_players = 0
-                for team in teams:
-                    players = fetcher.get_team_players(team['id'], season_id)
-                    
-                    # Récupérer l'ID de l'équipe dans notre base de données
-                    db_team = Club.query.filter_by(api_id=team['id']).first()
-                    
-                    if not db_team:
-                        # L'équipe n'existe pas, on la crée
-                        db_team = Club(
-                            api_id=team['id'],
-                            name=team['name'],
-                            short_name=team['name'],
-                            # Autres champs...
-                        )
-                        db.session.add(db_team)
-                        db.session.commit()
-                    
-                    # Enregistrer les joueurs
-                    for player in players:
-                        db_player = Player.query.filter_by(api_id=player['id']).first()
-                        
-                        if not db_player:
-                            db_player = Player(
-                                api_id=player['id'],
-                                name=player['name'],
-                                position=player['position'],
-                                club_id=db_team.id
-                                # Autres champs...
-                            )
-                            db.session.add(db_player)
-                    
-                    db.session.commit()
-                    total_players += len(players)
-                
-                flash(f'{total_players} joueurs importés avec succès', 'success')
-                
-            elif import_type == 'player_stats':
-                # Import des statistiques des joueurs
-                if 'headless' in request.form:
-                    headless = False
-                else:
-                    headless = True
-                
-                chrome_path = request.form.get('chrome_path') or None
-                
-                # Utiliser Selenium pour récupérer les statistiques détaillées
-                scraper = WhoScoredSeleniumScraper(headless=headless, chrome_path=chrome_path)
-                
-                # Récupérer la liste des joueurs à traiter
-                players = Player.query.join(Club).filter(Club.api_id.in_([team['id'] for team in fetcher.get_league_teams(league_id, season_id)])).all()
-                
-                stats_count = 0
-                for player in players:
-                    if player.api_id:
-                        stats = scraper.get_player_detailed_stats(player.api_id, season_id)
-                        
-                        if stats:
-                            # Créer ou mettre à jour les statistiques du joueur
-                            db_stats = PlayerStats.query.filter_by(
-                                player_id=player.id,
-                                season=season_id
-                            ).first()
-                            
-                            if not db_stats:
-                                db_stats = PlayerStats(
-                                    player_id=player.id,
-                                    season=season_id
-                                )
-                                db.session.add(db_stats)
-                            
-                            # Mettre à jour les statistiques
-                            update_player_stats_from_whoscored(db_stats, stats)
-                            db.session.commit()
-                            stats_count += 1
-                
-                flash(f'Statistiques de {stats_count} joueurs importées avec succès', 'success')
-                
-            elif import_type == 'league_stats':
-                # Import des statistiques d'une ligue entière pour une catégorie spécifique
-                category = request.form.get('stats_category') or 'Summary'
-                
-                if 'headless' in request.form:
-                    headless = False
-                else:
-                    headless = True
-                
-                chrome_path = request.form.get('chrome_path') or None
-                
-                # Utiliser Selenium pour récupérer les statistiques de la ligue
-                scraper = WhoScoredSeleniumScraper(headless=headless, chrome_path=chrome_path)
-                
-                # Récupérer les statistiques
-                df = scraper.get_league_player_statistics(league_id, season_id, category)
-                
-                if df is not None:
-                    # Sauvegarder les données dans un fichier CSV temporaire
-                    csv_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'temp', f'league_{league_id}_{season_id}_{category.lower()}.csv')
-                    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-                    
-                    df.to_csv(csv_path, index=False)
-                    
-                    flash(f'Statistiques {category} de la ligue importées avec succès', 'success')
-                    return redirect(url_for('whoscored.view_league_stats', league_id=league_id, season_id=season_id, category=category.lower()))
-                else:
-                    flash('Erreur lors de la récupération des statistiques de la ligue', 'danger')
-            
-            else:
-                flash('Type d\'import non reconnu', 'danger')
-                
+            job_id = job_runner.submit(import_type, **params)
         except Exception as e:
-            logger.error(f"Erreur lors de l'import des données: {str(e)}")
-            flash(f'Erreur lors de l\'import des données: {str(e)}', 'danger')
+            logger.error(f"Erreur lors de la soumission de l'import: {str(e)}")
             db.session.rollback()
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({"error": str(e)}), 500
+            flash(f'Erreur lors de la soumission de l\'import: {str(e)}', 'danger')
+            return redirect(url_for('whoscored.import_data'))
         
-        return redirect(url_for('whoscored.import_data'))
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({
+                "job_id": job_id,
+                "status_url": url_for('whoscored.job_status', job_id=job_id)
+            }), 202
+        
+        flash(f'Import lancé en arrière-plan (tâche n°{job_id})', 'info')
+        return redirect(url_for('whoscored.view_job', job_id=job_id))
     
     # GET request - afficher le formulaire
     return render_template('whoscored/import.html', leagues=LEAGUE_MAPPING)
 
-@whoscored_bp.route('/view/league/<league_id>/<season_id>/<category>')
+@whoscored_bp.route('/jobs')
+def list_jobs():
+    """Liste des dernières tâches d'import"""
+    jobs = ImportJob.query.filter(ImportJob.kind.in_(IMPORT_KINDS))\
+        .order_by(ImportJob.created_at.desc()).limit(50).all()
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify([job.to_dict() for job in jobs])
+    return render_template('whoscored/jobs.html', jobs=jobs)
+
+@whoscored_bp.route('/jobs/<int:job_id>')
+def view_job(job_id):
+    """Page de suivi d'une tâche d'import (l'état est rafraîchi par le navigateur)"""
+    job = ImportJob.query.get_or_404(job_id)
+    return render_template('whoscored/job.html', job=job, leagues=LEAGUE_MAPPING,
+                           resumable=job_runner.is_resumable(job))
+
+@whoscored_bp.route('/jobs/<int:job_id>/status')
+def job_status(job_id):
+    """État d'une tâche d'import au format JSON"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    
+    data = job.to_dict()
+    data["resumable"] = job_runner.is_resumable(job)
+    result = job.get_result()
+    if job.status == 'succeeded' and job.kind == 'league_stats' and result:
+        data["result_url"] = url_for('whoscored.view_league_stats', league_id=result['league_id'],
+                                     season_id=result['season_id'], category=result['category'])
+    return jsonify(data)
+
+@whoscored_bp.route('/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Demande l'annulation d'une tâche d'import"""
+    job = job_runner.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Tâche introuvable"}), 404
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(job.to_dict())
+    flash(f'Annulation de la tâche n°{job_id} demandée', 'warning')
+    return redirect(url_for('whoscored.view_job', job_id=job_id))
+
+@whoscored_bp.route('/jobs/<int:job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """Reprend une tâche d'import échouée, annulée ou interrompue, sans refaire ce qui est enregistré"""
+    try:
+        new_id = job_runner.resume(job_id)
+    except ValueError as e:
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({"error": str(e)}), 400
+        flash(str(e), 'danger')
+        return redirect(url_for('whoscored.view_job', job_id=job_id))
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({"job_id": new_id, "status_url": url_for('whoscored.job_status', job_id=new_id)}), 202
+    flash(f'Tâche n°{job_id} reprise par la tâche n°{new_id}', 'success')
+    return redirect(url_for('whoscored.view_job', job_id=new_id))
+
+@whoscored_bp.route('/view/league/<path:league_id>/<season_id>/<category>')
 def view_league_stats(league_id, season_id, category):
     """Affiche les statistiques de la ligue importées"""
-    csv_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'temp', f'league_{league_id}_{season_id}_{category}.csv')
+    csv_path = league_stats_csv_path(league_id, season_id, category)
     
     if not os.path.exists(csv_path):
         flash('Données non disponibles - veuillez d\'abord importer les statistiques', 'warning')
@@ -247,242 +183,35 @@ def upload_csv():
             return redirect(request.url)
         
         if file:
-            # Vérifier l'extension du fichier
-            if not file.filename.endswith('.csv'):
-                flash('Le fichier doit être au format CSV', 'danger')
+            # Vérifier l'extension du fichier (CSV, éventuellement compressé en gzip)
+            if not file.filename.endswith(('.csv', '.csv.gz')):
+                flash('Le fichier doit être au format CSV ou CSV.GZ', 'danger')
                 return redirect(request.url)
             
-            # Lire le contenu du CSV
-            content = file.read().decode('utf-8')
-            csv_data = StringIO(content)
-            reader = csv.DictReader(csv_data)
-            
             # Déterminer le type de données
             data_type = request.form.get('data_type')
+            compression = 'gzip' if file.filename.endswith('.gz') else None
             
-            if data_type == 'player_stats':
-                # Import des statistiques des joueurs
-                import_player_stats_from_csv(reader)
-                flash('Statistiques des joueurs importées avec succès', 'success')
-            elif data_type == 'matches':
-                # Import des matchs
-                import_matches_from_csv(reader)
-                flash('Matchs importés avec succès', 'success')
-            else:
+            if data_type not in ('player_stats', 'matches'):
                 flash('Type de données non reconnu', 'danger')
+                return redirect(url_for('whoscored.index'))
+            
+            # Import lu en flux, par blocs
+            try:
+                if data_type == 'player_stats':
+                    summary = import_player_stats_csv(file.stream, compression=compression)
+                    label = 'Statistiques des joueurs importées avec succès'
+                else:
+                    summary = import_matches_csv(file.stream, compression=compression)
+                    label = 'Matchs importés avec succès'
+            except Exception as e:
+                logger.error(f"Erreur lors de l'import CSV ({data_type}): {str(e)}")
+                flash(f"Erreur lors de l'import: {str(e)}", 'danger')
+                return redirect(request.url)
+            
+            flash(f"{label} : {summary['inserted']} créés, {summary['updated']} mis à jour, "
+                  f"{summary['skipped']} lignes ignorées ({summary['rows_per_second']} lignes/s)", 'success')
             
             return redirect(url_for('whoscored.index'))
     
     return render_template('whoscored/upload_csv.html')
-
-def update_player_stats_from_whoscored(db_stats, stats):
-    """
-    Met à jour les statistiques d'un joueur dans la base de données
-    à partir des données extraites de WhoScored
-    
-    Args:
-        db_stats: l'objet PlayerStats à mettre à jour
-        stats: les statistiques extraites de WhoScored
-    """
-    # Statistiques générales/résumé
-    if 'summary' in stats:
-        for key, value in stats['summary'].items():
-            # Convertir les clés WhoScored vers les noms de champs de notre modèle
-            field_name = convert_whoscored_field_name(key)
-            if hasattr(db_stats, field_name):
-                setattr(db_stats, field_name, value)
-    
-    # Statistiques offensives
-    if 'offensive' in stats:
-        if 'goals' in stats['offensive']:
-            db_stats.goals = stats['offensive']['goals']
-        if 'assists' in stats['offensive']:
-            db_stats.assists = stats['offensive']['assists']
-        if 'shots_per_game' in stats['offensive']:
-            db_stats.shots = float(stats['offensive']['shots_per_game']) * db_stats.matches_played
-        if 'shots_on_target_per_game' in stats['offensive']:
-            db_stats.shots_on_target = float(stats['offensive']['shots_on_target_per_game']) * db_stats.matches_played
-    
-    # Statistiques défensives
-    if 'defensive' in stats:
-        if 'tackles_per_game' in stats['defensive']:
-            db_stats.tackles = float(stats['defensive']['tackles_per_game']) * db_stats.matches_played
-        if 'interceptions_per_game' in stats['defensive']:
-            db_stats.interceptions = float(stats['defensive']['interceptions_per_game']) * db_stats.matches_played
-        if 'clearances_per_game' in stats['defensive']:
-            db_stats.clearances = float(stats['defensive']['clearances_per_game']) * db_stats.matches_played
-    
-    # Statistiques de passes
-    if 'passing' in stats:
-        if 'passes_per_game' in stats['passing']:
-            db_stats.passes = float(stats['passing']['passes_per_game']) * db_stats.matches_played
-        if 'pass_success_percentage' in stats['passing']:
-            db_stats.passes_completed = int(db_stats.passes * float(stats['passing']['pass_success_percentage']) / 100)
-        if 'key_passes_per_game' in stats['passing']:
-            db_stats.key_passes = float(stats['passing']['key_passes_per_game']) * db_stats.matches_played
-    
-    # Mettre à jour la date de mise à jour
-    db_stats.updated_at = datetime.utcnow()
-
-def convert_whoscored_field_name(whoscored_field):
-    """
-    Convertit un nom de champ WhoScored en nom de champ pour notre modèle
-    
-    Args:
-        whoscored_field: le nom du champ dans WhoScored
-        
-    Returns:
-        Le nom du champ correspondant dans notre modèle
-    """
-    mapping = {
-        'apps': 'matches_played',
-        'mins_played': 'minutes_played',
-        'goals': 'goals',
-        'assists': 'assists',
-        'yellow_cards': 'yellow_cards',
-        'red_cards': 'red_cards',
-        'shots_per_game': 'shots',
-        'pass_success': 'pass_accuracy',
-        'aerials_won': 'duels_won',
-        'man_of_the_match': 'motm',
-        'rating': 'rating'
-    }
-    
-    return mapping.get(whoscored_field, whoscored_field)
-
-def import_player_stats_from_csv(csv_reader):
-    """
-    Importe les statistiques des joueurs à partir d'un fichier CSV
-    
-    Args:
-        csv_reader: Un objet csv.DictReader contenant les données
-    """
-    for row in csv_reader:
-        # Vérifier si le joueur existe
-        player_name = row.get('Player')
-        team_name = row.get('Team')
-        
-        if not player_name or not team_name:
-            continue
-        
-        # Rechercher le club
-        club = Club.query.filter_by(name=team_name).first()
-        
-        if not club:
-            # Créer le club s'il n'existe pas
-            club = Club(name=team_name, short_name=team_name)
-            db.session.add(club)
-            db.session.commit()
-        
-        # Rechercher le joueur
-        player = Player.query.filter_by(name=player_name, club_id=club.id).first()
-        
-        if not player:
-            # Créer le joueur s'il n'existe pas
-            player = Player(
-                name=player_name,
-                club_id=club.id,
-                position=row.get('Position', 'Unknown')
-            )
-            db.session.add(player)
-            db.session.commit()
-        
-        # Récupérer ou créer les statistiques
-        season = row.get('Season', '2023/2024')  # Saison par défaut
-        
-        stats = PlayerStats.query.filter_by(player_id=player.id, season=season).first()
-        
-        if not stats:
-            stats = PlayerStats(player_id=player.id, season=season)
-            db.session.add(stats)
-        
-        # Mettre à jour les statistiques
-        for key, value in row.items():
-            field_name = convert_whoscored_field_name(key.lower().replace(' ', '_'))
-            
-            if hasattr(stats, field_name) and value:
-                # Convertir la valeur selon le type attendu
-                try:
-                    if isinstance(getattr(stats, field_name), int):
-                        setattr(stats, field_name, int(value))
-                    elif isinstance(getattr(stats, field_name), float):
-                        setattr(stats, field_name, float(value))
-                    else:
-                        setattr(stats, field_name, value)
-                except (ValueError, TypeError):
-                    # Ignorer les erreurs de conversion
-                    pass
-        
-        stats.updated_at = datetime.utcnow()
-    
-    db.session.commit()
-
-def import_matches_from_csv(csv_reader):
-    """
-    Importe les matchs à partir d'un fichier CSV
-    
-    Args:
-        csv_reader: Un objet csv.DictReader contenant les données
-    """
-    for row in csv_reader:
-        # Vérifier les données minimales
-        home_team_name = row.get('HomeTeam')
-        away_team_name = row.get('AwayTeam')
-        match_date_str = row.get('Date')
-        
-        if not home_team_name or not away_team_name or not match_date_str:
-            continue
-        
-        # Convertir la date
-        try:
-            match_date = datetime.strptime(match_date_str, '%Y-%m-%d')
-        except ValueError:
-            try:
-                match_date = datetime.strptime(match_date_str, '%d/%m/%Y')
-            except ValueError:
-                continue  # Ignorer si le format de date n'est pas reconnu
-        
-        # Récupérer ou créer les équipes
-        home_team = Club.query.filter_by(name=home_team_name).first()
-        if not home_team:
-            home_team = Club(name=home_team_name, short_name=home_team_name)
-            db.session.add(home_team)
-            db.session.commit()
-        
-        away_team = Club.query.filter_by(name=away_team_name).first()
-        if not away_team:
-            away_team = Club(name=away_team_name, short_name=away_team_name)
-            db.session.add(away_team)
-            db.session.commit()
-        
-        # Récupérer les scores
-        home_score = int(row.get('FTHG', 0))  # Full Time Home Goals
-        away_score = int(row.get('FTAG', 0))  # Full Time Away Goals
-        
-        # Vérifier si le match existe déjà
-        match = Match.query.filter_by(
-            home_team_id=home_team.id,
-            away_team_id=away_team.id,
-            date=match_date
-        ).first()
-        
-        if not match:
-            # Créer le match
-            match = Match(
-                home_team_id=home_team.id,
-                away_team_id=away_team.id,
-                date=match_date,
-                home_team_score=home_score,
-                away_team_score=away_score,
-                status='FINISHED',
-                competition=row.get('League', 'Unknown'),
-                season=row.get('Season', '2023/2024')
-            )
-            db.session.add(match)
-        else:
-            # Mettre à jour le match existant
-            match.home_team_score = home_score
-            match.away_team_score = away_score
-            match.status = 'FINISHED'
-    
-    db.session.commit()
\ No newline at end of file
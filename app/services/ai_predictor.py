@@ -1,12 +1,33 @@
 # app/services/ai_predictor.py
-import requests
 import json
+import hashlib
+import logging
+import numpy as np
 import pandas as pd
+from datetime import datetime, timedelta
 from flask import current_app
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.models.prediction import Prediction
+from app.services.analytics_store import analytics_store
+from app.services.cache import MemoCache, on_match_change
+from app.services.feature_store import feature_store
+from app.services.elo import ratings_before
+from app.services.ollama_client import ollama_client, OllamaError
+from app.services.prompt_cache import prompt_cache
 from app.services.data_fetcher import get_club_stats, get_club_matches
+from app.services.match_model import MODEL_VERSION, get_model
+
+logger = logging.getLogger(__name__)
 
 def prepare_match_data(home_team_id, away_team_id, match_date):
     """Prépare les données pour la prédiction de match"""
+    # Utiliser l'historique local lorsque les deux clubs y ont déjà joué
+    local_data = prepare_local_match_data(home_team_id, away_team_id, match_date)
+    if local_data:
+        return local_data
+    
     # Récupérer les statistiques des équipes
     home_stats = get_club_stats(home_team_id)
     away_stats = get_club_stats(away_team_id)
@@ -40,6 +61,8 @@ def prepare_match_data(home_team_id, away_team_id, match_date):
 
 def process_recent_form(matches, team_id, limit=5):
     """Traite les 5 derniers matchs pour obtenir la forme récente"""
+    # Les matchs à venir (sans résultat) ne comptent pas dans la forme
+    matches = [m for m in matches if m.get("status") == "FINISHED"]
     recent_matches = matches[:limit] if len(matches) >= limit else matches
     
     wins = 0
@@ -89,12 +112,466 @@ def find_head_to_head(matches, opponent_id):
         "last_matches": h2h_matches[:3] if len(h2h_matches) >= 3 else h2h_matches
     }
 
-def predict_match_result(home_team_id, away_team_id, match_date):
-    """Utilise Ollama pour prédire le résultat d'un match"""
-    # Préparer les données de match
+def _parse_match_date(match_date):
+    """Convertit la date du match (YYYY-MM-DD ou datetime) en datetime, None si invalide"""
+    if isinstance(match_date, datetime):
+        return match_date
+    try:
+        return datetime.strptime(str(match_date)[:10], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+def _finished_matches_mask(matches, before=None):
+    """Masque des matchs terminés du cache analytique, antérieurs à `before` si précisé"""
+    mask = matches.column('status') == matches.code('status', 'FINISHED')
+    if before is not None:
+        mask &= matches.column('date') < np.datetime64(before, 's')
+    return mask
+
+def compute_recent_form(team_id, limit=5, before=None):
+    """Calcule la forme récente d'une équipe à partir du cache analytique
+    
+    Args:
+        team_id: l'identifiant local du club
+        limit: nombre de matchs pris en compte
+        before: ne considérer que les matchs antérieurs à cette date (optionnel)
+        
+    Returns:
+        Un dictionnaire au format de process_recent_form (plus `last_match_id`,
+        le dernier match pris en compte), ou None si le cache est indisponible
+    """
+    matches = analytics_store.table('match')
+    if matches is None:
+        return None
+    
+    home_ids = matches.column('home_team_id')
+    away_ids = matches.column('away_team_id')
+    mask = _finished_matches_mask(matches, before) & ((home_ids == team_id) | (away_ids == team_id))
+    
+    # Les `limit` matchs les plus récents, du plus récent au plus ancien
+    positions = np.flatnonzero(mask)
+    positions = positions[np.argsort(matches.column('date')[positions], kind='stable')[::-1][:limit]]
+    
+    is_home = home_ids[positions] == team_id
+    home_scores = np.nan_to_num(matches.column('home_team_score')[positions]).astype(int)
+    away_scores = np.nan_to_num(matches.column('away_team_score')[positions]).astype(int)
+    team_goals = np.where(is_home, home_scores, away_scores)
+    opponent_goals = np.where(is_home, away_scores, home_scores)
+    results = np.where(team_goals > opponent_goals, "W", np.where(team_goals < opponent_goals, "L", "D"))
+    
+    return {
+        "matches_played": int(positions.size),
+        "wins": int((results == "W").sum()),
+        "draws": int((results == "D").sum()),
+        "losses": int((results == "L").sum()),
+        "goals_scored": int(team_goals.sum()),
+        "goals_conceded": int(opponent_goals.sum()),
+        "form_string": "".join(results.tolist()),
+        "last_match_id": int(matches.ids[positions[0]]) if positions.size else None
+    }
+
+def compute_head_to_head(team_id, opponent_id, limit=3, before=None):
+    """Calcule les confrontations directes entre deux clubs à partir du cache analytique
+    
+    Returns:
+        Un dictionnaire au format de find_head_to_head, ou None si le cache est indisponible
+    """
+    matches = analytics_store.table('match')
+    if matches is None:
+        return None
+    
+    home_ids = matches.column('home_team_id')
+    away_ids = matches.column('away_team_id')
+    mask = _finished_matches_mask(matches, before) & (
+        ((home_ids == team_id) & (away_ids == opponent_id)) |
+        ((home_ids == opponent_id) & (away_ids == team_id))
+    )
+    
+    positions = np.flatnonzero(mask)
+    positions = positions[np.argsort(matches.column('date')[positions], kind='stable')[::-1]]
+    
+    last_matches = []
+    for position in positions[:limit]:
+        last_matches.append({
+            "id": int(matches.ids[position]),
+            "date": str(matches.column('date')[position]),
+            "home_team_id": int(home_ids[position]),
+            "away_team_id": int(away_ids[position]),
+            "home_score": int(np.nan_to_num(matches.column('home_team_score')[position])),
+            "away_score": int(np.nan_to_num(matches.column('away_team_score')[position]))
+        })
+    
+    return {
+        "total_matches": int(positions.size),
+        "last_matches": last_matches
+    }
+
+def prepare_local_match_data(home_team_id, away_team_id, match_date):
+    """Prépare les données de prédiction à partir des matchs en base
+    (feature store, ou cache analytique pour une date antérieure aux derniers matchs)
+    
+    Returns:
+        Les données au format de prepare_match_data, ou None si l'un des clubs
+        est inconnu localement ou n'a aucun match terminé avant la date du match
+    """
+    try:
+        home_team = db.session.get(Club, int(home_team_id))
+        away_team = db.session.get(Club, int(away_team_id))
+    except (TypeError, ValueError):
+        return None
+    
+    if not home_team or not away_team:
+        return None
+    
+    before = _parse_match_date(match_date)
+    
+    # Lecture directe du feature store ; calcul sur le cache analytique pour une date passée
+    features = feature_store.match_features(home_team.id, away_team.id, before)
+    if features:
+        home_recent_form = features["home"].recent_form()
+        away_recent_form = features["away"].recent_form()
+        head_to_head = features["head_to_head"]
+        ratings = {home_team.id: features["home"].elo, away_team.id: features["away"].elo}
+    else:
+        home_recent_form = compute_recent_form(home_team.id, before=before)
+        away_recent_form = compute_recent_form(away_team.id, before=before)
+        head_to_head = compute_head_to_head(home_team.id, away_team.id, before=before)
+        ratings = ratings_before((home_team.id, away_team.id), before) if before else {}
+    
+    if not home_recent_form or not away_recent_form:
+        return None
+    if home_recent_form["matches_played"] == 0 or away_recent_form["matches_played"] == 0:
+        return None
+    
+    return {
+        "home_team": {
+            "id": home_team.id,
+            "name": home_team.name,
+            "crest": home_team.crest,
+            "elo": ratings.get(home_team.id),
+            "recent_form": home_recent_form
+        },
+        "away_team": {
+            "id": away_team.id,
+            "name": away_team.name,
+            "crest": away_team.crest,
+            "elo": ratings.get(away_team.id),
+            "recent_form": away_recent_form
+        },
+        "head_to_head": head_to_head,
+        "match_date": match_date
+    }
+
+# Prédictions servies sans recalcul :
+# (domicile, extérieur, date, empreinte des données, version du modèle) -> prédiction
+# L'empreinte vient du feature store, synchronisé avec la base : un match ajouté
+# par un autre processus change la clé. Dans ce processus, les entrées des clubs
+# concernés sont en plus supprimées dès qu'un de leurs matchs est modifié
+_prediction_cache = MemoCache(maxsize=2048)
+
+# Durée de vie des prédictions Ollama (clubs sans historique local)
+LLM_PREDICTION_TTL = 3600
+
+@on_match_change
+def _invalidate_predictions(change):
+    """Supprime les prédictions en cache des clubs concernés par un match modifié"""
+    club_ids = change["club_ids"]
+    if not club_ids:
+        _prediction_cache.clear()
+        return
+    _prediction_cache.invalidate_where(lambda key: key[0] in club_ids or key[1] in club_ids)
+
+def _prediction_cache_key(home_team_id, away_team_id, match_date, feature_hash=None):
+    """Clé de cache normalisée d'une prédiction
+    
+    Args:
+        home_team_id, away_team_id: les identifiants des clubs
+        match_date: la date du match
+        feature_hash: l'empreinte des données d'entrée (None pour une prédiction d'Ollama)
+    """
+    def normalize_id(team_id):
+        try:
+            return int(team_id)
+        except (TypeError, ValueError):
+            return team_id
+    
+    home_team_id, away_team_id = normalize_id(home_team_id), normalize_id(away_team_id)
+    parsed_date = _parse_match_date(match_date)
+    date_key = parsed_date.strftime('%Y-%m-%d') if parsed_date else str(match_date)
+    return (home_team_id, away_team_id, date_key, feature_hash, MODEL_VERSION)
+
+def compute_feature_hash(match_data):
+    """Calcule l'empreinte des données d'entrée d'une prédiction
+    
+    L'empreinte couvre la forme récente (dont le dernier match joué) des deux
+    clubs et leurs confrontations directes : elle change dès qu'un des clubs
+    joue un nouveau match.
+    """
+    features = {
+        "home_team_id": match_data["home_team"].get("id"),
+        "away_team_id": match_data["away_team"].get("id"),
+        "home_form": match_data["home_team"]["recent_form"],
+        "away_form": match_data["away_team"]["recent_form"],
+        "head_to_head": match_data["head_to_head"],
+        "match_date": str(match_data["match_date"])
+    }
+    payload = json.dumps(features, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def predict_match_result(home_team_id, away_team_id, match_date, with_narrative=None):
+    """Prédit le résultat d'un match
+    
+    Le modèle statistique local (Dixon-Coles) est utilisé lorsque les deux clubs
+    ont un historique en base ; Ollama n'est alors appelé que pour rédiger
+    l'analyse, si demandé. Sinon, la prédiction est demandée à Ollama.
+    
+    Les prédictions sont mémorisées en mémoire et dans la table Prediction
+    (clubs, date, empreinte des données d'entrée et version du modèle) : un
+    nouvel affichage du même match ne refait ni appel externe ni calcul.
+    Les prédictions d'Ollama, sans clubs en base, ne restent qu'en mémoire et
+    ne sont donc pas évaluées par `score-predictions`.
+    
+    Args:
+        home_team_id: l'identifiant du club à domicile
+        away_team_id: l'identifiant du club à l'extérieur
+        match_date: la date du match (YYYY-MM-DD)
+        with_narrative: demander le texte d'analyse à Ollama
+                        (PREDICTION_LLM_NARRATIVE par défaut)
+    """
+    if with_narrative is None:
+        with_narrative = current_app.config.get('PREDICTION_LLM_NARRATIVE', False)
+    
+    # Préparer les données de match (lues dans le feature store pour les clubs en base)
     match_data = prepare_match_data(home_team_id, away_team_id, match_date)
+    local = "id" in match_data["home_team"]
+    feature_hash = compute_feature_hash(match_data) if local else None
+    
+    cache_key = _prediction_cache_key(home_team_id, away_team_id, match_date, feature_hash)
+    cached = _prediction_cache.get(cache_key)
+    if cached is not None and (cached.get("narrative") or not with_narrative):
+        return dict(cached)
+    
+    if not local:
+        prediction = predict_with_llm(match_data)
+        if "error" not in prediction:
+            prediction["narrative"] = True
+            _prediction_cache.set(cache_key, prediction, ttl=LLM_PREDICTION_TTL)
+        return dict(prediction)
+    
+    saved = find_saved_prediction(match_data["home_team"]["id"], match_data["away_team"]["id"],
+                                  match_date, MODEL_VERSION)
+    
+    if saved and saved.feature_hash == feature_hash and (saved.has_narrative or not with_narrative):
+        prediction = saved.to_dict()
+    else:
+        prediction = predict_with_local_model(match_data)
+        prediction["feature_hash"] = feature_hash
+        prediction["narrative"] = False
+        
+        if with_narrative:
+            try:
+                narrative = generate_with_cache(build_prediction_prompt(match_data, prediction))["response"]
+                if narrative:
+                    prediction["explanation"] = narrative
+                    prediction["narrative"] = True
+            except Exception as e:
+                logger.warning(f"Analyse Ollama indisponible, explication du modèle conservée: {str(e)}")
+        
+        try:
+            saved = save_prediction(match_data, prediction, record=saved)
+            prediction["id"] = saved.id
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erreur lors de l'enregistrement de la prédiction: {str(e)}")
+    
+    _prediction_cache.set(cache_key, prediction, ttl=current_app.config.get('PREDICTION_CACHE_TTL', 900))
+    return dict(prediction)
+
+def predict_with_local_model(match_data, model=None, output=None):
+    """Prédit un match avec le modèle de Dixon-Coles ajusté sur les matchs en base
+    
+    Args:
+        match_data: les données retournées par prepare_local_match_data
+        model: le modèle à utiliser (modèle courant du processus par défaut)
+        output: la sortie du modèle pour ce match, au format de `model.predict`
+                (optionnel, déjà calculée pour un lot de matchs)
+        
+    Returns:
+        Un dictionnaire de prédiction (score, issue, probabilités 1X2, buts attendus,
+        confiance, explication et facteurs clés)
+    """
+    home_team = match_data["home_team"]
+    away_team = match_data["away_team"]
+    
+    model = model or get_model()
+    if output is None:
+        output = model.predict(home_team["id"], away_team["id"])
+    
+    prediction = {
+        "home_team": home_team["name"],
+        "away_team": away_team["name"],
+        "home_team_id": home_team["id"],
+        "away_team_id": away_team["id"],
+        "home_team_logo": home_team.get("crest"),
+        "away_team_logo": away_team.get("crest"),
+        "match_date": match_data["match_date"],
+        "predicted_winner": output["predicted_winner"],
+        "predicted_score": output["predicted_score"],
+        "probabilities": output["probabilities"],
+        "expected_goals": output["expected_goals"],
+        "likely_scores": output["likely_scores"],
+        "confidence": confidence_from_probabilities(output["probabilities"]),
+        "model_version": MODEL_VERSION
+    }
+    prediction["key_factors"] = build_key_factors(match_data, output, model)
+    prediction["explanation"] = build_explanation(match_data, output)
+    
+    return prediction
+
+def confidence_from_probabilities(probabilities):
+    """Niveau de confiance à partir de la probabilité de l'issue la plus probable"""
+    best = max(probabilities.values())
+    if best >= 0.6:
+        return "élevée"
+    if best >= 0.45:
+        return "moyenne"
+    return "faible"
+
+def build_key_factors(match_data, output, model):
+    """Construit la liste des facteurs clés affichés avec la prédiction"""
+    home_team = match_data["home_team"]
+    away_team = match_data["away_team"]
+    probabilities = output["probabilities"]
+    head_to_head = match_data["head_to_head"]
+    
+    factors = [
+        f"Probabilités : {home_team['name']} {probabilities['home']:.0%}, "
+        f"nul {probabilities['draw']:.0%}, {away_team['name']} {probabilities['away']:.0%}",
+        f"Buts attendus : {output['expected_goals']['home']:.2f} - {output['expected_goals']['away']:.2f}",
+        f"Forme récente : {home_team['name']} {home_team['recent_form']['form_string']}, "
+        f"{away_team['name']} {away_team['recent_form']['form_string']}"
+    ]
+    
+    if home_team.get("elo") is not None and away_team.get("elo") is not None:
+        factors.append(f"Classement Elo : {home_team['name']} {home_team['elo']:.0f}, {away_team['name']} {away_team['elo']:.0f}")
+    
+    if head_to_head["total_matches"] > 0:
+        factors.append(f"Confrontations directes récentes : {head_to_head['total_matches']}")
+    
+    for team in (home_team, away_team):
+        if not model.knows(team["id"]):
+            factors.append(f"Historique insuffisant pour {team['name']} : force moyenne utilisée")
+    
+    return factors
+
+def build_explanation(match_data, output):
+    """Rédige une explication courte de la prédiction du modèle local"""
+    home_name = match_data["home_team"]["name"]
+    away_name = match_data["away_team"]["name"]
+    probabilities = output["probabilities"]
+    outcome = {
+        "home": f"une victoire de {home_name}",
+        "away": f"une victoire de {away_name}",
+        "draw": "un match nul"
+    }[output["predicted_winner"]]
+    
+    return (
+        f"Le modèle statistique donne {outcome} comme issue la plus probable "
+        f"({probabilities[output['predicted_winner']]:.0%}), avec {output['expected_goals']['home']:.2f} "
+        f"buts attendus pour {home_name} et {output['expected_goals']['away']:.2f} pour {away_name}. "
+        f"Score le plus probable pour cette issue : {output['predicted_score']}."
+    )
+
+def _day_bounds(match_date):
+    """Retourne le début et la fin du jour d'une date de match"""
+    day_start = match_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day_start, day_start + timedelta(days=1)
+
+def find_saved_prediction(home_team_id, away_team_id, match_date, model_version):
+    """Recherche la prédiction enregistrée d'un match pour une version du modèle
+    
+    Returns:
+        L'objet Prediction, ou None s'il n'existe pas
+    """
+    match_date = _parse_match_date(match_date)
+    if not match_date:
+        return None
+    
+    day_start, day_end = _day_bounds(match_date)
+    return Prediction.query.filter(
+        Prediction.home_team_id == home_team_id,
+        Prediction.away_team_id == away_team_id,
+        Prediction.match_date >= day_start,
+        Prediction.match_date < day_end,
+        Prediction.model_version == model_version
+    ).first()
+
+def save_prediction(match_data, prediction, record=None):
+    """Enregistre (ou met à jour) la prédiction dans la table Prediction
+    
+    La prédiction est rattachée au match correspondant s'il existe déjà en base
+    (mêmes clubs, même jour).
+    
+    Args:
+        match_data: les données du match
+        prediction: le dictionnaire retourné par predict_with_local_model
+        record: la prédiction déjà enregistrée pour ce match (optionnel)
+    
+    Returns:
+        L'objet Prediction enregistré
+    """
+    home_team_id = prediction["home_team_id"]
+    away_team_id = prediction["away_team_id"]
+    match_date = _parse_match_date(prediction["match_date"])
+    
+    if record is None:
+        record = find_saved_prediction(home_team_id, away_team_id, match_date, prediction["model_version"])
+    
+    if record is None:
+        record = Prediction(
+            home_team_id=home_team_id,
+            away_team_id=away_team_id,
+            match_date=match_date,
+            model_version=prediction["model_version"]
+        )
+        db.session.add(record)
+    
+    if match_date and record.match_id is None:
+        day_start, day_end = _day_bounds(match_date)
+        match = Match.query.filter(
+            Match.home_team_id == home_team_id,
+            Match.away_team_id == away_team_id,
+            Match.date >= day_start,
+            Match.date < day_end
+        ).first()
+        record.match_id = match.id if match else None
+    
+    home_score, away_score = (int(goals) for goals in prediction["predicted_score"].split("-"))
+    
+    record.predicted_home_score = home_score
+    record.predicted_away_score = away_score
+    record.predicted_winner = prediction["predicted_winner"]
+    record.confidence = prediction["confidence"]
+    record.home_win_probability = prediction["probabilities"]["home"]
+    record.draw_probability = prediction["probabilities"]["draw"]
+    record.away_win_probability = prediction["probabilities"]["away"]
+    record.expected_home_goals = prediction["expected_goals"]["home"]
+    record.expected_away_goals = prediction["expected_goals"]["away"]
+    record.feature_hash = prediction.get("feature_hash")
+    record.has_narrative = prediction.get("narrative", False)
+    record.explanation = prediction["explanation"]
+    record.set_key_factors(prediction["key_factors"])
+    
+    db.session.commit()
+    return record
+
+def build_prediction_prompt(match_data, prediction=None):
+    """Construit le prompt envoyé à Ollama
     
-    # Construire le prompt pour Ollama
+    Args:
+        match_data: les données du match
+        prediction: la prédiction du modèle local à commenter (optionnel)
+    """
     prompt = f"""
     Analyse les données suivantes et prédis le résultat du match de football entre {match_data['home_team']['name']} et {match_data['away_team']['name']} le {match_data['match_date']}.
     
@@ -110,45 +587,109 @@ def predict_match_result(home_team_id, away_team_id, match_date):
     
     Confrontations directes:
     - Nombre total de rencontres: {match_data['head_to_head']['total_matches']}
+    """
     
+    if prediction:
+        probabilities = prediction["probabilities"]
+        prompt += f"""
+    Modèle statistique:
+    - Probabilités: victoire à domicile {probabilities['home']:.0%}, nul {probabilities['draw']:.0%}, victoire à l'extérieur {probabilities['away']:.0%}
+    - Buts attendus: {prediction['expected_goals']['home']:.2f} - {prediction['expected_goals']['away']:.2f}
+    - Score prédit: {prediction['predicted_score']}
+    
+    Rédige une analyse courte de ce match en t'appuyant sur ces chiffres, sans les contredire.
+    """
+    else:
+        prompt += """
     Donne une prédiction détaillée avec un score probable et une explication du raisonnement.
     """
     
-    # Appeler l'API Ollama
-    ollama_url = current_app.config['OLLAMA_API_URL']
+    return prompt
+
+def call_ollama(prompt):
+    """Envoie un prompt à Ollama et retourne le texte généré
+    
+    Raises:
+        OllamaError: si Ollama est occupé, injoignable ou trop lent
+    """
+    return ollama_client.generate(prompt)
+
+def analyse_llm_response(text):
+    """Extrait une fois pour toutes le score, l'issue et la confiance d'une réponse d'Ollama
+    
+    Returns:
+        Un dictionnaire {response, predicted_score, predicted_winner, confidence},
+        tel qu'enregistré dans le cache des prompts
+    """
+    predicted_score = extract_score_from_prediction(text)
+    return {
+        "response": text,
+        "predicted_score": predicted_score,
+        "predicted_winner": determine_winner(predicted_score),
+        "confidence": calculate_confidence(text)
+    }
+
+def generate_with_cache(prompt):
+    """Génère la réponse d'Ollama à un prompt, ou la relit dans le cache des prompts
+    
+    Le prompt ne dépend que des données du match : un même match n'est
+    rédigé qu'une fois par modèle et par durée de vie du cache.
+    
+    Returns:
+        L'entrée du cache (voir analyse_llm_response)
+    
+    Raises:
+        OllamaError: si la réponse n'est pas en cache et qu'Ollama est indisponible
+    """
+    entry = prompt_cache.get(ollama_client.model, prompt)
+    if entry is None:
+        entry = prompt_cache.set(ollama_client.model, prompt, analyse_llm_response(call_ollama(prompt)))
+    return entry
+
+def save_narrative(prediction, narrative):
+    """Enregistre l'analyse rédigée par Ollama pour une prédiction du modèle local
+    
+    Args:
+        prediction: le dictionnaire retourné par predict_match_result
+        narrative: le texte généré
     
+    Returns:
+        La prédiction mise à jour
+    """
+    prediction = dict(prediction, explanation=narrative, narrative=True)
+    
+    if prediction.get("id"):
+        record = db.session.get(Prediction, prediction["id"])
+        if record:
+            record.explanation = narrative
+            record.has_narrative = True
+            db.session.commit()
+    
+    cache_key = _prediction_cache_key(prediction["home_team_id"], prediction["away_team_id"],
+                                      prediction["match_date"], prediction.get("feature_hash"))
+    _prediction_cache.set(cache_key, prediction, ttl=current_app.config.get('PREDICTION_CACHE_TTL', 900))
+    return prediction
+
+def predict_with_llm(match_data):
+    """Demande la prédiction à Ollama (clubs sans historique local)"""
     try:
-        response = requests.post(
-            f"{ollama_url}/generate",
-            json={
-                "model": "mistral:latest",  # ou un autre modèle disponible sur votre instance Ollama
-                "prompt": prompt,
-                "stream": False
-            }
-        )
+        # Score, issue et confiance sont extraits du texte lors de la mise en cache
+        entry = generate_with_cache(build_prediction_prompt(match_data))
         
-        if response.status_code == 200:
-            result = response.json()
-            prediction = result.get("response", "")
-            
-            # Analyser la prédiction pour extraire le score
-            # Ceci est une version simplifiée, vous pourriez vouloir utiliser une regex ou une analyse NLP
-            score_prediction = extract_score_from_prediction(prediction)
-            
-            return {
-                "home_team": match_data['home_team']['name'],
-                "away_team": match_data['away_team']['name'],
-                "predicted_winner": determine_winner(score_prediction),
-                "predicted_score": score_prediction,
-                "explanation": prediction,
-                "confidence": calculate_confidence(prediction)
-            }
-        else:
-            return {
-                "error": f"Erreur lors de l'appel à Ollama: {response.status_code}",
-                "home_team": match_data['home_team']['name'],
-                "away_team": match_data['away_team']['name']
-            }
+        return {
+            "home_team": match_data['home_team']['name'],
+            "away_team": match_data['away_team']['name'],
+            "predicted_winner": entry["predicted_winner"],
+            "predicted_score": entry["predicted_score"],
+            "explanation": entry["response"],
+            "confidence": entry["confidence"]
+        }
+    except OllamaError as e:
+        return {
+            "error": str(e),
+            "home_team": match_data['home_team']['name'],
+            "away_team": match_data['away_team']['name']
+        }
     except Exception as e:
         return {
             "error": f"Exception lors de l'appel à Ollama: {str(e)}",
@@ -0,0 +1,449 @@
+# app/services/analytics_store.py
+"""
+Instantané en colonnes (tableaux NumPy) des tables Match, PlayerStats et
+PlayerPerformance, partagé par les calculs analytiques du processus
+"""
+
+import threading
+import time
+import logging
+import numpy as np
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.models.match import Match
+from app.models.player_stats import PlayerStats
+from app.models.player_performance import PlayerPerformance
+from app.services.cache import on_match_change
+
+logger = logging.getLogger(__name__)
+
+# Valeur utilisée pour les clés étrangères absentes
+MISSING_ID = -1
+
+MB = 1024 * 1024
+
+# Types des colonnes : 'id' (int64, -1 si absent), 'float' (float32, NaN si absent),
+# 'date' (datetime64[s], NaT si absent), 'bool' et 'category' (codes int32)
+MATCH_COLUMNS = {
+    'home_team_id': 'id',
+    'away_team_id': 'id',
+    'date': 'date',
+    'competition': 'category',
+    'season': 'category',
+    'status': 'category',
+    'matchday': 'float',
+    'home_team_score': 'float',
+    'away_team_score': 'float',
+    'half_time_home': 'float',
+    'half_time_away': 'float',
+    'home_possession': 'float',
+    'away_possession': 'float',
+    'home_shots': 'float',
+    'away_shots': 'float',
+    'home_shots_on_target': 'float',
+    'away_shots_on_target': 'float',
+    'home_corners': 'float',
+    'away_corners': 'float',
+    'home_fouls': 'float',
+    'away_fouls': 'float',
+    'home_yellow_cards': 'float',
+    'away_yellow_cards': 'float',
+    'home_red_cards': 'float',
+    'away_red_cards': 'float',
+    'updated_at': 'date'
+}
+
+PLAYER_STATS_COLUMNS = {
+    'player_id': 'id',
+    'season': 'category',
+    'matches_played': 'float',
+    'minutes_played': 'float',
+    'goals': 'float',
+    'assists': 'float',
+    'yellow_cards': 'float',
+    'red_cards': 'float',
+    'shots': 'float',
+    'shots_on_target': 'float',
+    'passes': 'float',
+    'passes_completed': 'float',
+    'key_passes': 'float',
+    'tackles': 'float',
+    'tackles_won': 'float',
+    'interceptions': 'float',
+    'clearances': 'float',
+    'blocks': 'float',
+    'duels': 'float',
+    'duels_won': 'float',
+    'saves': 'float',
+    'clean_sheets': 'float',
+    'goals_conceded': 'float',
+    'updated_at': 'date'
+}
+
+PLAYER_PERFORMANCE_COLUMNS = {
+    'match_id': 'id',
+    'player_id': 'id',
+    'team_id': 'id',
+    'minutes_played': 'float',
+    'goals': 'float',
+    'assists': 'float',
+    'yellow_cards': 'float',
+    'red_card': 'bool',
+    'shots': 'float',
+    'shots_on_target': 'float',
+    'passes': 'float',
+    'passes_completed': 'float',
+    'key_passes': 'float',
+    'tackles': 'float',
+    'interceptions': 'float',
+    'saves': 'float',
+    'avg_position_x': 'float',
+    'avg_position_y': 'float',
+    'rating': 'float',
+    'updated_at': 'date'
+}
+
+class ColumnarTable:
+    """
+    Instantané immuable d'une table : un tableau NumPy par colonne, trié par id
+
+    Les colonnes de type 'category' sont stockées sous forme de codes entiers ;
+    `categories[nom]` donne la liste des valeurs correspondantes.
+    """
+
+    def __init__(self, name, schema, ids, data, categories):
+        self.name = name
+        self.schema = schema
+        self.ids = ids
+        self.data = data
+        self.categories = categories
+        self._codes = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in categories.items()}
+
+    @classmethod
+    def from_rows(cls, name, schema, rows, categories=None):
+        """
+        Construit une table à partir de lignes SQLAlchemy (id puis colonnes du schéma)
+
+        Args:
+            name: le nom de la table
+            schema: dictionnaire colonne -> type
+            rows: lignes retournées par la requête
+            categories: catégories déjà connues, complétées si nécessaire (optionnel)
+        """
+        categories = {column: list(values) for column, values in (categories or {}).items()}
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        data = {}
+
+        for position, (column, kind) in enumerate(schema.items(), start=1):
+            values = [row[position] for row in rows]
+            if kind == 'category':
+                known = categories.setdefault(column, [])
+                codes = {value: code for code, value in enumerate(known)}
+                encoded = np.empty(len(values), dtype=np.int32)
+                for i, value in enumerate(values):
+                    code = codes.get(value)
+                    if code is None:
+                        code = codes[value] = len(known)
+                        known.append(value)
+                    encoded[i] = code
+                data[column] = encoded
+            else:
+                data[column] = _encode_column(values, kind)
+
+        order = np.argsort(ids, kind='stable')
+        return cls(name, schema, ids[order], {column: array[order] for column, array in data.items()}, categories)
+
+    def merged(self, other, removed_ids=()):
+        """
+        Retourne une nouvelle table où les lignes de `other` remplacent ou complètent les lignes existantes
+
+        Args:
+            other: table construite avec les catégories de celle-ci (voir from_rows)
+            removed_ids: identifiants des lignes à supprimer
+        """
+        drop = np.concatenate([other.ids, np.asarray(list(removed_ids), dtype=np.int64)])
+        keep = ~np.isin(self.ids, drop)
+
+        ids = np.concatenate([self.ids[keep], other.ids])
+        order = np.argsort(ids, kind='stable')
+        data = {column: np.concatenate([self.data[column][keep], other.data[column]])[order]
+                for column in self.schema}
+
+        return ColumnarTable(self.name, self.schema, ids[order], data, other.categories)
+
+    def column(self, name):
+        """Retourne le tableau d'une colonne"""
+        return self.data[name]
+
+    def code(self, column, value):
+        """Retourne le code d'une valeur de catégorie (-1 si inconnue)"""
+        return self._codes.get(column, {}).get(value, -1)
+
+    def positions(self, ids):
+        """
+        Retourne la position des identifiants dans les tableaux (-1 si absents)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(ids.shape, -1, dtype=np.int64)
+
+        positions = np.clip(np.searchsorted(self.ids, ids), 0, len(self.ids) - 1)
+        return np.where(self.ids[positions] == ids, positions, -1)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les tableaux, en octets"""
+        return self.ids.nbytes + sum(array.nbytes for array in self.data.values())
+
+    def __len__(self):
+        return len(self.ids)
+
+def _encode_column(values, kind):
+    """Convertit une liste de valeurs Python en tableau NumPy du type demandé"""
+    if kind == 'id':
+        return np.array([MISSING_ID if value is None else value for value in values], dtype=np.int64)
+    if kind == 'float':
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float32)
+    if kind == 'bool':
+        return np.array([bool(value) for value in values], dtype=bool)
+    if kind == 'date':
+        return np.array(values, dtype='datetime64[s]') if values else np.empty(0, dtype='datetime64[s]')
+    raise ValueError(f"Type de colonne inconnu: {kind}")
+
+class AnalyticsStore:
+    """
+    Cache en colonnes des tables d'analyse, construit au démarrage et
+    rafraîchi de façon incrémentale à partir de `updated_at`
+
+    Les suppressions de matchs sont suivies via les événements du modèle Match ;
+    celles des statistiques de joueurs nécessitent un appel à `rebuild()`.
+
+    Si la construction échoue ou dépasse le budget mémoire, le cache est
+    suspendu pendant `retry_seconds` : les appelants reviennent aux requêtes
+    ORM sans relancer une reconstruction complète à chaque lecture.
+    """
+
+    TABLES = {
+        'match': (Match, MATCH_COLUMNS),
+        'player_stats': (PlayerStats, PLAYER_STATS_COLUMNS),
+        'player_performance': (PlayerPerformance, PLAYER_PERFORMANCE_COLUMNS)
+    }
+
+    def __init__(self, max_bytes=256 * MB, refresh_interval=60, batch_size=10000, retry_seconds=600):
+        self.app = None
+        self.enabled = True
+        self.max_bytes = max_bytes
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.available = False
+        self.disabled_reason = None
+        self._disabled_until = None
+        self.last_refresh = None
+        self._last_refresh_monotonic = None
+        self._tables = {}
+        self._watermarks = {}
+        self._pending_changes = 0
+        self._deleted_match_ids = set()
+        self._lock = threading.RLock()
+
+        on_match_change(self._on_match_change)
+
+    def init_app(self, app, warm_up=True):
+        """Configure le cache avec l'application Flask et le construit
+
+        Args:
+            app: l'application Flask
+            warm_up: construire le cache immédiatement (sinon à la première lecture)
+        """
+        self.app = app
+        self.enabled = app.config.get('ANALYTICS_STORE_ENABLED', True)
+        self.max_bytes = app.config.get('ANALYTICS_STORE_MAX_MB', 256) * MB
+        self.refresh_interval = app.config.get('ANALYTICS_STORE_REFRESH_SECONDS', 60)
+        self.retry_seconds = app.config.get('ANALYTICS_STORE_RETRY_SECONDS', 600)
+
+        if not self.enabled or not warm_up:
+            return
+
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception as e:
+            logger.error(f"Erreur lors de la construction du cache analytique: {str(e)}")
+            self._suspend(f"construction impossible: {str(e)}")
+
+    def _on_match_change(self, change):
+        """Note qu'un match a changé depuis le dernier rafraîchissement"""
+        with self._lock:
+            self._pending_changes += 1
+            if change.get("deleted") and change.get("match_id") is not None:
+                self._deleted_match_ids.add(change["match_id"])
+
+    def _load(self, name, since=None, categories=None):
+        """Charge les lignes d'une table (toutes, ou modifiées après `since`) par lots"""
+        model, schema = self.TABLES[name]
+        query = select(model.id, *[getattr(model, column) for column in schema])
+        if since is not None:
+            query = query.where(model.updated_at > since)
+
+        parts = []
+        result = db.session.execute(query.execution_options(yield_per=self.batch_size))
+        for rows in result.partitions():
+            part = ColumnarTable.from_rows(name, schema, rows, categories)
+            categories = part.categories
+            parts.append(part)
+
+        if not parts:
+            return ColumnarTable.from_rows(name, schema, [], categories)
+
+        table = parts[0]
+        for part in parts[1:]:
+            table = table.merged(part)
+        return table
+
+    def _check_budget(self, tables):
+        """Vérifie que les tableaux respectent le budget mémoire"""
+        total = sum(table.nbytes for table in tables.values())
+        if total > self.max_bytes:
+            logger.error(f"Cache analytique désactivé: {total / MB:.1f} Mo dépassent le budget de {self.max_bytes / MB:.1f} Mo")
+            return False
+        return True
+
+    def _suspend(self, reason):
+        """Vide le cache et le suspend pendant `retry_seconds` (les lectures passent par la base)"""
+        with self._lock:
+            self._tables = {}
+            self.available = False
+            self.disabled_reason = reason
+            self._disabled_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Cache analytique suspendu pour {self.retry_seconds}s ({reason})")
+
+    def _commit_tables(self, tables):
+        """Publie les nouvelles tables et met à jour les marqueurs de fraîcheur"""
+        with self._lock:
+            if not self._check_budget(tables):
+                self._suspend("budget mémoire dépassé")
+                return False
+
+            self._tables = tables
+            self._watermarks = {}
+            for name, table in tables.items():
+                updated_at = table.column('updated_at')
+                valid = updated_at[~np.isnat(updated_at)]
+                self._watermarks[name] = valid.max().astype(datetime) if valid.size else None
+
+            self.available = True
+            self.disabled_reason = None
+            self._disabled_until = None
+            self.last_refresh = datetime.utcnow()
+            self._last_refresh_monotonic = time.monotonic()
+            return True
+
+    def rebuild(self):
+        """Reconstruit entièrement les tables depuis la base de données"""
+        start = time.monotonic()
+        with self._lock:
+            self._pending_changes = 0
+            self._deleted_match_ids = set()
+
+        tables = {name: self._load(name) for name in self.TABLES}
+        if self._commit_tables(tables):
+            logger.info(f"Cache analytique construit en {time.monotonic() - start:.2f}s "
+                        f"({', '.join(f'{name}: {len(table)}' for name, table in tables.items())}, "
+                        f"{self.nbytes / MB:.1f} Mo)")
+
+    def refresh(self):
+        """Ajoute au cache les lignes modifiées depuis le dernier rafraîchissement"""
+        if not self._tables:
+            return self.rebuild()
+
+        with self._lock:
+            current = dict(self._tables)
+            watermarks = dict(self._watermarks)
+            deleted = self._deleted_match_ids
+            self._pending_changes = 0
+            self._deleted_match_ids = set()
+
+        tables = {}
+        changed = 0
+        for name, table in current.items():
+            updates = self._load(name, since=watermarks.get(name), categories=table.categories)
+            removed = deleted if name == 'match' else ()
+            changed += len(updates) + len(removed)
+            tables[name] = table.merged(updates, removed) if (len(updates) or removed) else table
+
+        self._commit_tables(tables)
+        if changed:
+            logger.info(f"Cache analytique rafraîchi: {changed} lignes modifiées")
+
+    def ensure_fresh(self):
+        """Rafraîchit le cache si des matchs ont changé ou si l'intervalle est dépassé"""
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            if self._disabled_until is not None and time.monotonic() < self._disabled_until:
+                return False
+            needs_refresh = (
+                not self._tables or
+                self._pending_changes > 0 or
+                self._last_refresh_monotonic is None or
+                time.monotonic() - self._last_refresh_monotonic > self.refresh_interval
+            )
+
+        if needs_refresh:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement du cache analytique: {str(e)}")
+                if not self.available:
+                    self._suspend(f"construction impossible: {str(e)}")
+        return self.available
+
+    def table(self, name, refresh=True):
+        """
+        Retourne l'instantané d'une table ('match', 'player_stats', 'player_performance')
+
+        Returns:
+            Un ColumnarTable, ou None si le cache est indisponible
+            (les appelants reviennent alors aux requêtes ORM)
+        """
+        if refresh:
+            self.ensure_fresh()
+        with self._lock:
+            return self._tables.get(name) if self.available else None
+
+    @property
+    def nbytes(self):
+        """Mémoire totale occupée par le cache, en octets"""
+        with self._lock:
+            return sum(table.nbytes for table in self._tables.values())
+
+    def staleness(self):
+        """
+        Indicateur de fraîcheur du cache
+
+        Returns:
+            Un dictionnaire avec la date du dernier rafraîchissement, son âge
+            en secondes, le nombre de modifications en attente et `stale`
+        """
+        with self._lock:
+            age = time.monotonic() - self._last_refresh_monotonic if self._last_refresh_monotonic else None
+            retry_in = self._disabled_until - time.monotonic() if self._disabled_until is not None else None
+            return {
+                "available": self.available,
+                "disabled_reason": self.disabled_reason,
+                "retry_in_seconds": round(max(retry_in, 0.0), 1) if retry_in is not None else None,
+                "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+                "age_seconds": round(age, 1) if age is not None else None,
+                "pending_changes": self._pending_changes,
+                "stale": age is None or self._pending_changes > 0 or age > self.refresh_interval,
+                "memory_mb": round(self.nbytes / MB, 2),
+                "memory_budget_mb": round(self.max_bytes / MB, 2),
+                "rows": {name: len(table) for name, table in self._tables.items()}
+            }
+
+# Instance partagée par le processus
+analytics_store = AnalyticsStore()
@@ -14,6 +14,7 @@ from app import db
 from app.models.scheduled_task import ScheduledTask
 from app.models.api_request_log import APIRequestLog
 from app.models.api_quota import APIQuota
+from app.services.import_checkpoints import ImportCheckpoints, import_key
 
 logger = logging.getLogger(__name__)
 
@@ -468,6 +469,9 @@ class APIFootballClient:
                     logger.error(f"Tâche {task_id} non trouvée")
                     return
                 
+                # Une tâche relancée après une erreur reprend là où elle s'était arrêtée
+                resume = 'error' in json.loads(task.result or '{}')
+                
                 # Mettre à jour le statut
                 task.status = 'RUNNING'
                 task.last_run = datetime.utcnow()
@@ -479,15 +483,19 @@ class APIFootballClient:
                     # Extraire les paramètres
                     params = json.loads(task.parameters) if task.parameters else None
                     
-                    # Effectuer la requête API
-                    response = self._make_request(task.endpoint, params)
-                    
-                    # Vérifier s'il y a des erreurs
-                    if response and 'errors' in response and response['errors']:
-                        raise Exception(f"Erreur API: {response['errors']}")
-                    
-                    # Traiter la réponse selon le type de tâche
-                    result = self._process_task_response(task, response)
+                    if task.task_type == 'import_players' and params and params.get('league') and not params.get('team'):
+                        # Joueurs d'une ligue : toutes les pages, avec points de reprise
+                        result = self.import_league_players(params['league'], params.get('season'), resume=resume)
+                    else:
+                        # Effectuer la requête API
+                        response = self._make_request(task.endpoint, params)
+                        
+                        # Vérifier s'il y a des erreurs
+                        if response and 'errors' in response and response['errors']:
+                            raise Exception(f"Erreur API: {response['errors']}")
+                        
+                        # Traiter la réponse selon le type de tâche
+                        result = self._process_task_response(task, response)
                     
                     # Mettre à jour le statut
                     task.status = 'COMPLETED'
@@ -540,6 +548,58 @@ class APIFootballClient:
                 'status': 'success'
             }
     
+    def import_league_players(self, league_id, season, resume=False, progress=None):
+        """
+        Importe les joueurs d'une ligue page par page
+        
+        L'endpoint `players` est paginé (20 joueurs par page) : chaque page
+        enregistrée est inscrite comme point de reprise. En reprise, les pages
+        déjà enregistrées ne sont pas redemandées à l'API.
+        
+        Args:
+            league_id: ID de la ligue
+            season: Saison
+            resume: reprendre un import interrompu au lieu de tout refaire
+            progress: fonction appelée après chaque page avec (page, nombre de pages) (optionnel)
+            
+        Returns:
+            Un dictionnaire {pages, imported, skipped, players, stats}
+        """
+        checkpoints = ImportCheckpoints(import_key('api_football', 'players', league_id, season), resume=resume)
+        result = {'pages': None, 'imported': 0, 'skipped': 0, 'players': 0, 'stats': 0}
+        
+        page = 1
+        while result['pages'] is None or page <= result['pages']:
+            if checkpoints.is_done('page', page):
+                result['pages'] = result['pages'] or checkpoints.payload('page', page)['total']
+                result['skipped'] += 1
+            else:
+                response = self.get_players(league_id=league_id, season=season, page=page)
+                if not response or response.get('errors'):
+                    raise Exception(f"Erreur API pour la page {page} des joueurs: "
+                                    f"{response.get('errors') if response else 'pas de réponse'}")
+                
+                total = (response.get('paging') or {}).get('total') or 1
+                counts = self._process_players_data(response)
+                if counts is None:
+                    raise Exception(f"Erreur lors de l'enregistrement de la page {page} des joueurs")
+                
+                # Les joueurs de la page sont déjà validés : une page refaite ne crée pas de doublons
+                checkpoints.mark('page', page, {'total': total})
+                db.session.commit()
+                result['pages'] = total
+                result['imported'] += 1
+                result['players'] += counts['players']
+                result['stats'] += counts['stats']
+            
+            if progress:
+                progress(page, result['pages'])
+            page += 1
+        
+        logger.info(f"Joueurs de la ligue {league_id} ({season}) importés: {result['imported']} pages, "
+                    f"{result['skipped']} déjà faites")
+        return result
+    
     # Méthodes de traitement des données
     
     def _process_teams_data(self, data):
@@ -603,6 +663,9 @@ class APIFootballClient:
         
         Args:
             data: Les données de réponse de l'API
+            
+        Returns:
+            Un dictionnaire {players, stats}, ou None si rien n'a été enregistré
         """
         if not data or 'response' not in data:
             logger.error("Données de joueurs invalides")
@@ -747,6 +810,7 @@ class APIFootballClient:
         try:
             db.session.commit()
             logger.info(f"Importation des joueurs terminée: {players_count} joueurs, {stats_count} statistiques")
+            return {'players': players_count, 'stats': stats_count}
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde: {str(e)}")
             db.session.rollback()
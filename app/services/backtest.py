@@ -0,0 +1,263 @@
+# app/services/backtest.py
+"""
+Évaluation des prédictions : rejeu chronologique des saisons passées avec
+le modèle local et exactitude des prédictions enregistrées
+"""
+
+import time
+import logging
+import numpy as np
+from datetime import timedelta
+from sqlalchemy import select, update
+from app import db
+from app.models.match import Match
+from app.models.prediction import Prediction
+from app.services.match_model import MODEL_VERSION, fit_model
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('home', 'draw', 'away')
+
+# Probabilité minimale retenue pour le log-loss (évite log(0))
+LOG_LOSS_EPSILON = 1e-15
+
+def match_outcome(home_score, away_score):
+    """Issue d'un match : 'home', 'draw' ou 'away'"""
+    if home_score > away_score:
+        return 'home'
+    if home_score < away_score:
+        return 'away'
+    return 'draw'
+
+def score_predictions(probabilities, outcomes):
+    """
+    Calcule les métriques de qualité de prédictions 1X2
+
+    Args:
+        probabilities: tableau n x 3 (domicile, nul, extérieur)
+        outcomes: indices des issues réelles (0 domicile, 1 nul, 2 extérieur)
+
+    Returns:
+        Un dictionnaire avec `matches`, `accuracy`, `brier` (somme des carrés
+        sur les trois issues, moyennée) et `log_loss`
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    outcomes = np.asarray(outcomes, dtype=np.int64)
+    if outcomes.size == 0:
+        return {"matches": 0, "accuracy": None, "brier": None, "log_loss": None}
+
+    actual = np.zeros_like(probabilities)
+    actual[np.arange(outcomes.size), outcomes] = 1.0
+    observed = np.clip(probabilities[np.arange(outcomes.size), outcomes], LOG_LOSS_EPSILON, 1.0)
+
+    return {
+        "matches": int(outcomes.size),
+        "accuracy": round(float((probabilities.argmax(axis=1) == outcomes).mean()), 4),
+        "brier": round(float(((probabilities - actual) ** 2).sum(axis=1).mean()), 4),
+        "log_loss": round(float(-np.log(observed).mean()), 4)
+    }
+
+def _finished_matches(competition=None, seasons=None):
+    """Matchs terminés à rejouer, dans l'ordre chronologique"""
+    query = select(
+        Match.id, Match.date, Match.season, Match.home_team_id, Match.away_team_id,
+        Match.home_team_score, Match.away_team_score
+    ).where(
+        Match.status == 'FINISHED',
+        Match.date.isnot(None),
+        Match.home_team_id.isnot(None),
+        Match.away_team_id.isnot(None),
+        Match.home_team_score.isnot(None),
+        Match.away_team_score.isnot(None)
+    ).order_by(Match.date, Match.id)
+
+    if competition:
+        query = query.where(Match.competition == competition)
+    if seasons:
+        query = query.where(Match.season.in_(list(seasons)))
+
+    return db.session.execute(query).all()
+
+def run_backtest(competition=None, seasons=None, refit_days=7, min_training_matches=50, **model_options):
+    """
+    Rejoue les matchs passés dans l'ordre chronologique avec le modèle local
+
+    Les matchs sont regroupés en fenêtres de `refit_days` jours. Avant chaque
+    fenêtre, le modèle est ajusté uniquement sur les matchs terminés
+    antérieurs à son début (toutes compétitions), puis prédit tous les matchs
+    de la fenêtre. Aucune donnée postérieure au coup d'envoi n'est utilisée
+    et aucun service externe n'est appelé.
+
+    Args:
+        competition: compétition à rejouer (toutes par défaut)
+        seasons: saisons à rejouer (toutes par défaut)
+        refit_days: durée d'une fenêtre entre deux ajustements
+        min_training_matches: fenêtres ignorées tant que l'historique est plus court
+        model_options: paramètres du modèle (xi, prior_matches, max_goals...)
+
+    Returns:
+        Un dictionnaire avec les métriques globales et par saison, le nombre
+        de matchs ignorés et le débit (prédictions par seconde, avec et sans
+        l'ajustement du modèle)
+    """
+    start = time.monotonic()
+    matches = _finished_matches(competition, seasons)
+
+    probabilities = []
+    outcomes = []
+    match_seasons = []
+    skipped = 0
+    fits = 0
+    predict_seconds = 0.0
+
+    position = 0
+    while position < len(matches):
+        window_start = matches[position].date
+        window_end = window_start + timedelta(days=refit_days)
+        end = position
+        while end < len(matches) and matches[end].date < window_end:
+            end += 1
+        window = matches[position:end]
+        position = end
+
+        model = fit_model(before=window_start, **model_options)
+        fits += 1
+        if model.n_matches < min_training_matches:
+            skipped += len(window)
+            continue
+
+        predict_start = time.monotonic()
+        predicted = model.predict_many([row.home_team_id for row in window], [row.away_team_id for row in window])
+        predict_seconds += time.monotonic() - predict_start
+
+        probabilities.append(predicted["probabilities"])
+        outcomes.extend(OUTCOMES.index(match_outcome(row.home_team_score, row.away_team_score)) for row in window)
+        match_seasons.extend(row.season for row in window)
+
+    probabilities = np.concatenate(probabilities) if probabilities else np.empty((0, 3))
+    outcomes = np.asarray(outcomes, dtype=np.int64)
+    match_seasons = np.asarray(match_seasons, dtype=object)
+    total_seconds = time.monotonic() - start
+
+    summary = score_predictions(probabilities, outcomes)
+    summary.update({
+        "model_version": MODEL_VERSION,
+        "model_options": model_options,
+        "skipped": skipped,
+        "fits": fits,
+        "seconds": round(total_seconds, 3),
+        "predictions_per_second": round(outcomes.size / predict_seconds, 1) if predict_seconds > 0 else None,
+        "end_to_end_per_second": round(outcomes.size / total_seconds, 1) if total_seconds > 0 else None,
+        "by_season": {
+            season: score_predictions(probabilities[match_seasons == season], outcomes[match_seasons == season])
+            for season in sorted(set(match_seasons.tolist()), key=str)
+        }
+    })
+
+    logger.info(f"Backtest {MODEL_VERSION}: {summary['matches']} matchs, précision {summary['accuracy']}, "
+                f"Brier {summary['brier']}, log-loss {summary['log_loss']}, "
+                f"{summary['predictions_per_second']} prédictions/s")
+    return summary
+
+def fill_prediction_outcomes():
+    """
+    Renseigne `was_correct` des prédictions dont le match est terminé
+
+    Les prédictions sans match associé sont d'abord rattachées au match des
+    mêmes clubs le même jour.
+
+    Returns:
+        Le nombre de prédictions évaluées
+    """
+    # Rattacher les prédictions aux matchs enregistrés depuis
+    unlinked = Prediction.query.filter(
+        Prediction.match_id.is_(None),
+        Prediction.match_date.isnot(None),
+        Prediction.home_team_id.isnot(None)
+    ).all()
+    if unlinked:
+        dates = [prediction.match_date for prediction in unlinked]
+        candidates = {
+            (match.home_team_id, match.away_team_id, match.date.date()): match.id
+            for match in Match.query.filter(
+                Match.home_team_id.in_({prediction.home_team_id for prediction in unlinked}),
+                Match.date >= min(dates),
+                Match.date < max(dates) + timedelta(days=1)
+            )
+        }
+        for prediction in unlinked:
+            prediction.match_id = candidates.get(
+                (prediction.home_team_id, prediction.away_team_id, prediction.match_date.date())
+            )
+        db.session.flush()
+
+    rows = db.session.execute(
+        select(Prediction.id, Prediction.predicted_winner, Match.home_team_score, Match.away_team_score)
+        .join(Match, Match.id == Prediction.match_id)
+        .where(
+            Prediction.was_correct.is_(None),
+            Prediction.predicted_winner.in_(OUTCOMES),
+            Match.status == 'FINISHED',
+            Match.home_team_score.isnot(None),
+            Match.away_team_score.isnot(None)
+        )
+    ).all()
+
+    if rows:
+        db.session.execute(update(Prediction), [
+            {"id": row.id, "was_correct": row.predicted_winner == match_outcome(row.home_team_score, row.away_team_score)}
+            for row in rows
+        ])
+    db.session.commit()
+
+    logger.info(f"{len(rows)} prédictions évaluées")
+    return len(rows)
+
+def evaluate_saved_predictions(model_version=None):
+    """
+    Évalue les prédictions du modèle local enregistrées dont le match est terminé
+
+    Les prédictions demandées à Ollama (clubs sans historique en base) ne sont
+    pas enregistrées dans Prediction, faute de clubs auxquels les rattacher :
+    elles ne peuvent donc pas être évaluées ici.
+
+    Args:
+        model_version: ne retenir qu'une version du modèle (optionnel)
+
+    Returns:
+        Un dictionnaire {model_version: métriques}
+    """
+    query = select(
+        Prediction.model_version, Prediction.predicted_winner,
+        Prediction.home_win_probability, Prediction.draw_probability, Prediction.away_win_probability,
+        Match.home_team_score, Match.away_team_score
+    ).join(Match, Match.id == Prediction.match_id).where(
+        Match.status == 'FINISHED',
+        Match.home_team_score.isnot(None),
+        Match.away_team_score.isnot(None),
+        Prediction.predicted_winner.in_(OUTCOMES),
+        Prediction.model_version.isnot(None),
+        Prediction.home_win_probability.isnot(None)
+    )
+    if model_version:
+        query = query.where(Prediction.model_version == model_version)
+
+    grouped = {}
+    for row in db.session.execute(query):
+        grouped.setdefault(row.model_version, []).append(row)
+
+    results = {}
+    for version, rows in grouped.items():
+        outcomes = np.array([OUTCOMES.index(match_outcome(row.home_team_score, row.away_team_score)) for row in rows])
+        probabilities = np.array([
+            [row.home_win_probability, row.draw_probability, row.away_win_probability] for row in rows
+        ], dtype=float)
+
+        metrics = score_predictions(probabilities, outcomes)
+        metrics["matches"] = len(rows)
+        metrics["accuracy"] = round(float(np.mean([
+            row.predicted_winner == OUTCOMES[outcome] for row, outcome in zip(rows, outcomes)
+        ])), 4)
+        results[version] = metrics
+
+    return results
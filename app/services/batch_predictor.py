@@ -0,0 +1,303 @@
+# app/services/batch_predictor.py
+"""
+Prédiction par lots de tous les matchs d'une journée ou d'une période
+
+Les grands lots soumis depuis l'interface sont exécutés en arrière-plan par
+le job runner (tâche `predictions`).
+"""
+
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.models.prediction import Prediction
+from app.services.ai_predictor import (
+    prepare_local_match_data, predict_with_local_model, compute_feature_hash
+)
+from app.services.match_model import MODEL_VERSION, get_model
+from app.services.job_runner import job_runner
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('home', 'draw', 'away')
+LIKELY_SCORES = 5  # Scores les plus probables retournés par prédiction (comme `model.predict`)
+
+def fixtures_for_round(client, league_id, season, round_name=None):
+    """
+    Récupère les matchs d'une journée via API-Football
+
+    Args:
+        client: le client APIFootballClient
+        league_id: l'identifiant API-Football de la ligue
+        season: la saison (année de début)
+        round_name: le nom du tour (ex: 'Regular Season - 12'), tour en cours par défaut
+
+    Returns:
+        Une liste de matchs {home_team_id, away_team_id, match_date, match_id}
+        avec les identifiants locaux des clubs (None si le club est inconnu)
+    """
+    current = None if round_name else 'true'
+    rounds = client.get_fixture_rounds(league_id, season, current=current)
+    available = (rounds or {}).get('response') or []
+
+    if round_name is None:
+        if not available:
+            raise ValueError(f"Aucun tour en cours pour la ligue {league_id} ({season})")
+        round_name = available[0]
+    elif available and round_name not in available:
+        raise ValueError(f"Tour inconnu pour la ligue {league_id} ({season}): {round_name}")
+
+    response = client.get_fixtures(league_id=league_id, season=season, round=round_name)
+    fixtures = (response or {}).get('response') or []
+
+    # Correspondance des identifiants API-Football en une seule requête par table
+    team_api_ids = {fixture['teams'][side]['id'] for fixture in fixtures for side in ('home', 'away')}
+    clubs = {club.api_id: club.id for club in Club.query.filter(Club.api_id.in_(team_api_ids))} if team_api_ids else {}
+    fixture_ids = [fixture['fixture']['id'] for fixture in fixtures]
+    matches = {match.api_id: match.id for match in Match.query.filter(Match.api_id.in_(fixture_ids))} if fixture_ids else {}
+
+    result = []
+    for fixture in fixtures:
+        match_date = None
+        if fixture['fixture'].get('date'):
+            try:
+                match_date = datetime.strptime(fixture['fixture']['date'], '%Y-%m-%dT%H:%M:%S%z').replace(tzinfo=None)
+            except ValueError:
+                logger.warning(f"Format de date invalide: {fixture['fixture'].get('date')}")
+
+        result.append({
+            "home_team_id": clubs.get(fixture['teams']['home']['id']),
+            "away_team_id": clubs.get(fixture['teams']['away']['id']),
+            "home_team": fixture['teams']['home'].get('name'),
+            "away_team": fixture['teams']['away'].get('name'),
+            "match_date": match_date,
+            "match_id": matches.get(fixture['fixture']['id'])
+        })
+
+    logger.info(f"{len(result)} matchs trouvés pour {round_name} (ligue {league_id}, {season})")
+    return result
+
+def fixtures_for_dates(date_from, date_to, competition=None):
+    """
+    Récupère les matchs non terminés de la base entre deux dates
+
+    Args:
+        date_from: date de début, incluse
+        date_to: date de fin, incluse
+        competition: filtrer sur une compétition (optionnel)
+
+    Returns:
+        Une liste de matchs au format de fixtures_for_round
+    """
+    query = Match.query.filter(
+        Match.date >= date_from,
+        Match.date < date_to + timedelta(days=1),
+        Match.status != 'FINISHED'
+    )
+    if competition:
+        query = query.filter(Match.competition == competition)
+
+    return [
+        {
+            "home_team_id": match.home_team_id,
+            "away_team_id": match.away_team_id,
+            "match_date": match.date,
+            "match_id": match.id
+        }
+        for match in query.order_by(Match.date)
+    ]
+
+def serialize_fixtures(fixtures):
+    """Matchs au format JSON des paramètres d'une tâche (dates ISO 8601)"""
+    return [
+        dict(fixture, match_date=fixture["match_date"].isoformat() if fixture["match_date"] else None)
+        for fixture in fixtures
+    ]
+
+def deserialize_fixtures(fixtures):
+    """Matchs enregistrés par `serialize_fixtures`"""
+    return [
+        dict(fixture, match_date=datetime.fromisoformat(fixture["match_date"]) if fixture["match_date"] else None)
+        for fixture in fixtures
+    ]
+
+def _model_outputs(model, matches):
+    """
+    Sorties du modèle pour un lot de matchs, calculées en une opération vectorisée
+
+    Returns:
+        Une liste de dictionnaires au format de `model.predict` (sans la matrice des scores)
+    """
+    batch = model.predict_many([match_data["home_team"]["id"] for match_data in matches],
+                               [match_data["away_team"]["id"] for match_data in matches],
+                               top_scores=LIKELY_SCORES)
+    outputs = []
+    for probabilities, expected_goals, predicted_score, likely_scores, likely_probabilities in zip(
+            batch["probabilities"], batch["expected_goals"], batch["predicted_scores"],
+            batch["likely_scores"], batch["likely_probabilities"]):
+        outputs.append({
+            "probabilities": {outcome: round(float(value), 4) for outcome, value in zip(OUTCOMES, probabilities)},
+            "predicted_winner": OUTCOMES[int(probabilities.argmax())],
+            "expected_goals": {"home": round(float(expected_goals[0]), 2), "away": round(float(expected_goals[1]), 2)},
+            "predicted_score": f"{int(predicted_score[0])}-{int(predicted_score[1])}",
+            "likely_scores": [
+                {"score": f"{int(home_goals)}-{int(away_goals)}", "probability": round(float(probability), 4)}
+                for (home_goals, away_goals), probability in zip(likely_scores, likely_probabilities)
+            ]
+        })
+    return outputs
+
+def _score(match_data, model, output):
+    """Complète la sortie du modèle pour un match (sans accès à la base)"""
+    prediction = predict_with_local_model(match_data, model=model, output=output)
+    prediction["feature_hash"] = compute_feature_hash(match_data)
+    prediction["narrative"] = False
+    return prediction
+
+def _prediction_row(prediction, match_id, now):
+    """Convertit une prédiction en ligne de la table Prediction"""
+    home_score, away_score = (int(goals) for goals in prediction["predicted_score"].split("-"))
+    return {
+        "match_id": match_id,
+        "home_team_id": prediction["home_team_id"],
+        "away_team_id": prediction["away_team_id"],
+        "match_date": datetime.strptime(prediction["match_date"], '%Y-%m-%d'),
+        "model_version": prediction["model_version"],
+        "predicted_home_score": home_score,
+        "predicted_away_score": away_score,
+        "predicted_winner": prediction["predicted_winner"],
+        "confidence": prediction["confidence"],
+        "home_win_probability": prediction["probabilities"]["home"],
+        "draw_probability": prediction["probabilities"]["draw"],
+        "away_win_probability": prediction["probabilities"]["away"],
+        "expected_home_goals": prediction["expected_goals"]["home"],
+        "expected_away_goals": prediction["expected_goals"]["away"],
+        "feature_hash": prediction["feature_hash"],
+        "has_narrative": False,
+        "explanation": prediction["explanation"],
+        "key_factors": json.dumps(prediction["key_factors"]),
+        "updated_at": now
+    }
+
+def _write_predictions(fixtures, predictions):
+    """
+    Enregistre un lot de prédictions avec une insertion et une mise à jour groupées
+
+    Les prédictions déjà enregistrées pour le même match et la même version
+    du modèle sont mises à jour.
+
+    Returns:
+        Un tuple (lignes créées, lignes mises à jour)
+    """
+    dates = [datetime.strptime(prediction["match_date"], '%Y-%m-%d') for prediction in predictions]
+    existing = {
+        (record.home_team_id, record.away_team_id, record.match_date.date()): record
+        for record in Prediction.query.filter(
+            Prediction.model_version == MODEL_VERSION,
+            Prediction.home_team_id.in_({prediction["home_team_id"] for prediction in predictions}),
+            Prediction.match_date >= min(dates),
+            Prediction.match_date < max(dates) + timedelta(days=1)
+        )
+    }
+
+    now = datetime.utcnow()
+    new_rows = []
+    updated_rows = []
+    for fixture, prediction, match_date in zip(fixtures, predictions, dates):
+        record = existing.get((prediction["home_team_id"], prediction["away_team_id"], match_date.date()))
+        row = _prediction_row(prediction, fixture.get("match_id") or (record.match_id if record else None), now)
+        if record:
+            row["id"] = record.id
+            updated_rows.append(row)
+        else:
+            row["created_at"] = now
+            new_rows.append(row)
+
+    if new_rows:
+        db.session.execute(insert(Prediction), new_rows)
+    if updated_rows:
+        db.session.execute(update(Prediction), updated_rows)
+    db.session.commit()
+
+    return len(new_rows), len(updated_rows)
+
+def predict_fixtures(fixtures, batch_size=200, progress=None):
+    """
+    Prédit une liste de matchs et enregistre les prédictions par lots
+
+    Les données d'entrée sont préparées en un seul passage sur le cache
+    analytique avec un modèle ajusté une seule fois ; les sorties du modèle
+    de chaque lot sont calculées en une opération vectorisée (`predict_many`),
+    puis écrites en une transaction. Aucun appel à Ollama n'est effectué.
+
+    Args:
+        fixtures: la liste retournée par fixtures_for_round ou fixtures_for_dates
+        batch_size: nombre de prédictions calculées et écrites par transaction
+        progress: fonction appelée après chaque lot avec (terminés, total, prédictions par seconde)
+
+    Returns:
+        Un dictionnaire résumant l'exécution (compteurs, durée et débit)
+    """
+    start = time.monotonic()
+    summary = {"fixtures": len(fixtures), "predicted": 0, "created": 0, "updated": 0, "skipped": 0}
+
+    # Charger tous les clubs en une requête : les accès suivants utilisent la session
+    club_ids = {fixture[key] for fixture in fixtures for key in ("home_team_id", "away_team_id")} - {None}
+    if club_ids:
+        Club.query.filter(Club.id.in_(club_ids)).all()
+
+    model = get_model()
+
+    prepared = []
+    for fixture in fixtures:
+        if fixture["home_team_id"] is None or fixture["away_team_id"] is None or fixture["match_date"] is None:
+            summary["skipped"] += 1
+            continue
+
+        match_data = prepare_local_match_data(fixture["home_team_id"], fixture["away_team_id"],
+                                              fixture["match_date"].strftime('%Y-%m-%d'))
+        if match_data is None:
+            summary["skipped"] += 1
+            continue
+        prepared.append((fixture, match_data))
+
+    if summary["skipped"]:
+        logger.info(f"{summary['skipped']} matchs ignorés (club inconnu ou sans historique local)")
+
+    for offset in range(0, len(prepared), batch_size):
+        chunk = prepared[offset:offset + batch_size]
+        matches = [match_data for _, match_data in chunk]
+        predictions = [_score(match_data, model, output)
+                       for match_data, output in zip(matches, _model_outputs(model, matches))]
+
+        created, updated = _write_predictions([fixture for fixture, _ in chunk], predictions)
+        summary["predicted"] += len(predictions)
+        summary["created"] += created
+        summary["updated"] += updated
+
+        elapsed = time.monotonic() - start
+        rate = summary["predicted"] / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Prédictions: {summary['predicted']}/{len(prepared)} ({rate:.1f}/s)")
+        if progress:
+            progress(summary["predicted"], len(prepared), rate)
+
+    summary["seconds"] = round(time.monotonic() - start, 3)
+    summary["predictions_per_second"] = round(summary["predicted"] / summary["seconds"], 1) if summary["seconds"] > 0 else None
+    return summary
+
+@job_runner.task('predictions')
+def predict_fixtures_job(job, fixtures, batch_size=200):
+    """
+    Tâche de fond : prédit des matchs enregistrés par `serialize_fixtures`
+
+    L'avancement est publié et l'annulation vérifiée après chaque lot écrit.
+    """
+    def progress(done, total, rate):
+        job.progress(current=done, total=total, message=f"{done}/{total} prédictions ({rate:.1f}/s)")
+        job.check_cancelled()
+
+    return predict_fixtures(deserialize_fixtures(fixtures), batch_size=batch_size, progress=progress)
@@ -0,0 +1,284 @@
+# app/services/browser_pool.py
+"""
+Pool borné de navigateurs Chrome partagés par les scrapers WhoScored
+
+Le lancement de Chrome domine la durée des scrapes courts : les navigateurs
+sont gardés ouverts entre deux emprunts, vérifiés avant d'être prêtés et
+remplacés après un nombre de pages ou une croissance mémoire donnés. Le
+nombre total de navigateurs ouverts (prêtés ou au repos) est borné.
+
+Les limites de pages et de mémoire sont vérifiées au retour d'un
+navigateur : un long import emprunte donc un navigateur par unité de
+travail (un joueur, une page) plutôt qu'un seul pour toute sa durée. Un
+thread ferme les navigateurs restés trop longtemps au repos, même si le
+pool n'est plus sollicité.
+"""
+
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+from app.services.whoscored_scraper import WhoScoredSeleniumScraper
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class BrowserPoolTimeout(Exception):
+    """Aucun navigateur ne s'est libéré dans le délai d'attente"""
+
+class PooledBrowser:
+    """Un navigateur du pool et son usage cumulé"""
+
+    def __init__(self, driver, key):
+        self.driver = driver
+        self.key = key  # (headless, chrome_path)
+        self.pages = 0
+        self.leases = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Erreur lors de la fermeture d'un navigateur du pool: {str(e)}")
+
+class BrowserPool:
+    """
+    Pool de navigateurs emprunté par `scraper()` :
+
+        with browser_pool.scraper(headless=True) as scraper:
+            scraper.get_league_teams(league_id, season_id)
+
+    Les navigateurs sont rangés par configuration (headless, chemin de
+    Chrome) ; s'il n'y a pas de place pour en lancer un nouveau, un
+    navigateur au repos d'une autre configuration est fermé pour la libérer.
+    """
+
+    def __init__(self, max_size=2, max_pages=200, max_memory_mb=512, max_idle_seconds=600,
+                 checkout_timeout=600, factory=None):
+        """
+        Args:
+            max_size: nombre maximal de navigateurs ouverts
+            max_pages: pages chargées au-delà desquelles un navigateur est remplacé
+            max_memory_mb: tas JavaScript (Mo) au-delà duquel un navigateur est remplacé
+            max_idle_seconds: durée au repos au-delà de laquelle un navigateur est fermé
+            checkout_timeout: attente maximale d'un navigateur libre, en secondes
+            factory: fonction (headless, chrome_path) -> WebDriver (par défaut,
+                `WhoScoredSeleniumScraper.create_driver`)
+        """
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.max_idle_seconds = max_idle_seconds
+        self.checkout_timeout = checkout_timeout
+        self.factory = factory or WhoScoredSeleniumScraper.create_driver
+        self._idle = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "recycled": 0, "discarded": 0, "waits": 0, "reaped": 0}
+        self._reaper = None
+        self._closed = threading.Event()
+        atexit.register(self.close)
+
+    def init_app(self, app):
+        """Configure le pool avec l'application Flask"""
+        self.max_size = app.config.get('BROWSER_POOL_SIZE', self.max_size)
+        self.max_pages = app.config.get('BROWSER_POOL_MAX_PAGES', self.max_pages)
+        self.max_memory_mb = app.config.get('BROWSER_POOL_MAX_MEMORY_MB', self.max_memory_mb)
+        self.max_idle_seconds = app.config.get('BROWSER_POOL_IDLE_SECONDS', self.max_idle_seconds)
+        self.checkout_timeout = app.config.get('BROWSER_POOL_CHECKOUT_TIMEOUT', self.checkout_timeout)
+
+    def _healthy(self, browser):
+        """Vérifie qu'un navigateur au repos répond encore"""
+        try:
+            return browser.driver.execute_script("return 1") == 1 and bool(browser.driver.window_handles)
+        except Exception:
+            return False
+
+    def _memory_bytes(self, browser):
+        """Tas JavaScript utilisé par la page courante (None si indisponible)"""
+        try:
+            return browser.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null"
+            )
+        except Exception:
+            return None
+
+    def _prune_idle(self):
+        """Ferme les navigateurs restés trop longtemps au repos (appelé sous verrou)"""
+        now = time.monotonic()
+        expired = [browser for browser in self._idle if now - browser.last_used > self.max_idle_seconds]
+        for browser in expired:
+            self._idle.remove(browser)
+        return expired
+
+    def _start_reaper(self):
+        """Lance le thread de fermeture des navigateurs au repos (appelé sous verrou)"""
+        if self._reaper is None and self.max_idle_seconds:
+            self._reaper = threading.Thread(target=self._reap_idle, name='browser-pool-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_idle(self):
+        """Ferme régulièrement les navigateurs restés trop longtemps au repos"""
+        while not self._closed.wait(max(1.0, min(60.0, self.max_idle_seconds / 2))):
+            with self._condition:
+                expired = self._prune_idle()
+                self._stats["reaped"] += len(expired)
+                if expired:
+                    self._condition.notify_all()
+            for browser in expired:
+                logger.info("Navigateur du pool fermé après une période de repos")
+                browser.quit()
+
+    def _acquire(self, key, timeout):
+        """
+        Réserve un navigateur : un navigateur au repos de même configuration,
+        ou une place pour en lancer un nouveau
+
+        Returns:
+            Un tuple (navigateur au repos ou None, navigateurs à fermer)
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            to_close = self._prune_idle()
+            while True:
+                for browser in reversed(self._idle):
+                    if browser.key == key:
+                        self._idle.remove(browser)
+                        self._in_use += 1
+                        return browser, to_close
+
+                if self._in_use + len(self._idle) < self.max_size:
+                    self._in_use += 1
+                    return None, to_close
+
+                if self._idle:
+                    # Libérer la place d'un navigateur au repos d'une autre configuration
+                    to_close.append(self._idle.pop(0))
+                    self._in_use += 1
+                    return None, to_close
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    for browser in to_close:
+                        browser.quit()
+                    raise BrowserPoolTimeout(f"Aucun navigateur libre après {timeout}s "
+                                             f"({self.max_size} navigateurs maximum)")
+                self._stats["waits"] += 1
+                self._condition.wait(remaining)
+
+    def _release(self, browser, reusable):
+        """Rend un navigateur au pool, ou le ferme s'il n'est plus réutilisable ou si le pool est fermé"""
+        with self._condition:
+            self._in_use -= 1
+            # Un navigateur rendu après `close` ne doit pas rester ouvert dans le pool
+            reusable = reusable and not self._closed.is_set()
+            if reusable:
+                browser.last_used = time.monotonic()
+                self._idle.append(browser)
+                self._start_reaper()
+            self._condition.notify()
+        if not reusable:
+            browser.quit()
+
+    def _checkout(self, key, timeout):
+        """Emprunte un navigateur sain, lancé si nécessaire"""
+        browser, to_close = self._acquire(key, timeout)
+        for stale in to_close:
+            stale.quit()
+
+        try:
+            if browser is not None and not self._healthy(browser):
+                logger.warning("Navigateur du pool hors service, remplacement")
+                self._stats["discarded"] += 1
+                browser.quit()
+                browser = None
+
+            if browser is None:
+                browser = PooledBrowser(self.factory(*key), key)
+                self._stats["created"] += 1
+            else:
+                self._stats["reused"] += 1
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        browser.leases += 1
+        return browser
+
+    def _should_recycle(self, browser):
+        """Indique si un navigateur a atteint sa limite de pages ou de mémoire"""
+        if self.max_pages and browser.pages >= self.max_pages:
+            return f"{browser.pages} pages chargées"
+        if self.max_memory_mb:
+            memory = self._memory_bytes(browser)
+            if memory and memory > self.max_memory_mb * MB:
+                return f"{memory / MB:.0f} Mo de tas JavaScript"
+        return None
+
+    @contextmanager
+    def scraper(self, headless=True, chrome_path=None, timeout=None):
+        """
+        Emprunte un navigateur du pool le temps d'un bloc `with`
+
+        Args:
+            headless: si True, navigateur sans interface graphique
+            chrome_path: chemin vers l'exécutable Chrome (optionnel)
+            timeout: attente maximale d'un navigateur libre (par défaut `checkout_timeout`)
+
+        Yields:
+            Un WhoScoredSeleniumScraper utilisant le navigateur emprunté
+
+        Raises:
+            BrowserPoolTimeout: si aucun navigateur ne s'est libéré à temps
+        """
+        key = (bool(headless), chrome_path or None)
+        browser = self._checkout(key, self.checkout_timeout if timeout is None else timeout)
+        scraper = WhoScoredSeleniumScraper(driver=browser.driver)
+        reusable = True
+        try:
+            yield scraper
+        except WebDriverException:
+            # Le navigateur peut être dans un état incohérent
+            self._stats["discarded"] += 1
+            reusable = False
+            raise
+        finally:
+            browser.pages += scraper.pages_loaded
+            scraper.close()
+
+            if reusable:
+                reason = self._should_recycle(browser)
+                if reason:
+                    logger.info(f"Navigateur du pool remplacé ({reason})")
+                    self._stats["recycled"] += 1
+                    reusable = False
+                else:
+                    try:
+                        # Libérer la mémoire de la dernière page
+                        browser.driver.get("about:blank")
+                    except Exception:
+                        reusable = False
+            self._release(browser, reusable)
+
+    def close(self):
+        """Ferme les navigateurs au repos (les navigateurs prêtés sont fermés à leur retour)"""
+        self._closed.set()
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for browser in idle:
+            browser.quit()
+
+    def stats(self):
+        """Retourne les statistiques du pool"""
+        with self._condition:
+            return dict(self._stats, idle=len(self._idle), in_use=self._in_use, max_size=self.max_size)
+
+# Instance partagée par le processus
+browser_pool = BrowserPool()
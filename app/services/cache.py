@@ -0,0 +1,163 @@
+# app/services/cache.py
+"""
+Caches mémoire partagés par les services d'analyse et mécanisme
+d'invalidation déclenché par les modifications de matchs
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class MemoCache:
+    """
+    Cache mémoire thread-safe avec éviction LRU et durée de vie optionnelle
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        Initialise le cache
+
+        Args:
+            maxsize: nombre maximal d'entrées conservées (None pour illimité)
+            ttl: durée de vie d'une entrée en secondes (None pour illimitée)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Récupère une valeur du cache ou `default` si elle est absente ou expirée"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Enregistre une valeur dans le cache"""
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """
+        Récupère une valeur du cache ou la calcule avec `factory` puis la mémorise
+
+        Args:
+            key: la clé de cache
+            factory: fonction sans argument appelée en cas d'absence
+            ttl: durée de vie spécifique à cette entrée (optionnel)
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl=ttl)
+        return value
+
+    def invalidate(self, key):
+        """Supprime une entrée du cache"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate):
+        """
+        Supprime toutes les entrées dont la clé satisfait `predicate`
+
+        Returns:
+            Le nombre d'entrées supprimées
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def stats(self):
+        """Retourne les statistiques d'utilisation du cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total > 0 else 0.0
+            }
+
+
+# Fonctions appelées lorsqu'un match est créé, modifié ou supprimé
+_match_change_listeners = []
+
+def on_match_change(callback):
+    """
+    Enregistre une fonction appelée à chaque modification d'un match
+
+    La fonction reçoit un dictionnaire contenant `match_id`, `club_ids`,
+    `competition`, `season`, `status` et `deleted`. Utilisable comme décorateur.
+    """
+    _match_change_listeners.append(callback)
+    return callback
+
+def notify_match_change(match_id=None, club_ids=(), competition=None, season=None, status=None, deleted=False):
+    """
+    Prévient les caches enregistrés qu'un match a été modifié
+
+    Args:
+        match_id: l'identifiant du match modifié (optionnel)
+        club_ids: les identifiants des clubs concernés
+        competition: la compétition du match (optionnel)
+        season: la saison du match (optionnel)
+        status: le statut du match (optionnel)
+        deleted: True si le match a été supprimé
+    """
+    change = {
+        "match_id": match_id,
+        "club_ids": {club_id for club_id in club_ids if club_id is not None},
+        "competition": competition,
+        "season": season,
+        "status": status,
+        "deleted": deleted
+    }
+
+    for listener in list(_match_change_listeners):
+        try:
+            listener(change)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'invalidation du cache ({getattr(listener, '__name__', listener)}): {str(e)}")
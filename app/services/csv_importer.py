@@ -0,0 +1,475 @@
+# app/services/csv_importer.py
+"""
+Import en flux de fichiers CSV volumineux : lecture par blocs, résolution
+ensembliste des clubs et joueurs, conversion de types par colonne et
+écritures groupées
+"""
+
+import time
+import logging
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import bindparam
+from app import db
+from app.models.club import Club
+from app.models.player import Player
+from app.models.player_stats import PlayerStats
+from app.models.match import Match
+from app.services.cache import notify_match_change
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_SEASON = '2023/2024'
+
+GZIP_SIGNATURE = b'\x1f\x8b'
+
+# Formats de date acceptés dans les fichiers de matchs, dans l'ordre d'essai
+MATCH_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y')
+
+# Longueur maximale de Club.short_name
+SHORT_NAME_LENGTH = 10
+
+# Colonnes de PlayerStats qui ne proviennent pas du fichier
+PLAYER_STATS_RESERVED_COLUMNS = ('id', 'player_id', 'season', 'created_at', 'updated_at')
+
+def convert_whoscored_field_name(whoscored_field):
+    """
+    Convertit un nom de champ WhoScored en nom de champ pour notre modèle
+
+    Args:
+        whoscored_field: le nom du champ dans WhoScored
+
+    Returns:
+        Le nom du champ correspondant dans notre modèle
+    """
+    mapping = {
+        'apps': 'matches_played',
+        'mins_played': 'minutes_played',
+        'goals': 'goals',
+        'assists': 'assists',
+        'yellow_cards': 'yellow_cards',
+        'red_cards': 'red_cards',
+        'shots_per_game': 'shots',
+        'pass_success': 'pass_accuracy',
+        'aerials_won': 'duels_won',
+        'man_of_the_match': 'motm',
+        'rating': 'rating'
+    }
+
+    return mapping.get(whoscored_field, whoscored_field)
+
+def _coercers(model, reserved=()):
+    """
+    Fonctions de conversion vectorisée des colonnes d'un modèle, déduites de son schéma
+
+    Returns:
+        Un dictionnaire {nom de colonne: fonction Series -> Series}
+    """
+    coercers = {}
+    for column in model.__table__.columns:
+        if column.name in reserved:
+            continue
+        python_type = column.type.python_type
+        if python_type is int:
+            coercers[column.name] = lambda series: pd.to_numeric(series, errors='coerce').round().astype('Int64')
+        elif python_type is float:
+            coercers[column.name] = lambda series: pd.to_numeric(series, errors='coerce')
+        elif python_type is str:
+            coercers[column.name] = lambda series: series.astype('string').str.strip()
+    return coercers
+
+def _records(frame):
+    """Lignes d'un DataFrame en dictionnaires de valeurs Python (None pour les manquantes)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def _scalar_defaults(model):
+    """Valeurs par défaut constantes des colonnes d'un modèle"""
+    return {
+        column.name: column.default.arg
+        for column in model.__table__.columns
+        if column.default is not None and column.default.is_scalar
+    }
+
+def bulk_insert(model, frame):
+    """
+    Insère les lignes d'un DataFrame en une requête groupée
+
+    Les valeurs manquantes reçoivent la valeur par défaut de leur colonne.
+    """
+    if frame.empty:
+        return
+    defaults = {column: value for column, value in _scalar_defaults(model).items() if column in frame}
+    db.session.execute(model.__table__.insert(), _records(frame.fillna(defaults)))
+
+def bulk_update(model, frame, key='id'):
+    """
+    Met à jour les lignes d'un DataFrame identifiées par `key`, en requêtes groupées
+
+    Les valeurs manquantes ne modifient pas la colonne : les lignes sont
+    regroupées par ensemble de colonnes renseignées.
+    """
+    if frame.empty:
+        return
+    table = model.__table__
+    groups = {}
+    for record in _records(frame):
+        values = {column: value for column, value in record.items() if value is not None}
+        groups.setdefault(tuple(sorted(values)), []).append(values)
+
+    for columns, rows in groups.items():
+        assignments = {column: bindparam(column) for column in columns if column != key}
+        if not assignments:
+            continue
+        statement = table.update().where(table.c[key] == bindparam(f"_{key}")).values(assignments)
+        db.session.execute(statement, [dict(row, **{f"_{key}": row[key]}) for row in rows])
+
+def resolve_clubs(names):
+    """
+    Retourne les identifiants des clubs par nom, en créant les clubs absents en une seule requête
+
+    Args:
+        names: les noms des clubs
+
+    Returns:
+        Un dictionnaire {nom: identifiant}
+    """
+    names = {name for name in names if name}
+    if not names:
+        return {}
+
+    def load():
+        found = {}
+        for club_id, name in db.session.execute(
+            db.select(Club.id, Club.name).where(Club.name.in_(names)).order_by(Club.id)
+        ):
+            found.setdefault(name, club_id)
+        return found
+
+    clubs = load()
+    missing = names - clubs.keys()
+    if missing:
+        db.session.execute(Club.__table__.insert(), [
+            {"name": name, "short_name": name[:SHORT_NAME_LENGTH]} for name in sorted(missing)
+        ])
+        clubs = load()
+    return clubs
+
+def resolve_players(players):
+    """
+    Retourne les identifiants des joueurs par (nom, club), en créant les joueurs absents
+
+    Args:
+        players: dictionnaire {(nom, club_id): poste} des joueurs du bloc
+
+    Returns:
+        Un dictionnaire {(nom, club_id): identifiant}
+    """
+    if not players:
+        return {}
+
+    names = {name for name, _ in players}
+    club_ids = {club_id for _, club_id in players}
+
+    def load():
+        found = {}
+        for player_id, name, club_id in db.session.execute(
+            db.select(Player.id, Player.name, Player.club_id)
+            .where(Player.name.in_(names), Player.club_id.in_(club_ids))
+            .order_by(Player.id)
+        ):
+            found.setdefault((name, club_id), player_id)
+        return found
+
+    found = load()
+    missing = [key for key in players if key not in found]
+    if missing:
+        db.session.execute(Player.__table__.insert(), [
+            {"name": name, "club_id": club_id, "position": players[(name, club_id)]} for name, club_id in missing
+        ])
+        found = load()
+    return found
+
+def _import_player_stats_chunk(chunk, coercers):
+    """Importe un bloc de lignes de statistiques de joueurs"""
+    chunk.columns = [convert_whoscored_field_name(str(column).strip().lower().replace(' ', '_'))
+                     for column in chunk.columns]
+    chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+
+    if 'player' not in chunk or 'team' not in chunk:
+        return 0, 0, len(chunk)
+
+    chunk['player'] = chunk['player'].str.strip()
+    chunk['team'] = chunk['team'].str.strip()
+    valid = chunk['player'].notna() & (chunk['player'] != '') & chunk['team'].notna() & (chunk['team'] != '')
+    skipped = int((~valid).sum())
+    chunk = chunk[valid]
+    if chunk.empty:
+        return 0, 0, skipped
+
+    season = chunk['season'].fillna(DEFAULT_SEASON) if 'season' in chunk else pd.Series(DEFAULT_SEASON, index=chunk.index)
+    position = chunk['position'].fillna('Unknown') if 'position' in chunk else pd.Series('Unknown', index=chunk.index)
+
+    # Clubs et joueurs résolus pour tout le bloc
+    clubs = resolve_clubs(chunk['team'].unique())
+    club_ids = chunk['team'].map(clubs)
+    players = {}
+    for name, club_id, player_position in zip(chunk['player'], club_ids, position):
+        players.setdefault((name, int(club_id)), player_position)
+    player_ids = resolve_players(players)
+
+    # Conversion des colonnes de statistiques une fois par colonne
+    stats = pd.DataFrame({
+        column: coercers[column](chunk[column]) for column in chunk.columns if column in coercers
+    }, index=chunk.index)
+    stats['player_id'] = [player_ids[(name, int(club_id))] for name, club_id in zip(chunk['player'], club_ids)]
+    stats['season'] = season.values
+
+    # Plusieurs lignes pour un même joueur et une même saison : dernière valeur renseignée par colonne
+    stats = stats.groupby(['player_id', 'season'], sort=False, as_index=False).last()
+
+    existing = {
+        (player_id, stats_season): stats_id
+        for stats_id, player_id, stats_season in db.session.execute(
+            db.select(PlayerStats.id, PlayerStats.player_id, PlayerStats.season)
+            .where(PlayerStats.player_id.in_(stats['player_id'].unique().tolist()))
+        )
+    }
+
+    keys = list(zip(stats['player_id'].tolist(), stats['season'].tolist()))
+    stats['id'] = pd.array([existing.get(key) for key in keys], dtype='Int64')
+    stats['updated_at'] = datetime.utcnow()
+    is_new = stats['id'].isna()
+    inserts = stats[is_new].drop(columns='id')
+    updates = stats[~is_new]
+
+    bulk_insert(PlayerStats, inserts)
+    bulk_update(PlayerStats, updates)
+    return len(inserts), len(updates), skipped
+
+def read_csv_chunks(source, chunksize=DEFAULT_CHUNK_SIZE, compression='infer'):
+    """
+    Ouvre un CSV (éventuellement compressé en gzip) en lecture par blocs
+
+    Toutes les colonnes sont lues comme du texte ; les cellules vides sont
+    des valeurs manquantes.
+
+    Args:
+        source: chemin ou objet fichier (texte ou binaire, ex: l'upload Flask)
+        chunksize: nombre de lignes par bloc
+        compression: 'gzip', None, ou 'infer' (extension du chemin, ou
+                     signature gzip pour un objet fichier binaire)
+    """
+    if compression == 'infer' and hasattr(source, 'read'):
+        compression = None
+        if hasattr(source, 'seekable') and source.seekable():
+            position = source.tell()
+            signature = source.read(2)
+            source.seek(position)
+            if signature == GZIP_SIGNATURE:
+                compression = 'gzip'
+
+    return pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[''],
+                       skipinitialspace=True, encoding='utf-8', compression=compression)
+
+def _import_chunks(reader, import_chunk, label, progress=None):
+    """
+    Importe les blocs d'un lecteur CSV, une transaction par bloc
+
+    Args:
+        reader: le lecteur retourné par read_csv_chunks
+        import_chunk: fonction DataFrame -> (créées, mises à jour, ignorées)
+        label: description de l'import pour le journal
+        progress: fonction appelée après chaque bloc avec le résumé du bloc
+
+    Returns:
+        Un dictionnaire avec `rows`, `inserted`, `updated`, `skipped`,
+        `seconds`, `rows_per_second` et `chunks` (les mêmes valeurs par bloc)
+    """
+    start = time.monotonic()
+    summary = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0, "chunks": []}
+
+    for number, chunk in enumerate(reader, start=1):
+        chunk_start = time.monotonic()
+        try:
+            inserted, updated, skipped = import_chunk(chunk)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        seconds = time.monotonic() - chunk_start
+        chunk_summary = {
+            "chunk": number,
+            "rows": len(chunk),
+            "inserted": inserted,
+            "updated": updated,
+            "skipped": skipped,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(len(chunk) / seconds, 1) if seconds > 0 else None
+        }
+        summary["chunks"].append(chunk_summary)
+        summary["rows"] += len(chunk)
+        summary["inserted"] += inserted
+        summary["updated"] += updated
+        summary["skipped"] += skipped
+        logger.debug(f"{label}, bloc {number}: {len(chunk)} lignes ({chunk_summary['rows_per_second']} lignes/s)")
+        if progress:
+            progress(chunk_summary)
+
+    seconds = time.monotonic() - start
+    summary["seconds"] = round(seconds, 3)
+    summary["rows_per_second"] = round(summary["rows"] / seconds, 1) if seconds > 0 else None
+    logger.info(f"{label}: {summary['rows']} lignes, {summary['inserted']} créées, "
+                f"{summary['updated']} mises à jour, {summary['skipped']} ignorées en {summary['seconds']}s")
+    return summary
+
+def import_player_stats_csv(source, chunksize=DEFAULT_CHUNK_SIZE, compression='infer', progress=None):
+    """
+    Importe un fichier CSV de statistiques de joueurs WhoScored en flux
+
+    Le fichier est lu par blocs de `chunksize` lignes ; chaque bloc résout ses
+    clubs et joueurs en quelques requêtes, crée les absents, puis insère ou
+    met à jour les statistiques (joueur, saison) en une transaction.
+
+    Args:
+        source: chemin ou objet fichier (texte ou binaire, ex: l'upload Flask)
+        chunksize: nombre de lignes par bloc
+        compression: compression du fichier (voir read_csv_chunks)
+        progress: fonction appelée après chaque bloc avec le résumé du bloc
+
+    Returns:
+        Le résumé de l'import (voir _import_chunks)
+    """
+    coercers = _coercers(PlayerStats, reserved=PLAYER_STATS_RESERVED_COLUMNS)
+    return _import_chunks(
+        read_csv_chunks(source, chunksize, compression),
+        lambda chunk: _import_player_stats_chunk(chunk, coercers),
+        "Import CSV des statistiques de joueurs",
+        progress
+    )
+
+def parse_dates(values, formats=MATCH_DATE_FORMATS):
+    """
+    Convertit une colonne de dates texte en essayant plusieurs formats, de façon vectorisée
+
+    Returns:
+        Une Series datetime64 (NaT pour les valeurs non reconnues)
+    """
+    values = values.str.strip()
+    dates = pd.to_datetime(values, format=formats[0], errors='coerce')
+    for date_format in formats[1:]:
+        missing = dates.isna() & values.notna()
+        if not missing.any():
+            break
+        dates[missing] = pd.to_datetime(values[missing], format=date_format, errors='coerce')
+    return dates
+
+def _import_matches_chunk(chunk):
+    """Importe un bloc de lignes de matchs
+
+    Returns:
+        Un tuple (créés, mis à jour, ignorés, {(compétition, saison): clubs concernés})
+    """
+    chunk.columns = [str(column).strip() for column in chunk.columns]
+    if not {'HomeTeam', 'AwayTeam', 'Date'} <= set(chunk.columns):
+        return 0, 0, len(chunk), {}
+
+    home_names = chunk['HomeTeam'].str.strip()
+    away_names = chunk['AwayTeam'].str.strip()
+    dates = parse_dates(chunk['Date'])
+    valid = home_names.notna() & (home_names != '') & away_names.notna() & (away_names != '') & dates.notna()
+    skipped = int((~valid).sum())
+    if not valid.any():
+        return 0, 0, skipped, {}
+
+    def column(name, default):
+        if name in chunk:
+            return chunk.loc[valid, name].fillna(default)
+        return pd.Series(default, index=chunk.index[valid])
+
+    def goals(name):
+        if name in chunk:
+            return pd.to_numeric(chunk.loc[valid, name], errors='coerce').fillna(0).astype(int)
+        return pd.Series(0, index=chunk.index[valid])
+
+    clubs = resolve_clubs(pd.concat([home_names[valid], away_names[valid]]).unique())
+    matches = pd.DataFrame({
+        "home_team_id": home_names[valid].map(clubs).astype(int),
+        "away_team_id": away_names[valid].map(clubs).astype(int),
+        "date": dates[valid],
+        "home_team_score": goals('FTHG'),
+        "away_team_score": goals('FTAG'),
+        "competition": column('League', 'Unknown'),
+        "season": column('Season', DEFAULT_SEASON)
+    })
+
+    # Clé naturelle (domicile, extérieur, date) : la dernière ligne l'emporte
+    matches = matches.drop_duplicates(['home_team_id', 'away_team_id', 'date'], keep='last')
+    match_dates = matches['date'].dt.to_pydatetime().tolist()
+
+    existing = {
+        (row.home_team_id, row.away_team_id, row.date): row
+        for row in db.session.execute(
+            db.select(Match.id, Match.home_team_id, Match.away_team_id, Match.date, Match.competition, Match.season)
+            .where(
+                Match.home_team_id.in_(matches['home_team_id'].unique().tolist()),
+                Match.date >= min(match_dates),
+                Match.date <= max(match_dates)
+            )
+        )
+    }
+    found = [existing.get(key) for key in zip(matches['home_team_id'].tolist(), matches['away_team_id'].tolist(), match_dates)]
+
+    now = datetime.utcnow()
+    matches['status'] = 'FINISHED'
+    matches['updated_at'] = now
+    is_new = pd.Series([row is None for row in found], index=matches.index)
+
+    inserts = matches[is_new]
+    updates = matches.loc[~is_new, ['home_team_score', 'away_team_score', 'status', 'updated_at']]
+    updates.insert(0, 'id', [row.id for row in found if row is not None])
+
+    bulk_insert(Match, inserts)
+    bulk_update(Match, updates)
+
+    # Clubs concernés par compétition et saison, pour prévenir les caches
+    changes = {}
+    for (competition, season), group in inserts.groupby(['competition', 'season']):
+        changes.setdefault((competition, season), set()).update(group['home_team_id'].tolist() + group['away_team_id'].tolist())
+    for row in found:
+        if row is not None:
+            changes.setdefault((row.competition, row.season), set()).update((row.home_team_id, row.away_team_id))
+
+    return len(inserts), len(updates), skipped, changes
+
+def import_matches_csv(source, chunksize=DEFAULT_CHUNK_SIZE, compression='infer', progress=None):
+    """
+    Importe un fichier CSV de résultats de matchs en flux
+
+    Colonnes : Date, HomeTeam, AwayTeam, FTHG, FTAG, League et Season
+    (optionnelles). Les dates sont converties par colonne (YYYY-MM-DD,
+    DD/MM/YYYY ou DD/MM/YY), les clubs résolus et créés par bloc, et les
+    matchs insérés ou mis à jour selon la clé (domicile, extérieur, date).
+    Les caches dépendant des matchs sont prévenus après chaque bloc.
+
+    Args:
+        source: chemin ou objet fichier (texte ou binaire, éventuellement gzip)
+        chunksize: nombre de lignes par bloc
+        compression: compression du fichier (voir read_csv_chunks)
+        progress: fonction appelée après chaque bloc avec le résumé du bloc
+
+    Returns:
+        Le résumé de l'import (voir _import_chunks)
+    """
+    def import_chunk(chunk):
+        inserted, updated, skipped, changes = _import_matches_chunk(chunk)
+        db.session.commit()
+
+        # Les écritures groupées ne déclenchent pas les évènements du modèle Match
+        for (competition, season), club_ids in changes.items():
+            notify_match_change(club_ids=club_ids, competition=competition, season=season, status='FINISHED')
+        return inserted, updated, skipped
+
+    return _import_chunks(read_csv_chunks(source, chunksize, compression), import_chunk,
+                          "Import CSV des matchs", progress)
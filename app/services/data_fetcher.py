@@ -1,25 +1,110 @@
 # app/services/data_fetcher.py
-import requests
+import logging
 import pandas as pd
-import os
+from datetime import datetime, timedelta
 from flask import current_app
+from sqlalchemy.orm import joinedload
+from app.models.club import Club
+from app.models.match import Match
+from app.models.player import Player
+from app.models.player_stats import PlayerStats
+from app.services.cache import MemoCache, on_match_change
+from app.services.football_data_client import football_data_client
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'un match dont le résultat n'est pas encore connu
+PENDING_STATUSES = ('SCHEDULED', 'TIMED', 'LIVE', 'IN_PLAY', 'PAUSED', 'UNKNOWN')
+
+# Matchs des clubs lus en base, invalidés à chaque modification d'un match du club
+_local_matches_cache = MemoCache(maxsize=1024, ttl=600)
+
+@on_match_change
+def _invalidate_local_matches(change):
+    """Supprime les matchs mémorisés des clubs concernés par un match"""
+    club_ids = change["club_ids"]
+    if not club_ids:
+        _local_matches_cache.clear()
+    else:
+        _local_matches_cache.invalidate_where(lambda key: key[0] in club_ids)
 
 def get_football_api_data(endpoint, params=None):
-    """Récupère les données depuis une API de football"""
-    api_key = current_app.config['FOOTBALL_API_KEY']
-    base_url = "https://api.football-data.org/v4"
+    """Récupère les données depuis l'API football-data.org (session mutualisée et cache)"""
+    return football_data_client.get(endpoint, params)
+
+def _local_id(club_id):
+    """Identifiant local d'un club ou d'un joueur, None s'il n'est pas numérique"""
+    try:
+        return int(club_id)
+    except (TypeError, ValueError):
+        return None
+
+def _team_to_api_format(club):
+    """Représentation d'un club au format football-data.org"""
+    if club is None:
+        return {"id": None, "name": "Équipe inconnue", "shortName": None, "tla": None, "crest": None}
+    return {"id": club.id, "name": club.name, "shortName": club.short_name, "tla": club.tla, "crest": club.crest}
+
+def _winner(match):
+    """Vainqueur d'un match au format football-data.org"""
+    if match.status != 'FINISHED' or match.home_team_score is None or match.away_team_score is None:
+        return None
+    if match.home_team_score > match.away_team_score:
+        return "HOME_TEAM"
+    if match.home_team_score < match.away_team_score:
+        return "AWAY_TEAM"
+    return "DRAW"
+
+def match_to_api_format(match):
+    """Représentation d'un match de la base au format football-data.org
     
-    headers = {
-        "X-Auth-Token": api_key
+    Les identifiants des clubs sont les identifiants locaux.
+    """
+    return {
+        "id": match.id,
+        "utcDate": match.date.strftime('%Y-%m-%dT%H:%M:%SZ') if match.date else None,
+        "status": match.status,
+        "matchday": match.matchday,
+        "competition": {"name": match.competition},
+        "season": match.season,
+        "homeTeam": _team_to_api_format(match.home_team),
+        "awayTeam": _team_to_api_format(match.away_team),
+        "score": {
+            "winner": _winner(match),
+            "fullTime": {"home": match.home_team_score, "away": match.away_team_score},
+            "halfTime": {"home": match.half_time_home, "away": match.half_time_away}
+        },
+        "source": "local"
     }
+
+def _local_club_matches(club_id, season=None, limit=100):
+    """Matchs d'un club en base, du plus récent au plus ancien, au format football-data.org"""
+    def load():
+        query = Match.query.options(
+            joinedload(Match.home_team),
+            joinedload(Match.away_team)
+        ).filter(
+            (Match.home_team_id == club_id) | (Match.away_team_id == club_id)
+        )
+        if season:
+            query = query.filter(Match.season.like(f"{season}%"))
+        return [match_to_api_format(match) for match in query.order_by(Match.date.desc()).limit(limit)]
     
-    response = requests.get(f"{base_url}/{endpoint}", headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        # Gestion des erreurs
-        print(f"Erreur API: {response.status_code} - {response.text}")
-        return None
+    return _local_matches_cache.get_or_set((club_id, season, limit), load)
+
+def local_matches_are_fresh(club_id):
+    """Indique si les matchs d'un club en base sont à jour
+    
+    Ils ne le sont plus lorsqu'un match passé depuis plus de
+    FOOTBALL_DATA_RESULT_DELAY_HOURS heures n'a toujours pas de résultat.
+    """
+    delay = current_app.config.get('FOOTBALL_DATA_RESULT_DELAY_HOURS', 3)
+    overdue = Match.query.filter(
+        (Match.home_team_id == club_id) | (Match.away_team_id == club_id),
+        Match.status.in_(PENDING_STATUSES),
+        Match.date < datetime.utcnow() - timedelta(hours=delay)
+    ).first()
+    return overdue is None
 
 def import_csv_data(file_path):
     """Importe des données depuis un fichier CSV"""
@@ -31,8 +116,32 @@ def import_csv_data(file_path):
         return None
 
 def get_club_stats(club_id):
-    """Récupère les statistiques d'un club"""
-    # Exemple utilisant l'API
+    """Récupère les statistiques d'un club
+    
+    Le club et ses 20 derniers matchs sont lus en base lorsqu'ils y sont et à
+    jour ; l'API football-data.org n'est appelée qu'à défaut, et la base sert
+    encore de secours si l'API est indisponible.
+    """
+    local_id = _local_id(club_id)
+    club = Club.query.get(local_id) if local_id is not None else None
+    
+    local_stats = None
+    if club is not None:
+        matches = _local_club_matches(club.id, limit=20)
+        if matches:
+            local_stats = {
+                "id": club.id,
+                "name": club.name,
+                "crest": club.crest,
+                "founded": club.founded,
+                "venue": club.venue,
+                "coach": None,
+                "matches": matches,
+                "source": "local"
+            }
+            if local_matches_are_fresh(club.id):
+                return local_stats
+    
     team_data = get_football_api_data(f"teams/{club_id}")
     
     # Récupération des 20 derniers matchs
@@ -48,13 +157,23 @@ def get_club_stats(club_id):
             "venue": team_data.get("venue"),
             "coach": team_data.get("coach", {}).get("name"),
             "matches": matches["matches"],
+            "source": "api"
             # D'autres statistiques calculées à partir des matchs peuvent être ajoutées ici
         }
         return stats
-    return None
+    return local_stats
 
 def get_club_matches(club_id, season=None):
-    """Récupère les matchs d'un club pour une saison donnée"""
+    """Récupère les matchs d'un club pour une saison donnée
+    
+    Les matchs sont lus en base lorsqu'ils y sont et à jour, sinon demandés à
+    football-data.org (la base restant le secours si l'API est indisponible).
+    """
+    local_id = _local_id(club_id)
+    local_matches = _local_club_matches(local_id, season) if local_id is not None else []
+    if local_matches and local_matches_are_fresh(local_id):
+        return local_matches
+    
     params = {"team": club_id, "limit": 100}
     if season:
         params["season"] = season
@@ -63,10 +182,43 @@ def get_club_matches(club_id, season=None):
     
     if matches_data:
         return matches_data["matches"]
-    return []
+    return local_matches
+
+def _local_player_stats(player_id):
+    """Statistiques d'un joueur en base au format de get_player_stats, avec leur date de mise à jour"""
+    local_id = _local_id(player_id)
+    player = Player.query.get(local_id) if local_id is not None else None
+    if player is None:
+        return None, None
+    
+    stats = PlayerStats.query.filter_by(player_id=player.id).order_by(PlayerStats.season.desc()).first()
+    if stats is None:
+        return None, None
+    
+    player_info = {
+        "id": player.id,
+        "name": player.name,
+        "position": player.position,
+        "dateOfBirth": player.date_of_birth.isoformat() if player.date_of_birth else None,
+        "nationality": player.nationality,
+        "stats": {column.name: getattr(stats, column.name) for column in PlayerStats.__table__.columns
+                  if column.name not in ('id', 'player_id', 'created_at', 'updated_at')},
+        "source": "local"
+    }
+    return player_info, stats.updated_at
 
 def get_player_stats(player_id):
-    """Récupère les statistiques d'un joueur"""
+    """Récupère les statistiques d'un joueur
+    
+    Les statistiques en base sont utilisées si elles datent de moins de
+    FOOTBALL_DATA_PLAYER_MAX_AGE_HOURS heures, sinon elles sont demandées à
+    football-data.org (la base restant le secours si l'API est indisponible).
+    """
+    local_info, updated_at = _local_player_stats(player_id)
+    max_age = timedelta(hours=current_app.config.get('FOOTBALL_DATA_PLAYER_MAX_AGE_HOURS', 168))
+    if local_info and updated_at and datetime.utcnow() - updated_at < max_age:
+        return local_info
+    
     player_data = get_football_api_data(f"players/{player_id}")
     
     if player_data:
@@ -81,148 +233,31 @@ def get_player_stats(player_id):
                 "position": player_data.get("position"),
                 "dateOfBirth": player_data.get("dateOfBirth"),
                 "nationality": player_data.get("nationality"),
-                "stats": stats_data
+                "stats": stats_data,
+                "source": "api"
             }
             return player_info
-    return None
+    return local_info
 
 def get_player_matches(player_id, limit=10):
     """Récupère les derniers matchs d'un joueur avec ses statistiques individuelles"""
-    # Cette fonction dépend de la structure de l'API utilisée
-    # Simulons des données pour l'exemple
-    player_matches = []
-    # Dans une vraie implémentation, récupérez les données depuis l'API
-    return player_matches
-
-# app/services/data_processor.py
-import pandas as pd
-import numpy as np
-
-def process_club_performance(matches):
-    """Traite les données de matchs pour générer des statistiques de performance"""
-    if not matches:
-        return {}
-    
-    # Initialisation des compteurs
-    results = {"wins": 0, "draws": 0, "losses": 0}
-    goals_scored = 0
-    goals_conceded = 0
-    performance_timeline = []
-    
-    for match in matches:
-        # Déterminer si le club est l'équipe à domicile ou à l'extérieur
-        is_home = (match["homeTeam"]["id"] == matches[0]["homeTeam"]["id"])
-        
-        # Calculer les buts marqués et encaissés
-        if is_home:
-            team_goals = match["score"]["fullTime"]["home"] or 0
-            opponent_goals = match["score"]["fullTime"]["away"] or 0
-        else:
-            team_goals = match["score"]["fullTime"]["away"] or 0
-            opponent_goals = match["score"]["fullTime"]["home"] or 0
-        
-        goals_scored += team_goals
-        goals_conceded += opponent_goals
-        
-        # Déterminer le résultat
-        if team_goals > opponent_goals:
-            results["wins"] += 1
-            result = "W"
-        elif team_goals < opponent_goals:
-            results["losses"] += 1
-            result = "L"
-        else:
-            results["draws"] += 1
-            result = "D"
-        
-        # Ajouter au timeline
-        performance_timeline.append({
-            "date": match["utcDate"],
-            "opponent": match["homeTeam"]["name"] if not is_home else match["awayTeam"]["name"],
-            "result": result,
-            "goalsScored": team_goals,
-            "goalsConceded": opponent_goals
-        })
+    from app.services.player_timeseries import fetch_player_performances
     
-    # Calculer des statistiques supplémentaires
-    total_matches = len(matches)
-    win_percentage = (results["wins"] / total_matches) * 100 if total_matches > 0 else 0
+    rows = fetch_player_performances([player_id], limit=limit)
     
-    return {
-        "totalMatches": total_matches,
-        "results": results,
-        "winPercentage": win_percentage,
-        "goalsScored": goals_scored,
-        "goalsConceded": goals_conceded,
-        "goalDifference": goals_scored - goals_conceded,
-        "averageGoalsScored": goals_scored / total_matches if total_matches > 0 else 0,
-        "averageGoalsConceded": goals_conceded / total_matches if total_matches > 0 else 0,
-        "timeline": performance_timeline
-    }
-
-def process_player_heatmap(matches):
-    """Génère des données de carte de chaleur pour un joueur à partir de ses matchs"""
-    # Cette fonction nécessite des données de position détaillées pour chaque match
-    # Pour l'exemple, nous allons générer des données simulées
-    
-    # Dimensions standard d'un terrain de football (en mètres)
-    pitch_length = 105
-    pitch_width = 68
-    
-    # Créer une grille 2D pour représenter le terrain
-    grid_size = 10  # Taille des cellules de la grille en mètres
-    grid_length = int(pitch_length / grid_size)
-    grid_width = int(pitch_width / grid_size)
-    
-    # Initialiser la grille avec des zéros
-    heatmap_grid = np.zeros((grid_width, grid_length))
-    
-    # Dans une vraie implémentation, vous analyseriez les données réelles des matchs
-    # Pour l'exemple, nous générons des données simulées basées sur la position du joueur
-    
-    # Simuler quelques positions fréquentes pour un joueur (dépend de son poste)
-    position = "midfielder"  # À remplacer par la position réelle du joueur
-    
-    if position == "forward":
-        # Les attaquants sont plus souvent dans le dernier tiers offensif
-        for _ in range(100):
-            x = np.random.normal(grid_length * 0.8, grid_length * 0.2)
-            y = np.random.normal(grid_width * 0.5, grid_width * 0.3)
-            x = max(0, min(int(x), grid_length - 1))
-            y = max(0, min(int(y), grid_width - 1))
-            heatmap_grid[y, x] += 1
-    elif position == "midfielder":
-        # Les milieux couvrent plus le centre du terrain
-        for _ in range(100):
-            x = np.random.normal(grid_length * 0.5, grid_length * 0.3)
-            y = np.random.normal(grid_width * 0.5, grid_width * 0.3)
-            x = max(0, min(int(x), grid_length - 1))
-            y = max(0, min(int(y), grid_width - 1))
-            heatmap_grid[y, x] += 1
-    elif position == "defender":
-        # Les défenseurs restent plus dans le tiers défensif
-        for _ in range(100):
-            x = np.random.normal(grid_length * 0.2, grid_length * 0.2)
-            y = np.random.normal(grid_width * 0.5, grid_width * 0.3)
-            x = max(0, min(int(x), grid_length - 1))
-            y = max(0, min(int(y), grid_width - 1))
-            heatmap_grid[y, x] += 1
-    
-    # Convertir la grille en format pour la visualisation
-    heatmap_data = []
-    for y in range(grid_width):
-        for x in range(grid_length):
-            if heatmap_grid[y, x] > 0:
-                heatmap_data.append({
-                    "x": x * grid_size,
-                    "y": y * grid_size,
-                    "value": float(heatmap_grid[y, x])
-                })
+    player_matches = []
+    for row in rows:
+        is_home = row.team_id is not None and row.team_id == row.home_team_id
+        player_matches.append({
+            "match_id": row.match_id,
+            "date": row.date,
+            "competition": row.competition,
+            "opponent": row.away_team_name if is_home else row.home_team_name,
+            "is_home": is_home,
+            "minutes_played": row.minutes_played or 0,
+            "goals": row.goals or 0,
+            "assists": row.assists or 0,
+            "rating": row.rating
+        })
     
-    return {
-        "heatmapData": heatmap_data,
-        "pitchDimensions": {
-            "length": pitch_length,
-            "width": pitch_width
-        }
-    }
\ No newline at end of file
+    return player_matches
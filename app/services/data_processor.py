@@ -2,6 +2,9 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from sqlalchemy import select, func, union_all
+from app.services.cache import MemoCache, on_match_change
+from app.services.analytics_store import analytics_store
 import logging
 
 logger = logging.getLogger(__name__)
@@ -174,49 +177,220 @@ def process_player_heatmap(matches):
         }
     }
 
-def generate_team_comparison(team1, team2):
+# Métriques comparées : libellé affiché -> colonne calculée par équipe
+COMPARISON_METRICS = {
+    "Buts": "goals_for",
+    "Buts encaissés": "goals_against",
+    "Possession": "possession",
+    "Tirs": "shots",
+    "Corners": "corners",
+    "Fautes": "fouls",
+    "Cartons": "cards"
+}
+
+# Métriques de toutes les équipes d'une ligue, mémorisées par (compétition, saison)
+_league_metrics_cache = MemoCache(maxsize=256)
+
+@on_match_change
+def _invalidate_league_metrics(change):
+    """Supprime les métriques mémorisées de la compétition et de la saison du match modifié"""
+    _league_metrics_cache.invalidate((change["competition"], change["season"]))
+    club_ids = change["club_ids"]
+    _league_metrics_cache.invalidate_where(lambda key: key[0] == 'latest_league' and key[1] in club_ids)
+
+def _team_side_select(side, competition, season):
+    """Construit la sélection des statistiques d'un match du point de vue d'une équipe"""
+    from app.models.match import Match
+    
+    opponent = 'away' if side == 'home' else 'home'
+    column = lambda name: getattr(Match, name)
+    
+    return select(
+        column(f"{side}_team_id").label("team_id"),
+        column(f"{side}_team_score").label("goals_for"),
+        column(f"{opponent}_team_score").label("goals_against"),
+        column(f"{side}_possession").label("possession"),
+        column(f"{side}_shots").label("shots"),
+        column(f"{side}_corners").label("corners"),
+        column(f"{side}_fouls").label("fouls"),
+        (func.coalesce(column(f"{side}_yellow_cards"), 0) +
+         func.coalesce(column(f"{side}_red_cards"), 0)).label("cards")
+    ).where(
+        Match.competition == competition,
+        Match.season == season,
+        Match.status == 'FINISHED'
+    )
+
+def compute_league_team_metrics(competition, season):
+    """Calcule les moyennes par match et les percentiles de toutes les équipes d'une ligue
+    
+    Une seule requête groupée couvre toutes les équipes ; le résultat est mémorisé
+    par compétition et saison jusqu'à la prochaine modification d'un match.
+    
+    Args:
+        competition: la compétition (valeur de Match.competition)
+        season: la saison (valeur de Match.season)
+        
+    Returns:
+        Un dictionnaire {team_id: {"matches": n, "averages": {...}, "percentiles": {...}}}
+    """
+    return _league_metrics_cache.get_or_set(
+        (competition, season),
+        lambda: _compute_league_team_metrics(competition, season)
+    )
+
+def _compute_league_team_metrics(competition, season):
+    """Calcule les moyennes de chaque équipe puis les percentiles de chaque métrique"""
+    columns = list(COMPARISON_METRICS.values())
+    
+    matches = analytics_store.table('match')
+    if matches is not None:
+        team_ids, counts, values = _league_averages_from_store(matches, competition, season, columns)
+    else:
+        team_ids, counts, values = _league_averages_from_db(competition, season, columns)
+    
+    if not team_ids:
+        return {}
+    
+    # Rang centile de chaque équipe pour chaque métrique (moyenne des ex-aequo)
+    below = (values[None, :, :] < values[:, None, :]).sum(axis=1)
+    equal = (values[None, :, :] == values[:, None, :]).sum(axis=1)
+    percentiles = (below + 0.5 * equal) / len(team_ids) * 100
+    
+    metrics = {}
+    for i, team_id in enumerate(team_ids):
+        metrics[team_id] = {
+            "matches": counts[i],
+            "averages": {name: round(float(values[i, j]), 2) for j, name in enumerate(columns)},
+            "percentiles": {name: round(float(percentiles[i, j]), 1) for j, name in enumerate(columns)}
+        }
+    
+    logger.info(f"Métriques calculées pour {len(metrics)} équipes ({competition} {season})")
+    return metrics
+
+def _league_averages_from_db(competition, season, columns):
+    """Calcule les moyennes par équipe avec une requête groupée"""
+    from app import db
+    
+    sides = union_all(
+        _team_side_select('home', competition, season),
+        _team_side_select('away', competition, season)
+    ).subquery()
+    
+    query = select(
+        sides.c.team_id,
+        func.count().label("matches"),
+        *[func.avg(sides.c[name]).label(name) for name in columns]
+    ).group_by(sides.c.team_id)
+    
+    rows = db.session.execute(query).all()
+    
+    team_ids = [row.team_id for row in rows]
+    counts = [row.matches for row in rows]
+    values = np.array([[getattr(row, name) for name in columns] for row in rows], dtype=float)
+    return team_ids, counts, np.nan_to_num(values.reshape(len(rows), len(columns)), nan=0.0)
+
+def _league_averages_from_store(matches, competition, season, columns):
+    """Calcule les moyennes par équipe à partir du cache analytique en colonnes"""
+    mask = (
+        (matches.column('competition') == matches.code('competition', competition)) &
+        (matches.column('season') == matches.code('season', season)) &
+        (matches.column('status') == matches.code('status', 'FINISHED'))
+    )
+    
+    def side(prefix, opponent):
+        column = lambda name: matches.column(name)[mask].astype(float)
+        cards = np.nan_to_num(column(f"{prefix}_yellow_cards")) + np.nan_to_num(column(f"{prefix}_red_cards"))
+        return {
+            "team_id": matches.column(f"{prefix}_team_id")[mask],
+            "goals_for": column(f"{prefix}_team_score"),
+            "goals_against": column(f"{opponent}_team_score"),
+            "possession": column(f"{prefix}_possession"),
+            "shots": column(f"{prefix}_shots"),
+            "corners": column(f"{prefix}_corners"),
+            "fouls": column(f"{prefix}_fouls"),
+            "cards": cards
+        }
+    
+    home, away = side("home", "away"), side("away", "home")
+    team_column = np.concatenate([home["team_id"], away["team_id"]])
+    if team_column.size == 0:
+        return [], [], np.empty((0, len(columns)))
+    
+    team_ids, inverse = np.unique(team_column, return_inverse=True)
+    counts = np.bincount(inverse)
+    
+    # Moyenne par équipe en ignorant les valeurs manquantes, comme AVG en SQL
+    values = np.zeros((len(team_ids), len(columns)))
+    for j, name in enumerate(columns):
+        metric = np.concatenate([home[name], away[name]])
+        valid = ~np.isnan(metric)
+        sums = np.bincount(inverse, weights=np.where(valid, metric, 0.0), minlength=len(team_ids))
+        present = np.bincount(inverse, weights=valid, minlength=len(team_ids))
+        values[:, j] = np.divide(sums, present, out=np.zeros_like(sums), where=present > 0)
+    
+    return team_ids.tolist(), counts.tolist(), values
+
+def _latest_league(team):
+    """Retourne la compétition et la saison du dernier match terminé d'une équipe"""
+    from app import db
+    from app.models.match import Match
+    
+    def compute():
+        row = db.session.execute(
+            select(Match.competition, Match.season).where(
+                ((Match.home_team_id == team.id) | (Match.away_team_id == team.id)) &
+                (Match.status == 'FINISHED')
+            ).order_by(Match.date.desc()).limit(1)
+        ).first()
+        return (row.competition, row.season) if row else (None, None)
+    
+    return _league_metrics_cache.get_or_set(('latest_league', team.id), compute)
+
+def generate_team_comparison(team1, team2, competition=None, season=None):
     """Génère une comparaison statistique entre deux équipes
     
     Args:
         team1: Premier club à comparer
         team2: Second club à comparer
+        competition: la compétition de référence (par défaut celle du dernier match de team1)
+        season: la saison de référence (par défaut celle du dernier match de team1)
         
     Returns:
         Un dictionnaire contenant les statistiques comparatives
     """
-    # Initialiser le dictionnaire de comparaison
-    comparison = {
-        "team1": {
-            "name": team1.name,
-            "stats": {}
-        },
-        "team2": {
-            "name": team2.name,
-            "stats": {}
-        },
-        "categories": ["Buts", "Possession", "Tirs", "Passes", "Duels aériens", "Tacles"]
-    }
+    if competition is None or season is None:
+        latest_competition, latest_season = _latest_league(team1)
+        competition = competition or latest_competition
+        season = season or latest_season
     
-    # Pour l'exemple, nous générons des données fictives
-    comparison["team1"]["stats"] = {
-        "Buts": 1.8,  # Buts par match
-        "Possession": 55,  # Pourcentage
-        "Tirs": 14.5,  # Tirs par match
-        "Passes": 450,  # Passes par match
-        "Duels aériens": 22.3,  # Duels aériens gagnés par match
-        "Tacles": 18.7  # Tacles réussis par match
-    }
+    league_metrics = compute_league_team_metrics(competition, season) if competition else {}
     
-    comparison["team2"]["stats"] = {
-        "Buts": 1.5,
-        "Possession": 52,
-        "Tirs": 12.2,
-        "Passes": 420,
-        "Duels aériens": 19.8,
-        "Tacles": 20.1
+    # Initialiser le dictionnaire de comparaison
+    comparison = {
+        "competition": competition,
+        "season": season,
+        "categories": list(COMPARISON_METRICS.keys())
     }
     
-    # Dans une implémentation réelle, ces statistiques seraient calculées à partir des données des matchs
+    for key, team in (("team1", team1), ("team2", team2)):
+        team_metrics = league_metrics.get(team.id)
+        
+        if team_metrics:
+            stats = {label: team_metrics["averages"][name] for label, name in COMPARISON_METRICS.items()}
+            percentiles = {label: team_metrics["percentiles"][name] for label, name in COMPARISON_METRICS.items()}
+            matches = team_metrics["matches"]
+        else:
+            stats = {label: 0.0 for label in COMPARISON_METRICS}
+            percentiles = {label: None for label in COMPARISON_METRICS}
+            matches = 0
+        
+        comparison[key] = {
+            "name": team.name,
+            "matches": matches,
+            "stats": stats,
+            "percentiles": percentiles
+        }
     
     return comparison
 
@@ -225,7 +399,8 @@ def process_player_performance(player, matches):
     
     Args:
         player: Le joueur à analyser
-        matches: Liste des matchs joués par le joueur
+        matches: Liste des matchs joués par le joueur, en ordre chronologique
+            (format retourné par data_fetcher.get_player_matches)
         
     Returns:
         Un dictionnaire contenant les statistiques de performance
@@ -240,39 +415,30 @@ def process_player_performance(player, matches):
             "averageRating": 0.0
         }
     
-    # Initialiser les compteurs
-    total_minutes = 0
-    goals = 0
-    assists = 0
-    ratings = []
+    # Séries chronologiques des matchs du joueur
+    minutes = np.array([match["minutes_played"] or 0 for match in matches], dtype=float)
+    goals = np.array([match["goals"] or 0 for match in matches], dtype=float)
+    assists = np.array([match["assists"] or 0 for match in matches], dtype=float)
+    match_ratings = np.array([np.nan if match["rating"] is None else match["rating"] for match in matches], dtype=float)
     
-    # Pour l'exemple, nous générons des données fictives
+    ratings = []
     for i, match in enumerate(matches):
-        # Nombre de minutes jouées (par défaut, supposons qu'il a joué tout le match)
-        minutes = 90
-        # Note de performance (entre 6.0 et 10.0)
-        rating = 6.0 + np.random.rand() * 3.0
-        
-        total_minutes += minutes
         ratings.append({
             "match": i + 1,
-            "opponent": f"Équipe {i+1}",
-            "rating": round(rating, 1)
+            "date": match["date"].strftime('%Y-%m-%d') if match["date"] else None,
+            "opponent": match["opponent"] or "Équipe inconnue",
+            "rating": None if np.isnan(match_ratings[i]) else round(float(match_ratings[i]), 1)
         })
-        
-        # Simuler des buts et passes décisives occasionnels
-        if np.random.rand() < 0.3:  # 30% de chance de marquer
-            goals += 1
-        if np.random.rand() < 0.2:  # 20% de chance de faire une passe décisive
-            assists += 1
+    
+    rated = match_ratings[~np.isnan(match_ratings)]
     
     return {
         "totalMatches": len(matches),
-        "minutesPlayed": total_minutes,
-        "goals": goals,
-        "assists": assists,
+        "minutesPlayed": int(minutes.sum()),
+        "goals": int(goals.sum()),
+        "assists": int(assists.sum()),
         "ratings": ratings,
-        "averageRating": sum(r["rating"] for r in ratings) / len(ratings) if ratings else 0.0
+        "averageRating": round(float(rated.mean()), 2) if rated.size else 0.0
     }
 
 def calculate_player_contribution(player, team):
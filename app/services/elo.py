@@ -0,0 +1,192 @@
+# app/services/elo.py
+"""
+Classement Elo des clubs calculé sur l'historique des matchs terminés
+"""
+
+import logging
+import numpy as np
+from sqlalchemy import select, func
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.models.team_features import TeamFeatures
+from app.models.team_rating import TeamRating
+
+logger = logging.getLogger(__name__)
+
+ELO_INITIAL = 1500.0
+ELO_K = 20.0
+ELO_HOME_ADVANTAGE = 100.0
+
+def expected_home_score(home_rating, away_rating):
+    """Score attendu de l'équipe à domicile (probabilité de victoire, nul compté pour moitié)"""
+    return 1.0 / (1.0 + 10 ** ((away_rating - home_rating - ELO_HOME_ADVANTAGE) / 400.0))
+
+def _goal_multiplier(margin):
+    """Pondération du gain par l'écart de buts (méthode du World Football Elo)"""
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11.0 + margin) / 8.0))
+
+def elo_update(home_rating, away_rating, home_goals, away_goals):
+    """
+    Calcule les nouveaux classements après un match, en temps constant
+
+    Returns:
+        Un tuple (classement domicile, classement extérieur)
+    """
+    expected = expected_home_score(home_rating, away_rating)
+    result = 1.0 if home_goals > away_goals else 0.5 if home_goals == away_goals else 0.0
+    delta = ELO_K * float(_goal_multiplier(abs(home_goals - away_goals))) * (result - expected)
+    return home_rating + delta, away_rating - delta
+
+def _rating_levels(home_index, away_index, n_teams):
+    """
+    Répartit les matchs (dans l'ordre chronologique) en niveaux indépendants
+
+    Le niveau d'un match suit ceux des matchs précédents de ses deux clubs :
+    un club apparaît au plus une fois par niveau, et les niveaux traités
+    dans l'ordre donnent exactement le résultat du calcul match par match.
+    """
+    last_level = [-1] * n_teams
+    levels = np.empty(len(home_index), dtype=np.int64)
+    for position, (home, away) in enumerate(zip(home_index.tolist(), away_index.tolist())):
+        level = max(last_level[home], last_level[away]) + 1
+        last_level[home] = last_level[away] = level
+        levels[position] = level
+    return levels
+
+def compute_match_ratings(home_ids, away_ids, home_goals, away_goals):
+    """
+    Calcule le classement Elo de tous les clubs sur une suite de matchs
+
+    Les mises à jour sont vectorisées par niveaux de matchs indépendants.
+
+    Args:
+        home_ids, away_ids: identifiants des clubs, matchs triés chronologiquement
+        home_goals, away_goals: buts marqués
+
+    Returns:
+        Un dictionnaire avec les tableaux `home_rating`, `away_rating`
+        (classements après chaque match), `change` (variation du club à
+        domicile) et `ratings` ({team_id: classement final})
+    """
+    home_ids = np.asarray(home_ids, dtype=np.int64)
+    away_ids = np.asarray(away_ids, dtype=np.int64)
+    home_goals = np.asarray(home_goals, dtype=float)
+    away_goals = np.asarray(away_goals, dtype=float)
+
+    team_ids, inverse = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+    home_index, away_index = inverse[:home_ids.size], inverse[home_ids.size:]
+
+    ratings = np.full(team_ids.size, ELO_INITIAL)
+    home_rating = np.empty(home_ids.size)
+    away_rating = np.empty(home_ids.size)
+    change = np.empty(home_ids.size)
+
+    result = np.where(home_goals > away_goals, 1.0, np.where(home_goals == away_goals, 0.5, 0.0))
+    weight = ELO_K * _goal_multiplier(np.abs(home_goals - away_goals))
+
+    if home_ids.size:
+        levels = _rating_levels(home_index, away_index, team_ids.size)
+        order = np.argsort(levels, kind='stable')
+        bounds = np.flatnonzero(np.diff(levels[order])) + 1
+
+        for positions in np.split(order, bounds):
+            home, away = home_index[positions], away_index[positions]
+            delta = weight[positions] * (result[positions] - expected_home_score(ratings[home], ratings[away]))
+            ratings[home] += delta
+            ratings[away] -= delta
+            home_rating[positions] = ratings[home]
+            away_rating[positions] = ratings[away]
+            change[positions] = delta
+
+    return {
+        "home_rating": home_rating,
+        "away_rating": away_rating,
+        "change": change,
+        "ratings": dict(zip(team_ids.tolist(), ratings.tolist()))
+    }
+
+def history_rows(match_id, date, home_team_id, away_team_id, home_rating, away_rating, change):
+    """Lignes de TeamRating d'un match (une par club)"""
+    return [
+        {"team_id": home_team_id, "opponent_id": away_team_id, "match_id": match_id, "date": date,
+         "rating": round(float(home_rating), 2), "change": round(float(change), 2)},
+        {"team_id": away_team_id, "opponent_id": home_team_id, "match_id": match_id, "date": date,
+         "rating": round(float(away_rating), 2), "change": round(-float(change), 2)}
+    ]
+
+def rating_history(team_id, limit=None):
+    """
+    Historique du classement d'un club, du plus ancien au plus récent
+
+    Args:
+        team_id: l'identifiant du club
+        limit: nombre maximal de matchs les plus récents (optionnel)
+    """
+    query = TeamRating.query.filter_by(team_id=team_id).order_by(TeamRating.date.desc(), TeamRating.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return list(reversed(query.all()))
+
+def ratings_before(team_ids, before):
+    """
+    Classement de plusieurs clubs avant une date, lu dans l'historique
+
+    Returns:
+        Un dictionnaire {team_id: classement} (classement initial si aucun match)
+    """
+    latest = select(
+        TeamRating.team_id,
+        func.max(TeamRating.date).label("date")
+    ).where(
+        TeamRating.team_id.in_(list(team_ids)),
+        TeamRating.date < before
+    ).group_by(TeamRating.team_id).subquery()
+
+    rows = db.session.execute(
+        select(TeamRating.team_id, TeamRating.rating).join(
+            latest, (TeamRating.team_id == latest.c.team_id) & (TeamRating.date == latest.c.date)
+        )
+    ).all()
+
+    ratings = {team_id: ELO_INITIAL for team_id in team_ids}
+    ratings.update({row.team_id: row.rating for row in rows})
+    return ratings
+
+def elo_ranking(competition=None, season=None, limit=None):
+    """
+    Classement Elo courant des clubs, du meilleur au moins bon
+
+    Args:
+        competition: ne retenir que les clubs ayant joué dans cette compétition (optionnel)
+        season: avec `competition`, restreindre à une saison (optionnel)
+        limit: nombre maximal de clubs (optionnel)
+
+    Returns:
+        Une liste de dictionnaires {rank, team_id, name, crest, elo, matches_played}
+    """
+    query = db.session.query(TeamFeatures, Club).join(Club, Club.id == TeamFeatures.team_id)
+
+    if competition:
+        played = select(Match.home_team_id).where(Match.competition == competition)
+        played_away = select(Match.away_team_id).where(Match.competition == competition)
+        if season:
+            played = played.where(Match.season == season)
+            played_away = played_away.where(Match.season == season)
+        query = query.filter(TeamFeatures.team_id.in_(played.union(played_away)))
+
+    query = query.order_by(TeamFeatures.elo.desc())
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {
+            "rank": rank,
+            "team_id": club.id,
+            "name": club.name,
+            "crest": club.crest,
+            "elo": features.elo,
+            "matches_played": features.matches_played
+        }
+        for rank, (features, club) in enumerate(query.all(), start=1)
+    ]
@@ -0,0 +1,472 @@
+# app/services/feature_store.py
+"""
+Feature store des prédictions : caractéristiques glissantes par club
+(forme, buts, Elo et son historique, bilans domicile/extérieur) et index
+des confrontations directes, persistés et mis à jour au fil des matchs terminés
+"""
+
+import json
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from sqlalchemy import select, func, insert, update, delete
+from sqlalchemy.orm import Session
+from app import db
+from app.models.match import Match
+from app.models.team_features import TeamFeatures
+from app.models.head_to_head import HeadToHead
+from app.models.team_rating import TeamRating
+from app.services.cache import on_match_change
+from app.services.elo import ELO_INITIAL, elo_update, compute_match_ratings, history_rows
+
+logger = logging.getLogger(__name__)
+
+FORM_WINDOW = 5  # Matchs retenus pour la forme récente (même valeur que compute_recent_form)
+HEAD_TO_HEAD_WINDOW = 3  # Confrontations directes détaillées
+
+def _result_letter(goals_for, goals_against):
+    return "W" if goals_for > goals_against else "L" if goals_for < goals_against else "D"
+
+class _TeamState:
+    """État de travail d'un club pendant la mise à jour des caractéristiques"""
+
+    def __init__(self, team_id):
+        self.team_id = team_id
+        self.matches_played = 0
+        self.last_match_id = None
+        self.last_match_date = None
+        self.source_updated_at = None
+        self.elo = ELO_INITIAL
+        self.recent = deque(maxlen=FORM_WINDOW)
+        self.recent_home = deque(maxlen=FORM_WINDOW)
+        self.recent_away = deque(maxlen=FORM_WINDOW)
+
+    @classmethod
+    def from_record(cls, record):
+        state = cls(record.team_id)
+        state.matches_played = record.matches_played or 0
+        state.last_match_id = record.last_match_id
+        state.last_match_date = record.last_match_date
+        state.source_updated_at = record.source_updated_at
+        state.elo = record.elo if record.elo is not None else ELO_INITIAL
+        # Les listes enregistrées vont du plus récent au plus ancien
+        state.recent.extend(reversed(record.get_recent_matches()))
+        state.recent_home.extend(reversed(record.get_recent_matches('home')))
+        state.recent_away.extend(reversed(record.get_recent_matches('away')))
+        return state
+
+    def add_match(self, row, is_home, elo):
+        goals_for, goals_against = (row.home_goals, row.away_goals) if is_home else (row.away_goals, row.home_goals)
+        entry = [row.id, row.date.isoformat(timespec='seconds'), is_home, goals_for, goals_against]
+
+        self.matches_played += 1
+        self.last_match_id = row.id
+        self.last_match_date = row.date
+        if row.updated_at is not None and (self.source_updated_at is None or row.updated_at > self.source_updated_at):
+            self.source_updated_at = row.updated_at
+        self.elo = elo
+        self.recent.append(entry)
+        (self.recent_home if is_home else self.recent_away).append(entry)
+
+    def to_row(self):
+        """Convertit l'état en colonnes de TeamFeatures"""
+        row = {
+            "team_id": self.team_id,
+            "matches_played": self.matches_played,
+            "last_match_id": self.last_match_id,
+            "last_match_date": self.last_match_date,
+            "source_updated_at": self.source_updated_at,
+            "elo": round(self.elo, 2),
+            "updated_at": datetime.utcnow()
+        }
+
+        for prefix, column, matches in (("", "recent_matches", self.recent),
+                                        ("home_", "recent_home_matches", self.recent_home),
+                                        ("away_", "recent_away_matches", self.recent_away)):
+            latest_first = list(reversed(matches))
+            row[column] = json.dumps(latest_first)
+            row[f"{prefix}form_string"] = "".join(_result_letter(match[3], match[4]) for match in latest_first)
+            row[f"{prefix}goals_for"] = sum(match[3] for match in latest_first)
+            row[f"{prefix}goals_against"] = sum(match[4] for match in latest_first)
+
+        return row
+
+class _PairState:
+    """État de travail des confrontations directes d'une paire de clubs"""
+
+    def __init__(self, team_a_id, team_b_id):
+        self.team_a_id = team_a_id
+        self.team_b_id = team_b_id
+        self.total_matches = 0
+        self.team_a_wins = 0
+        self.draws = 0
+        self.team_b_wins = 0
+        self.last_match_date = None
+        self.last_matches = deque(maxlen=HEAD_TO_HEAD_WINDOW)
+
+    @classmethod
+    def from_record(cls, record):
+        state = cls(record.team_a_id, record.team_b_id)
+        state.total_matches = record.total_matches or 0
+        state.team_a_wins = record.team_a_wins or 0
+        state.draws = record.draws or 0
+        state.team_b_wins = record.team_b_wins or 0
+        state.last_match_date = record.last_match_date
+        state.last_matches.extend(reversed(record.get_last_matches()))
+        return state
+
+    def add_match(self, row):
+        self.total_matches += 1
+        self.last_match_date = row.date
+
+        winner = None
+        if row.home_goals > row.away_goals:
+            winner = row.home_team_id
+        elif row.away_goals > row.home_goals:
+            winner = row.away_team_id
+
+        if winner is None:
+            self.draws += 1
+        elif winner == self.team_a_id:
+            self.team_a_wins += 1
+        else:
+            self.team_b_wins += 1
+
+        self.last_matches.append({
+            "id": row.id,
+            "date": row.date.isoformat(timespec='seconds'),
+            "home_team_id": row.home_team_id,
+            "away_team_id": row.away_team_id,
+            "home_score": row.home_goals,
+            "away_score": row.away_goals
+        })
+
+    def to_row(self):
+        """Convertit l'état en colonnes de HeadToHead"""
+        return {
+            "team_a_id": self.team_a_id,
+            "team_b_id": self.team_b_id,
+            "total_matches": self.total_matches,
+            "team_a_wins": self.team_a_wins,
+            "draws": self.draws,
+            "team_b_wins": self.team_b_wins,
+            "last_match_date": self.last_match_date,
+            "last_matches": json.dumps(list(reversed(self.last_matches))),
+            "updated_at": datetime.utcnow()
+        }
+
+def _apply_match(teams, pairs, row, home_elo=None, away_elo=None):
+    """
+    Ajoute un match terminé aux états des deux clubs et de leur paire
+
+    Args:
+        home_elo, away_elo: classements après le match s'ils sont déjà calculés
+                            (sinon mise à jour Elo en temps constant)
+
+    Returns:
+        Les lignes d'historique Elo du match
+    """
+    for team_id in (row.home_team_id, row.away_team_id):
+        if team_id not in teams:
+            teams[team_id] = _TeamState(team_id)
+    home, away = teams[row.home_team_id], teams[row.away_team_id]
+
+    if home_elo is None:
+        home_elo, away_elo = elo_update(home.elo, away.elo, row.home_goals, row.away_goals)
+    change = home_elo - home.elo
+
+    home.add_match(row, True, home_elo)
+    away.add_match(row, False, away_elo)
+
+    key = HeadToHead.key(row.home_team_id, row.away_team_id)
+    if key not in pairs:
+        pairs[key] = _PairState(*key)
+    pairs[key].add_match(row)
+
+    return history_rows(row.id, row.date, row.home_team_id, row.away_team_id, home_elo, away_elo, change)
+
+def _match_rows_query():
+    """Requête des matchs terminés dans l'ordre chronologique (scores manquants à 0)"""
+    return select(
+        Match.id,
+        Match.date,
+        Match.home_team_id,
+        Match.away_team_id,
+        func.coalesce(Match.home_team_score, 0).label("home_goals"),
+        func.coalesce(Match.away_team_score, 0).label("away_goals"),
+        Match.updated_at
+    ).where(
+        Match.status == 'FINISHED',
+        Match.date.isnot(None),
+        Match.home_team_id.isnot(None),
+        Match.away_team_id.isnot(None)
+    ).order_by(Match.date, Match.id)
+
+class FeatureStore:
+    """
+    Caractéristiques de prédiction persistées dans TeamFeatures et HeadToHead
+
+    Les matchs terminés modifiés depuis le dernier passage (updated_at) sont
+    appliqués un par un lorsqu'ils sont postérieurs au dernier match compté
+    de leurs clubs ; un match antérieur, une correction de score ou une
+    suppression déclenchent une reconstruction complète en un seul passage
+    sur l'historique.
+
+    Les écritures passent par une session dédiée : une synchronisation
+    déclenchée pendant une lecture ne valide jamais la session de la requête.
+    """
+
+    def __init__(self, refresh_interval=60, batch_size=10000):
+        self.enabled = True
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.last_sync = None
+        self._last_sync_monotonic = None
+        self._watermark = None
+        self._pending_changes = 0
+        self._needs_rebuild = False
+        self._lock = threading.RLock()
+
+        on_match_change(self._on_match_change)
+
+    def init_app(self, app, warm_up=True):
+        """Configure le feature store avec l'application Flask et le synchronise
+
+        Args:
+            app: l'application Flask
+            warm_up: synchroniser immédiatement (sinon à la première lecture)
+        """
+        self.enabled = app.config.get('FEATURE_STORE_ENABLED', True)
+        self.refresh_interval = app.config.get('FEATURE_STORE_REFRESH_SECONDS', 60)
+
+        if not self.enabled or not warm_up:
+            return
+
+        try:
+            with app.app_context():
+                self.sync()
+        except Exception as e:
+            logger.error(f"Erreur lors de la synchronisation du feature store: {str(e)}")
+
+    def _on_match_change(self, change):
+        """Note qu'un match a changé depuis la dernière synchronisation"""
+        with self._lock:
+            self._pending_changes += 1
+            if change.get("deleted") and change.get("status") == 'FINISHED':
+                self._needs_rebuild = True
+
+    def rebuild(self, session=None):
+        """Recalcule toutes les caractéristiques en un passage sur les matchs terminés
+
+        Les classements Elo et leur historique sont calculés de façon vectorisée.
+
+        Args:
+            session: la session dédiée de `sync` (une session propre est ouverte sinon)
+        """
+        if session is None:
+            with Session(db.engine) as session:
+                return self.rebuild(session)
+
+        start = time.monotonic()
+        teams = {}
+        pairs = {}
+        history = []
+
+        result = session.execute(_match_rows_query().execution_options(yield_per=self.batch_size))
+        rows = [row for partition in result.partitions() for row in partition]
+
+        ratings = compute_match_ratings(
+            [row.home_team_id for row in rows], [row.away_team_id for row in rows],
+            [row.home_goals for row in rows], [row.away_goals for row in rows]
+        )
+        for row, home_elo, away_elo in zip(rows, ratings["home_rating"].tolist(), ratings["away_rating"].tolist()):
+            history.extend(_apply_match(teams, pairs, row, home_elo, away_elo))
+
+        session.execute(delete(TeamRating))
+        session.execute(delete(HeadToHead))
+        session.execute(delete(TeamFeatures))
+        if teams:
+            session.execute(insert(TeamFeatures), [state.to_row() for state in teams.values()])
+        if pairs:
+            session.execute(insert(HeadToHead), [state.to_row() for state in pairs.values()])
+        for offset in range(0, len(history), self.batch_size):
+            session.execute(insert(TeamRating), history[offset:offset + self.batch_size])
+        session.commit()
+
+        sources = [state.source_updated_at for state in teams.values() if state.source_updated_at]
+        self._watermark = max(sources) if sources else None
+
+        logger.info(f"Feature store reconstruit en {time.monotonic() - start:.2f}s "
+                    f"({len(rows)} matchs, {len(teams)} clubs, {len(pairs)} confrontations)")
+
+    def sync(self):
+        """
+        Applique les matchs modifiés depuis la dernière synchronisation, dans
+        une session dédiée (la session de la requête en cours n'est pas touchée)
+
+        Returns:
+            Le nombre de matchs appliqués incrémentalement, ou None en cas de reconstruction
+        """
+        with self._lock:
+            needs_rebuild = self._needs_rebuild
+            self._needs_rebuild = False
+            self._pending_changes = 0
+
+            try:
+                with Session(db.engine) as session:
+                    if self._watermark is None:
+                        self._watermark = session.execute(select(func.max(TeamFeatures.source_updated_at))).scalar()
+                        needs_rebuild = needs_rebuild or self._watermark is None
+
+                    if needs_rebuild:
+                        self.rebuild(session)
+                        return None
+
+                    rows = session.execute(
+                        _match_rows_query().where(Match.updated_at > self._watermark)
+                    ).all()
+                    if not rows:
+                        return 0
+
+                    applied = self._apply_incremental(session, rows)
+                    if applied is None:
+                        session.rollback()
+                        self.rebuild(session)
+                    return applied
+            except Exception:
+                # La modification n'a pas été appliquée : elle le sera au prochain passage
+                self._needs_rebuild = self._needs_rebuild or needs_rebuild
+                self._pending_changes += 1
+                raise
+            finally:
+                self.last_sync = datetime.utcnow()
+                self._last_sync_monotonic = time.monotonic()
+
+    def _apply_incremental(self, session, rows):
+        """
+        Applique des matchs postérieurs aux derniers matchs comptés
+
+        Args:
+            session: la session dédiée de `sync`
+            rows: les matchs modifiés depuis la dernière synchronisation
+
+        Returns:
+            Le nombre de matchs appliqués, ou None si une reconstruction est nécessaire
+        """
+        team_ids = {row.home_team_id for row in rows} | {row.away_team_id for row in rows}
+        teams = {
+            record.team_id: _TeamState.from_record(record)
+            for record in session.scalars(select(TeamFeatures).where(TeamFeatures.team_id.in_(team_ids)))
+        }
+        keys = {HeadToHead.key(row.home_team_id, row.away_team_id) for row in rows}
+        pairs = {
+            (record.team_a_id, record.team_b_id): _PairState.from_record(record)
+            for record in session.scalars(select(HeadToHead).where(
+                HeadToHead.team_a_id.in_({key[0] for key in keys}),
+                HeadToHead.team_b_id.in_({key[1] for key in keys})
+            ))
+            if (record.team_a_id, record.team_b_id) in keys
+        }
+        existing_teams = set(teams)
+        existing_pairs = set(pairs)
+        history = []
+
+        for row in rows:
+            for team_id in (row.home_team_id, row.away_team_id):
+                state = teams.get(team_id)
+                # Match déjà compté ou antérieur au dernier match compté : l'ordre n'est plus respecté
+                if state is not None and state.last_match_date is not None and row.date <= state.last_match_date:
+                    logger.info(f"Match {row.id} antérieur aux caractéristiques du club {team_id}, reconstruction")
+                    return None
+            history.extend(_apply_match(teams, pairs, row))
+
+        if history:
+            session.execute(insert(TeamRating), history)
+        for team_id, state in teams.items():
+            if team_id in existing_teams:
+                session.execute(update(TeamFeatures).where(TeamFeatures.team_id == team_id).values(state.to_row()))
+            else:
+                session.execute(insert(TeamFeatures), [state.to_row()])
+        for key, state in pairs.items():
+            if key in existing_pairs:
+                session.execute(update(HeadToHead).where(
+                    HeadToHead.team_a_id == key[0], HeadToHead.team_b_id == key[1]
+                ).values(state.to_row()))
+            else:
+                session.execute(insert(HeadToHead), [state.to_row()])
+        session.commit()
+
+        self._watermark = max([self._watermark] + [row.updated_at for row in rows if row.updated_at])
+        logger.info(f"Feature store: {len(rows)} matchs appliqués")
+        return len(rows)
+
+    def ensure_current(self):
+        """Synchronise le feature store si des matchs ont changé ou si l'intervalle est dépassé"""
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            needs_sync = (
+                self._pending_changes > 0 or
+                self._needs_rebuild or
+                self._last_sync_monotonic is None or
+                time.monotonic() - self._last_sync_monotonic > self.refresh_interval
+            )
+
+        if needs_sync:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Erreur lors de la synchronisation du feature store: {str(e)}")
+                return False
+        return True
+
+    def team_features(self, team_ids):
+        """
+        Retourne les caractéristiques de plusieurs clubs
+
+        Returns:
+            Un dictionnaire {team_id: TeamFeatures}
+        """
+        if not self.ensure_current():
+            return {}
+        return {
+            record.team_id: record
+            # populate_existing : les objets déjà chargés par la requête reflètent la dernière synchronisation
+            for record in TeamFeatures.query.filter(TeamFeatures.team_id.in_(list(team_ids))).populate_existing()
+        }
+
+    def match_features(self, home_team_id, away_team_id, before=None):
+        """
+        Assemble les caractéristiques d'un match : deux lectures par clé
+
+        Args:
+            home_team_id: l'identifiant du club à domicile
+            away_team_id: l'identifiant du club à l'extérieur
+            before: date du match ; les caractéristiques ne sont valables que
+                    si elle est postérieure aux derniers matchs comptés
+
+        Returns:
+            Un dictionnaire {home, away, head_to_head} avec les TeamFeatures des
+            clubs et les confrontations directes, ou None si le feature store
+            ne peut pas répondre (club inconnu, date passée ou store désactivé)
+        """
+        teams = self.team_features((home_team_id, away_team_id))
+        home, away = teams.get(home_team_id), teams.get(away_team_id)
+        if home is None or away is None:
+            return None
+
+        if before is not None and any(team.last_match_date and team.last_match_date >= before for team in (home, away)):
+            return None
+
+        pair = db.session.get(HeadToHead, HeadToHead.key(home_team_id, away_team_id), populate_existing=True)
+        return {
+            "home": home,
+            "away": away,
+            "head_to_head": pair.to_dict() if pair else {"total_matches": 0, "last_matches": []}
+        }
+
+# Instance partagée par le processus
+feature_store = FeatureStore()
@@ -0,0 +1,98 @@
+# app/services/football_data_client.py
+"""
+Client de l'API football-data.org : session HTTP mutualisée, délais
+stricts et réponses mémorisées
+"""
+
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from app.services.cache import MemoCache
+
+logger = logging.getLogger(__name__)
+
+class FootballDataClient:
+    """
+    Client HTTP de football-data.org partagé par le processus
+
+    Les réponses réussies sont mémorisées `cache_ttl` secondes par
+    (endpoint, paramètres) ; une erreur ou un délai dépassé retourne None
+    sans lever d'exception.
+    """
+
+    BASE_URL = "https://api.football-data.org/v4"
+
+    def __init__(self, api_key=None, connect_timeout=3, read_timeout=10, cache_ttl=900, cache_size=512, pool_size=4):
+        """
+        Args:
+            api_key: clé de l'API (FOOTBALL_API_KEY)
+            connect_timeout: délai de connexion en secondes
+            read_timeout: délai de réponse en secondes
+            cache_ttl: durée de vie des réponses mémorisées, en secondes
+            cache_size: nombre maximal de réponses mémorisées
+            pool_size: nombre de connexions conservées dans la session
+        """
+        self.api_key = api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = pool_size
+        self.cache = MemoCache(maxsize=cache_size, ttl=cache_ttl)
+        self.session = self._create_session()
+
+    def _create_session(self):
+        """Crée la session HTTP mutualisée"""
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+        return session
+
+    def init_app(self, app):
+        """Configure le client avec l'application Flask"""
+        self.api_key = app.config.get('FOOTBALL_API_KEY')
+        self.connect_timeout = app.config.get('FOOTBALL_DATA_CONNECT_TIMEOUT', self.connect_timeout)
+        self.read_timeout = app.config.get('FOOTBALL_DATA_TIMEOUT', self.read_timeout)
+        self.pool_size = app.config.get('FOOTBALL_DATA_POOL_SIZE', self.pool_size)
+        self.cache = MemoCache(
+            maxsize=app.config.get('FOOTBALL_DATA_CACHE_SIZE', 512),
+            ttl=app.config.get('FOOTBALL_DATA_CACHE_TTL', 900)
+        )
+
+        self.session.close()
+        self.session = self._create_session()
+
+    def get(self, endpoint, params=None):
+        """
+        Récupère une ressource de l'API, depuis le cache si possible
+
+        Args:
+            endpoint: le chemin de la ressource (ex: "teams/65")
+            params: les paramètres de la requête (optionnel)
+
+        Returns:
+            Le JSON de la réponse, ou None en cas d'erreur
+        """
+        cache_key = (endpoint, tuple(sorted((params or {}).items())))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.session.get(
+                f"{self.BASE_URL}/{endpoint}",
+                headers={"X-Auth-Token": self.api_key},
+                params=params,
+                timeout=(self.connect_timeout, self.read_timeout)
+            )
+        except requests.RequestException as e:
+            logger.warning(f"football-data.org injoignable ({endpoint}): {str(e)}")
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"Erreur API football-data.org ({endpoint}): {response.status_code} - {response.text[:200]}")
+            return None
+
+        data = response.json()
+        self.cache.set(cache_key, data)
+        return data
+
+# Instance partagée par le processus
+football_data_client = FootballDataClient()
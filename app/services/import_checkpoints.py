@@ -0,0 +1,109 @@
+# app/services/import_checkpoints.py
+"""
+Points de reprise des imports longs
+
+Un import est découpé en unités (pages, équipes, joueurs) ; chaque unité
+terminée est inscrite dans la table `import_checkpoint`, jamais avant que
+les lignes qu'elle a produites soient validées en base. Un import relancé en mode
+reprise saute les unités déjà inscrites : après un arrêt, seules les
+dernières minutes de travail sont refaites, les écritures étant par
+ailleurs idempotentes (mise à jour des lignes existantes).
+"""
+
+import json
+import logging
+import threading
+from sqlalchemy import func
+from app import db
+from app.models.import_checkpoint import ImportCheckpoint
+
+logger = logging.getLogger(__name__)
+
+def import_key(*parts):
+    """Clé d'un import : `import_key('whoscored', 'league', '252/2', '9618')` -> 'whoscored:league:252/2:9618'"""
+    return ':'.join(str(part) for part in parts)
+
+class ImportCheckpoints:
+    """
+    Unités terminées d'un import, chargées en mémoire au démarrage
+
+    `mark` ajoute l'inscription à la session courante sans la valider :
+    l'appelant la valide avec les données de l'unité.
+    """
+
+    def __init__(self, key, resume=False):
+        """
+        Args:
+            key: la clé de l'import (voir `import_key`)
+            resume: reprendre l'import ; sinon les points de reprise
+                précédents de cette clé sont effacés et tout est refait
+        """
+        self.key = key
+        self.resume = resume
+        self._lock = threading.Lock()
+        if not resume:
+            self.clear()
+        self._done = {}
+        for row in ImportCheckpoint.query.filter_by(import_key=key).all():
+            self._done.setdefault(row.unit_type, {})[row.unit_id] = row.get_payload()
+        if resume:
+            logger.info(f"Reprise de l'import {key}: {self.summary()}")
+
+    def is_done(self, unit_type, unit_id):
+        """Indique si une unité est déjà terminée"""
+        return str(unit_id) in self._done.get(unit_type, {})
+
+    def payload(self, unit_type, unit_id):
+        """Données enregistrées avec une unité terminée (None si absente)"""
+        return self._done.get(unit_type, {}).get(str(unit_id))
+
+    def done(self, unit_type):
+        """Unités terminées d'un type : {identifiant: données}"""
+        with self._lock:
+            return dict(self._done.get(unit_type, {}))
+
+    def mark(self, unit_type, unit_id, payload=None):
+        """
+        Inscrit une unité terminée dans la session courante (à valider par l'appelant)
+
+        Une unité déjà inscrite n'est pas inscrite une seconde fois.
+
+        Returns:
+            True si l'unité a été ajoutée à la session, False si elle était déjà inscrite
+        """
+        unit_id = str(unit_id)
+        with self._lock:
+            units = self._done.setdefault(unit_type, {})
+            if unit_id in units:
+                return False
+            units[unit_id] = payload
+        db.session.add(ImportCheckpoint(import_key=self.key, unit_type=unit_type, unit_id=unit_id,
+                                        payload=json.dumps(payload) if payload is not None else None))
+        return True
+
+    def forget(self, unit_type, unit_id):
+        """Retire de la mémoire une unité dont l'inscription n'a pas pu être validée"""
+        with self._lock:
+            self._done.get(unit_type, {}).pop(str(unit_id), None)
+
+    def clear(self):
+        """Efface les points de reprise de l'import"""
+        ImportCheckpoint.query.filter_by(import_key=self.key).delete(synchronize_session=False)
+        db.session.commit()
+
+    def summary(self):
+        """Nombre d'unités terminées par type"""
+        with self._lock:
+            return {unit_type: len(units) for unit_type, units in self._done.items()}
+
+def list_imports():
+    """
+    Imports ayant des points de reprise
+
+    Returns:
+        Une liste de dictionnaires {key, units, last_completed_at}
+    """
+    rows = db.session.query(
+        ImportCheckpoint.import_key, func.count(ImportCheckpoint.id), func.max(ImportCheckpoint.completed_at)
+    ).group_by(ImportCheckpoint.import_key).order_by(func.max(ImportCheckpoint.completed_at).desc()).all()
+    return [{"key": key, "units": units, "last_completed_at": last} for key, units, last in rows]
@@ -0,0 +1,512 @@
+# app/services/import_pipeline.py
+"""
+Import d'une ligue WhoScored en pipeline : téléchargement, analyse et
+écriture en base sont des étapes séparées, reliées par des files
+
+    téléchargement (N threads, budget de politesse par hôte)
+        -> file bornée des pages -> analyse (pool de threads)
+        -> file bornée des lignes -> écriture (un thread, par lots)
+
+L'analyse d'une page de ligue ou d'équipe ajoute de nouvelles pages à
+télécharger : cette file-là n'est pas bornée (elle ne contient que des
+URL), sans quoi téléchargement et analyse pourraient s'attendre
+mutuellement. Les lignes d'un club, puis de ses joueurs, puis de leurs
+statistiques sont produites dans cet ordre, et l'unique thread d'écriture
+les enregistre donc toujours après celles dont elles dépendent.
+
+Avec des points de reprise (ImportCheckpoints), la page de la ligue, chaque
+équipe et chaque joueur sont inscrits comme terminés une fois toutes leurs
+lignes validées en base ; en reprise, les unités inscrites ne sont ni
+téléchargées ni analysées à nouveau.
+"""
+
+import time
+import queue
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from flask import current_app
+from app import db
+from app.models.club import Club
+from app.models.player import Player
+from app.models.player_stats import PlayerStats
+
+logger = logging.getLogger(__name__)
+
+class PolitenessBudget:
+    """
+    Budget de requêtes par hôte, partagé par les threads de téléchargement
+
+    Deux requêtes vers un même hôte démarrent à au moins `min_interval`
+    secondes d'écart (allongé d'une part aléatoire jusqu'à `jitter`), et au
+    plus `max_concurrent` sont en cours simultanément.
+    """
+
+    def __init__(self, min_interval=3.0, jitter=0.5, max_concurrent=2):
+        """
+        Args:
+            min_interval: écart minimal entre deux requêtes vers un hôte, en secondes
+            jitter: part aléatoire ajoutée à l'écart (0.5 : jusqu'à +50 %)
+            max_concurrent: requêtes simultanées au plus par hôte
+        """
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.max_concurrent = max_concurrent
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Budget configuré par WHOSCORED_HOST_MIN_INTERVAL, _JITTER et _MAX_CONCURRENT"""
+        return cls(min_interval=config.get('WHOSCORED_HOST_MIN_INTERVAL', 3.0),
+                   jitter=config.get('WHOSCORED_HOST_JITTER', 0.5),
+                   max_concurrent=config.get('WHOSCORED_HOST_MAX_CONCURRENT', 2))
+
+    def _host(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = {"semaphore": threading.BoundedSemaphore(self.max_concurrent), "next_at": 0.0}
+            return self._hosts[host]
+
+    @contextmanager
+    def slot(self, url):
+        """Attend le tour de l'hôte de `url` puis l'occupe le temps de la requête"""
+        state = self._host(url)
+        with state["semaphore"]:
+            with self._lock:
+                start = max(time.monotonic(), state["next_at"])
+                state["next_at"] = start + self.min_interval * (1 + random.uniform(0, self.jitter))
+            delay = start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            yield
+
+class StageCounters:
+    """Compteurs de débit d'une étape du pipeline"""
+
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, items=1, error=False):
+        with self._lock:
+            self.busy_seconds += seconds
+            if error:
+                self.errors += 1
+            else:
+                self.processed += items
+
+    def snapshot(self, elapsed, queued=None):
+        """
+        Returns:
+            Un dictionnaire {processed, errors, busy_seconds, per_second, queued}
+        """
+        with self._lock:
+            return {
+                "processed": self.processed,
+                "errors": self.errors,
+                "busy_seconds": round(self.busy_seconds, 2),
+                "per_second": round(self.processed / elapsed, 2) if elapsed else None,
+                "queued": queued
+            }
+
+class LeaguePipeline:
+    """
+    Import des équipes, joueurs et statistiques d'une ligue WhoScored
+
+    Usage:
+        pipeline = LeaguePipeline(league_id, season_id, fetcher_factory)
+        stats = pipeline.run(progress=callback)
+    """
+
+    def __init__(self, league_id, season_id, fetcher_factory, fetch_workers=2, parse_workers=2,
+                 batch_size=200, queue_size=50, flush_seconds=2.0, checkpoints=None):
+        """
+        Args:
+            league_id: l'identifiant de la ligue
+            season_id: l'identifiant de la saison
+            fetcher_factory: crée un WhoScoredDataFetcher (un par thread de
+                téléchargement, les sessions HTTP n'étant pas partagées)
+            fetch_workers: threads de téléchargement
+            parse_workers: threads d'analyse
+            batch_size: lignes écrites par transaction au plus
+            queue_size: capacité des files de pages et de lignes
+            flush_seconds: délai maximal avant l'écriture d'un lot incomplet
+            checkpoints: points de reprise de l'import (ImportCheckpoints, optionnel)
+        """
+        self.league_id = league_id
+        self.season_id = season_id
+        self.fetcher_factory = fetcher_factory
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.checkpoints = checkpoints
+
+        self._fetch_queue = queue.Queue()
+        self._parse_queue = queue.Queue(maxsize=queue_size)
+        self._write_queue = queue.Queue(maxsize=queue_size)
+        self._counters = {name: StageCounters(name) for name in ('fetch', 'parse', 'write')}
+        self._totals = {"teams": 0, "players": 0, "stats": 0, "skipped": 0}
+        self._pending = 0  # pages à télécharger ou en cours d'analyse
+        self._condition = threading.Condition()
+        self._finished = threading.Event()
+        self._stopped = threading.Event()
+        self._started_at = None
+        self._batches = 0
+        self._written = set()  # lignes validées en base (thread d'écriture)
+
+    # Suivi des pages en cours
+
+    def _submit(self, kind, url, **context):
+        with self._condition:
+            self._pending += 1
+        self._fetch_queue.put((kind, url, context))
+
+    def _done(self):
+        with self._condition:
+            self._pending -= 1
+            if self._pending == 0:
+                self._condition.notify_all()
+
+    def _count(self, key, count):
+        with self._condition:
+            self._totals[key] += count
+
+    def _put(self, target, item):
+        """Ajoute à une file bornée, sans rester bloqué si le pipeline est arrêté"""
+        while not self._stopped.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        """Prochain élément d'une file, ou None quand le pipeline est terminé ou arrêté"""
+        while not self._stopped.is_set():
+            try:
+                return source.get(timeout=0.5)
+            except queue.Empty:
+                if self._finished.is_set():
+                    return None
+        return None
+
+    # Étapes
+
+    def _fetch_worker(self):
+        fetcher = self.fetcher_factory()
+        while True:
+            task = self._get(self._fetch_queue)
+            if task is None:
+                return
+            kind, url, context = task
+            start = time.perf_counter()
+            try:
+                html = fetcher._get_page(url)
+            except Exception as e:
+                logger.error(f"Téléchargement impossible de {url}: {str(e)}")
+                self._counters['fetch'].record(time.perf_counter() - start, error=True)
+                self._done()
+                continue
+            self._counters['fetch'].record(time.perf_counter() - start)
+            if not self._put(self._parse_queue, (kind, html, context)):
+                self._done()
+
+    def _parse_worker(self):
+        fetcher = self.fetcher_factory()
+        while True:
+            task = self._get(self._parse_queue)
+            if task is None:
+                return
+            kind, html, context = task
+            start = time.perf_counter()
+            try:
+                self._parse(fetcher, kind, html, context)
+                self._counters['parse'].record(time.perf_counter() - start)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'analyse d'une page {kind} ({context}): {str(e)}")
+                self._counters['parse'].record(time.perf_counter() - start, error=True)
+            finally:
+                self._done()
+
+    def _is_done(self, unit_type, unit_id):
+        return self.checkpoints is not None and self.checkpoints.is_done(unit_type, unit_id)
+
+    def _checkpoint(self, unit_type, unit_id, payload=None, requires=()):
+        """
+        Transmet à l'écriture l'inscription d'une unité, après ses lignes
+
+        Args:
+            requires: clés des lignes de l'unité ; elle n'est inscrite qu'une
+                fois toutes ces lignes validées en base
+        """
+        if self.checkpoints is not None:
+            self._put(self._write_queue, ('checkpoint', (unit_type, unit_id, payload, frozenset(requires))))
+
+    def _queue_teams(self, fetcher, teams):
+        """Ajoute les pages des équipes à télécharger ; une équipe terminée ne renvoie que ses joueurs restants"""
+        for team in teams:
+            if self._is_done('team', team['id']):
+                self._count("skipped", 1)
+                self._queue_players(fetcher, self.checkpoints.payload('team', team['id']) or [])
+            else:
+                self._submit('team', fetcher.team_url(team['id']), team_id=team['id'])
+
+    def _queue_players(self, fetcher, players):
+        for player in players:
+            if self._is_done('player', player['id']):
+                self._count("skipped", 1)
+            else:
+                self._submit('player', fetcher.player_url(player['id']), player_id=player['id'])
+
+    def _parse(self, fetcher, kind, html, context):
+        """Analyse une page, transmet ses lignes à l'écriture et ajoute les pages qu'elle référence"""
+        if kind == 'league':
+            teams = fetcher.teams_from_page(html, self.league_id, self.season_id)
+            for team in teams:
+                self._put(self._write_queue, ('club', team))
+            self._checkpoint('page', 'league', [{'id': team['id'], 'name': team['name']} for team in teams],
+                             requires=[('club', str(team['id'])) for team in teams])
+            self._count("teams", len(teams))
+            self._queue_teams(fetcher, teams)
+        elif kind == 'team':
+            players = fetcher.players_from_page(html, context['team_id'], self.season_id)
+            for player in players:
+                self._put(self._write_queue, ('player', player))
+            self._checkpoint('team', context['team_id'], [{'id': player['id'], 'name': player['name']} for player in players],
+                             requires=[('player', str(player['id'])) for player in players])
+            self._count("players", len(players))
+            self._queue_players(fetcher, players)
+        elif kind == 'player':
+            self._put(self._write_queue, ('stats', fetcher.stats_from_page(html, context['player_id'], self.season_id)))
+            self._checkpoint('player', context['player_id'], requires=[('stats', str(context['player_id']))])
+
+    def _write_worker(self, app):
+        fetcher = self.fetcher_factory()
+        with app.app_context():
+            try:
+                batch = []
+                deadline = time.monotonic() + self.flush_seconds
+                while True:
+                    try:
+                        batch.append(self._write_queue.get(timeout=0.2))
+                    except queue.Empty:
+                        if self._finished.is_set() or self._stopped.is_set():
+                            break
+                    if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                        self._flush(fetcher, batch)
+                        batch = []
+                        deadline = time.monotonic() + self.flush_seconds
+                # Lignes restantes (y compris après un arrêt : elles sont complètes)
+                while True:
+                    try:
+                        batch.append(self._write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._flush(fetcher, batch)
+            finally:
+                db.session.remove()
+
+    def _flush(self, fetcher, batch):
+        """
+        Écrit un lot de clubs, joueurs et statistiques en une transaction, puis
+        inscrit les points de reprise des unités dont toutes les lignes sont écrites
+
+        Si la transaction échoue, le lot est écrit à nouveau ligne par ligne :
+        seules les lignes refusées sont perdues, et non les clubs ou joueurs
+        dont dépendent les lignes des lots suivants.
+        """
+        start = time.perf_counter()
+        rows = [item for item in batch if item[0] != 'checkpoint']
+        units = [row for kind, row in batch if kind == 'checkpoint']
+        try:
+            written = self._write_rows(fetcher, rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Écriture d'un lot de {len(rows)} lignes impossible ({str(e)}), "
+                           f"nouvel essai ligne par ligne")
+            written = []
+            for item in rows:
+                try:
+                    keys = self._write_rows(fetcher, [item])
+                    db.session.commit()
+                    written.extend(keys)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Ligne {item[0]} ignorée ({item[1]}): {str(e)}")
+                    self._counters['write'].record(0.0, error=True)
+
+        self._written.update(written)
+        self._mark_units(units)
+        self._batches += 1
+        self._counters['write'].record(time.perf_counter() - start, items=len(batch))
+        self._count("stats", sum(1 for kind, _ in written if kind == 'stats'))
+
+    def _mark_units(self, units):
+        """
+        Inscrit les unités terminées dont toutes les lignes ont été validées
+
+        Une unité dont une ligne a été ignorée ou annulée n'est pas inscrite :
+        elle sera refaite à la reprise.
+        """
+        marked = []
+        try:
+            for unit_type, unit_id, payload, requires in units:
+                if not requires <= self._written:
+                    logger.warning(f"Point de reprise {unit_type} {unit_id} non inscrit, "
+                                   f"{len(requires - self._written)} ligne(s) non écrite(s)")
+                    continue
+                if self.checkpoints.mark(unit_type, unit_id, payload):
+                    marked.append((unit_type, unit_id))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for unit_type, unit_id in marked:
+                self.checkpoints.forget(unit_type, unit_id)
+            logger.error(f"Erreur lors de l'inscription de {len(marked)} points de reprise: {str(e)}")
+
+    def _write_rows(self, fetcher, batch):
+        """
+        Ajoute des lignes de clubs, joueurs et statistiques à la transaction courante (sans la valider)
+
+        Returns:
+            Les clés ('club' | 'player' | 'stats', identifiant WhoScored) des lignes écrites
+        """
+        clubs = [row for kind, row in batch if kind == 'club']
+        players = [row for kind, row in batch if kind == 'player']
+        stats = [row for kind, row in batch if kind == 'stats']
+
+        # Les identifiants WhoScored extraits des pages sont des chaînes, api_id un entier
+        team_ids = {str(row['id']) for row in clubs} | {str(row['team_id']) for row in players}
+        known_clubs = ({str(club.api_id): club for club in Club.query.filter(Club.api_id.in_(team_ids)).all()}
+                       if team_ids else {})
+        for row in clubs:
+            if str(row['id']) not in known_clubs:
+                known_clubs[str(row['id'])] = Club(api_id=row['id'], name=row['name'], short_name=row['name'])
+                db.session.add(known_clubs[str(row['id'])])
+        db.session.flush()
+        written = [('club', str(row['id'])) for row in clubs]
+
+        player_ids = {str(row['id']) for row in players} | {str(row['player_id']) for row in stats}
+        known_players = ({str(player.api_id): player for player in Player.query.filter(Player.api_id.in_(player_ids)).all()}
+                         if player_ids else {})
+        for row in players:
+            club = known_clubs.get(str(row['team_id']))
+            if str(row['id']) not in known_players:
+                known_players[str(row['id'])] = Player(api_id=row['id'], name=row['name'], position=row['position'],
+                                                       club_id=club.id if club else None)
+                db.session.add(known_players[str(row['id'])])
+        db.session.flush()
+        written.extend(('player', str(row['id'])) for row in players)
+
+        stats_ids = [known_players[str(row['player_id'])].id for row in stats if str(row['player_id']) in known_players]
+        known_stats = ({row.player_id: row for row in PlayerStats.query.filter(
+            PlayerStats.player_id.in_(stats_ids), PlayerStats.season == self.season_id).all()}
+            if stats_ids else {})
+        for row in stats:
+            player = known_players.get(str(row['player_id']))
+            if player is None:
+                logger.warning(f"Statistiques ignorées, joueur {row['player_id']} inconnu")
+                continue
+            db_stats = known_stats.get(player.id)
+            if db_stats is None:
+                db_stats = known_stats[player.id] = PlayerStats(player_id=player.id, season=self.season_id)
+                db.session.add(db_stats)
+            fetcher._update_player_stats(db_stats, row)
+            written.append(('stats', str(row['player_id'])))
+        db.session.flush()
+        return written
+
+    # Exécution
+
+    def stats(self):
+        """
+        Compteurs du pipeline
+
+        Returns:
+            Un dictionnaire {elapsed, teams, players, stats, skipped, batches, stages}
+            où `stages` donne pour chaque étape les éléments traités, les
+            erreurs, le temps de travail cumulé, le débit et la file d'attente ;
+            `skipped` compte les unités sautées car déjà terminées
+        """
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        queues = {'fetch': self._fetch_queue, 'parse': self._parse_queue, 'write': self._write_queue}
+        with self._condition:
+            totals = dict(self._totals)
+        return dict(
+            totals,
+            elapsed=round(elapsed, 1),
+            batches=self._batches,
+            stages={name: counters.snapshot(elapsed, queues[name].qsize()) for name, counters in self._counters.items()}
+        )
+
+    def run(self, progress=None, progress_interval=5.0):
+        """
+        Exécute l'import jusqu'à la dernière page
+
+        Args:
+            progress: fonction appelée avec `stats()` toutes les
+                `progress_interval` secondes, depuis le thread appelant ; une
+                exception qu'elle lève (ex: JobCancelled) arrête le pipeline
+                puis est propagée
+            progress_interval: intervalle entre deux appels de `progress`
+
+        Returns:
+            Les compteurs finaux (voir `stats`)
+        """
+        app = current_app._get_current_object()
+        self._started_at = time.monotonic()
+        threads = ([threading.Thread(target=self._fetch_worker, name=f"whoscored-fetch-{i}", daemon=True)
+                    for i in range(self.fetch_workers)]
+                   + [threading.Thread(target=self._parse_worker, name=f"whoscored-parse-{i}", daemon=True)
+                      for i in range(self.parse_workers)]
+                   + [threading.Thread(target=self._write_worker, args=(app,), name="whoscored-write", daemon=True)])
+
+        # En reprise, la liste des équipes vient du point de reprise de la page de la ligue
+        fetcher = self.fetcher_factory()
+        with self._condition:
+            self._pending += 1
+        if self._is_done('page', 'league'):
+            teams = self.checkpoints.payload('page', 'league') or []
+            self._count("skipped", 1)
+            self._count("teams", len(teams))
+            self._queue_teams(fetcher, teams)
+        else:
+            self._submit('league', fetcher.league_url(self.league_id, self.season_id))
+        self._done()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._pending == 0, timeout=progress_interval)
+                    finished = self._pending == 0
+                if finished:
+                    break
+                if progress:
+                    progress(self.stats())
+        except BaseException:
+            self._stopped.set()
+            raise
+        finally:
+            self._finished.set()
+            for thread in threads:
+                thread.join()
+
+        stats = self.stats()
+        if progress:
+            progress(stats)
+        logger.info(f"Import de la ligue {self.league_id}, saison {self.season_id} terminé: {stats['teams']} équipes, "
+                    f"{stats['players']} joueurs, {stats['stats']} statistiques en {stats['elapsed']}s")
+        return stats
@@ -0,0 +1,353 @@
+# app/services/job_runner.py
+"""
+Exécution des imports longs en arrière-plan
+
+Une tâche est enregistrée dans la table `import_job` puis exécutée par un
+pool de threads du processus ; la requête HTTP qui la soumet retourne
+aussitôt son identifiant. La tâche publie son avancement dans sa ligne et
+consulte régulièrement la demande d'annulation.
+
+Chaque tâche porte le processus qui l'exécute (`hôte:pid`), qui met à jour
+régulièrement ses tâches en attente ou en cours. Au démarrage d'un
+processus, seules les tâches dont le processus propriétaire est arrêté
+sont marquées interrompues : ni une commande `flask` ni un nouveau worker
+ne touchent aux tâches des autres processus.
+"""
+
+import os
+import json
+import socket
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select, update
+from app import db
+from app.models.import_job import ImportJob
+
+logger = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    """Levée dans une tâche dont l'annulation a été demandée"""
+
+class JobContext:
+    """
+    Accès d'une tâche en cours à sa ligne `import_job`
+
+    `progress` et `check_cancelled` valident la session courante : ils sont à
+    appeler entre deux unités de travail, pas au milieu d'une écriture.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.current = 0
+        self.total = None
+
+    def progress(self, current=None, total=None, message=None):
+        """
+        Publie l'avancement de la tâche
+
+        Args:
+            current: nombre d'éléments traités (optionnel)
+            total: nombre total d'éléments (optionnel)
+            message: description de l'étape en cours (optionnel)
+        """
+        if current is not None:
+            self.current = current
+        if total is not None:
+            self.total = total
+
+        values = {"progress_current": self.current, "progress_total": self.total, "updated_at": datetime.utcnow()}
+        if message is not None:
+            values["message"] = message[:255]
+        db.session.execute(update(ImportJob).where(ImportJob.id == self.job_id).values(**values))
+        db.session.commit()
+
+    def advance(self, step=1, message=None):
+        """Ajoute `step` éléments traités à l'avancement"""
+        self.progress(current=self.current + step, message=message)
+
+    def check_cancelled(self):
+        """
+        Interrompt la tâche si son annulation a été demandée
+
+        Raises:
+            JobCancelled: si l'annulation a été demandée
+        """
+        db.session.commit()
+        requested = db.session.execute(
+            select(ImportJob.cancel_requested).where(ImportJob.id == self.job_id)
+        ).scalar()
+        if requested:
+            raise JobCancelled()
+
+class JobRunner:
+    """
+    Pool de threads exécutant les tâches enregistrées en base
+
+    Les fonctions de tâche sont déclarées avec le décorateur `task(kind)` et
+    reçoivent un `JobContext` suivi des paramètres de la tâche ; leur valeur
+    de retour (sérialisable en JSON) devient le résultat de la tâche. Une
+    tâche déclarée `resumable` accepte le paramètre `resume` : une tâche
+    échouée, annulée ou interrompue peut alors être reprise par une nouvelle
+    tâche aux mêmes paramètres (voir `resume`).
+    """
+
+    def __init__(self, max_workers=1, stale_seconds=300, heartbeat_seconds=60):
+        """
+        Args:
+            max_workers: nombre de tâches exécutées simultanément
+            stale_seconds: délai sans nouvelle au-delà duquel une tâche d'un
+                processus d'un autre hôte est considérée interrompue
+            heartbeat_seconds: intervalle de mise à jour des tâches du processus
+        """
+        self.max_workers = max_workers
+        self.stale_seconds = stale_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._tasks = {}
+        self._resumable = set()
+        self._app = None
+        self._executor = None
+        self._heartbeat = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure le pool avec l'application Flask et clôt les tâches orphelines"""
+        self._app = app
+        self.max_workers = app.config.get('IMPORT_JOB_WORKERS', self.max_workers)
+        self.stale_seconds = app.config.get('IMPORT_JOB_STALE_SECONDS', self.stale_seconds)
+        self.heartbeat_seconds = app.config.get('IMPORT_JOB_HEARTBEAT_SECONDS', self.heartbeat_seconds)
+
+        try:
+            with app.app_context():
+                interrupted = self.mark_stale_jobs()
+                if interrupted:
+                    logger.warning(f"{interrupted} tâche(s) d'import interrompue(s) par un arrêt du serveur")
+        except Exception as e:
+            logger.error(f"Erreur lors de la vérification des tâches d'import: {str(e)}")
+
+    def task(self, kind, resumable=False):
+        """
+        Décorateur déclarant la fonction exécutée pour un type de tâche
+
+        Args:
+            kind: le type de tâche
+            resumable: la fonction accepte `resume=True` pour reprendre un
+                import interrompu à partir de ses points de reprise
+        """
+        def decorator(func):
+            self._tasks[kind] = func
+            if resumable:
+                self._resumable.add(kind)
+            return func
+        return decorator
+
+    def is_resumable(self, job):
+        """Indique si une tâche terminée sans succès peut être reprise"""
+        return job.kind in self._resumable and job.status in ('failed', 'cancelled', 'interrupted')
+
+    @property
+    def kinds(self):
+        return list(self._tasks)
+
+    @property
+    def owner(self):
+        """Identifiant du processus courant (recalculé : les workers sont créés par fork)"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='import-job')
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, args=(self._app,),
+                                                   name='import-job-heartbeat', daemon=True)
+                self._heartbeat.start()
+            return self._executor
+
+    def _heartbeat_loop(self, app):
+        """Met à jour régulièrement les tâches en attente ou en cours du processus"""
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            try:
+                with app.app_context():
+                    db.session.execute(
+                        update(ImportJob)
+                        .where(ImportJob.owner == self.owner, ImportJob.status.in_(('pending', 'running')))
+                        .values(updated_at=datetime.utcnow())
+                    )
+                    db.session.commit()
+            except Exception as e:
+                logger.error(f"Erreur lors de la mise à jour des tâches d'import du processus: {str(e)}")
+
+    def _owner_alive(self, owner, updated_at, now):
+        """
+        Indique si le processus propriétaire d'une tâche tourne encore
+
+        Sur le même hôte, l'existence du processus est vérifiée ; pour un autre
+        hôte (ou une tâche sans propriétaire), on se fie à sa dernière nouvelle.
+        """
+        host, _, pid = (owner or '').rpartition(':')
+        if owner and host == socket.gethostname() and pid.isdigit():
+            if int(pid) == os.getpid():
+                return True
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                return True
+            return True
+        return updated_at is not None and updated_at >= now - timedelta(seconds=self.stale_seconds)
+
+    def mark_stale_jobs(self):
+        """
+        Marque interrompues les tâches en attente ou en cours dont le processus
+        propriétaire est arrêté
+
+        Returns:
+            Le nombre de tâches marquées
+        """
+        now = datetime.utcnow()
+        jobs = db.session.execute(
+            select(ImportJob.id, ImportJob.owner, ImportJob.updated_at)
+            .where(ImportJob.status.in_(('pending', 'running')))
+        ).all()
+        orphans = [job_id for job_id, owner, updated_at in jobs if not self._owner_alive(owner, updated_at, now)]
+        if not orphans:
+            return 0
+
+        db.session.execute(
+            update(ImportJob)
+            .where(ImportJob.id.in_(orphans), ImportJob.status.in_(('pending', 'running')))
+            .values(status='interrupted', finished_at=now, updated_at=now,
+                    error="Tâche interrompue par un arrêt du serveur")
+        )
+        db.session.commit()
+        return len(orphans)
+
+    def submit(self, kind, **params):
+        """
+        Enregistre une tâche et la confie au pool
+
+        Args:
+            kind: le type de tâche (déclaré avec `task`)
+            **params: les paramètres de la tâche, sérialisables en JSON
+
+        Returns:
+            L'identifiant de la tâche
+        """
+        job_id = self._create(kind, params)
+        self._get_executor().submit(self._run, self._app, job_id)
+        logger.info(f"Tâche d'import {job_id} ({kind}) soumise")
+        return job_id
+
+    def _create(self, kind, params):
+        """Enregistre une tâche en attente et retourne son identifiant"""
+        if kind not in self._tasks:
+            raise ValueError(f"Type de tâche inconnu: {kind}")
+
+        job = ImportJob(kind=kind, params=json.dumps(params), status='pending', message="En attente", owner=self.owner)
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+
+    def resume(self, job_id, background=True):
+        """
+        Reprend une tâche échouée, annulée ou interrompue
+
+        Une nouvelle tâche, aux mêmes paramètres et avec `resume=True`, saute
+        les unités déjà enregistrées par la précédente.
+
+        Args:
+            job_id: l'identifiant de la tâche à reprendre
+            background: confier la nouvelle tâche au pool ; sinon elle est
+                exécutée aussitôt dans le thread appelant (commande en ligne)
+
+        Returns:
+            L'identifiant de la nouvelle tâche
+
+        Raises:
+            ValueError: si la tâche n'existe pas ou ne peut pas être reprise
+        """
+        job = db.session.get(ImportJob, job_id)
+        if job is None:
+            raise ValueError(f"Tâche d'import {job_id} introuvable")
+        if not self.is_resumable(job):
+            raise ValueError(f"La tâche d'import {job_id} ({job.kind}, {job.status}) ne peut pas être reprise")
+
+        params = dict(job.get_params(), resume=True)
+        if background:
+            new_id = self.submit(job.kind, **params)
+        else:
+            new_id = self._create(job.kind, params)
+            self._run(self._app, new_id)
+        logger.info(f"Tâche d'import {job_id} reprise par la tâche {new_id}")
+        return new_id
+
+    def cancel(self, job_id):
+        """
+        Demande l'annulation d'une tâche
+
+        Une tâche en attente est annulée aussitôt ; une tâche en cours s'arrête
+        à son prochain appel de `check_cancelled`.
+
+        Returns:
+            La tâche, ou None si elle n'existe pas
+        """
+        job = db.session.get(ImportJob, job_id)
+        if job is None or job.finished:
+            return job
+
+        job.cancel_requested = True
+        if job.status == 'pending':
+            job.status = 'cancelled'
+            job.finished_at = datetime.utcnow()
+            job.message = "Annulée avant son démarrage"
+        else:
+            job.message = "Annulation demandée"
+        db.session.commit()
+        return job
+
+    def _run(self, app, job_id):
+        """Exécute une tâche dans un thread du pool"""
+        with app.app_context():
+            try:
+                job = db.session.get(ImportJob, job_id)
+                if job is None or job.status != 'pending':
+                    if job is not None:
+                        logger.warning(f"Tâche d'import {job_id} non exécutée: statut {job.status}")
+                    return
+
+                job.status = 'running'
+                job.started_at = datetime.utcnow()
+                job.message = "Démarrage"
+                db.session.commit()
+                kind, params = job.kind, job.get_params()
+
+                status, result, error, message = 'succeeded', None, None, "Terminée"
+                try:
+                    result = self._tasks[kind](JobContext(job_id), **params)
+                except JobCancelled:
+                    status, message = 'cancelled', "Annulée"
+                except Exception as e:
+                    logger.error(f"Erreur dans la tâche d'import {job_id} ({kind}): {str(e)}")
+                    status, error, message = 'failed', str(e), "Échec"
+
+                db.session.rollback()
+                job = db.session.get(ImportJob, job_id)
+                job.status = status
+                job.result = json.dumps(result) if result is not None else None
+                job.error = error
+                job.message = message
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(f"Tâche d'import {job_id} ({kind}) : {status}")
+            except Exception as e:
+                logger.error(f"Erreur lors de l'exécution de la tâche d'import {job_id}: {str(e)}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+# Instance partagée par le processus
+job_runner = JobRunner()
@@ -0,0 +1,402 @@
+# app/services/match_centre.py
+"""
+Extraction des données du centre de match WhoScored
+
+Les pages d'un match (Live, LiveStatistics, et le plus souvent MatchReport)
+embarquent l'objet JavaScript `matchCentreData` : équipes, joueurs, notes et
+tous les événements du match avec leurs coordonnées. Il est repéré dans le
+source de la page et décodé une seule fois, sans aucune requête sur le DOM,
+puis converti en événements et en performances de joueurs prêts à être
+enregistrés (MatchEvent, PlayerPerformance).
+
+Les coordonnées WhoScored sont en pourcentage du terrain (0 à 100), chaque
+équipe attaquant de gauche (x = 0) à droite (x = 100).
+"""
+
+import re
+import json
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Début de l'objet dans le source de la page (`matchCentreData: {` ou `var matchCentreData = {`)
+MATCH_CENTRE_START = re.compile(r'matchCentreData\s*[:=]\s*(?=\{)')
+
+# Lien vers la compétition dans l'en-tête de la page (ex: « Premier League - 2023/2024 »)
+TOURNAMENT_LINK = re.compile(r'<a[^>]+href="[^"]*/Tournaments/\d+[^"]*"[^>]*>([^<]+)</a>')
+SEASON_NAME = re.compile(r'(\d{4})\s*/\s*(\d{4})')
+
+_decoder = json.JSONDecoder()
+
+# Types d'événements WhoScored ramenés aux types déjà utilisés par MatchEvent
+EVENT_TYPES = {
+    'Goal': 'GOAL',
+    'Card': 'CARD',
+    'SubstitutionOff': 'SUBSTITUTION'
+}
+CARD_TYPES = {'Yellow': 'YELLOW', 'SecondYellow': 'YELLOW_RED', 'Red': 'RED'}
+SHOT_ON_TARGET_TYPES = ('Goal', 'SavedShot')
+
+def _snake_case(name):
+    """'BallRecovery' -> 'BALL_RECOVERY'"""
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).upper()
+
+def _display_name(value):
+    return value.get('displayName') if isinstance(value, dict) else None
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def extract_match_centre(source):
+    """
+    Repère et décode l'objet `matchCentreData` d'une page de match
+
+    Args:
+        source: le HTML de la page
+
+    Returns:
+        Le dictionnaire décodé, ou None si la page ne le contient pas
+    """
+    if not source:
+        return None
+    start = MATCH_CENTRE_START.search(source)
+    if not start:
+        return None
+    try:
+        data, _ = _decoder.raw_decode(source, start.end())
+    except ValueError as e:
+        logger.warning(f"matchCentreData illisible: {str(e)}")
+        return None
+    return data if isinstance(data, dict) and data.get('home') and data.get('away') else None
+
+def season_for_date(date):
+    """Saison au format '2023/2024' d'un match joué à cette date (début en juillet)"""
+    if date is None:
+        return None
+    start = date.year if date.month >= 7 else date.year - 1
+    return f"{start}/{start + 1}"
+
+def extract_competition(source):
+    """
+    Compétition et saison indiquées dans l'en-tête d'une page de match
+
+    Args:
+        source: le HTML de la page
+
+    Returns:
+        Un tuple (compétition, saison), chaque valeur pouvant être None
+    """
+    link = TOURNAMENT_LINK.search(source or '')
+    if not link:
+        return None, None
+    text = ' '.join(link.group(1).split())
+    season = SEASON_NAME.search(text)
+    if season:
+        text = text[:season.start()].rstrip(' -,')
+    return text or None, f"{season.group(1)}/{season.group(2)}" if season else None
+
+def _score(value):
+    """'2 : 1' -> (2, 1)"""
+    parts = [_to_int(part) for part in (value or '').split(':')]
+    return tuple(parts) if len(parts) == 2 and None not in parts else (None, None)
+
+def _extra_minute(minute, period, limits):
+    """Minutes de temps additionnel d'un événement (None dans le temps réglementaire)"""
+    limit = _to_int(limits.get(str(period))) if period is not None else None
+    if minute is None or limit is None or minute <= limit:
+        return None
+    return minute - limit
+
+def _qualifiers(event):
+    """Qualificatifs d'un événement : {nom: valeur, ou True sans valeur}"""
+    qualifiers = {}
+    for qualifier in event.get('qualifiers') or []:
+        name = _display_name(qualifier.get('type'))
+        if name:
+            qualifiers[name] = qualifier.get('value', True)
+    return qualifiers
+
+def _event(raw, limits):
+    """Convertit un événement WhoScored en dictionnaire aux colonnes de MatchEvent"""
+    source_type = _display_name(raw.get('type')) or 'Unknown'
+    qualifiers = _qualifiers(raw)
+    minute = _to_int(raw.get('minute'))
+    period = raw.get('period') or {}
+
+    event = {
+        'source_event_id': _to_int(raw.get('id')),
+        'source_type': source_type,
+        'type': 'GOAL' if raw.get('isGoal') else EVENT_TYPES.get(source_type, _snake_case(source_type)[:20]),
+        'minute': minute,
+        'second': _to_int(raw.get('second')),
+        'extra_minute': _extra_minute(minute, period.get('value'), limits),
+        'expanded_minute': _to_int(raw.get('expandedMinute')),
+        'period': _display_name(period),
+        'team_id': raw.get('teamId'),
+        'player_id': raw.get('playerId'),
+        'secondary_player_id': None,
+        'assist_player_id': None,
+        'card_type': None,
+        'goal_type': None,
+        'x': raw.get('x'),
+        'y': raw.get('y'),
+        'end_x': raw.get('endX'),
+        'end_y': raw.get('endY'),
+        'is_successful': (_display_name(raw.get('outcomeType')) == 'Successful') if raw.get('outcomeType') else None,
+        'is_touch': bool(raw.get('isTouch')),
+        'is_shot': bool(raw.get('isShot')),
+        'qualifiers': qualifiers
+    }
+
+    if event['type'] == 'GOAL':
+        if raw.get('isOwnGoal') or 'OwnGoal' in qualifiers:
+            event['goal_type'] = 'OWN_GOAL'
+        else:
+            event['goal_type'] = 'PENALTY' if 'Penalty' in qualifiers else 'NORMAL'
+            event['assist_player_id'] = raw.get('relatedPlayerId')
+    elif event['type'] == 'CARD':
+        event['card_type'] = CARD_TYPES.get(_display_name(raw.get('cardType')))
+    elif event['type'] == 'SUBSTITUTION':
+        event['secondary_player_id'] = raw.get('relatedPlayerId')
+    return event
+
+def _empty_performance():
+    return {
+        'goals': 0, 'assists': 0, 'yellow_cards': 0, 'red_card': False,
+        'shots': 0, 'shots_on_target': 0, 'hit_woodwork': 0,
+        'passes': 0, 'passes_completed': 0, 'key_passes': 0, 'crosses': 0, 'crosses_completed': 0, 'through_balls': 0,
+        'tackles': 0, 'tackles_won': 0, 'interceptions': 0, 'clearances': 0, 'blocks': 0, 'duels': 0, 'duels_won': 0,
+        'saves': 0, 'goals_conceded': 0, 'penalties_saved': 0
+    }
+
+def _count_event(stats, event):
+    """Ajoute un événement aux statistiques de son joueur"""
+    source_type, qualifiers, successful = event['source_type'], event['qualifiers'], event['is_successful']
+
+    if event['type'] == 'GOAL' and event['goal_type'] != 'OWN_GOAL':
+        stats['goals'] += 1
+    elif event['type'] == 'CARD':
+        if event['card_type'] == 'YELLOW':
+            stats['yellow_cards'] += 1
+        elif event['card_type'] in ('RED', 'YELLOW_RED'):
+            stats['red_card'] = True
+
+    if event['is_shot'] and event['goal_type'] != 'OWN_GOAL':
+        stats['shots'] += 1
+        if source_type in SHOT_ON_TARGET_TYPES and 'Blocked' not in qualifiers:
+            stats['shots_on_target'] += 1
+        if source_type == 'ShotOnPost':
+            stats['hit_woodwork'] += 1
+
+    if source_type == 'Pass':
+        stats['passes'] += 1
+        stats['passes_completed'] += bool(successful)
+        stats['key_passes'] += 'KeyPass' in qualifiers
+        stats['through_balls'] += 'Throughball' in qualifiers
+        if 'Cross' in qualifiers:
+            stats['crosses'] += 1
+            stats['crosses_completed'] += bool(successful)
+    elif source_type in ('Tackle', 'Challenge'):
+        stats['tackles'] += 1
+        stats['tackles_won'] += source_type == 'Tackle'
+    elif source_type == 'Interception':
+        stats['interceptions'] += 1
+    elif source_type == 'Clearance':
+        stats['clearances'] += 1
+    elif source_type == 'BlockedPass' or (source_type == 'Save' and 'Blocked' in qualifiers):
+        stats['blocks'] += 1
+    elif source_type in ('Aerial', 'TakeOn'):
+        stats['duels'] += 1
+        stats['duels_won'] += bool(successful)
+    elif source_type == 'Save':
+        stats['saves'] += 1
+        stats['penalties_saved'] += 'Penalty' in qualifiers
+
+def _final_rating(stats):
+    """Dernière note d'un joueur (les notes sont données minute par minute)"""
+    ratings = (stats or {}).get('ratings') or {}
+    if not ratings:
+        return None
+    minute = max(ratings, key=lambda key: float(key))
+    return round(float(ratings[minute]), 2)
+
+def _minutes_played(raw, last_minute):
+    """Minutes jouées d'après l'entrée en jeu et la sortie éventuelles"""
+    if raw.get('isFirstEleven'):
+        start = 0
+    elif raw.get('subbedInExpandedMinute') is not None:
+        start = raw['subbedInExpandedMinute']
+    else:
+        return 0
+    end = raw.get('subbedOutExpandedMinute')
+    return max(0, (end if end is not None else last_minute) - start)
+
+def parse_match_centre(source):
+    """
+    Convertit les données du centre de match en lignes prêtes à enregistrer
+
+    Args:
+        source: le HTML d'une page de match, ou l'objet `matchCentreData` déjà décodé
+
+    Returns:
+        Un dictionnaire {match, teams, players, events} où les identifiants
+        d'équipes et de joueurs sont ceux de WhoScored, ou None si la page ne
+        contient pas les données du centre de match
+    """
+    data = source if isinstance(source, dict) else extract_match_centre(source)
+    if not data:
+        return None
+    competition, season = (None, None) if isinstance(source, dict) else extract_competition(source)
+
+    limits = data.get('periodMinuteLimits') or {}
+    events = [_event(raw, limits) for raw in data.get('events') or []]
+    last_minute = (_to_int(data.get('expandedMaxMinute'))
+                   or max((event['expanded_minute'] or 0 for event in events), default=90))
+
+    home_score, away_score = _score(data.get('ftScore') or data.get('score'))
+    half_time_home, half_time_away = _score(data.get('htScore'))
+    start_time = data.get('startTime')
+    try:
+        date = datetime.fromisoformat(start_time) if start_time else None
+    except ValueError:
+        date = None
+
+    match = {
+        'date': date,
+        'home_team_score': home_score,
+        'away_team_score': away_score,
+        'half_time_home': half_time_home,
+        'half_time_away': half_time_away,
+        'venue': data.get('venueName'),
+        'referee': (data.get('referee') or {}).get('name'),
+        'attendance': _to_int(data.get('attendance')),
+        'finished': bool(data.get('ftScore')),
+        'competition': competition,
+        'season': season or season_for_date(date)
+    }
+
+    teams = {}
+    players = {}
+    for side in ('home', 'away'):
+        team = data[side]
+        teams[side] = {
+            'id': team.get('teamId'),
+            'name': team.get('name'),
+            'manager': team.get('managerName'),
+            'formation': ((team.get('formations') or [{}])[0]).get('formationName')
+        }
+        for raw in team.get('players') or []:
+            players[raw.get('playerId')] = dict(
+                _empty_performance(),
+                player_id=raw.get('playerId'),
+                name=raw.get('name') or (data.get('playerIdNameDictionary') or {}).get(str(raw.get('playerId'))),
+                team_id=team.get('teamId'),
+                side=side,
+                position=raw.get('position'),
+                shirt_number=_to_int(raw.get('shirtNo')),
+                captain=bool(raw.get('isCaptain')),
+                starter=bool(raw.get('isFirstEleven')),
+                man_of_the_match=bool(raw.get('isManOfTheMatch')),
+                minutes_played=_minutes_played(raw, last_minute),
+                rating=_final_rating(raw.get('stats')),
+                touches=[],
+                _on=0 if raw.get('isFirstEleven') else raw.get('subbedInExpandedMinute'),
+                _off=raw.get('subbedOutExpandedMinute')
+            )
+
+    # Un seul parcours des événements : statistiques et positions des joueurs
+    goals_against = {teams['home']['id']: [], teams['away']['id']: []}
+    opponent = {teams['home']['id']: teams['away']['id'], teams['away']['id']: teams['home']['id']}
+    for event in events:
+        player = players.get(event['player_id'])
+        if player is not None:
+            _count_event(player, event)
+            if event['is_touch'] and event['x'] is not None and event['y'] is not None:
+                player['touches'].append([event['x'], event['y']])
+        if event['type'] == 'GOAL':
+            # Un but contre son camp est concédé par l'équipe du buteur
+            conceding = event['team_id'] if event['goal_type'] == 'OWN_GOAL' else opponent.get(event['team_id'])
+            goals_against.get(conceding, []).append(event['expanded_minute'] or 0)
+        if event['assist_player_id'] in players:
+            players[event['assist_player_id']]['assists'] += 1
+
+    for player in players.values():
+        on, off = player.pop('_on'), player.pop('_off')
+        if player['position'] == 'GK' and on is not None:
+            player['goals_conceded'] = sum(1 for minute in goals_against.get(player['team_id'], [])
+                                           if on <= minute <= (off if off is not None else last_minute))
+        touches = player['touches']
+        player['avg_position_x'] = round(sum(x for x, _ in touches) / len(touches), 2) if touches else None
+        player['avg_position_y'] = round(sum(y for _, y in touches) / len(touches), 2) if touches else None
+
+    return {'match': match, 'teams': teams, 'players': list(players.values()), 'events': events}
+
+def team_stats(centre):
+    """
+    Statistiques des deux équipes calculées à partir des événements
+
+    WhoScored ne fournit pas la possession dans ces données : seule la part
+    des passes de chaque équipe (`pass_share`) est calculée, comme indicateur
+    approché, sans être confondue avec la possession réelle.
+
+    Returns:
+        Un dictionnaire {statistique: {'home': valeur, 'away': valeur}}
+    """
+    sides = {centre['teams']['home']['id']: 'home', centre['teams']['away']['id']: 'away'}
+    stats = {name: {'home': 0, 'away': 0} for name in
+             ('shots', 'shots_on_target', 'passes', 'passes_completed', 'corners', 'fouls', 'yellow_cards', 'red_cards')}
+
+    for player in centre['players']:
+        side = player['side']
+        stats['shots'][side] += player['shots']
+        stats['shots_on_target'][side] += player['shots_on_target']
+        stats['passes'][side] += player['passes']
+        stats['passes_completed'][side] += player['passes_completed']
+        stats['yellow_cards'][side] += player['yellow_cards']
+        stats['red_cards'][side] += player['red_card']
+
+    for event in centre['events']:
+        side = sides.get(event['team_id'])
+        if side is None:
+            continue
+        if event['source_type'] == 'CornerAwarded' and event['is_successful']:
+            stats['corners'][side] += 1
+        elif event['source_type'] == 'Foul' and event['is_successful'] is False:
+            stats['fouls'][side] += 1
+
+    total_passes = stats['passes']['home'] + stats['passes']['away']
+    stats['pass_share'] = {
+        side: round(100.0 * stats['passes'][side] / total_passes, 1) if total_passes else None
+        for side in ('home', 'away')
+    }
+    return stats
+
+def match_report(centre):
+    """
+    Données du centre de match au format de `parse_match_report`
+    (événements principaux, statistiques d'équipe et notes des joueurs)
+    """
+    names = {player['player_id']: player['name'] for player in centre['players']}
+    event_types = {'GOAL': 'goal', 'CARD': 'card', 'SUBSTITUTION': 'substitution'}
+    return {
+        'events': [
+            {'type': event_types[event['type']], 'minute': str(event['minute']), 'player': names.get(event['player_id'])}
+            for event in centre['events'] if event['type'] in event_types
+        ],
+        'team_stats': team_stats(centre),
+        'player_ratings': {player['name']: player['rating'] for player in centre['players'] if player['rating'] is not None}
+    }
+
+def match_info(centre):
+    """Données du centre de match au format de `parse_match_info`"""
+    match = centre['match']
+    info = {'home_team': centre['teams']['home']['name'], 'away_team': centre['teams']['away']['name']}
+    if match['home_team_score'] is not None:
+        info['score'] = f"{match['home_team_score']} : {match['away_team_score']}"
+    if match['date']:
+        info['date'] = match['date'].isoformat()
+    return info
@@ -0,0 +1,407 @@
+# app/services/match_model.py
+"""
+Modèle statistique local de prédiction des scores (Poisson / Dixon-Coles)
+ajusté sur l'historique des matchs
+"""
+
+import threading
+import time
+import logging
+import numpy as np
+from datetime import datetime
+from math import lgamma
+from app.services.analytics_store import analytics_store
+from app.services.cache import on_match_change
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = "dixon-coles-1"
+
+class DixonColesModel:
+    """
+    Modèle de buts de Dixon et Coles (1997)
+
+    Les buts de l'équipe à domicile suivent une loi de Poisson de paramètre
+    attaque_dom * défense_ext * avantage_domicile, ceux de l'équipe à
+    l'extérieur attaque_ext * défense_dom ; `rho` corrige la dépendance des
+    scores faibles (0-0, 1-0, 0-1, 1-1). Les matchs anciens sont pondérés
+    par une décroissance exponentielle exp(-xi * jours).
+    """
+
+    def __init__(self, xi=0.0019, prior_matches=3.0, max_goals=10, iterations=100, tolerance=1e-6):
+        """
+        Args:
+            xi: taux de décroissance temporelle par jour (0 pour pondérer tous les matchs également)
+            prior_matches: nombre de matchs fictifs « moyens » ajoutés à chaque équipe (régularisation)
+            max_goals: nombre maximal de buts par équipe dans la matrice des scores
+            iterations: nombre maximal d'itérations de l'ajustement
+            tolerance: seuil de convergence des paramètres
+        """
+        self.xi = xi
+        self.prior_matches = prior_matches
+        self.max_goals = max_goals
+        self.iterations = iterations
+        self.tolerance = tolerance
+
+        self.team_ids = np.empty(0, dtype=np.int64)
+        self.attack = np.empty(0)
+        self.defence = np.empty(0)
+        self.home_advantage = 1.0
+        self.rho = 0.0
+        self.n_matches = 0
+        self.fitted_at = None
+        self.reference_date = None
+
+        goals = np.arange(max_goals + 1)
+        self._log_factorials = np.array([lgamma(k + 1) for k in goals])
+        self._goals = goals
+
+    def fit(self, home_ids, away_ids, home_goals, away_goals, dates=None, reference_date=None):
+        """
+        Ajuste le modèle sur des tableaux de matchs terminés
+
+        Args:
+            home_ids, away_ids: identifiants des équipes
+            home_goals, away_goals: buts marqués
+            dates: dates des matchs (datetime64), pour la pondération temporelle (optionnel)
+            reference_date: date à laquelle les poids valent 1 (dernière date par défaut)
+
+        Returns:
+            self
+        """
+        home_ids = np.asarray(home_ids, dtype=np.int64)
+        away_ids = np.asarray(away_ids, dtype=np.int64)
+        home_goals = np.asarray(home_goals, dtype=float)
+        away_goals = np.asarray(away_goals, dtype=float)
+
+        valid = ~(np.isnan(home_goals) | np.isnan(away_goals)) & (home_ids >= 0) & (away_ids >= 0)
+        weighted = dates is not None and self.xi > 0
+        if weighted:
+            # Un match sans date ne peut pas être pondéré : il est écarté
+            dates = np.asarray(dates, dtype='datetime64[s]')
+            valid &= ~np.isnat(dates)
+        home_ids, away_ids = home_ids[valid], away_ids[valid]
+        home_goals, away_goals = home_goals[valid], away_goals[valid]
+
+        if weighted and valid.any():
+            dates = dates[valid]
+            reference = np.datetime64(reference_date, 's') if reference_date is not None else dates.max()
+            age_days = (reference - dates).astype('timedelta64[s]').astype(float) / 86400.0
+            weights = np.exp(-self.xi * np.maximum(age_days, 0.0))
+            self.reference_date = reference.astype(datetime)
+        else:
+            weights = np.ones(home_goals.size)
+
+        self.team_ids, inverse = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+        home_index, away_index = inverse[:home_ids.size], inverse[home_ids.size:]
+        n_teams = self.team_ids.size
+        self.n_matches = int(home_goals.size)
+
+        if self.n_matches == 0:
+            self.attack = np.empty(0)
+            self.defence = np.empty(0)
+            self.fitted_at = datetime.utcnow()
+            return self
+
+        # Sommes pondérées par équipe, calculées une seule fois
+        scored = (np.bincount(home_index, weights * home_goals, n_teams) +
+                  np.bincount(away_index, weights * away_goals, n_teams))
+        conceded = (np.bincount(home_index, weights * away_goals, n_teams) +
+                    np.bincount(away_index, weights * home_goals, n_teams))
+        played = np.bincount(home_index, weights, n_teams) + np.bincount(away_index, weights, n_teams)
+        total_home_goals = np.sum(weights * home_goals)
+
+        mean_goals = (total_home_goals + np.sum(weights * away_goals)) / (2 * weights.sum())
+        prior = self.prior_matches * mean_goals
+
+        attack = np.ones(n_teams)
+        defence = np.ones(n_teams) * mean_goals
+        home_advantage = 1.0
+
+        # Ajustement par maximum de vraisemblance (algorithme itératif de Maher)
+        for _ in range(self.iterations):
+            expected_attack = (np.bincount(home_index, weights * defence[away_index] * home_advantage, n_teams) +
+                               np.bincount(away_index, weights * defence[home_index], n_teams))
+            new_attack = (scored + prior) / (expected_attack + self.prior_matches * mean_goals)
+
+            expected_defence = (np.bincount(home_index, weights * new_attack[away_index], n_teams) +
+                                np.bincount(away_index, weights * new_attack[home_index] * home_advantage, n_teams))
+            new_defence = (conceded + prior) / (expected_defence + self.prior_matches)
+
+            new_home_advantage = total_home_goals / np.sum(weights * new_attack[home_index] * new_defence[away_index])
+
+            # Normalisation : attaque moyenne égale à 1
+            scale = new_attack.mean()
+            new_attack /= scale
+            new_defence *= scale
+
+            change = max(np.abs(new_attack - attack).max(), np.abs(new_defence - defence).max(),
+                         abs(new_home_advantage - home_advantage))
+            attack, defence, home_advantage = new_attack, new_defence, new_home_advantage
+            if change < self.tolerance:
+                break
+
+        self.attack = attack
+        self.defence = defence
+        self.home_advantage = float(home_advantage)
+        self.rho = self._fit_rho(home_index, away_index, home_goals, away_goals, weights)
+        self.fitted_at = datetime.utcnow()
+        return self
+
+    def _fit_rho(self, home_index, away_index, home_goals, away_goals, weights):
+        """Estime la correction des scores faibles par recherche sur une grille"""
+        low = (home_goals <= 1) & (away_goals <= 1)
+        if not low.any():
+            return 0.0
+
+        lam = (self.attack[home_index] * self.defence[away_index] * self.home_advantage)[low]
+        mu = (self.attack[away_index] * self.defence[home_index])[low]
+        x, y, w = home_goals[low], away_goals[low], weights[low]
+
+        grid = np.linspace(-0.2, 0.2, 81)[:, None]
+        tau = np.select(
+            [(x == 0) & (y == 0), (x == 0) & (y == 1), (x == 1) & (y == 0), (x == 1) & (y == 1)],
+            [1 - lam * mu * grid, 1 + lam * grid, 1 + mu * grid, 1 - grid],
+            default=1.0
+        )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            log_likelihood = np.where(tau > 0, np.log(tau), -np.inf) @ w
+        return float(grid[np.argmax(log_likelihood), 0])
+
+    def _strengths(self, team_id):
+        """Retourne l'attaque et la défense d'une équipe (valeurs moyennes si inconnue)"""
+        position = np.searchsorted(self.team_ids, team_id)
+        if position < self.team_ids.size and self.team_ids[position] == team_id:
+            return self.attack[position], self.defence[position]
+        mean_defence = float(self.defence.mean()) if self.defence.size else 1.3
+        return 1.0, mean_defence
+
+    def expected_goals(self, home_team_id, away_team_id):
+        """Retourne les buts attendus (domicile, extérieur)"""
+        home_attack, home_defence = self._strengths(home_team_id)
+        away_attack, away_defence = self._strengths(away_team_id)
+        return (float(home_attack * away_defence * self.home_advantage),
+                float(away_attack * home_defence))
+
+    def score_matrix(self, home_team_id, away_team_id):
+        """
+        Calcule la matrice des probabilités de score
+
+        Returns:
+            Un tableau (max_goals + 1) x (max_goals + 1) où [i, j] est la
+            probabilité du score i-j (domicile-extérieur)
+        """
+        lam, mu = self.expected_goals(home_team_id, away_team_id)
+        home_pmf = np.exp(self._goals * np.log(lam) - lam - self._log_factorials)
+        away_pmf = np.exp(self._goals * np.log(mu) - mu - self._log_factorials)
+        matrix = np.outer(home_pmf, away_pmf)
+
+        # Correction de Dixon-Coles des scores faibles
+        matrix[0, 0] *= 1 - lam * mu * self.rho
+        matrix[0, 1] *= 1 + lam * self.rho
+        matrix[1, 0] *= 1 + mu * self.rho
+        matrix[1, 1] *= 1 - self.rho
+
+        return matrix / matrix.sum()
+
+    def predict(self, home_team_id, away_team_id, top_scores=5):
+        """
+        Prédit un match
+
+        Returns:
+            Un dictionnaire avec les probabilités 1X2, l'issue la plus probable,
+            les buts attendus, le score prédit (le plus probable pour cette
+            issue) et les scores les plus probables
+        """
+        matrix = self.score_matrix(home_team_id, away_team_id)
+        lam, mu = self.expected_goals(home_team_id, away_team_id)
+
+        probabilities = {
+            "home": float(np.tril(matrix, -1).sum()),
+            "draw": float(np.trace(matrix)),
+            "away": float(np.triu(matrix, 1).sum())
+        }
+        winner = max(probabilities, key=probabilities.get)
+
+        flat = np.argsort(matrix, axis=None)[::-1][:top_scores]
+        likely_scores = [
+            {"score": f"{i}-{j}", "probability": round(float(matrix[i, j]), 4)}
+            for i, j in zip(*np.unravel_index(flat, matrix.shape))
+        ]
+
+        # Score le plus probable parmi ceux correspondant à l'issue la plus probable
+        home_goals, away_goals = np.indices(matrix.shape)
+        outcome = np.sign(home_goals - away_goals)
+        outcome_mask = outcome == {"home": 1, "draw": 0, "away": -1}[winner]
+        i, j = np.unravel_index(np.argmax(np.where(outcome_mask, matrix, -1.0)), matrix.shape)
+
+        return {
+            "probabilities": {key: round(value, 4) for key, value in probabilities.items()},
+            "predicted_winner": winner,
+            "expected_goals": {"home": round(lam, 2), "away": round(mu, 2)},
+            "predicted_score": f"{i}-{j}",
+            "likely_scores": likely_scores,
+            "score_matrix": matrix
+        }
+
+    def score_matrices(self, home_team_ids, away_team_ids):
+        """
+        Calcule les matrices des scores d'un lot de matchs en une seule opération vectorisée
+
+        Args:
+            home_team_ids, away_team_ids: identifiants des clubs de chaque match
+
+        Returns:
+            Un tuple (matrices n x (max_goals + 1) x (max_goals + 1), buts attendus
+            domicile, buts attendus extérieur)
+        """
+        home_team_ids = np.asarray(home_team_ids, dtype=np.int64)
+        away_team_ids = np.asarray(away_team_ids, dtype=np.int64)
+
+        mean_defence = float(self.defence.mean()) if self.defence.size else 1.3
+        attack = np.concatenate([self.attack, [1.0]])
+        defence = np.concatenate([self.defence, [mean_defence]])
+
+        def positions(team_ids):
+            found = np.searchsorted(self.team_ids, team_ids)
+            known = found < self.team_ids.size
+            known[known] = self.team_ids[found[known]] == team_ids[known]
+            # Les clubs inconnus pointent vers les valeurs moyennes ajoutées en fin de tableau
+            return np.where(known, found, self.team_ids.size)
+
+        home, away = positions(home_team_ids), positions(away_team_ids)
+        lam = attack[home] * defence[away] * self.home_advantage
+        mu = attack[away] * defence[home]
+
+        goals = self._goals
+        home_pmf = np.exp(goals * np.log(lam)[:, None] - lam[:, None] - self._log_factorials)
+        away_pmf = np.exp(goals * np.log(mu)[:, None] - mu[:, None] - self._log_factorials)
+        matrices = home_pmf[:, :, None] * away_pmf[:, None, :]
+
+        matrices[:, 0, 0] *= 1 - lam * mu * self.rho
+        matrices[:, 0, 1] *= 1 + lam * self.rho
+        matrices[:, 1, 0] *= 1 + mu * self.rho
+        matrices[:, 1, 1] *= 1 - self.rho
+        matrices /= matrices.sum(axis=(1, 2), keepdims=True)
+        return matrices, lam, mu
+
+    def predict_many(self, home_team_ids, away_team_ids, top_scores=0):
+        """
+        Prédit un lot de matchs en une seule opération vectorisée
+
+        Args:
+            home_team_ids, away_team_ids: identifiants des clubs de chaque match
+            top_scores: nombre de scores les plus probables retournés par match (aucun par défaut)
+
+        Returns:
+            Un dictionnaire de tableaux : `probabilities` (n x 3, domicile/nul/extérieur),
+            `expected_goals` (n x 2) et `predicted_scores` (n x 2, score le plus
+            probable pour l'issue la plus probable), ainsi que `likely_scores`
+            (n x top_scores x 2) et leurs probabilités `likely_probabilities`
+            (n x top_scores) si `top_scores` est demandé
+        """
+        matrices, lam, mu = self.score_matrices(home_team_ids, away_team_ids)
+
+        home_goals, away_goals = np.indices(matrices.shape[1:])
+        outcome_masks = np.stack([home_goals > away_goals, home_goals == away_goals, home_goals < away_goals])
+        probabilities = np.einsum('nij,kij->nk', matrices, outcome_masks.astype(float))
+
+        winners = probabilities.argmax(axis=1)
+        best = np.where(outcome_masks[winners], matrices, -1.0).reshape(len(matrices), -1).argmax(axis=1)
+
+        result = {
+            "probabilities": probabilities,
+            "expected_goals": np.column_stack([lam, mu]),
+            "predicted_scores": np.column_stack(np.unravel_index(best, matrices.shape[1:]))
+        }
+        if top_scores:
+            flat = matrices.reshape(len(matrices), -1)
+            top = np.argsort(flat, axis=1)[:, ::-1][:, :top_scores]
+            result["likely_scores"] = np.stack(np.unravel_index(top, matrices.shape[1:]), axis=-1)
+            result["likely_probabilities"] = np.take_along_axis(flat, top, axis=1)
+        return result
+
+    def knows(self, team_id):
+        """Indique si l'équipe figure dans les données d'ajustement"""
+        position = np.searchsorted(self.team_ids, team_id)
+        return bool(position < self.team_ids.size and self.team_ids[position] == team_id)
+
+def finished_match_arrays(before=None):
+    """
+    Retourne les tableaux des matchs terminés et datés (équipes, buts, dates)
+
+    Utilise le cache analytique en colonnes, ou la base de données s'il est indisponible.
+
+    Args:
+        before: ne retenir que les matchs antérieurs à cette date (optionnel)
+    """
+    matches = analytics_store.table('match')
+    if matches is not None:
+        mask = (matches.column('status') == matches.code('status', 'FINISHED')) & ~np.isnat(matches.column('date'))
+        if before is not None:
+            mask &= matches.column('date') < np.datetime64(before, 's')
+        return (matches.column('home_team_id')[mask], matches.column('away_team_id')[mask],
+                matches.column('home_team_score')[mask].astype(float),
+                matches.column('away_team_score')[mask].astype(float),
+                matches.column('date')[mask])
+
+    from app import db
+    from app.models.match import Match
+    from sqlalchemy import select
+
+    query = select(Match.home_team_id, Match.away_team_id, Match.home_team_score,
+                   Match.away_team_score, Match.date).where(Match.status == 'FINISHED',
+                                                          Match.date.isnot(None))
+    if before is not None:
+        query = query.where(Match.date < before)
+    rows = db.session.execute(query).all()
+
+    return (np.array([row.home_team_id if row.home_team_id is not None else -1 for row in rows], dtype=np.int64),
+            np.array([row.away_team_id if row.away_team_id is not None else -1 for row in rows], dtype=np.int64),
+            np.array([np.nan if row.home_team_score is None else row.home_team_score for row in rows], dtype=float),
+            np.array([np.nan if row.away_team_score is None else row.away_team_score for row in rows], dtype=float),
+            np.array([row.date for row in rows], dtype='datetime64[s]'))
+
+def fit_model(before=None, **model_options):
+    """
+    Ajuste un modèle de Dixon-Coles sur les matchs terminés
+
+    Args:
+        before: n'utiliser que les matchs antérieurs à cette date (optionnel)
+        model_options: paramètres transmis à DixonColesModel
+
+    Returns:
+        Le modèle ajusté
+    """
+    start = time.monotonic()
+    home_ids, away_ids, home_goals, away_goals, dates = finished_match_arrays(before)
+    model = DixonColesModel(**model_options).fit(home_ids, away_ids, home_goals, away_goals, dates,
+                                                  reference_date=before)
+    logger.info(f"Modèle {MODEL_VERSION} ajusté sur {model.n_matches} matchs en {time.monotonic() - start:.3f}s")
+    return model
+
+# Modèle partagé par le processus, réajusté après chaque modification d'un match terminé
+_model_lock = threading.Lock()
+_current_model = None
+_model_stale = True
+
+@on_match_change
+def _mark_model_stale(change):
+    """Demande un nouvel ajustement lorsqu'un résultat change"""
+    global _model_stale
+    if change["status"] == 'FINISHED' or change["deleted"]:
+        _model_stale = True
+
+def get_model():
+    """Retourne le modèle courant, en le réajustant si des résultats ont changé"""
+    global _current_model, _model_stale
+
+    with _model_lock:
+        if _current_model is None or _model_stale:
+            _model_stale = False
+            try:
+                _current_model = fit_model()
+            except Exception:
+                _model_stale = True
+                raise
+        return _current_model
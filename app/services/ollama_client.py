@@ -0,0 +1,228 @@
+# app/services/ollama_client.py
+"""
+Client Ollama partagé : session HTTP mutualisée, délais stricts,
+concurrence bornée et génération en flux
+"""
+
+import json
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+logger = logging.getLogger(__name__)
+
+class OllamaError(Exception):
+    """Erreur lors d'un appel à Ollama"""
+
+class OllamaBusyError(OllamaError):
+    """Trop de générations en cours : la requête n'a pas obtenu de place à temps"""
+
+class OllamaTimeoutError(OllamaError):
+    """Ollama n'a pas répondu, ou la génération a dépassé sa durée maximale"""
+
+class OllamaClient:
+    """
+    Client HTTP d'Ollama partagé par le processus
+
+    Toutes les requêtes passent par une même session (connexions réutilisées)
+    et par un sémaphore qui borne le nombre de générations simultanées ; une
+    requête qui n'obtient pas de place en `queue_timeout` secondes échoue
+    immédiatement au lieu de bloquer un worker.
+    """
+
+    def __init__(self, base_url='http://localhost:11434/api', model='mistral:latest', connect_timeout=3,
+                 read_timeout=30, max_generation_seconds=120, max_concurrency=2, queue_timeout=5, pool_size=4):
+        """
+        Args:
+            base_url: URL de l'API Ollama (avec /api)
+            model: modèle utilisé par défaut
+            connect_timeout: délai de connexion en secondes
+            read_timeout: délai maximal sans recevoir de données, en secondes
+            max_generation_seconds: durée maximale d'une génération complète
+            max_concurrency: nombre maximal de générations simultanées
+            queue_timeout: attente maximale d'une place libre, en secondes
+            pool_size: nombre de connexions conservées dans la session
+        """
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_generation_seconds = max_generation_seconds
+        self.queue_timeout = queue_timeout
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._active = 0
+        self._lock = threading.Lock()
+        self.session = self._create_session()
+
+    def _create_session(self):
+        """Crée la session HTTP mutualisée"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def init_app(self, app):
+        """Configure le client avec l'application Flask"""
+        self.base_url = app.config.get('OLLAMA_API_URL', self.base_url).rstrip('/')
+        self.model = app.config.get('OLLAMA_MODEL', self.model)
+        self.connect_timeout = app.config.get('OLLAMA_CONNECT_TIMEOUT', self.connect_timeout)
+        self.read_timeout = app.config.get('OLLAMA_TIMEOUT', self.read_timeout)
+        self.max_generation_seconds = app.config.get('OLLAMA_MAX_GENERATION_SECONDS', self.max_generation_seconds)
+        self.queue_timeout = app.config.get('OLLAMA_QUEUE_TIMEOUT', self.queue_timeout)
+        self.max_concurrency = app.config.get('OLLAMA_MAX_CONCURRENCY', self.max_concurrency)
+        self.pool_size = app.config.get('OLLAMA_POOL_SIZE', self.pool_size)
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.session.close()
+        self.session = self._create_session()
+
+    def _acquire(self):
+        """Réserve une place de génération ou lève OllamaBusyError"""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise OllamaBusyError(f"{self.max_concurrency} générations Ollama déjà en cours")
+        with self._lock:
+            self._active += 1
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _post(self, prompt, model, stream, options):
+        """Envoie une requête de génération"""
+        payload = {"model": model or self.model, "prompt": prompt, "stream": stream}
+        if options:
+            payload["options"] = options
+
+        try:
+            response = self.session.post(
+                f"{self.base_url}/generate",
+                json=payload,
+                stream=stream,
+                timeout=(self.connect_timeout, self.read_timeout)
+            )
+        except requests.Timeout as e:
+            raise OllamaTimeoutError(f"Ollama n'a pas répondu: {str(e)}") from e
+        except requests.RequestException as e:
+            raise OllamaError(f"Ollama injoignable: {str(e)}") from e
+
+        if response.status_code != 200:
+            response.close()
+            raise OllamaError(f"Erreur lors de l'appel à Ollama: {response.status_code}")
+        return response
+
+    def generate(self, prompt, model=None, options=None):
+        """
+        Génère une réponse complète
+
+        La génération est lue en flux pour appliquer la durée maximale.
+
+        Returns:
+            Le texte généré
+
+        Raises:
+            OllamaBusyError, OllamaTimeoutError, OllamaError
+        """
+        return "".join(self.stream(prompt, model=model, options=options))
+
+    def stream(self, prompt, model=None, options=None):
+        """
+        Démarre une génération en flux
+
+        La place de génération est réservée et la requête envoyée dès l'appel :
+        une erreur (Ollama occupé ou injoignable) est levée avant le premier
+        fragment. La place est libérée à la fin du flux ou à sa fermeture.
+
+        Returns:
+            Un GenerationStream itérable sur les fragments de texte
+
+        Raises:
+            OllamaBusyError, OllamaTimeoutError, OllamaError
+        """
+        self._acquire()
+        try:
+            response = self._post(prompt, model, True, options)
+        except Exception:
+            self._release()
+            raise
+        return GenerationStream(self, response)
+
+    def status(self):
+        """Occupation du client"""
+        with self._lock:
+            return {
+                "base_url": self.base_url,
+                "model": self.model,
+                "active": self._active,
+                "max_concurrency": self.max_concurrency
+            }
+
+class GenerationStream:
+    """Flux de fragments d'une génération Ollama, qui libère sa place à la fin"""
+
+    def __init__(self, client, response):
+        self.client = client
+        self.response = response
+        self.start = time.monotonic()
+        self._lines = response.iter_lines()
+        self._closed = False
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed or self._done:
+            self.close()
+            raise StopIteration
+
+        try:
+            for line in self._lines:
+                if not line:
+                    continue
+                if time.monotonic() - self.start > self.client.max_generation_seconds:
+                    raise OllamaTimeoutError(f"Génération interrompue après {self.client.max_generation_seconds}s")
+
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                self._done = bool(chunk.get("done"))
+                if chunk.get("response"):
+                    return chunk["response"]
+                if self._done:
+                    break
+        except requests.Timeout as e:
+            self.close()
+            raise OllamaTimeoutError(f"Ollama ne répond plus: {str(e)}") from e
+        except requests.RequestException as e:
+            self.close()
+            # requests signale un délai dépassé en cours de flux comme une erreur de connexion
+            if e.args and isinstance(e.args[0], ReadTimeoutError):
+                raise OllamaTimeoutError(f"Ollama ne répond plus: {str(e)}") from e
+            raise OllamaError(f"Flux Ollama interrompu: {str(e)}") from e
+        except Exception:
+            self.close()
+            raise
+
+        self.close()
+        raise StopIteration
+
+    def close(self):
+        """Ferme la connexion et libère la place de génération"""
+        if not self._closed:
+            self._closed = True
+            self.response.close()
+            self.client._release()
+
+    def __del__(self):
+        self.close()
+
+# Instance partagée par le processus
+ollama_client = OllamaClient()
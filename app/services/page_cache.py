@@ -0,0 +1,309 @@
+# app/services/page_cache.py
+"""
+Cache local des pages WhoScored téléchargées par WhoScoredDataFetcher
+
+Les pages sont enregistrées compressées (gzip) sous l'empreinte de leur URL
+canonique, c'est-à-dire sans le paramètre aléatoire `r` ajouté contre les
+caches HTTP. Chaque type de page a sa durée de vie : longue pour les comptes
+rendus de matchs terminés, courte pour les classements. En mode hors ligne,
+seules les pages du cache sont servies, quel que soit leur âge.
+
+Le répertoire peut être partagé par plusieurs processus : une page absente
+de l'index d'un processus est cherchée sur le disque avant d'être déclarée
+absente. Seules les pages qui portent les marqueurs attendus pour leur type
+sont enregistrées (jamais une page de vérification anti-robot).
+"""
+
+import os
+import re
+import gzip
+import time
+import hashlib
+import logging
+import threading
+import requests
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Type de page selon le chemin de l'URL (premier motif reconnu)
+PAGE_TYPES = [
+    ('match_report', re.compile(r'/Matches/\d+/MatchReport', re.IGNORECASE)),
+    ('match', re.compile(r'/Matches/\d+', re.IGNORECASE)),
+    ('player', re.compile(r'/Players/\d+', re.IGNORECASE)),
+    ('team', re.compile(r'/Teams/\d+', re.IGNORECASE)),
+    ('league', re.compile(r'/Regions/\d+/', re.IGNORECASE))
+]
+
+# Durées de vie par défaut, en secondes (None : jamais périmée)
+DEFAULT_TTLS = {
+    'match_report': 30 * 24 * 3600,
+    'match': 3600,
+    'player': 24 * 3600,
+    'team': 24 * 3600,
+    'league': 3600,
+    'other': 6 * 3600
+}
+
+# Paramètres de requête ignorés dans la clé du cache
+IGNORED_PARAMS = ('r',)
+
+# Marqueurs dont l'un au moins doit figurer dans une page de chaque type
+PAGE_MARKERS = {
+    'match_report': ('matchCentreData', 'match-centre', 'matchHeader'),
+    'match': ('matchCentreData', 'match-centre', 'matchHeader'),
+    'player': ('player-summary-statistics', 'player-tournament-stats', '/Players/'),
+    'team': ('/Players/',),
+    'league': ('/Teams/',)
+}
+
+# Marqueurs des pages de blocage ou de vérification anti-robot
+BLOCKED_MARKERS = ('_Incapsula_Resource', 'Incapsula incident', 'Request unsuccessful', 'cf-challenge',
+                   'challenge-platform', 'g-recaptcha', 'h-captcha')
+
+class PageNotCachedError(requests.RequestException):
+    """Page absente du cache alors que le mode hors ligne est actif"""
+
+class BlockedPageError(requests.RequestException):
+    """WhoScored a répondu par une page de blocage ou de vérification anti-robot"""
+
+def is_blocked_page(html):
+    """Indique si une page est une page de blocage ou de vérification anti-robot"""
+    return any(marker in html for marker in BLOCKED_MARKERS)
+
+class PageCache:
+    """
+    Cache URL canonique -> HTML, persistant et compressé sur disque
+
+    Les pages sont stockées dans `<répertoire>/<type>/<2 premiers caractères>/<empreinte>.html.gz` ;
+    la date de modification du fichier est la date du téléchargement. Lorsque
+    la taille totale dépasse `max_bytes`, les pages les plus anciennes sont
+    supprimées.
+    """
+
+    def __init__(self, directory='cache/pages', ttls=None, max_bytes=500 * MB, offline=False):
+        """
+        Args:
+            directory: répertoire des fichiers du cache
+            ttls: durées de vie par type de page, en secondes (complètent DEFAULT_TTLS)
+            max_bytes: taille totale maximale des fichiers
+            offline: ne servir que les pages du cache, sans jamais télécharger
+        """
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.enabled = True
+        self._index = None  # {(type, empreinte): (taille, date de téléchargement)}
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure le cache avec l'application Flask"""
+        self.enabled = app.config.get('WHOSCORED_PAGE_CACHE_ENABLED', True)
+        self.directory = app.config.get('WHOSCORED_PAGE_CACHE_DIR', self.directory)
+        self.ttls = dict(DEFAULT_TTLS, **app.config.get('WHOSCORED_PAGE_CACHE_TTLS', {}))
+        self.max_bytes = int(app.config.get('WHOSCORED_PAGE_CACHE_MAX_MB', self.max_bytes / MB) * MB)
+        self.offline = app.config.get('WHOSCORED_OFFLINE', False)
+        self._index = None
+
+    @staticmethod
+    def canonical_url(url):
+        """URL sans fragment ni paramètre aléatoire, paramètres triés et hôte en minuscules"""
+        parts = urlsplit(url)
+        params = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                        if key not in IGNORED_PARAMS)
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(params), ''))
+
+    @staticmethod
+    def page_type(url):
+        """Type de page d'une URL ('match_report', 'match', 'player', 'team', 'league' ou 'other')"""
+        path = urlsplit(url).path
+        for page_type, pattern in PAGE_TYPES:
+            if pattern.search(path):
+                return page_type
+        return 'other'
+
+    def _entry(self, url):
+        canonical = self.canonical_url(url)
+        return self.page_type(canonical), hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, entry):
+        page_type, key = entry
+        return os.path.join(self.directory, page_type, key[:2], f"{key}.html.gz")
+
+    def _load_index(self):
+        """Recense les fichiers du cache (appelé sous verrou, au premier accès)"""
+        if self._index is not None:
+            return
+        self._index = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+
+        for page_type in os.listdir(self.directory):
+            for root, _, files in os.walk(os.path.join(self.directory, page_type)):
+                for name in files:
+                    if not name.endswith('.html.gz'):
+                        continue
+                    stat = os.stat(os.path.join(root, name))
+                    self._index[(page_type, name[:-8])] = (stat.st_size, stat.st_mtime)
+                    self._total_bytes += stat.st_size
+
+    def _remove(self, entry):
+        """Supprime une page du disque (appelé sous verrou)"""
+        size, _ = self._index.pop(entry, (0, None))
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(entry))
+        except OSError:
+            pass
+
+    def _expired(self, entry, fetched_at):
+        ttl = self.ttls.get(entry[0], self.ttls['other'])
+        return ttl is not None and fetched_at + ttl < time.time()
+
+    def is_valid(self, url, html):
+        """
+        Indique si une page peut être enregistrée : ni page de blocage, ni page
+        sans aucun des marqueurs attendus pour son type
+        """
+        if not html or is_blocked_page(html):
+            return False
+        markers = PAGE_MARKERS.get(self.page_type(url))
+        return markers is None or any(marker in html for marker in markers)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, url):
+        """
+        Récupère une page du cache
+
+        En mode hors ligne, une page périmée est servie quand même. Le fichier
+        est lu et décompressé hors du verrou.
+
+        Returns:
+            Le HTML de la page, ou None si absente ou périmée
+        """
+        if not self.enabled and not self.offline:
+            return None
+
+        entry = self._entry(url)
+        path = self._path(entry)
+        with self._lock:
+            self._load_index()
+            indexed = self._index.get(entry)
+
+        if indexed is None:
+            # Page peut-être écrite par un autre processus depuis le chargement de l'index
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._count("misses")
+                return None
+            indexed = (stat.st_size, stat.st_mtime)
+            with self._lock:
+                if entry not in self._index:
+                    self._index[entry] = indexed
+                    self._total_bytes += stat.st_size
+
+        if not self.offline and self._expired(entry, indexed[1]):
+            self._count("expired")
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                html = gzip.decompress(f.read()).decode('utf-8')
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            logger.warning(f"Page illisible dans le cache ({url}): {str(e)}")
+            with self._lock:
+                self._remove(entry)
+                self._stats["misses"] += 1
+            return None
+
+        self._count("hits")
+        return html
+
+    def set(self, url, html):
+        """
+        Enregistre une page téléchargée, si elle est valide (voir `is_valid`)
+
+        Returns:
+            True si la page a été enregistrée
+        """
+        if not self.enabled:
+            return False
+        if not self.is_valid(url, html):
+            logger.warning(f"Page non enregistrée dans le cache, contenu inattendu: {url}")
+            self._count("rejected")
+            return False
+
+        entry = self._entry(url)
+        data = gzip.compress(html.encode('utf-8'))
+        path = self._path(entry)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Erreur lors de l'écriture dans le cache des pages: {str(e)}")
+            return False
+
+        with self._lock:
+            self._load_index()
+            previous_size, _ = self._index.get(entry, (0, None))
+            self._index[entry] = (len(data), time.time())
+            self._total_bytes += len(data) - previous_size
+            self._stats["stored"] += 1
+            self._enforce_size()
+        return True
+
+    def _enforce_size(self):
+        """Supprime les pages les plus anciennes au-delà de la taille maximale (appelé sous verrou)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for entry, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(entry)
+
+    def purge_expired(self):
+        """
+        Supprime les pages périmées du disque
+
+        Returns:
+            Le nombre de pages supprimées
+        """
+        with self._lock:
+            self._load_index()
+            expired = [entry for entry, (_, fetched_at) in self._index.items() if self._expired(entry, fetched_at)]
+            for entry in expired:
+                self._remove(entry)
+            return len(expired)
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._load_index()
+            for entry in list(self._index):
+                self._remove(entry)
+
+    def stats(self):
+        """Retourne les statistiques du cache"""
+        with self._lock:
+            self._load_index()
+            by_type = {}
+            for page_type, _ in self._index:
+                by_type[page_type] = by_type.get(page_type, 0) + 1
+            return dict(self._stats, entries=len(self._index), by_type=by_type, bytes=self._total_bytes,
+                        max_bytes=self.max_bytes, offline=self.offline)
+
+# Instance partagée par le processus
+page_cache = PageCache()
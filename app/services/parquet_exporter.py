@@ -0,0 +1,226 @@
+# app/services/parquet_exporter.py
+"""
+Export incrémental des tables d'analyse vers des fichiers Parquet
+partitionnés par compétition et saison
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import select, types
+from app import db
+from app.models.match import Match
+from app.models.match_event import MatchEvent
+from app.models.player_performance import PlayerPerformance
+from app.models.player_stats import PlayerStats
+from app.models.team_stats import TeamStats
+
+logger = logging.getLogger(__name__)
+
+# Tables exportées : nom -> (modèle, colonnes de partition)
+# Les performances et événements héritent de la compétition et de la saison de leur match
+EXPORT_TABLES = {
+    'match': (Match, ('competition', 'season')),
+    'player_performance': (PlayerPerformance, ('competition', 'season')),
+    'match_event': (MatchEvent, ('competition', 'season')),
+    'player_stats': (PlayerStats, ('season',)),
+    'team_stats': (TeamStats, ('season',))
+}
+
+STATE_FILE = '_export_state.json'
+
+def _arrow_type(column_type):
+    """Convertit un type de colonne SQLAlchemy en type Arrow"""
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp('us')
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    return pa.string()
+
+def _partition_value(value):
+    """Normalise une valeur de partition pour l'utiliser comme nom de répertoire"""
+    if value is None or value == '':
+        return 'unknown'
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value))
+
+class ParquetExporter:
+    """
+    Exporte les tables Match, PlayerStats, TeamStats, PlayerPerformance et
+    MatchEvent en lots d'enregistrements Arrow
+
+    Chaque exécution ajoute un fichier par partition
+    (`<table>/competition=<c>/season=<s>/part-<horodatage>.parquet`) contenant
+    uniquement les lignes modifiées depuis l'export précédent. Chaque export
+    relit aussi les `safety_seconds` précédant le marqueur, pour rattraper les
+    lignes dont `updated_at` est antérieur au marqueur mais qui ont été
+    validées après sa lecture (transactions longues, autres processus). Une
+    ligne peut donc apparaître dans plusieurs fichiers : dédoublonner par `id`
+    en gardant celle dont `updated_at` est la plus récente.
+
+    Les colonnes de partition restent dans les fichiers avec leur valeur
+    d'origine (les noms de répertoires sont normalisés) : lire les données
+    sans partitionnement Hive, par ex. `pyarrow.dataset.dataset(chemin)`.
+    """
+
+    def __init__(self, output_dir, batch_size=50000, safety_seconds=300):
+        """
+        Args:
+            output_dir: répertoire racine de l'export
+            batch_size: nombre de lignes lues et converties à la fois (borne la mémoire)
+            safety_seconds: durée relue avant le marqueur du dernier export
+        """
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.safety_window = timedelta(seconds=safety_seconds)
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+
+    def load_state(self):
+        """Charge les marqueurs du dernier export (updated_at maximal par table)"""
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        """Enregistre les marqueurs d'export de façon atomique"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _build_query(self, model, partition_columns, since):
+        """Construit la requête de lecture d'une table avec ses colonnes de partition"""
+        columns = [column for column in model.__table__.columns]
+        query = select(*columns)
+
+        extra = [name for name in partition_columns if name not in model.__table__.columns]
+        if extra:
+            query = select(*columns, *[getattr(Match, name).label(f"_{name}") for name in extra])
+            query = query.outerjoin(Match, Match.id == model.match_id)
+
+        if since:
+            query = query.where(model.updated_at > datetime.fromisoformat(since) - self.safety_window)
+
+        return query.order_by(model.id), columns
+
+    def export_table(self, name, since=None, run_id=None):
+        """
+        Exporte les lignes d'une table modifiées après `since` (moins la fenêtre de sécurité)
+
+        Args:
+            name: le nom de la table (clé de EXPORT_TABLES)
+            since: updated_at du dernier export au format ISO (None pour tout exporter)
+            run_id: suffixe des fichiers produits
+
+        Returns:
+            Un dictionnaire (lignes exportées, fichiers écrits, nouveau marqueur)
+        """
+        model, partition_columns = EXPORT_TABLES[name]
+        run_id = run_id or datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        query, columns = self._build_query(model, partition_columns, since)
+
+        schema = pa.schema([pa.field(column.name, _arrow_type(column.type)) for column in columns])
+        column_names = [column.name for column in columns]
+        partition_keys = [
+            column if column in model.__table__.columns else f"_{column}"
+            for column in partition_columns
+        ]
+
+        writers = {}
+        rows_exported = 0
+        watermark = datetime.fromisoformat(since) if since else None
+
+        try:
+            result = db.session.execute(query.execution_options(yield_per=self.batch_size))
+            for rows in result.partitions():
+                # Regrouper les lignes du lot par partition
+                groups = {}
+                for row in rows:
+                    mapping = row._mapping
+                    key = tuple(_partition_value(mapping[column]) for column in partition_keys)
+                    groups.setdefault(key, []).append(row)
+
+                    updated_at = mapping['updated_at']
+                    if updated_at is not None and (watermark is None or updated_at > watermark):
+                        watermark = updated_at
+
+                for key, group in groups.items():
+                    batch = pa.RecordBatch.from_arrays(
+                        [pa.array([row._mapping[column] for row in group], type=field.type)
+                         for column, field in zip(column_names, schema)],
+                        schema=schema
+                    )
+
+                    writer = writers.get(key)
+                    if writer is None:
+                        directory = os.path.join(
+                            self.output_dir, name,
+                            *[f"{column}={value}" for column, value in zip(partition_columns, key)]
+                        )
+                        os.makedirs(directory, exist_ok=True)
+                        path = os.path.join(directory, f"part-{run_id}.parquet")
+                        writer = writers[key] = pq.ParquetWriter(path, schema, compression='snappy')
+
+                    writer.write_batch(batch)
+
+                rows_exported += len(rows)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        return {
+            "rows": rows_exported,
+            "files": len(writers),
+            "watermark": watermark.isoformat() if watermark else None
+        }
+
+    def export(self, tables=None, full=False):
+        """
+        Exporte les tables demandées en reprenant après le dernier export
+
+        Args:
+            tables: liste des tables à exporter (toutes par défaut)
+            full: si True, ignore les marqueurs et exporte toutes les lignes
+
+        Returns:
+            Un dictionnaire {table: résumé de l'export}
+        """
+        tables = tables or list(EXPORT_TABLES.keys())
+        unknown = [name for name in tables if name not in EXPORT_TABLES]
+        if unknown:
+            raise ValueError(f"Tables inconnues: {', '.join(unknown)}")
+
+        state = self.load_state()
+        run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        summary = {}
+
+        for name in tables:
+            start = time.monotonic()
+            since = None if full else state.get(name, {}).get('watermark')
+            result = self.export_table(name, since=since, run_id=run_id)
+            result["seconds"] = round(time.monotonic() - start, 2)
+            summary[name] = result
+
+            # Enregistrer le marqueur après chaque table pour qu'un échec n'oblige pas à tout refaire
+            state[name] = {
+                "watermark": result["watermark"],
+                "last_export": datetime.utcnow().isoformat(),
+                "last_rows": result["rows"]
+            }
+            self._save_state(state)
+
+            logger.info(f"Export Parquet {name}: {result['rows']} lignes, {result['files']} fichiers en {result['seconds']}s")
+
+        return summary
@@ -0,0 +1,296 @@
+# app/services/parser_benchmark.py
+"""
+Micro-benchmark de l'analyse des pages WhoScored : couche lxml
+(whoscored_parser) comparée à l'ancienne analyse BeautifulSoup/html.parser
+sur des pages enregistrées, et débit des routines get_* / _extract_* du
+fetcher et du scraper sur le corpus de pages (parser_corpus)
+"""
+
+import io
+import time
+import logging
+import resource
+import tracemalloc
+import pandas as pd
+from bs4 import BeautifulSoup
+from app.services import whoscored_parser as parser
+
+logger = logging.getLogger(__name__)
+
+def _legacy_text(element):
+    return element.text.strip() if element else ''
+
+def _legacy_league_teams(html):
+    """Ancienne extraction des équipes d'une ligue"""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = soup.select('table.standings a[href*="/Teams/"]') or soup.select('div.tournament-teamlist a[href*="/Teams/"]')
+    return [{'id': link['href'].split('/')[2], 'name': link.text.strip()} for link in links]
+
+def _legacy_team_players(html):
+    """Ancienne extraction des joueurs d'une équipe"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.select('table#player-table-statistics-body tr') or soup.select('table.player-statistics tbody tr')
+    players = []
+    for row in rows:
+        link = row.select_one('a[href*="/Players/"]')
+        if link:
+            position = row.select_one('td:nth-child(2)')
+            players.append({'id': link['href'].split('/')[2], 'name': link.text.strip(),
+                            'position': position.text.strip() if position else 'Unknown'})
+    return players
+
+def _legacy_stat_rows(html):
+    """Ancienne extraction des statistiques de l'onglet courant d'un joueur"""
+    soup = BeautifulSoup(html, 'html.parser')
+    stats = {}
+    for table in soup.select("table.player-statistics, table.player-stats-detailed"):
+        for row in table.select("tbody tr"):
+            cells = row.select("td")
+            if len(cells) >= 2:
+                key = cells[0].text.strip().lower().replace(' ', '_').replace('%', 'percent')
+                stats[key] = parser.convert_value(cells[1].text.strip())
+    return stats
+
+def _legacy_match_report(html):
+    """Ancienne extraction d'un compte rendu de match"""
+    soup = BeautifulSoup(html, 'html.parser')
+    details = {'events': [], 'team_stats': {}, 'player_ratings': {}}
+    for event in soup.select('div.match-centre-events-wrapper li'):
+        classes = event.get('class', [])
+        event_type = 'goal' if 'goal' in classes else 'card' if 'card' in classes else 'substitution' if 'sub' in classes else None
+        if event_type:
+            details['events'].append({'type': event_type,
+                                      'minute': _legacy_text(event.select_one('span.minute')).replace("'", ''),
+                                      'player': _legacy_text(event.select_one('a')) or None})
+    stats_table = soup.select_one('div.match-centre-stats')
+    if stats_table:
+        for category in stats_table.select('div.stat-category'):
+            name, home, away = (category.select_one('div.stat-name'), category.select_one('div.home-stat'),
+                                category.select_one('div.away-stat'))
+            if name and home and away:
+                details['team_stats'][name.text.strip().lower().replace(' ', '_')] = {
+                    'home': parser.convert_value(home.text.strip()), 'away': parser.convert_value(away.text.strip())}
+    for rating in soup.select('div.home-team div.player-rating') + soup.select('div.away-team div.player-rating'):
+        link, value = rating.select_one('a'), rating.select_one('span.rating')
+        if link and value:
+            try:
+                details['player_ratings'][link.text.strip()] = float(value.text.strip())
+            except ValueError:
+                details['player_ratings'][link.text.strip()] = 0.0
+    return details
+
+def _legacy_league_stats_table(html):
+    """Ancienne extraction du tableau des statistiques d'une ligue (pandas.read_html)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.select_one("table.player-table-statistics") or soup.select_one("table.stats-table")
+    return pd.read_html(io.StringIO(str(table)))[0] if table else None
+
+def _lxml_league_stats_table(html):
+    columns = parser.parse_league_stats_table(html)
+    return pd.DataFrame(columns) if columns else None
+
+# Routines comparées : (nom, ancienne analyse, analyse lxml)
+ROUTINES = [
+    ('league_teams', _legacy_league_teams, parser.parse_league_teams),
+    ('team_players', _legacy_team_players, parser.parse_team_players),
+    ('player_tab_stats', _legacy_stat_rows, parser.parse_stat_rows),
+    ('match_report', _legacy_match_report, parser.parse_match_report),
+    ('league_stats_table', _legacy_league_stats_table, _lxml_league_stats_table)
+]
+
+def _size(result):
+    """Nombre d'éléments extraits, pour vérifier que les deux analyses concordent"""
+    if result is None:
+        return 0
+    if isinstance(result, pd.DataFrame):
+        return result.size
+    if isinstance(result, dict) and 'players' in result:
+        return len(result['events']) + len(result['players'])
+    if isinstance(result, dict) and 'events' in result:
+        return len(result['events']) + len(result['team_stats']) + len(result['player_ratings'])
+    if isinstance(result, dict) and 'summary' in result:
+        return len(result['summary'])
+    return len(result)
+
+def _time(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    return time.perf_counter() - start, result
+
+def compare_parsers(pages, repeat=5):
+    """
+    Chronomètre chaque routine d'analyse sur des pages enregistrées
+
+    Args:
+        pages: dictionnaire {nom de la page: HTML}
+        repeat: nombre d'analyses de chaque page par routine
+
+    Returns:
+        Une liste de dictionnaires par routine : durées cumulées des deux
+        analyses, pages par seconde, accélération et éléments extraits
+    """
+    results = []
+    for name, legacy, fast in ROUTINES:
+        legacy_seconds = fast_seconds = 0.0
+        legacy_items = fast_items = 0
+        for html in pages.values():
+            try:
+                seconds, result = _time(legacy, html, repeat)
+                legacy_seconds += seconds
+                legacy_items += _size(result)
+            except Exception as e:
+                logger.warning(f"Ancienne analyse {name} en échec: {str(e)}")
+            seconds, result = _time(fast, html, repeat)
+            fast_seconds += seconds
+            fast_items += _size(result)
+
+        parsed = len(pages) * repeat
+        results.append({
+            "routine": name,
+            "pages": parsed,
+            "legacy_seconds": round(legacy_seconds, 4),
+            "lxml_seconds": round(fast_seconds, 4),
+            "legacy_pages_per_second": round(parsed / legacy_seconds, 1) if legacy_seconds else None,
+            "lxml_pages_per_second": round(parsed / fast_seconds, 1) if fast_seconds else None,
+            "speedup": round(legacy_seconds / fast_seconds, 2) if fast_seconds else None,
+            "legacy_items": legacy_items,
+            "lxml_items": fast_items
+        })
+    return results
+
+class _CorpusPages:
+    """Remplace le cache des pages du fetcher : sert toujours la page courante du corpus"""
+
+    offline = True
+
+    def __init__(self):
+        self.html = ''
+
+    def get(self, url):
+        return self.html
+
+    def set(self, url, html):
+        pass
+
+class _CorpusDriver:
+    """Remplace le navigateur du scraper : expose la page courante du corpus"""
+
+    title = 'corpus'
+
+    def __init__(self):
+        self.page_source = ''
+
+    def find_element(self, *args, **kwargs):
+        return self
+
+    def find_elements(self, *args, **kwargs):
+        return [self]
+
+    def save_screenshot(self, path):
+        return True
+
+def _corpus_routines():
+    """
+    Routines chronométrées sur le corpus : (nom, type de page, fonction(page courante, HTML))
+
+    Les routines du fetcher et du scraper sont appelées telles quelles, avec un
+    cache et un navigateur factices qui servent la page du corpus, afin de
+    mesurer tout leur travail et pas seulement celui de whoscored_parser.
+    """
+    from app.services.whoscored_data_fetcher import WhoScoredDataFetcher
+    from app.services.whoscored_scraper import WhoScoredSeleniumScraper
+
+    pages = _CorpusPages()
+    driver = _CorpusDriver()
+    fetcher = WhoScoredDataFetcher(cache=pages)
+    scraper = WhoScoredSeleniumScraper(driver=driver)
+
+    def served(func):
+        def run(html):
+            pages.html = driver.page_source = html
+            return func()
+        return run
+
+    return [
+        ('get_league_teams', 'league_teams', served(lambda: fetcher.get_league_teams('0/0', '0'))),
+        ('get_team_players', 'team_players', served(lambda: fetcher.get_team_players('0', '0'))),
+        ('get_player_stats', 'player_stats', served(lambda: fetcher.get_player_stats('0', '0'))),
+        ('_extract_player_info', 'player_stats', served(scraper._extract_player_info)),
+        ('_extract_current_tab_stats', 'player_stats', served(scraper._extract_current_tab_stats)),
+        ('get_match_details', 'match_report', served(lambda: fetcher.get_match_details('0'))),
+        ('_extract_match_info', 'match_report', served(scraper._extract_match_info)),
+        ('get_match_centre', 'match_centre', served(lambda: fetcher.get_match_centre('0'))),
+        ('parse_team_stats_table', 'match_report', lambda html: parser.parse_team_stats_table(html, 'home')),
+        ('parse_league_stats_table', 'league_stats', parser.parse_league_stats_table)
+    ]
+
+def _max_rss_kb():
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def benchmark_corpus(corpus, repeat=5):
+    """
+    Chronomètre chaque routine d'analyse sur les pages du corpus
+
+    La mémoire par page est le pic d'allocations Python (tracemalloc) pendant
+    une analyse, en moyenne sur les pages ; les allocations internes de
+    libxml2 n'y figurent pas, d'où la croissance du RSS maximal du processus
+    reportée à part.
+
+    Args:
+        corpus: le ParserCorpus
+        repeat: nombre d'analyses de chaque page par routine
+
+    Returns:
+        Une liste de dictionnaires par routine : pages analysées, durée, pages
+        par seconde, éléments extraits et mémoire par page
+
+    Raises:
+        ValueError: si le corpus ne contient aucune page
+    """
+    html_by_type = {}
+    for page_type, _, html in corpus.pages():
+        html_by_type.setdefault(page_type, []).append(html)
+    if not html_by_type:
+        raise ValueError(f"Corpus vide ({corpus.directory})")
+
+    # Les pages du corpus ne doivent pas être réenregistrées comme échecs
+    save_failures, corpus.save_failures = corpus.save_failures, False
+    results = []
+    try:
+        for name, page_type, func in _corpus_routines():
+            documents = html_by_type.get(page_type, [])
+            if not documents:
+                continue
+
+            rss_before = _max_rss_kb()
+            seconds = 0.0
+            items = 0
+            for html in documents:
+                elapsed, result = _time(func, html, repeat)
+                seconds += elapsed
+                items += _size(result)
+
+            # Mesure mémoire séparée : tracemalloc ralentit fortement l'analyse
+            peaks = []
+            for html in documents:
+                tracemalloc.start()
+                func(html)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            parsed = len(documents) * repeat
+            results.append({
+                "routine": name,
+                "page_type": page_type,
+                "pages": parsed,
+                "seconds": round(seconds, 4),
+                "pages_per_second": round(parsed / seconds, 1) if seconds else None,
+                "items": items,
+                "peak_kb_per_page": round(sum(peaks) / len(peaks) / 1024, 1),
+                "max_rss_growth_kb": _max_rss_kb() - rss_before
+            })
+    finally:
+        corpus.save_failures = save_failures
+    return results
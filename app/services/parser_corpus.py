@@ -0,0 +1,156 @@
+# app/services/parser_corpus.py
+"""
+Corpus de pages WhoScored enregistrées pour tester et chronométrer les
+analyses hors ligne
+
+Le corpus est rangé par type de page :
+
+    <répertoire>/league_teams/*.html     pages d'une ligue (liste des équipes)
+    <répertoire>/team_players/*.html     pages d'une équipe (liste des joueurs)
+    <répertoire>/player_stats/*.html     fiches de joueurs
+    <répertoire>/match_report/*.html     comptes rendus de matchs
+    <répertoire>/match_centre/*.html     pages en direct d'un match (matchCentreData)
+    <répertoire>/league_stats/*.html     tableaux de statistiques d'une ligue
+
+Le dépôt fournit une page synthétique de chaque type (synthetic_*.html, même
+structure que les pages WhoScored, données fictives) : le banc d'essai
+fonctionne sans navigateur ni accès au site.
+
+Les pages dont l'analyse échoue sont enregistrées dans `failures/<type>/`
+(au lieu de fichiers debug_*.html dans le répertoire courant) : il suffit
+de les déplacer dans le répertoire de leur type pour les ajouter au corpus.
+"""
+
+import os
+import re
+import gzip
+import logging
+
+logger = logging.getLogger(__name__)
+
+CORPUS_TYPES = ('league_teams', 'team_players', 'player_stats', 'match_report', 'match_centre', 'league_stats')
+
+# Type de page du cache des pages -> type du corpus
+PAGE_CACHE_TYPES = {
+    'league': 'league_teams',
+    'team': 'team_players',
+    'player': 'player_stats',
+    'match_report': 'match_report',
+    'match': 'match_centre'
+}
+
+def _file_name(name):
+    """Nom de fichier sûr (les identifiants de ligue contiennent des '/')"""
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('_') + '.html'
+
+class ParserCorpus:
+    """Accès au répertoire du corpus de pages"""
+
+    def __init__(self, directory='corpus/whoscored', save_failures=True):
+        """
+        Args:
+            directory: répertoire du corpus
+            save_failures: enregistrer les pages dont l'analyse échoue
+        """
+        self.directory = directory
+        self.save_failures = save_failures
+
+    def init_app(self, app):
+        """Configure le corpus avec l'application Flask"""
+        self.directory = app.config.get('WHOSCORED_CORPUS_DIR', self.directory)
+        self.save_failures = app.config.get('WHOSCORED_SAVE_FAILED_PAGES', self.save_failures)
+
+    def _write(self, path, html):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        return path
+
+    def add(self, page_type, name, html):
+        """
+        Ajoute une page au corpus
+
+        Returns:
+            Le chemin du fichier écrit
+        """
+        if page_type not in CORPUS_TYPES:
+            raise ValueError(f"Type de page inconnu: {page_type}")
+        return self._write(os.path.join(self.directory, page_type, _file_name(name)), html)
+
+    def save_failure(self, page_type, name, html):
+        """
+        Enregistre une page dont l'analyse n'a rien donné, pour débogage
+
+        Returns:
+            Le chemin du fichier écrit, ou None si l'enregistrement est désactivé ou a échoué
+        """
+        if not self.save_failures or not html:
+            return None
+        try:
+            path = self._write(os.path.join(self.directory, 'failures', page_type, _file_name(name)), html)
+            logger.info(f"Page enregistrée pour débogage: {path}")
+            return path
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer la page {page_type}/{name}: {str(e)}")
+            return None
+
+    def pages(self, page_types=None):
+        """
+        Parcourt les pages du corpus
+
+        Args:
+            page_types: types de pages à parcourir (tous par défaut)
+
+        Yields:
+            Des tuples (type, chemin, HTML)
+        """
+        for page_type in page_types or CORPUS_TYPES:
+            directory = os.path.join(self.directory, page_type)
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(('.html', '.htm')):
+                    path = os.path.join(directory, name)
+                    with open(path, encoding='utf-8', errors='replace') as f:
+                        yield page_type, path, f.read()
+
+    def import_page_cache(self, cache, limit=None):
+        """
+        Copie dans le corpus les pages du cache des pages WhoScored
+
+        Args:
+            cache: le PageCache
+            limit: nombre maximal de pages copiées par type (optionnel)
+
+        Returns:
+            Un dictionnaire {type du corpus: pages copiées}
+        """
+        copied = {}
+        for cache_type, corpus_type in PAGE_CACHE_TYPES.items():
+            directory = os.path.join(cache.directory, cache_type)
+            if not os.path.isdir(directory):
+                continue
+            for root, _, files in os.walk(directory):
+                for name in sorted(files):
+                    if not name.endswith('.html.gz') or (limit and copied.get(corpus_type, 0) >= limit):
+                        continue
+                    with open(os.path.join(root, name), 'rb') as f:
+                        html = gzip.decompress(f.read()).decode('utf-8')
+                    self.add(corpus_type, name[:16], html)
+                    copied[corpus_type] = copied.get(corpus_type, 0) + 1
+        return copied
+
+    def stats(self):
+        """Nombre de pages par type, et de pages en échec à examiner"""
+        counts = {}
+        for page_type in CORPUS_TYPES:
+            directory = os.path.join(self.directory, page_type)
+            counts[page_type] = (sum(1 for name in os.listdir(directory) if name.endswith(('.html', '.htm')))
+                                 if os.path.isdir(directory) else 0)
+        failures = 0
+        for _, _, files in os.walk(os.path.join(self.directory, 'failures')):
+            failures += sum(1 for name in files if name.endswith('.html'))
+        return {"pages": counts, "failures": failures, "directory": self.directory}
+
+# Instance partagée par le processus
+parser_corpus = ParserCorpus()
@@ -0,0 +1,196 @@
+# app/services/player_timeseries.py
+"""
+Séries temporelles de performance des joueurs construites à partir
+des lignes PlayerPerformance jointes aux matchs
+"""
+
+import numpy as np
+import logging
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.models.player_performance import PlayerPerformance
+
+logger = logging.getLogger(__name__)
+
+# Séries exposées : nom dans la réponse -> colonne de PlayerPerformance
+SERIES_COLUMNS = {
+    "ratings": "rating",
+    "minutes": "minutes_played",
+    "goals": "goals",
+    "assists": "assists"
+}
+
+def fetch_player_performances(player_ids, date_from=None, date_to=None, limit=None):
+    """Récupère les performances de plusieurs joueurs en une seule requête
+
+    Args:
+        player_ids: liste des identifiants des joueurs
+        date_from: date minimale des matchs, incluse (optionnel)
+        date_to: date maximale des matchs, exclue (optionnel)
+        limit: nombre maximal de matchs les plus récents par joueur (optionnel)
+
+    Returns:
+        Une liste de lignes triées par joueur puis par date croissante
+    """
+    if not player_ids:
+        return []
+
+    home_club = aliased(Club)
+    away_club = aliased(Club)
+
+    # Numéro du match pour chaque joueur, du plus récent au plus ancien
+    row_number = func.row_number().over(
+        partition_by=PlayerPerformance.player_id,
+        order_by=Match.date.desc()
+    ).label("row_number")
+
+    query = select(
+        PlayerPerformance.player_id,
+        PlayerPerformance.match_id,
+        PlayerPerformance.team_id,
+        PlayerPerformance.minutes_played,
+        PlayerPerformance.goals,
+        PlayerPerformance.assists,
+        PlayerPerformance.rating,
+        Match.date,
+        Match.competition,
+        Match.home_team_id,
+        home_club.name.label("home_team_name"),
+        away_club.name.label("away_team_name"),
+        row_number
+    ).join(
+        Match, Match.id == PlayerPerformance.match_id
+    ).outerjoin(
+        home_club, home_club.id == Match.home_team_id
+    ).outerjoin(
+        away_club, away_club.id == Match.away_team_id
+    ).where(
+        PlayerPerformance.player_id.in_(player_ids)
+    )
+
+    if date_from is not None:
+        query = query.where(Match.date >= date_from)
+    if date_to is not None:
+        query = query.where(Match.date < date_to)
+
+    if limit:
+        ranked = query.subquery()
+        query = select(ranked).where(ranked.c.row_number <= limit).order_by(ranked.c.player_id, ranked.c.date)
+    else:
+        query = query.order_by(PlayerPerformance.player_id, Match.date)
+
+    return db.session.execute(query).all()
+
+def rolling_mean(values, window):
+    """Calcule une moyenne glissante vectorisée en ignorant les valeurs manquantes
+
+    Les premières valeurs utilisent une fenêtre partielle ; une fenêtre ne
+    contenant aucune valeur donne NaN.
+
+    Args:
+        values: tableau de valeurs (NaN pour les valeurs manquantes)
+        window: taille de la fenêtre
+
+    Returns:
+        Un tableau NumPy de même taille que `values`
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+
+    window = max(1, int(window))
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    end = np.arange(1, values.size + 1)
+    start = np.maximum(0, end - window)
+    window_sums = sums[end] - sums[start]
+    window_counts = counts[end] - counts[start]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+def build_player_timeseries(player_ids, date_from=None, date_to=None, limit=None, window=5):
+    """Construit les séries temporelles de performance de plusieurs joueurs
+
+    Args:
+        player_ids: liste des identifiants des joueurs
+        date_from: date minimale des matchs, incluse (optionnel)
+        date_to: date maximale des matchs, exclue (optionnel)
+        limit: nombre maximal de matchs les plus récents par joueur (optionnel)
+        window: taille de la fenêtre des moyennes glissantes
+
+    Returns:
+        Un dictionnaire {player_id: série} où chaque série contient des tableaux
+        NumPy en ordre chronologique et `next_before`, la borne `date_to` à
+        utiliser pour la page précédente (None s'il n'y en a pas)
+    """
+    rows = fetch_player_performances(player_ids, date_from, date_to, limit)
+
+    grouped = {player_id: [] for player_id in player_ids}
+    for row in rows:
+        grouped.setdefault(row.player_id, []).append(row)
+
+    series = {}
+    for player_id, player_rows in grouped.items():
+        is_home = np.array([row.team_id is not None and row.team_id == row.home_team_id for row in player_rows], dtype=bool)
+
+        player_series = {
+            "player_id": player_id,
+            "dates": [row.date for row in player_rows],
+            "match_ids": np.array([row.match_id for row in player_rows], dtype=np.int64),
+            "competitions": [row.competition for row in player_rows],
+            "opponents": [row.away_team_name if home else row.home_team_name
+                          for row, home in zip(player_rows, is_home)],
+            "is_home": is_home,
+            "next_before": player_rows[0].date if limit and len(player_rows) >= limit else None
+        }
+
+        for name, column in SERIES_COLUMNS.items():
+            values = np.array([getattr(row, column) for row in player_rows], dtype=float)
+            player_series[name] = values
+            player_series[f"rolling_{name}"] = rolling_mean(values, window)
+
+        series[player_id] = player_series
+
+    return series
+
+def _to_list(values):
+    """Convertit un tableau NumPy en liste JSON (NaN devient None)"""
+    return [None if isinstance(value, float) and np.isnan(value) else value
+            for value in np.asarray(values).tolist()]
+
+def serialize_timeseries(series, precision=2):
+    """Convertit les séries construites par build_player_timeseries en données JSON
+
+    Args:
+        series: le dictionnaire retourné par build_player_timeseries
+        precision: nombre de décimales des moyennes glissantes
+
+    Returns:
+        Une liste de séries prêtes pour jsonify
+    """
+    result = []
+    for player_series in series.values():
+        data = {
+            "playerId": player_series["player_id"],
+            "dates": [date.strftime('%Y-%m-%d') if date else None for date in player_series["dates"]],
+            "matchIds": player_series["match_ids"].tolist(),
+            "competitions": player_series["competitions"],
+            "opponents": player_series["opponents"],
+            "isHome": player_series["is_home"].tolist(),
+            "nextBefore": player_series["next_before"].isoformat() if player_series["next_before"] else None,
+            "rolling": {}
+        }
+
+        for name in SERIES_COLUMNS:
+            data[name] = _to_list(player_series[name])
+            data["rolling"][name] = _to_list(np.round(player_series[f"rolling_{name}"], precision))
+
+        result.append(data)
+
+    return result
@@ -0,0 +1,227 @@
+# app/services/prompt_cache.py
+"""
+Cache des réponses d'Ollama adressé par le contenu du prompt
+
+Chaque réponse est enregistrée sur disque sous l'empreinte SHA-256 du couple
+(modèle, prompt), avec une durée de vie et une taille totale maximale ; les
+entrées récentes sont aussi gardées en mémoire. Le répertoire peut être
+partagé par plusieurs processus : une entrée absente de l'index d'un
+processus est cherchée sur le disque avant d'être déclarée absente.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from app.services.cache import MemoCache
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class PromptCache:
+    """
+    Cache (modèle, prompt) -> réponse persistant sur disque
+
+    Les entrées sont des dictionnaires JSON (la réponse et les valeurs qui
+    en sont dérivées), stockées dans `<répertoire>/<2 premiers caractères>/<empreinte>.json`.
+    Lorsque la taille totale dépasse `max_bytes`, les entrées les plus
+    anciennes sont supprimées.
+    """
+
+    def __init__(self, directory='cache/prompts', ttl=7 * 24 * 3600, max_bytes=50 * MB, memory_size=256):
+        """
+        Args:
+            directory: répertoire des fichiers du cache
+            ttl: durée de vie d'une entrée en secondes (None pour illimitée)
+            max_bytes: taille totale maximale des fichiers
+            memory_size: nombre d'entrées gardées en mémoire
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self._memory = MemoCache(maxsize=memory_size, ttl=ttl)
+        self._index = None  # {empreinte: (taille, date de création)}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure le cache avec l'application Flask"""
+        self.enabled = app.config.get('PROMPT_CACHE_ENABLED', True)
+        self.directory = app.config.get('PROMPT_CACHE_DIR', self.directory)
+        self.ttl = app.config.get('PROMPT_CACHE_TTL', self.ttl)
+        self.max_bytes = int(app.config.get('PROMPT_CACHE_MAX_MB', self.max_bytes / MB) * MB)
+        self._memory = MemoCache(maxsize=app.config.get('PROMPT_CACHE_MEMORY_SIZE', 256), ttl=self.ttl)
+        self._index = None
+
+    @staticmethod
+    def key(model, prompt):
+        """Empreinte du couple (modèle, prompt)"""
+        return hashlib.sha256(json.dumps([model, prompt]).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """Recense les fichiers du cache (appelé sous verrou, au premier accès)"""
+        if self._index is not None:
+            return
+        self._index = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                self._index[name[:-5]] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+    def _remove(self, key):
+        """Supprime une entrée du disque (appelé sous verrou)"""
+        size, _ = self._index.pop(key, (0, None))
+        self._total_bytes -= size
+        self._memory.invalidate(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _expired(self, created_at):
+        return self.ttl is not None and created_at + self.ttl < time.time()
+
+    def get(self, model, prompt):
+        """
+        Récupère la réponse mémorisée d'un prompt
+
+        Returns:
+            Le dictionnaire enregistré, ou None si absent ou expiré
+        """
+        if not self.enabled:
+            return None
+
+        key = self.key(model, prompt)
+        entry = self._memory.get(key)
+        if entry is not None and not self._expired(entry["created_at"]):
+            return dict(entry)
+
+        with self._lock:
+            self._load_index()
+            indexed = key in self._index
+
+        # Une entrée absente de l'index a pu être écrite par un autre processus
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            if indexed:
+                with self._lock:
+                    self._remove(key)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entrée illisible dans le cache des prompts ({key}): {str(e)}")
+            with self._lock:
+                self._remove(key)
+            return None
+
+        with self._lock:
+            if self._expired(entry.get("created_at", 0)):
+                self._remove(key)
+                return None
+            if key not in self._index:
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                self._index[key] = (size, entry.get("created_at", 0))
+                self._total_bytes += size
+
+        self._memory.set(key, entry)
+        return dict(entry)
+
+    def set(self, model, prompt, entry):
+        """
+        Enregistre la réponse d'un prompt
+
+        Args:
+            model: le modèle ayant généré la réponse
+            prompt: le prompt envoyé
+            entry: dictionnaire sérialisable en JSON (réponse et valeurs dérivées)
+
+        Returns:
+            L'entrée enregistrée, complétée de `model` et `created_at`
+        """
+        entry = dict(entry, model=model, created_at=time.time())
+        if not self.enabled:
+            return entry
+
+        key = self.key(model, prompt)
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Erreur lors de l'écriture dans le cache des prompts: {str(e)}")
+            return entry
+
+        with self._lock:
+            self._load_index()
+            previous_size, _ = self._index.get(key, (0, None))
+            self._index[key] = (len(data), entry["created_at"])
+            self._total_bytes += len(data) - previous_size
+            self._enforce_size()
+
+        self._memory.set(key, entry)
+        return entry
+
+    def _enforce_size(self):
+        """Supprime les entrées les plus anciennes au-delà de la taille maximale (appelé sous verrou)"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def purge_expired(self):
+        """
+        Supprime les entrées expirées du disque
+
+        Returns:
+            Le nombre d'entrées supprimées
+        """
+        with self._lock:
+            self._load_index()
+            expired = [key for key, (_, created_at) in self._index.items() if self._expired(created_at)]
+            for key in expired:
+                self._remove(key)
+            return len(expired)
+
+    def clear(self):
+        """Vide entièrement le cache"""
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                self._remove(key)
+            self._memory.clear()
+
+    def stats(self):
+        """Retourne les statistiques du cache"""
+        with self._lock:
+            self._load_index()
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "memory": self._memory.stats()
+            }
+
+# Instance partagée par le processus
+prompt_cache = PromptCache()
@@ -0,0 +1,241 @@
+# app/services/season_simulator.py
+"""
+Projection de fin de saison par simulation de Monte-Carlo des matchs
+restants avec le modèle de buts local
+"""
+
+import time
+import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.services.cache import MemoCache, on_match_change
+from app.services.match_model import MODEL_VERSION, get_model
+
+logger = logging.getLogger(__name__)
+
+# Statuts des matchs restant à jouer
+REMAINING_STATUSES = ('SCHEDULED', 'TIMED', 'POSTPONED', 'LIVE', 'IN_PLAY', 'PAUSED', 'UNKNOWN')
+
+# Simulations par bloc (borne la mémoire : blocs x matchs restants)
+CHUNK_SIZE = 5000
+
+# Projections mémorisées par compétition et saison jusqu'au prochain résultat
+_simulation_cache = MemoCache(maxsize=64)
+
+@on_match_change
+def _invalidate_simulations(change):
+    """Supprime les projections de la compétition et de la saison d'un match modifié"""
+    if change["competition"] is None:
+        _simulation_cache.clear()
+    else:
+        _simulation_cache.invalidate_where(
+            lambda key: key[0] == change["competition"] and key[1] == change["season"]
+        )
+
+def _standings(competition, season):
+    """
+    Classement actuel et matchs restants d'une compétition
+
+    Returns:
+        Un tuple (identifiants des clubs, tableaux `played`, `points`, `goals_for`,
+        `goals_against` par club, index domicile et extérieur des matchs restants
+        et identifiants de ces clubs)
+    """
+    rows = db.session.execute(
+        select(Match.status, Match.home_team_id, Match.away_team_id, Match.home_team_score, Match.away_team_score)
+        .where(
+            Match.competition == competition,
+            Match.season == season,
+            Match.home_team_id.isnot(None),
+            Match.away_team_id.isnot(None)
+        )
+    ).all()
+
+    team_ids = np.array(sorted({row.home_team_id for row in rows} | {row.away_team_id for row in rows}), dtype=np.int64)
+    n_teams = team_ids.size
+    played = np.zeros(n_teams, dtype=np.int64)
+    points = np.zeros(n_teams, dtype=np.int64)
+    goals_for = np.zeros(n_teams, dtype=np.int64)
+    goals_against = np.zeros(n_teams, dtype=np.int64)
+
+    finished = [row for row in rows if row.status == 'FINISHED'
+                and row.home_team_score is not None and row.away_team_score is not None]
+    remaining = [row for row in rows if row.status in REMAINING_STATUSES]
+
+    if finished:
+        home = np.searchsorted(team_ids, [row.home_team_id for row in finished])
+        away = np.searchsorted(team_ids, [row.away_team_id for row in finished])
+        home_goals = np.array([row.home_team_score for row in finished], dtype=np.int64)
+        away_goals = np.array([row.away_team_score for row in finished], dtype=np.int64)
+        home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+
+        played += np.bincount(home, minlength=n_teams) + np.bincount(away, minlength=n_teams)
+        points += np.bincount(home, home_points, n_teams).astype(np.int64) + np.bincount(away, away_points, n_teams).astype(np.int64)
+        goals_for += np.bincount(home, home_goals, n_teams).astype(np.int64) + np.bincount(away, away_goals, n_teams).astype(np.int64)
+        goals_against += np.bincount(home, away_goals, n_teams).astype(np.int64) + np.bincount(away, home_goals, n_teams).astype(np.int64)
+
+    remaining_home = np.array([row.home_team_id for row in remaining], dtype=np.int64)
+    remaining_away = np.array([row.away_team_id for row in remaining], dtype=np.int64)
+
+    return (team_ids, played, points, goals_for, goals_against,
+            np.searchsorted(team_ids, remaining_home), np.searchsorted(team_ids, remaining_away),
+            remaining_home, remaining_away)
+
+def _simulate_chunk(score_cdf, home_index, away_index, points, goals_for, goals_against, simulations, seed):
+    """
+    Simule un bloc de fins de saison (exécutable dans un autre processus)
+
+    Le score de chaque match restant est tiré, pour toutes les simulations à
+    la fois, dans la fonction de répartition de sa matrice des scores.
+
+    Returns:
+        Un tuple (comptes des places finales, clubs x places ; somme des points par club)
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = points.size
+    n_fixtures, n_scores = score_cdf.shape
+    side = int(round(np.sqrt(n_scores)))
+
+    final_points = np.tile(points.astype(float), (simulations, 1))
+    goal_difference = np.tile((goals_for - goals_against).astype(float), (simulations, 1))
+    scored = np.tile(goals_for.astype(float), (simulations, 1))
+
+    if n_fixtures:
+        # Une seule recherche pour tous les matchs : la répartition du match f est décalée de f
+        offsets = np.arange(n_fixtures)
+        shifted = (score_cdf + offsets[:, None]).ravel()
+        draws = rng.random((simulations, n_fixtures)) + offsets
+        flat = np.searchsorted(shifted, draws, side='right')
+        flat = np.minimum(flat, (offsets + 1) * n_scores - 1) - offsets * n_scores
+        home_goals, away_goals = np.divmod(flat, side)
+
+        home_points = np.where(home_goals > away_goals, 3.0, np.where(home_goals == away_goals, 1.0, 0.0))
+        away_points = np.where(away_goals > home_goals, 3.0, np.where(home_goals == away_goals, 1.0, 0.0))
+
+        # Matrices d'appartenance match -> club : les cumuls par club sont des produits matriciels
+        home_onehot = np.zeros((n_fixtures, n_teams))
+        away_onehot = np.zeros((n_fixtures, n_teams))
+        home_onehot[offsets, home_index] = 1.0
+        away_onehot[offsets, away_index] = 1.0
+
+        final_points += home_points @ home_onehot + away_points @ away_onehot
+        margin = (home_goals - away_goals).astype(float)
+        goal_difference += margin @ home_onehot - margin @ away_onehot
+        scored += home_goals.astype(float) @ home_onehot + away_goals.astype(float) @ away_onehot
+
+    # Départage : points, différence de buts, buts marqués, puis tirage au sort
+    key = final_points * 1e6 + goal_difference * 1e3 + scored + rng.random((simulations, n_teams))
+    order = np.argsort(-key, axis=1)
+    places = np.empty_like(order)
+    np.put_along_axis(places, order, np.arange(n_teams)[None, :], axis=1)
+
+    counts = np.bincount((np.arange(n_teams)[None, :] * n_teams + places).ravel(), minlength=n_teams * n_teams)
+    return counts.reshape(n_teams, n_teams), final_points.sum(axis=0)
+
+def simulate_season(competition, season, simulations=10000, processes=1, top_places=4, relegation_places=3,
+                    seed=None, use_cache=True):
+    """
+    Projette la fin d'une saison par simulation des matchs restants
+
+    Le classement actuel est calculé sur les matchs terminés de la compétition ;
+    les matchs restants sont tirés selon les matrices des scores du modèle de
+    Dixon-Coles courant. Le résultat est mémorisé jusqu'à la prochaine
+    modification d'un match de la compétition et de la saison.
+
+    Args:
+        competition: la compétition
+        season: la saison
+        simulations: nombre de saisons simulées
+        processes: nombre de processus de calcul (1 pour rester dans le processus courant)
+        top_places: nombre de places qualificatives comptées dans `top` (0 au nombre de clubs)
+        relegation_places: nombre de places de relégation (0 au nombre de clubs)
+        seed: graine du générateur aléatoire (optionnel, pour des résultats reproductibles)
+        use_cache: réutiliser une projection mémorisée
+
+    Returns:
+        Un dictionnaire avec les paramètres, le débit et, par club, le classement
+        actuel, les points attendus et les probabilités de titre, de top et de
+        relégation, ainsi que la distribution des places finales
+    """
+    cache_key = (competition, season, simulations, top_places, relegation_places, seed)
+    if use_cache:
+        cached = _simulation_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    start = time.monotonic()
+    (team_ids, played, points, goals_for, goals_against,
+     home_index, away_index, remaining_home, remaining_away) = _standings(competition, season)
+    n_teams = team_ids.size
+    if n_teams == 0:
+        raise ValueError(f"Aucun match pour {competition} {season}")
+    top_places = max(0, min(top_places, n_teams))
+    relegation_places = max(0, min(relegation_places, n_teams))
+
+    if remaining_home.size:
+        matrices, _, _ = get_model().score_matrices(remaining_home, remaining_away)
+        score_cdf = np.cumsum(matrices.reshape(len(matrices), -1), axis=1)
+        score_cdf[:, -1] = 1.0
+    else:
+        # Saison terminée : le classement final est le classement actuel
+        score_cdf = np.ones((0, 1))
+
+    chunk_sizes = [min(CHUNK_SIZE, simulations - done) for done in range(0, simulations, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    arguments = [(score_cdf, home_index, away_index, points, goals_for, goals_against, size, chunk_seed)
+                 for size, chunk_seed in zip(chunk_sizes, seeds)]
+
+    if processes > 1 and len(arguments) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(arguments))) as executor:
+            results = list(executor.map(_simulate_chunk, *zip(*arguments)))
+    else:
+        results = [_simulate_chunk(*chunk_arguments) for chunk_arguments in arguments]
+
+    place_counts = sum(counts for counts, _ in results)
+    points_sum = sum(total for _, total in results)
+    place_probabilities = place_counts / simulations
+
+    clubs = {club.id: club for club in Club.query.filter(Club.id.in_(team_ids.tolist()))}
+    teams = []
+    for position, team_id in enumerate(team_ids.tolist()):
+        club = clubs.get(team_id)
+        distribution = place_probabilities[position]
+        teams.append({
+            "team_id": team_id,
+            "name": club.name if club else None,
+            "crest": club.crest if club else None,
+            "played": int(played[position]),
+            "points": int(points[position]),
+            "goal_difference": int(goals_for[position] - goals_against[position]),
+            "expected_points": round(float(points_sum[position] / simulations), 2),
+            "title": round(float(distribution[0]), 4),
+            "top": round(float(distribution[:top_places].sum()), 4),
+            "relegation": round(float(distribution[n_teams - relegation_places:].sum()), 4) if relegation_places else 0.0,
+            "positions": [round(float(probability), 4) for probability in distribution]
+        })
+    teams.sort(key=lambda team: (-team["expected_points"], -team["points"]))
+
+    seconds = time.monotonic() - start
+    result = {
+        "competition": competition,
+        "season": season,
+        "model_version": MODEL_VERSION,
+        "simulations": simulations,
+        "remaining_fixtures": int(remaining_home.size),
+        "top_places": top_places,
+        "relegation_places": relegation_places,
+        "seconds": round(seconds, 3),
+        "simulations_per_second": round(simulations / seconds, 1) if seconds > 0 else None,
+        "teams": teams
+    }
+
+    logger.info(f"Saison {competition} {season} simulée {simulations} fois "
+                f"({result['remaining_fixtures']} matchs restants) en {seconds:.3f}s")
+    if use_cache:
+        _simulation_cache.set(cache_key, result)
+    return result
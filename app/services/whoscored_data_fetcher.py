@@ -1,16 +1,17 @@
 # app/services/whoscored_data_fetcher.py
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import json
 import time
 import random
 import logging
-from app.models.player import Player
-from app.models.club import Club
-from app.models.match import Match
-from app.models.player_stats import PlayerStats
-from app import db
+from flask import current_app
+from app.services.page_cache import page_cache, PageNotCachedError, BlockedPageError, is_blocked_page
+from app.services.import_pipeline import LeaguePipeline, PolitenessBudget
+from app.services.import_checkpoints import ImportCheckpoints, import_key
+from app.services.parser_corpus import parser_corpus
+from app.services.match_centre import parse_match_centre, match_report
+from app.services.whoscored_parser import (
+    convert_value, parse_league_teams, parse_team_players, parse_player_summary, parse_match_report
+)
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -40,10 +41,20 @@ class WhoScoredDataFetcher:
         '74/22': 'ligue_1'            # Ligue 1
     }
     
-    def __init__(self, proxy=None):
+    def __init__(self, proxy=None, cache=None, budget=None):
+        """
+        Args:
+            proxy: proxy HTTP(S) à utiliser (optionnel)
+            cache: cache des pages (par défaut, le cache partagé `page_cache`)
+            budget: budget de politesse par hôte (PolitenessBudget) partagé
+                entre fetchers ; à défaut, délais aléatoires fixes autour de
+                chaque requête
+        """
         self.session = requests.Session()
         self.update_headers()
         self.proxy = proxy
+        self.cache = cache if cache is not None else page_cache
+        self.budget = budget
     
     def update_headers(self):
         """
@@ -73,7 +84,19 @@ class WhoScoredDataFetcher:
     def _get_page(self, url, retries=5, delay=5):
         """
         Récupère une page avec gestion d'erreurs et délai entre les tentatives
+        
+        La page est servie par le cache local si elle y est encore valide (sans
+        délai ni requête) ; sinon elle est téléchargée puis enregistrée.
+        
+        Raises:
+            PageNotCachedError: si la page n'est pas en cache en mode hors ligne
         """
+        html = self.cache.get(url)
+        if html is not None:
+            return html
+        if self.cache.offline:
+            raise PageNotCachedError(f"Page absente du cache (mode hors ligne): {url}")
+        
         proxies = None
         if self.proxy:
             proxies = {'http': self.proxy, 'https': self.proxy}
@@ -81,8 +104,9 @@ class WhoScoredDataFetcher:
         # Mettre à jour les headers avec un User-Agent aléatoire
         self.update_headers()
         
-        # Ajouter un délai aléatoire avant chaque requête
-        time.sleep(random.uniform(2, 5))
+        # Ajouter un délai aléatoire avant chaque requête (sauf si un budget par hôte les espace déjà)
+        if self.budget is None:
+            time.sleep(random.uniform(2, 5))
         
         for attempt in range(retries):
             try:
@@ -92,14 +116,23 @@ class WhoScoredDataFetcher:
                     'session_id': f"{random.randint(10000000, 99999999)}"
                 }
                 
-                response = self.session.get(url, proxies=proxies, timeout=15, cookies=cookies)
+                if self.budget is not None:
+                    with self.budget.slot(url):
+                        response = self.session.get(url, proxies=proxies, timeout=15, cookies=cookies)
+                else:
+                    response = self.session.get(url, proxies=proxies, timeout=15, cookies=cookies)
                 response.raise_for_status()
+                if is_blocked_page(response.text):
+                    raise BlockedPageError(f"Page de vérification anti-robot reçue pour {url}")
                 
                 # Sauvegarder les cookies pour les requêtes futures
                 self.session.cookies.update(response.cookies)
+                # Seules les pages portant les marqueurs attendus sont gardées en cache
+                self.cache.set(url, response.text)
                 
                 # Ajouter un délai plus long entre les tentatives
-                time.sleep(random.uniform(delay, delay * 2))
+                if self.budget is None:
+                    time.sleep(random.uniform(delay, delay * 2))
                 
                 return response.text
             except requests.RequestException as e:
@@ -115,6 +148,18 @@ class WhoScoredDataFetcher:
                     logger.error(f"Échec après {retries} tentatives pour {url}")
                     raise
     
+    def league_url(self, league_id, season_id):
+        """URL de la page d'une ligue pour une saison"""
+        return f"{self.BASE_URL}/Regions/{league_id}/Tournaments/Seasons/{season_id}/Stages/"
+    
+    def team_url(self, team_id):
+        """URL de la page d'une équipe (avec un paramètre aléatoire pour éviter la mise en cache)"""
+        return f"{self.BASE_URL}/Teams/{team_id}/Show/?r={random.randint(1000, 9999)}"
+    
+    def player_url(self, player_id):
+        """URL de la fiche d'un joueur (avec un paramètre aléatoire pour éviter la mise en cache)"""
+        return f"{self.BASE_URL}/Players/{player_id}/Show/?r={random.randint(1000, 9999)}"
+    
     def get_league_teams(self, league_id, season_id):
         """
         Récupère la liste des équipes pour une ligue et une saison données
@@ -126,36 +171,19 @@ class WhoScoredDataFetcher:
         Returns:
             Une liste de dictionnaires contenant les informations des équipes
         """
-        url = f"{self.BASE_URL}/Regions/{league_id}/Tournaments/Seasons/{season_id}/Stages/"
-        
-        html = self._get_page(url)
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        teams = []
-        team_links = soup.select('table.standings a[href*="/Teams/"]')
-        
-        if not team_links:
-            # Essayer un sélecteur alternatif
-            team_links = soup.select('div.tournament-teamlist a[href*="/Teams/"]')
-        
-        if not team_links:
+        return self.teams_from_page(self._get_page(self.league_url(league_id, season_id)), league_id, season_id)
+    
+    def teams_from_page(self, html, league_id, season_id):
+        """Équipes de la page d'une ligue déjà téléchargée (voir `get_league_teams`)"""
+        teams = [
+            dict(team, league_id=league_id, season_id=season_id)
+            for team in parse_league_teams(html)
+        ]
+        
+        if not teams:
             logger.warning(f"Aucune équipe trouvée pour la ligue {league_id}, saison {season_id}")
             # Sauvegarder la page HTML pour débogage
-            with open(f"debug_teams_{league_id}_{season_id}.html", "w", encoding="utf-8") as f:
-                f.write(html)
-        
-        for link in team_links:
-            href = link['href']
-            team_id = href.split('/')[2] if '/Teams/' in href else None
-            
-            if team_id:
-                team_name = link.text.strip()
-                teams.append({
-                    'id': team_id,
-                    'name': team_name,
-                    'league_id': league_id,
-                    'season_id': season_id
-                })
+            parser_corpus.save_failure('league_teams', f"{league_id}_{season_id}", html)
         
         logger.info(f"Nombre d'équipes trouvées: {len(teams)}")
         return teams
@@ -171,46 +199,19 @@ class WhoScoredDataFetcher:
         Returns:
             Une liste de dictionnaires contenant les informations des joueurs
         """
-        url = f"{self.BASE_URL}/Teams/{team_id}/Show/"
-        
-        # Ajouter un paramètre aléatoire pour éviter la mise en cache
-        url = f"{url}?r={random.randint(1000, 9999)}"
-        
-        html = self._get_page(url)
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        players = []
-        player_rows = soup.select('table#player-table-statistics-body tr')
-        
-        if not player_rows:
-            # Essayer un sélecteur alternatif
-            player_rows = soup.select('table.player-statistics tbody tr')
-        
-        if not player_rows:
+        return self.players_from_page(self._get_page(self.team_url(team_id)), team_id, season_id)
+    
+    def players_from_page(self, html, team_id, season_id):
+        """Joueurs de la page d'une équipe déjà téléchargée (voir `get_team_players`)"""
+        players = [
+            dict(player, team_id=team_id, season_id=season_id)
+            for player in parse_team_players(html)
+        ]
+        
+        if not players:
             logger.warning(f"Aucun joueur trouvé pour l'équipe {team_id}, saison {season_id}")
             # Sauvegarder la page HTML pour débogage
-            with open(f"debug_players_{team_id}_{season_id}.html", "w", encoding="utf-8") as f:
-                f.write(html)
-        
-        for row in player_rows:
-            player_link = row.select_one('a[href*="/Players/"]')
-            if not player_link:
-                continue
-                
-            player_id = player_link['href'].split('/')[2]
-            player_name = player_link.text.strip()
-            
-            # Récupérer la position du joueur
-            position_cell = row.select_one('td:nth-child(2)')
-            position = position_cell.text.strip() if position_cell else 'Unknown'
-            
-            players.append({
-                'id': player_id,
-                'name': player_name,
-                'team_id': team_id,
-                'position': position,
-                'season_id': season_id
-            })
+            parser_corpus.save_failure('team_players', f"{team_id}_{season_id}", html)
         
         logger.info(f"Nombre de joueurs trouvés: {len(players)}")
         return players
@@ -226,14 +227,10 @@ class WhoScoredDataFetcher:
         Returns:
             Un dictionnaire contenant les statistiques du joueur
         """
-        url = f"{self.BASE_URL}/Players/{player_id}/Show/"
-        
-        # Ajouter un paramètre aléatoire pour éviter la mise en cache
-        url = f"{url}?r={random.randint(1000, 9999)}"
-        
-        html = self._get_page(url)
-        soup = BeautifulSoup(html, 'html.parser')
-        
+        return self.stats_from_page(self._get_page(self.player_url(player_id)), player_id, season_id)
+    
+    def stats_from_page(self, html, player_id, season_id):
+        """Statistiques de la fiche d'un joueur déjà téléchargée (voir `get_player_stats`)"""
         stats = {
             'player_id': player_id,
             'season_id': season_id,
@@ -245,19 +242,11 @@ class WhoScoredDataFetcher:
         }
         
         # Statistiques générales (résumé)
-        summary_table = soup.select_one('table.player-summary-statistics')
-        if summary_table:
-            for row in summary_table.select('tr'):
-                cells = row.select('td')
-                if len(cells) >= 2:
-                    key = cells[0].text.strip().lower().replace(' ', '_')
-                    value = cells[1].text.strip()
-                    stats['summary'][key] = self._convert_value(value)
-        else:
+        stats['summary'] = parse_player_summary(html)
+        if not stats['summary']:
             logger.warning(f"Aucune statistique trouvée pour le joueur {player_id}, saison {season_id}")
             # Sauvegarder la page HTML pour débogage
-            with open(f"debug_player_stats_{player_id}_{season_id}.html", "w", encoding="utf-8") as f:
-                f.write(html)
+            parser_corpus.save_failure('player_stats', f"{player_id}_{season_id}", html)
         
         # Les autres statistiques nécessitent JavaScript, donc elles seront récupérées par le scraper Selenium
         return stats
@@ -278,202 +267,86 @@ class WhoScoredDataFetcher:
         url = f"{url}?r={random.randint(1000, 9999)}"
         
         html = self._get_page(url)
-        soup = BeautifulSoup(html, 'html.parser')
         
-        match_details = {
-            'id': match_id,
-            'events': [],
-            'team_stats': {},
-            'player_ratings': {}
-        }
+        # Données du centre de match embarquées dans la page : décodées une seule fois
+        centre = parse_match_centre(html)
+        if centre:
+            return dict(match_report(centre), id=match_id, match_centre=centre)
         
-        # Récupérer les événements du match (buts, cartons, etc.)
-        event_list = soup.select('div.match-centre-events-wrapper li')
-        for event in event_list:
-            event_type = None
-            if 'goal' in event.get('class', []):
-                event_type = 'goal'
-            elif 'card' in event.get('class', []):
-                event_type = 'card'
-            elif 'sub' in event.get('class', []):
-                event_type = 'substitution'
-            
-            if event_type:
-                event_minute = event.select_one('span.minute')
-                event_minute_text = event_minute.text.strip().replace("'", '') if event_minute else ''
-                
-                player_name = event.select_one('a')
-                player_name_text = player_name.text.strip() if player_name else None
-                
-                match_details['events'].append({
-                    'type': event_type,
-                    'minute': event_minute_text,
-                    'player': player_name_text
-                })
-        
-        # Récupérer les statistiques des équipes
-        stats_table = soup.select_one('div.match-centre-stats')
-        if stats_table:
-            categories = stats_table.select('div.stat-category')
-            for category in categories:
-                stat_name_elem = category.select_one('div.stat-name')
-                home_stat_elem = category.select_one('div.home-stat')
-                away_stat_elem = category.select_one('div.away-stat')
-                
-                if stat_name_elem and home_stat_elem and away_stat_elem:
-                    stat_name = stat_name_elem.text.strip().lower().replace(' ', '_')
-                    home_value = home_stat_elem.text.strip()
-                    away_value = away_stat_elem.text.strip()
-                    
-                    match_details['team_stats'][stat_name] = {
-                        'home': self._convert_value(home_value),
-                        'away': self._convert_value(away_value)
-                    }
-        
-        # Récupérer les notes des joueurs
-        ratings_home = soup.select('div.home-team div.player-rating')
-        ratings_away = soup.select('div.away-team div.player-rating')
-        
-        for rating in ratings_home:
-            player_elem = rating.select_one('a')
-            rating_elem = rating.select_one('span.rating')
-            
-            if player_elem and rating_elem:
-                player_name = player_elem.text.strip()
-                player_rating = rating_elem.text.strip()
-                try:
-                    match_details['player_ratings'][player_name] = float(player_rating)
-                except ValueError:
-                    match_details['player_ratings'][player_name] = 0.0
-        
-        for rating in ratings_away:
-            player_elem = rating.select_one('a')
-            rating_elem = rating.select_one('span.rating')
-            
-            if player_elem and rating_elem:
-                player_name = player_elem.text.strip()
-                player_rating = rating_elem.text.strip()
-                try:
-                    match_details['player_ratings'][player_name] = float(player_rating)
-                except ValueError:
-                    match_details['player_ratings'][player_name] = 0.0
+        # Événements (buts, cartons, remplacements), statistiques des équipes et notes des joueurs
+        match_details = dict(parse_match_report(html), id=match_id)
         
         if not match_details['events'] and not match_details['team_stats'] and not match_details['player_ratings']:
             logger.warning(f"Aucun détail trouvé pour le match {match_id}")
             # Sauvegarder la page HTML pour débogage
-            with open(f"debug_match_{match_id}.html", "w", encoding="utf-8") as f:
-                f.write(html)
+            parser_corpus.save_failure('match_report', match_id, html)
         
         return match_details
     
+    def get_match_centre(self, match_id):
+        """
+        Récupère les données du centre de match (événements avec coordonnées,
+        joueurs et notes) embarquées dans la page en direct d'un match
+        
+        Args:
+            match_id: l'identifiant du match
+        
+        Returns:
+            Le résultat de `parse_match_centre`, ou None si la page ne contient pas ces données
+        """
+        url = f"{self.BASE_URL}/Matches/{match_id}/Live/"
+        
+        html = self._get_page(url)
+        centre = parse_match_centre(html)
+        
+        if not centre:
+            logger.warning(f"Données du centre de match introuvables pour le match {match_id}")
+            parser_corpus.save_failure('match_centre', match_id, html)
+            return None
+        
+        logger.info(f"Centre de match {match_id}: {len(centre['events'])} événements, {len(centre['players'])} joueurs")
+        return centre
+    
     def _convert_value(self, value):
         """
         Convertit une valeur en string vers le type approprié (int, float, etc.)
         """
-        if not value:
-            return 0
-            
-        value = value.strip()
-        
-        # Essayer de convertir en entier
-        try:
-            return int(value)
-        except ValueError:
-            pass
-        
-        # Essayer de convertir en nombre à virgule
-        try:
-            # Remplacer la virgule par un point pour les nombres décimaux
-            if ',' in value:
-                value = value.replace(',', '.')
-            return float(value)
-        except ValueError:
-            pass
-        
-        # Pour les pourcentages
-        if '%' in value:
-            try:
-                return float(value.replace('%', '')) / 100
-            except ValueError:
-                pass
-        
-        # Retourner la valeur comme une chaîne si les conversions échouent
-        return value
+        return convert_value(value)
     
-    def import_league_data(self, league_id, season_id):
+    def import_league_data(self, league_id, season_id, progress=None, resume=False):
         """
         Importe toutes les données d'une ligue pour une saison (équipes, joueurs, statistiques)
         
+        Le téléchargement, l'analyse et l'écriture des pages sont des étapes
+        parallèles d'un pipeline (voir LeaguePipeline), configuré par les
+        paramètres WHOSCORED_PIPELINE_* ; les requêtes vers WhoScored sont
+        espacées par le budget de politesse par hôte. La page de la ligue,
+        chaque équipe et chaque joueur enregistrés sont inscrits comme points
+        de reprise : en reprise, seules les unités non terminées sont refaites.
+        
         Args:
             league_id: l'identifiant de la ligue
             season_id: l'identifiant de la saison
+            progress: fonction appelée régulièrement avec les compteurs du pipeline (optionnel)
+            resume: reprendre un import interrompu au lieu de tout refaire
+        
+        Returns:
+            Les compteurs du pipeline : équipes, joueurs, statistiques, et débit de chaque étape
         """
         logger.info(f"Importation des données pour la ligue {league_id}, saison {season_id}")
         
-        # Récupérer la liste des équipes
-        teams = self.get_league_teams(league_id, season_id)
-        
-        for team in teams:
-            # Ajouter un délai entre chaque traitement d'équipe
-            time.sleep(random.uniform(5, 10))
-            
-            # Vérifier si l'équipe existe déjà en base de données
-            db_team = Club.query.filter_by(api_id=team['id']).first()
-            
-            if not db_team:
-                # Créer une nouvelle équipe
-                db_team = Club(
-                    api_id=team['id'],
-                    name=team['name'],
-                    # Autres champs...
-                )
-                db.session.add(db_team)
-                db.session.commit()
-                logger.info(f"Équipe créée: {team['name']}")
-            
-            # Récupérer la liste des joueurs de l'équipe
-            players = self.get_team_players(team['id'], season_id)
-            
-            for player in players:
-                # Ajouter un délai entre chaque traitement de joueur
-                time.sleep(random.uniform(3, 5))
-                
-                # Vérifier si le joueur existe déjà
-                db_player = Player.query.filter_by(api_id=player['id']).first()
-                
-                if not db_player:
-                    # Créer un nouveau joueur
-                    db_player = Player(
-                        api_id=player['id'],
-                        name=player['name'],
-                        position=player['position'],
-                        club_id=db_team.id
-                        # Autres champs...
-                    )
-                    db.session.add(db_player)
-                    db.session.commit()
-                    logger.info(f"Joueur créé: {player['name']}")
-                
-                # Récupérer les statistiques du joueur
-                player_stats = self.get_player_stats(player['id'], season_id)
-                
-                # Créer ou mettre à jour les statistiques du joueur
-                db_stats = PlayerStats.query.filter_by(
-                    player_id=db_player.id,
-                    season=season_id
-                ).first()
-                
-                if not db_stats:
-                    db_stats = PlayerStats(
-                        player_id=db_player.id,
-                        season=season_id
-                    )
-                    db.session.add(db_stats)
-                
-                # Mettre à jour les statistiques
-                self._update_player_stats(db_stats, player_stats)
-                db.session.commit()
-                logger.info(f"Statistiques mises à jour pour {player['name']}")
+        config = current_app.config
+        budget = self.budget or PolitenessBudget.from_config(config)
+        pipeline = LeaguePipeline(
+            league_id, season_id,
+            fetcher_factory=lambda: WhoScoredDataFetcher(proxy=self.proxy, cache=self.cache, budget=budget),
+            fetch_workers=config.get('WHOSCORED_PIPELINE_FETCH_WORKERS', 2),
+            parse_workers=config.get('WHOSCORED_PIPELINE_PARSE_WORKERS', 2),
+            batch_size=config.get('WHOSCORED_PIPELINE_BATCH_SIZE', 200),
+            queue_size=config.get('WHOSCORED_PIPELINE_QUEUE_SIZE', 50),
+            checkpoints=ImportCheckpoints(import_key('whoscored', 'league', league_id, season_id), resume=resume)
+        )
+        return pipeline.run(progress=progress)
     
     def _update_player_stats(self, db_stats, player_stats):
         """
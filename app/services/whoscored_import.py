@@ -0,0 +1,413 @@
+# app/services/whoscored_import.py
+"""
+Tâches d'import depuis WhoScored, exécutées en arrière-plan par le job runner
+
+Chaque tâche publie son avancement et vérifie la demande d'annulation entre
+deux équipes ou deux joueurs ; le navigateur Chrome est emprunté au pool de
+navigateurs et lui est rendu à la fin de la tâche, qu'elle réussisse, échoue
+ou soit annulée. Les imports de joueurs et de ligues inscrivent leurs unités
+terminées comme points de reprise : relancés avec `resume=True` (voir
+`JobRunner.resume`), ils sautent ce qui a déjà été enregistré.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+from app import db
+from app.models.club import Club
+from app.models.match import Match
+from app.models.match_event import MatchEvent
+from app.models.player import Player
+from app.models.player_performance import PlayerPerformance
+from app.models.player_stats import PlayerStats
+from app.services.browser_pool import browser_pool
+from app.services.csv_importer import convert_whoscored_field_name
+from app.services.import_checkpoints import ImportCheckpoints, import_key
+from app.services.job_runner import job_runner
+from app.services.match_centre import team_stats
+from app.services.whoscored_data_fetcher import WhoScoredDataFetcher
+
+logger = logging.getLogger(__name__)
+
+# Types de tâches proposés par le formulaire d'import
+IMPORT_KINDS = ('teams', 'players', 'player_stats', 'league', 'league_stats')
+
+def league_stats_csv_path(league_id, season_id, category):
+    """Chemin du fichier CSV des statistiques d'une ligue pour une catégorie"""
+    return os.path.join(os.path.dirname(__file__), '..', 'static', 'temp',
+                        f'league_{league_id}_{season_id}_{category.lower()}.csv')
+
+def _get_or_create_club(team):
+    """Retourne le club d'une équipe WhoScored, créé s'il n'existe pas"""
+    db_team = Club.query.filter_by(api_id=team['id']).first()
+    if not db_team:
+        db_team = Club(
+            api_id=team['id'],
+            name=team['name'],
+            short_name=team['name'],
+            # Autres champs...
+        )
+        db.session.add(db_team)
+        db.session.flush()
+    return db_team
+
+@job_runner.task('teams')
+def import_teams(job, league_id, season_id, headless=True, chrome_path=None, proxy=None):
+    """
+    Importe les équipes d'une ligue
+
+    Returns:
+        Un dictionnaire {teams, created}
+    """
+    job.progress(message="Chargement de la liste des équipes")
+    with browser_pool.scraper(headless=headless, chrome_path=chrome_path) as scraper:
+        teams = scraper.get_league_teams(league_id, season_id)
+
+    created = 0
+    job.progress(current=0, total=len(teams), message="Enregistrement des équipes")
+    for team in teams:
+        if not Club.query.filter_by(api_id=team['id']).first():
+            _get_or_create_club(team)
+            created += 1
+    db.session.commit()
+    job.progress(current=len(teams), message=f"{len(teams)} équipes importées")
+
+    return {"teams": len(teams), "created": created}
+
+@job_runner.task('players', resumable=True)
+def import_players(job, league_id, season_id, headless=True, chrome_path=None, proxy=None, resume=False):
+    """
+    Importe les joueurs de toutes les équipes d'une ligue
+
+    Chaque équipe est inscrite comme point de reprise dans la transaction
+    qui enregistre ses joueurs.
+
+    Returns:
+        Un dictionnaire {teams, players, created, skipped}
+    """
+    checkpoints = ImportCheckpoints(import_key('whoscored', 'players', league_id, season_id), resume=resume)
+    fetcher = WhoScoredDataFetcher(proxy=proxy)
+    job.progress(message="Chargement de la liste des équipes")
+    teams = fetcher.get_league_teams(league_id, season_id)
+    job.progress(current=0, total=len(teams))
+
+    total_players = 0
+    created = 0
+    skipped = 0
+    for team in teams:
+        job.check_cancelled()
+        if checkpoints.is_done('team', team['id']):
+            skipped += 1
+            job.advance(message=f"{team['name']} : déjà importée")
+            continue
+
+        players = fetcher.get_team_players(team['id'], season_id)
+        db_team = _get_or_create_club(team)
+
+        for player in players:
+            if not Player.query.filter_by(api_id=player['id']).first():
+                db.session.add(Player(
+                    api_id=player['id'],
+                    name=player['name'],
+                    position=player['position'],
+                    club_id=db_team.id
+                    # Autres champs...
+                ))
+                created += 1
+
+        checkpoints.mark('team', team['id'], {'players': len(players)})
+        db.session.commit()
+        total_players += len(players)
+        job.advance(message=f"{team['name']} : {len(players)} joueurs")
+
+    return {"teams": len(teams), "players": total_players, "created": created, "skipped": skipped}
+
+@job_runner.task('player_stats')
+def import_player_stats(job, league_id, season_id, headless=True, chrome_path=None, proxy=None):
+    """
+    Importe les statistiques détaillées des joueurs connus d'une ligue
+
+    Un navigateur est emprunté au pool pour chaque joueur : le pool peut
+    ainsi remplacer un navigateur usé (pages, mémoire) au cours d'un long
+    import, et le prêter entre deux joueurs à une autre tâche.
+
+    Returns:
+        Un dictionnaire {players, imported}
+    """
+    job.progress(message="Chargement de la liste des équipes")
+    with browser_pool.scraper(headless=headless, chrome_path=chrome_path) as scraper:
+        team_ids = [team['id'] for team in scraper.get_league_teams(league_id, season_id)]
+    players = Player.query.join(Club).filter(Club.api_id.in_(team_ids), Player.api_id.isnot(None)).all()
+    job.progress(current=0, total=len(players))
+
+    stats_count = 0
+    for player in players:
+        job.check_cancelled()
+        with browser_pool.scraper(headless=headless, chrome_path=chrome_path) as scraper:
+            stats = scraper.get_player_detailed_stats(player.api_id, season_id)
+
+        if stats:
+            # Créer ou mettre à jour les statistiques du joueur
+            db_stats = PlayerStats.query.filter_by(player_id=player.id, season=season_id).first()
+            if not db_stats:
+                db_stats = PlayerStats(player_id=player.id, season=season_id)
+                db.session.add(db_stats)
+
+            update_player_stats_from_whoscored(db_stats, stats)
+            db.session.commit()
+            stats_count += 1
+
+        job.advance(message=player.name)
+
+    return {"players": len(players), "imported": stats_count}
+
+def pipeline_message(stats):
+    """Résumé des compteurs du pipeline d'import d'une ligue"""
+    stages = stats['stages']
+    return (f"{stats['teams']} équipes, {stats['players']} joueurs, {stats['stats']} statistiques - "
+            f"pages {stages['fetch']['per_second']}/s, analyses {stages['parse']['per_second']}/s, "
+            f"lignes écrites {stages['write']['per_second']}/s"
+            + (f" ({stats['skipped']} unités déjà importées)" if stats.get('skipped') else ""))
+
+@job_runner.task('league', resumable=True)
+def import_league(job, league_id, season_id, headless=True, chrome_path=None, proxy=None, resume=False):
+    """
+    Importe les équipes, les joueurs et leurs statistiques d'une ligue avec
+    le pipeline de WhoScoredDataFetcher (sans navigateur), en sautant en
+    reprise les équipes et joueurs déjà importés
+
+    Returns:
+        Les compteurs du pipeline
+    """
+    def progress(stats):
+        job.progress(current=stats['stats'], total=stats['players'] or None, message=pipeline_message(stats))
+        job.check_cancelled()
+
+    job.progress(message="Chargement de la page de la ligue")
+    return WhoScoredDataFetcher(proxy=proxy).import_league_data(league_id, season_id, progress=progress, resume=resume)
+
+@job_runner.task('league_stats')
+def import_league_stats(job, league_id, season_id, category='Summary', headless=True, chrome_path=None, proxy=None):
+    """
+    Récupère les statistiques des joueurs d'une ligue pour une catégorie et
+    les enregistre dans un fichier CSV
+
+    Returns:
+        Un dictionnaire {league_id, season_id, category, rows}
+    """
+    job.progress(current=0, total=1, message=f"Statistiques {category} de la ligue")
+    with browser_pool.scraper(headless=headless, chrome_path=chrome_path) as scraper:
+        df = scraper.get_league_player_statistics(league_id, season_id, category)
+
+    if df is None:
+        raise RuntimeError("Erreur lors de la récupération des statistiques de la ligue")
+
+    csv_path = league_stats_csv_path(league_id, season_id, category)
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    df.to_csv(csv_path, index=False)
+    job.progress(current=1, message=f"{len(df)} lignes enregistrées")
+
+    return {"league_id": league_id, "season_id": season_id, "category": category.lower(), "rows": len(df)}
+
+def update_player_stats_from_whoscored(db_stats, stats):
+    """
+    Met à jour les statistiques d'un joueur dans la base de données
+    à partir des données extraites de WhoScored
+
+    Args:
+        db_stats: l'objet PlayerStats à mettre à jour
+        stats: les statistiques extraites de WhoScored
+    """
+    # Statistiques générales/résumé
+    if 'summary' in stats:
+        for key, value in stats['summary'].items():
+            # Convertir les clés WhoScored vers les noms de champs de notre modèle
+            field_name = convert_whoscored_field_name(key)
+            if hasattr(db_stats, field_name):
+                setattr(db_stats, field_name, value)
+
+    # Statistiques offensives
+    if 'offensive' in stats:
+        if 'goals' in stats['offensive']:
+            db_stats.goals = stats['offensive']['goals']
+        if 'assists' in stats['offensive']:
+            db_stats.assists = stats['offensive']['assists']
+        if 'shots_per_game' in stats['offensive']:
+            db_stats.shots = float(stats['offensive']['shots_per_game']) * db_stats.matches_played
+        if 'shots_on_target_per_game' in stats['offensive']:
+            db_stats.shots_on_target = float(stats['offensive']['shots_on_target_per_game']) * db_stats.matches_played
+
+    # Statistiques défensives
+    if 'defensive' in stats:
+        if 'tackles_per_game' in stats['defensive']:
+            db_stats.tackles = float(stats['defensive']['tackles_per_game']) * db_stats.matches_played
+        if 'interceptions_per_game' in stats['defensive']:
+            db_stats.interceptions = float(stats['defensive']['interceptions_per_game']) * db_stats.matches_played
+        if 'clearances_per_game' in stats['defensive']:
+            db_stats.clearances = float(stats['defensive']['clearances_per_game']) * db_stats.matches_played
+
+    # Statistiques de passes
+    if 'passing' in stats:
+        if 'passes_per_game' in stats['passing']:
+            db_stats.passes = float(stats['passing']['passes_per_game']) * db_stats.matches_played
+        if 'pass_success_percentage' in stats['passing']:
+            db_stats.passes_completed = int(db_stats.passes * float(stats['passing']['pass_success_percentage']) / 100)
+        if 'key_passes_per_game' in stats['passing']:
+            db_stats.key_passes = float(stats['passing']['key_passes_per_game']) * db_stats.matches_played
+
+    # Mettre à jour la date de mise à jour
+    db_stats.updated_at = datetime.utcnow()
+
+# Colonnes de Match complétées par les statistiques du centre de match, si vides
+# (la part des passes n'est pas une possession et n'est donc pas enregistrée)
+MATCH_STAT_COLUMNS = {
+    'shots': ('home_shots', 'away_shots'),
+    'shots_on_target': ('home_shots_on_target', 'away_shots_on_target'),
+    'corners': ('home_corners', 'away_corners'),
+    'fouls': ('home_fouls', 'away_fouls'),
+    'yellow_cards': ('home_yellow_cards', 'away_yellow_cards'),
+    'red_cards': ('home_red_cards', 'away_red_cards')
+}
+
+PERFORMANCE_COLUMNS = (
+    'position', 'shirt_number', 'captain', 'minutes_played', 'goals', 'assists', 'yellow_cards', 'red_card',
+    'shots', 'shots_on_target', 'hit_woodwork', 'passes', 'passes_completed', 'key_passes', 'crosses',
+    'crosses_completed', 'through_balls', 'tackles', 'tackles_won', 'interceptions', 'clearances', 'blocks',
+    'duels', 'duels_won', 'saves', 'goals_conceded', 'penalties_saved', 'avg_position_x', 'avg_position_y', 'rating'
+)
+
+def _find_or_create_match(centre, home_team, away_team, competition=None, season=None):
+    """Match du centre de match : même affiche le même jour, créé s'il n'existe pas
+    
+    Raises:
+        ValueError: si la page ne donne pas la date du match
+    """
+    info = centre['match']
+    if not info['date']:
+        # Sans date, l'affiche ne suffit pas à retrouver le match, ni à le créer
+        raise ValueError("Date du match introuvable dans le centre de match")
+    competition = competition or info.get('competition')
+    season = season or info.get('season')
+    day = info['date'].replace(hour=0, minute=0, second=0, microsecond=0)
+    match = Match.query.filter(Match.home_team_id == home_team.id, Match.away_team_id == away_team.id,
+                               Match.date >= day, Match.date < day + timedelta(days=1)).first()
+
+    if not match:
+        match = Match(home_team_id=home_team.id, away_team_id=away_team.id, date=info['date'],
+                      competition=competition, season=season)
+        db.session.add(match)
+    else:
+        match.competition = match.competition or competition
+        match.season = match.season or season
+    if info['finished']:
+        match.status = 'FINISHED'
+        for column in ('home_team_score', 'away_team_score', 'half_time_home', 'half_time_away'):
+            if info[column] is not None:
+                setattr(match, column, info[column])
+    db.session.flush()
+    return match
+
+def import_match_centre(centre, match=None, competition=None, season=None):
+    """
+    Enregistre les données du centre de match d'un match WhoScored
+
+    Les événements (avec leurs coordonnées) sont rapprochés de ceux déjà
+    importés par leur identifiant WhoScored : les événements connus sont mis
+    à jour (leur id ne change pas), les nouveaux insérés et ceux qui ont
+    disparu de la page supprimés, en requêtes groupées. Les performances des
+    joueurs sont créées ou mises à jour. Une nouvelle importation du même
+    match ne crée donc pas de doublons.
+
+    Args:
+        centre: le résultat de `parse_match_centre`
+        match: le match concerné (optionnel, retrouvé d'après les équipes et la date sinon)
+        competition: nom de la compétition d'un match créé (optionnel, lu dans la page sinon)
+        season: saison d'un match créé, ex: '2023/2024' (optionnel, lue dans la page ou déduite de la date sinon)
+
+    Returns:
+        Un dictionnaire {match_id, events, players}
+    
+    Raises:
+        ValueError: si le match n'est pas fourni et que la page ne donne pas sa date
+    """
+    clubs = {side: _get_or_create_club(team) for side, team in centre['teams'].items()}
+    club_ids = {team['id']: clubs[side].id for side, team in centre['teams'].items()}
+    if match is None:
+        match = _find_or_create_match(centre, clubs['home'], clubs['away'], competition, season)
+
+    for name, value in team_stats(centre).items():
+        for side, column in zip(('home', 'away'), MATCH_STAT_COLUMNS.get(name, ())):
+            if getattr(match, column) is None and value[side] is not None:
+                setattr(match, column, value[side])
+
+    # Joueurs : ceux qui manquent sont créés en une fois
+    known = {player.api_id: player for player in
+             Player.query.filter(Player.api_id.in_([player['player_id'] for player in centre['players']])).all()}
+    for player in centre['players']:
+        if player['player_id'] not in known:
+            known[player['player_id']] = Player(api_id=player['player_id'], name=player['name'],
+                                                position=player['position'], shirt_number=player['shirt_number'],
+                                                club_id=club_ids.get(player['team_id']))
+            db.session.add(known[player['player_id']])
+    db.session.flush()
+    player_ids = {api_id: player.id for api_id, player in known.items()}
+
+    # Seuls les joueurs entrés en jeu ont une performance
+    played = [player for player in centre['players'] if player['minutes_played']]
+    performances = {performance.player_id: performance for performance in
+                    PlayerPerformance.query.filter_by(match_id=match.id).all()}
+    for player in played:
+        performance = performances.get(player_ids[player['player_id']])
+        if performance is None:
+            performance = PlayerPerformance(match_id=match.id, player_id=player_ids[player['player_id']])
+            db.session.add(performance)
+        performance.team_id = club_ids.get(player['team_id'])
+        for column in PERFORMANCE_COLUMNS:
+            setattr(performance, column, player[column])
+        performance.heatmap_data = json.dumps(player['touches'])
+
+    # Événements sans identifiant WhoScored : impossibles à rapprocher d'une importation à l'autre
+    events = {event['source_event_id']: event for event in centre['events'] if event['source_event_id'] is not None}
+    existing = dict(db.session.query(MatchEvent.source_event_id, MatchEvent.id).filter(
+        MatchEvent.match_id == match.id, MatchEvent.source_event_id.isnot(None)).all())
+    vanished = [event_id for source_id, event_id in existing.items() if source_id not in events]
+    if vanished:
+        MatchEvent.query.filter(MatchEvent.id.in_(vanished)).delete(synchronize_session=False)
+
+    now = datetime.utcnow()
+    rows = [{
+        'match_id': match.id,
+        'source_event_id': event['source_event_id'],
+        'minute': event['minute'],
+        'second': event['second'],
+        'extra_minute': event['extra_minute'],
+        'period': event['period'],
+        'type': event['type'],
+        'team_id': club_ids.get(event['team_id']),
+        'player_id': player_ids.get(event['player_id']),
+        'secondary_player_id': player_ids.get(event['secondary_player_id']),
+        'assist_player_id': player_ids.get(event['assist_player_id']),
+        'card_type': event['card_type'],
+        'goal_type': event['goal_type'],
+        'x': event['x'],
+        'y': event['y'],
+        'end_x': event['end_x'],
+        'end_y': event['end_y'],
+        'is_successful': event['is_successful'],
+        'qualifiers': json.dumps(event['qualifiers']) if event['qualifiers'] else None,
+        'updated_at': now
+    } for event in events.values()]
+    new_rows = [dict(row, created_at=now) for row in rows if row['source_event_id'] not in existing]
+    updated_rows = [dict(row, id=existing[row['source_event_id']]) for row in rows
+                    if row['source_event_id'] in existing]
+    if new_rows:
+        db.session.execute(insert(MatchEvent), new_rows)
+    if updated_rows:
+        db.session.execute(update(MatchEvent), updated_rows)
+
+    db.session.commit()
+    logger.info(f"Centre de match importé pour le match {match.id}: {len(new_rows)} événements ajoutés, "
+                f"{len(updated_rows)} mis à jour, {len(vanished)} supprimés, {len(played)} joueurs")
+    return {"match_id": match.id, "events": len(events), "players": len(played)}
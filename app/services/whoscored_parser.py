@@ -0,0 +1,368 @@
+# app/services/whoscored_parser.py
+"""
+Analyse des pages WhoScored avec lxml
+
+Le HTML d'une page (réponse HTTP ou `page_source` de Selenium) est analysé
+une seule fois par lxml, puis interrogé avec des expressions XPath compilées
+au chargement du module. Les tableaux sont retournés en colonnes typées
+(entiers, décimaux ou chaînes).
+"""
+
+import re
+import logging
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+def _has_class(name):
+    """Condition XPath équivalente au sélecteur CSS `.name`"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _first_of(*xpaths):
+    """Compile des expressions XPath essayées dans l'ordre"""
+    return tuple(etree.XPath(xpath) for xpath in xpaths)
+
+# Tableaux de statistiques d'un joueur (onglet courant)
+STAT_ROWS = etree.XPath(
+    f"//table[{_has_class('player-statistics')} or {_has_class('player-stats-detailed')}"
+    f" or ancestor::div[{_has_class('player-stats-container')}]]//tr[td]"
+)
+SUMMARY_ROWS = etree.XPath(f"(//table[{_has_class('player-summary-statistics')}])[1]//tr[td]")
+CELLS = etree.XPath("./td")
+
+# Informations d'un joueur
+PLAYER_NAME = _first_of(
+    f"//div[{_has_class('player-header')}]//h1",
+    f"//h1[{_has_class('player-name')}]"
+)
+PLAYER_INFO_TERMS = _first_of(
+    f"//div[{_has_class('player-header')}]//dl/*[self::dt or self::dd]",
+    f"//div[{_has_class('player-info')}]//dl/*[self::dt or self::dd]"
+)
+
+# Équipes d'une ligue et joueurs d'une équipe
+TEAM_LINKS = _first_of(
+    f"//table[{_has_class('standings')}]//a[contains(@href, '/Teams/')]",
+    f"//div[{_has_class('tournament-teamlist')}]//a[contains(@href, '/Teams/')]"
+)
+PLAYER_ROWS = _first_of(
+    "//*[@id='player-table-statistics-body']//tr",
+    f"//table[{_has_class('player-statistics')}]//tr[td]"
+)
+PLAYER_LINK = etree.XPath(".//a[contains(@href, '/Players/')][1]")
+POSITION_CELL = etree.XPath("./td[2]")
+TEAM_ID = re.compile(r'/Teams/(\d+)')
+PLAYER_ID = re.compile(r'/Players/(\d+)')
+
+# Compte rendu de match
+MATCH_EVENTS = etree.XPath(f"//div[{_has_class('match-centre-events-wrapper')}]//li")
+EVENT_MINUTE = etree.XPath(f".//span[{_has_class('minute')}][1]")
+FIRST_LINK = etree.XPath(".//a[1]")
+MATCH_STAT_CATEGORIES = etree.XPath(
+    f"(//div[{_has_class('match-centre-stats')}])[1]//div[{_has_class('stat-category')}]"
+)
+STAT_NAME = etree.XPath(f".//div[{_has_class('stat-name')}][1]")
+HOME_STAT = etree.XPath(f".//div[{_has_class('home-stat')}][1]")
+AWAY_STAT = etree.XPath(f".//div[{_has_class('away-stat')}][1]")
+PLAYER_RATINGS = etree.XPath(
+    f"//div[{_has_class('home-team')} or {_has_class('away-team')}]//div[{_has_class('player-rating')}]"
+)
+RATING_VALUE = etree.XPath(f".//span[{_has_class('rating')}][1]")
+
+# En-tête du centre de match
+MATCH_TEAMS = (
+    (etree.XPath(f"//div[{_has_class('home-team')}]//span[{_has_class('team-name')}]"),
+     etree.XPath(f"//div[{_has_class('away-team')}]//span[{_has_class('team-name')}]")),
+    (etree.XPath(f"//div[{_has_class('home-team')}]//h2"), etree.XPath(f"//div[{_has_class('away-team')}]//h2")),
+    (etree.XPath(f"//span[{_has_class('home-team-name')}]"), etree.XPath(f"//span[{_has_class('away-team-name')}]"))
+)
+MATCH_SCORE = _first_of(
+    f"//div[{_has_class('match-centre-header')}]//div[{_has_class('result')}]",
+    f"//div[{_has_class('match-centre-header')}]//span[{_has_class('result')}]",
+    f"//span[{_has_class('match-score')}]"
+)
+MATCH_DATE = _first_of(
+    f"//div[{_has_class('match-centre-header')}]//div[{_has_class('date')}]",
+    f"//span[{_has_class('match-date')}]",
+    f"//div[{_has_class('match-info')}]//span[{_has_class('date')}]"
+)
+
+# Tableaux de statistiques : ligue entière et joueurs d'une équipe dans un match
+LEAGUE_STATS_TABLE = _first_of(
+    f"//table[{_has_class('player-table-statistics')}]",
+    f"//table[{_has_class('stats-table')}]"
+)
+_TEAM_DIV = "//div[contains(concat(' ', normalize-space(@class), ' '), ${})]"
+TEAM_STATS_TABLE = _first_of(
+    f"{_TEAM_DIV.format('statistics')}//table[{_has_class('player-statistics')}]",
+    f"{_TEAM_DIV.format('stats')}//table[{_has_class('player-statistics')}]",
+    f"{_TEAM_DIV.format('statistics')}//table"
+)
+TABLE_HEADERS = _first_of("(.//thead/tr)[last()]/th", "(.//tr[th and not(td)])[1]/th")
+TABLE_ROWS = etree.XPath(".//tr[td]")
+
+def parse_document(source):
+    """
+    Analyse une page HTML (sans effet sur un document déjà analysé)
+
+    Args:
+        source: le HTML (str ou bytes) ou un élément lxml
+
+    Returns:
+        La racine du document lxml
+    """
+    if isinstance(source, (str, bytes)):
+        return lxml.html.document_fromstring(source)
+    return source
+
+def text(element):
+    """Texte d'un élément, espaces normalisés ('' si l'élément est absent)"""
+    return ' '.join(element.text_content().split()) if element is not None else ''
+
+def _first(doc, xpaths, **variables):
+    """Résultats de la première expression XPath qui trouve des éléments"""
+    for xpath in xpaths:
+        found = xpath(doc, **variables)
+        if found:
+            return found
+    return []
+
+def convert_value(value):
+    """
+    Convertit une valeur en string vers le type approprié (int, float, etc.)
+    """
+    if not value:
+        return 0
+
+    value = value.strip()
+
+    # Essayer de convertir en entier
+    try:
+        return int(value)
+    except ValueError:
+        pass
+
+    # Essayer de convertir en nombre à virgule
+    try:
+        # Remplacer la virgule par un point pour les nombres décimaux
+        if ',' in value:
+            value = value.replace(',', '.')
+        return float(value)
+    except ValueError:
+        pass
+
+    # Pour les pourcentages
+    if '%' in value:
+        try:
+            return float(value.replace('%', '')) / 100
+        except ValueError:
+            pass
+
+    # Retourner la valeur comme une chaîne si les conversions échouent
+    return value
+
+def _stat_key(label, percent=True):
+    key = label.lower().replace(' ', '_')
+    return key.replace('%', 'percent') if percent else key
+
+def parse_stat_rows(source, rows=STAT_ROWS, percent_keys=True):
+    """
+    Statistiques clé / valeur d'un tableau à deux colonnes
+
+    Args:
+        source: le HTML ou le document analysé
+        rows: l'expression XPath des lignes
+        percent_keys: remplacer '%' par 'percent' dans les clés
+
+    Returns:
+        Un dictionnaire {statistique: valeur convertie}
+    """
+    stats = {}
+    for row in rows(parse_document(source)):
+        cells = CELLS(row)
+        if len(cells) >= 2:
+            stats[_stat_key(text(cells[0]), percent_keys)] = convert_value(text(cells[1]))
+    return stats
+
+def parse_player_summary(source):
+    """Statistiques du tableau de résumé de la fiche d'un joueur"""
+    return parse_stat_rows(source, rows=SUMMARY_ROWS, percent_keys=False)
+
+def parse_player_info(source):
+    """
+    Informations de l'en-tête de la fiche d'un joueur
+
+    Returns:
+        Un dictionnaire {name, <terme>: valeur}, None pour le nom s'il est introuvable
+    """
+    doc = parse_document(source)
+    names = _first(doc, PLAYER_NAME)
+    info = {'name': text(names[0]) if names else None}
+
+    terms = _first(doc, PLAYER_INFO_TERMS)
+    for i in range(0, len(terms) - 1, 2):
+        key = text(terms[i]).lower().replace(' ', '_').replace(':', '')
+        info[key] = text(terms[i + 1])
+    return info
+
+def parse_league_teams(source):
+    """
+    Équipes listées sur la page d'une ligue
+
+    Returns:
+        Une liste de dictionnaires {id, name}
+    """
+    teams = []
+    for link in _first(parse_document(source), TEAM_LINKS):
+        match = TEAM_ID.search(link.get('href', ''))
+        if match:
+            teams.append({'id': match.group(1), 'name': text(link)})
+    return teams
+
+def parse_team_players(source):
+    """
+    Joueurs listés sur la page d'une équipe
+
+    Returns:
+        Une liste de dictionnaires {id, name, position}
+    """
+    players = []
+    for row in _first(parse_document(source), PLAYER_ROWS):
+        links = PLAYER_LINK(row)
+        match = PLAYER_ID.search(links[0].get('href', '')) if links else None
+        if not match:
+            continue
+        positions = POSITION_CELL(row)
+        players.append({
+            'id': match.group(1),
+            'name': text(links[0]),
+            'position': text(positions[0]) if positions else 'Unknown'
+        })
+    return players
+
+def parse_match_report(source):
+    """
+    Événements, statistiques d'équipe et notes des joueurs d'un compte rendu de match
+
+    Returns:
+        Un dictionnaire {events, team_stats, player_ratings}
+    """
+    doc = parse_document(source)
+    details = {'events': [], 'team_stats': {}, 'player_ratings': {}}
+
+    for event in MATCH_EVENTS(doc):
+        classes = event.get('class', '').split()
+        event_type = ('goal' if 'goal' in classes else 'card' if 'card' in classes
+                      else 'substitution' if 'sub' in classes else None)
+        if event_type:
+            minutes = EVENT_MINUTE(event)
+            links = FIRST_LINK(event)
+            details['events'].append({
+                'type': event_type,
+                'minute': text(minutes[0]).replace("'", '') if minutes else '',
+                'player': text(links[0]) if links else None
+            })
+
+    for category in MATCH_STAT_CATEGORIES(doc):
+        name, home, away = STAT_NAME(category), HOME_STAT(category), AWAY_STAT(category)
+        if name and home and away:
+            details['team_stats'][text(name[0]).lower().replace(' ', '_')] = {
+                'home': convert_value(text(home[0])),
+                'away': convert_value(text(away[0]))
+            }
+
+    for rating in PLAYER_RATINGS(doc):
+        links, values = FIRST_LINK(rating), RATING_VALUE(rating)
+        if links and values:
+            try:
+                details['player_ratings'][text(links[0])] = float(text(values[0]))
+            except ValueError:
+                details['player_ratings'][text(links[0])] = 0.0
+
+    return details
+
+def parse_match_info(source):
+    """
+    Équipes, score et date de l'en-tête du centre de match
+
+    Returns:
+        Un dictionnaire avec les clés trouvées parmi home_team, away_team, score et date
+    """
+    doc = parse_document(source)
+    info = {}
+
+    for home_xpath, away_xpath in MATCH_TEAMS:
+        home, away = home_xpath(doc), away_xpath(doc)
+        if home and away:
+            info['home_team'], info['away_team'] = text(home[0]), text(away[0])
+            break
+
+    score = _first(doc, MATCH_SCORE)
+    if score:
+        info['score'] = text(score[0])
+    date = _first(doc, MATCH_DATE)
+    if date:
+        info['date'] = text(date[0])
+    return info
+
+def typed_column(values):
+    """
+    Type une colonne de textes : entiers, décimaux si tous les nombres ne
+    sont pas entiers, sinon chaînes (les cellules vides ou '-' deviennent None)
+    """
+    converted = [None if value in ('', '-') else convert_value(value) for value in values]
+    present = [value for value in converted if value is not None]
+    if not present or any(isinstance(value, str) for value in present):
+        return [value if value not in ('', '-') else None for value in values]
+    if all(isinstance(value, int) for value in present):
+        return converted
+    return [float(value) if value is not None else None for value in converted]
+
+def parse_table(table):
+    """
+    Convertit un tableau HTML en colonnes typées
+
+    Les noms de colonnes proviennent de la dernière ligne d'en-tête ; un nom
+    en double est suffixé comme le fait pandas (`Nom.1`).
+
+    Args:
+        table: l'élément <table>
+
+    Returns:
+        Un dictionnaire ordonné {colonne: liste de valeurs}
+    """
+    headers = [text(cell) for cell in _first(table, TABLE_HEADERS)]
+    rows = [[text(cell) for cell in CELLS(row)] for row in TABLE_ROWS(table)]
+    width = max([len(headers)] + [len(row) for row in rows])
+
+    names, seen = [], {}
+    for index in range(width):
+        name = headers[index] if index < len(headers) and headers[index] else str(index)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+
+    return {
+        name: typed_column([row[index] if index < len(row) else '' for row in rows])
+        for index, name in enumerate(names)
+    }
+
+def parse_league_stats_table(source):
+    """Colonnes typées du tableau des statistiques d'une ligue (None si absent)"""
+    tables = _first(parse_document(source), LEAGUE_STATS_TABLE)
+    return parse_table(tables[0]) if tables else None
+
+def parse_team_stats_table(source, team_type):
+    """Colonnes typées du tableau des joueurs d'une équipe ('home' ou 'away') dans un match (None si absent)"""
+    tables = _first(parse_document(source), TEAM_STATS_TABLE,
+                    statistics=f" {team_type}-team-statistics ", stats=f" {team_type}-team-stats ")
+    return parse_table(tables[0]) if tables else None
+
+def columns_to_records(columns):
+    """Convertit des colonnes {nom: valeurs} en liste de dictionnaires par ligne"""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -17,13 +17,21 @@ import json
 import logging
 import random
 import os
-from bs4 import BeautifulSoup
 import pandas as pd
 import re
 from datetime import datetime
+from app.services.parser_corpus import parser_corpus
+from app.services.match_centre import parse_match_centre, match_info as match_centre_info
+from app.services.whoscored_parser import (
+    convert_value, parse_stat_rows, parse_player_info, parse_league_teams, parse_match_info,
+    parse_league_stats_table, parse_team_stats_table, columns_to_records
+)
 
 logger = logging.getLogger(__name__)
 
+# Tableau de statistiques attendu sur la fiche d'un joueur
+STAT_TABLE_SELECTOR = "table.player-statistics, table.player-stats-detailed, div.player-stats-container table"
+
 class WhoScoredSeleniumScraper:
     """
     Scraper utilisant Selenium pour extraire les données de WhoScored
@@ -41,31 +49,54 @@ class WhoScoredSeleniumScraper:
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/99.0.4844.51 Safari/537.36'
     ]
     
-    def __init__(self, headless=True, chrome_path=None):
+    def __init__(self, headless=True, chrome_path=None, driver=None):
         """
         Initialise le scraper Selenium
         
         Args:
             headless: si True, lance Chrome en mode headless (sans interface graphique)
             chrome_path: chemin vers l'exécutable Chrome (optionnel)
+            driver: navigateur déjà lancé à utiliser (optionnel, ex: emprunté au
+                pool de navigateurs) ; il n'est alors pas fermé par `close`
         """
-        self.options = Options()
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self.create_driver(headless, chrome_path)
+        self.wait = WebDriverWait(self.driver, 15)
+        self.pages_loaded = 0
+        
+        # Créer un répertoire pour les captures d'écran si nécessaire
+        if not os.path.exists("screenshots"):
+            os.makedirs("screenshots")
+    
+    @classmethod
+    def create_driver(cls, headless=True, chrome_path=None):
+        """
+        Lance une instance de Chrome configurée pour WhoScored
+        
+        Args:
+            headless: si True, lance Chrome en mode headless (sans interface graphique)
+            chrome_path: chemin vers l'exécutable Chrome (optionnel)
+        
+        Returns:
+            Le WebDriver Chrome
+        """
+        options = Options()
         if headless:
-            self.options.add_argument('--headless')
+            options.add_argument('--headless')
         
-        self.options.add_argument('--no-sandbox')
-        self.options.add_argument('--disable-dev-shm-usage')
-        self.options.add_argument('--disable-gpu')
-        self.options.add_argument('--window-size=1920,1080')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--window-size=1920,1080')
         
         # User-Agent aléatoire
-        user_agent = random.choice(self.USER_AGENTS)
-        self.options.add_argument(f'user-agent={user_agent}')
+        user_agent = random.choice(cls.USER_AGENTS)
+        options.add_argument(f'user-agent={user_agent}')
         
         # Désactiver les fonctionnalités qui peuvent révéler qu'il s'agit d'un bot
-        self.options.add_argument('--disable-blink-features=AutomationControlled')
-        self.options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        self.options.add_experimental_option('useAutomationExtension', False)
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option('excludeSwitches', ['enable-automation'])
+        options.add_experimental_option('useAutomationExtension', False)
         
         # Ajouter des préférences pour gérer les cookies et autres paramètres
         prefs = {
@@ -73,37 +104,57 @@ class WhoScoredSeleniumScraper:
             "credentials_enable_service": False,
             "profile.password_manager_enabled": False
         }
-        self.options.add_experimental_option("prefs", prefs)
+        options.add_experimental_option("prefs", prefs)
         
         try:
             if chrome_path:
                 service = Service(executable_path=chrome_path)
-                self.driver = webdriver.Chrome(service=service, options=self.options)
+                driver = webdriver.Chrome(service=service, options=options)
             else:
-                self.driver = webdriver.Chrome(options=self.options)
+                driver = webdriver.Chrome(options=options)
             
             # Modifier le navigator.webdriver pour éviter la détection
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            # Créer un répertoire pour les captures d'écran si nécessaire
-            if not os.path.exists("screenshots"):
-                os.makedirs("screenshots")
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             
             # Définir des timeouts raisonnables
-            self.driver.set_page_load_timeout(30)
-            self.wait = WebDriverWait(self.driver, 15)
+            driver.set_page_load_timeout(30)
+            return driver
         except Exception as e:
             logger.error(f"Erreur lors de l'initialisation de Selenium: {str(e)}")
             raise
     
+    def close(self):
+        """Ferme le navigateur (sans effet s'il est déjà fermé ou s'il est emprunté)"""
+        driver = getattr(self, 'driver', None)
+        if driver is None:
+            return
+        self.driver = None
+        if not self._owns_driver:
+            return
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Erreur lors de la fermeture du navigateur: {str(e)}")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
     def __del__(self):
         """Ferme le navigateur lors de la destruction de l'objet"""
         try:
-            if hasattr(self, 'driver'):
-                self.driver.quit()
+            self.close()
         except:
             pass
     
+    def _load(self, url):
+        """Charge une page dans le navigateur et la compte"""
+        self.driver.get(url)
+        self.pages_loaded += 1
+    
     def _random_sleep(self, min_seconds=1, max_seconds=3):
         """
         Attend un temps aléatoire entre min_seconds et max_seconds
@@ -146,7 +197,7 @@ class WhoScoredSeleniumScraper:
             # Ajouter un délai aléatoire avant de charger la page
             self._random_sleep(2, 4)
             
-            self.driver.get(url)
+            self._load(url)
             
             # Attendre le chargement initial
             self._random_sleep(3, 5)
@@ -224,39 +275,13 @@ class WhoScoredSeleniumScraper:
         Extrait les informations de base du joueur depuis la page actuelle
         """
         try:
-            info = {}
-            
-            # Extraire le nom du joueur
-            try:
-                player_name_element = self.driver.find_element(By.CSS_SELECTOR, "div.player-header h1")
-                info['name'] = player_name_element.text.strip()
-            except NoSuchElementException:
-                try:
-                    # Essayer un sélecteur alternatif
-                    player_name_element = self.driver.find_element(By.CSS_SELECTOR, "h1.player-name")
-                    info['name'] = player_name_element.text.strip()
-                except NoSuchElementException:
-                    info['name'] = "Nom non disponible"
-                    logger.warning("Nom du joueur non trouvé")
-            
-            # Extraire d'autres informations comme la position, le club, etc.
-            try:
-                info_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.player-header dl dt, div.player-header dl dd")
-                
-                if not info_elements:
-                    # Essayer un sélecteur alternatif
-                    info_elements = self.driver.find_elements(By.CSS_SELECTOR, "div.player-info dl dt, div.player-info dl dd")
-                
-                for i in range(0, len(info_elements), 2):
-                    if i + 1 < len(info_elements):
-                        key = info_elements[i].text.strip().lower().replace(' ', '_').replace(':', '')
-                        value = info_elements[i + 1].text.strip()
-                        info[key] = value
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'extraction des informations détaillées du joueur: {str(e)}")
+            info = parse_player_info(self.driver.page_source)
+            if not info['name']:
+                info['name'] = "Nom non disponible"
+                logger.warning("Nom du joueur non trouvé")
             
             # Prendre une capture d'écran pour référence
-            self.driver.save_screenshot(f"screenshots/player_info_{info.get('name', 'unknown').replace(' ', '_')}.png")
+            self.driver.save_screenshot(f"screenshots/player_info_{info['name'].replace(' ', '_')}.png")
             
             return info
         except Exception as e:
@@ -266,66 +291,20 @@ class WhoScoredSeleniumScraper:
     def _extract_current_tab_stats(self):
         """
         Extrait les statistiques de l'onglet actuellement affiché
+        
+        Le HTML de la page est lu une seule fois puis analysé par lxml, au lieu
+        d'un aller-retour Selenium par cellule.
         """
         try:
-            stats = {}
-            
             # Attendre que le tableau de statistiques soit chargé
             try:
-                # Essayer différents sélecteurs pour trouver le tableau de statistiques
-                selectors = [
-                    "table.player-statistics",
-                    "table.player-stats-detailed",
-                    "div.player-stats-container table"
-                ]
-                
-                stats_table = None
-                for selector in selectors:
-                    try:
-                        stats_table = self.wait.until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                        )
-                        if stats_table:
-                            break
-                    except TimeoutException:
-                        continue
-                
-                if not stats_table:
-                    logger.warning("Tableau de statistiques non trouvé")
-                    return stats
-                
-                # Extraire les statistiques
-                rows = stats_table.find_elements(By.CSS_SELECTOR, "tbody tr")
-                
-                for row in rows:
-                    cells = row.find_elements(By.CSS_SELECTOR, "td")
-                    if len(cells) >= 2:
-                        key = cells[0].text.strip().lower().replace(' ', '_').replace('%', 'percent')
-                        value = cells[1].text.strip()
-                        stats[key] = self._convert_value(value)
+                self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, STAT_TABLE_SELECTOR)))
             except TimeoutException:
                 logger.warning("Timeout en attendant le tableau de statistiques")
             
-            # Si aucune statistique n'est trouvée, essayer de lire le HTML brut
+            stats = parse_stat_rows(self.driver.page_source)
             if not stats:
-                try:
-                    html = self.driver.page_source
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Essayer de trouver le tableau de statistiques
-                    tables = soup.select("table.player-statistics, table.player-stats-detailed")
-                    
-                    for table in tables:
-                        rows = table.select("tbody tr")
-                        for row in rows:
-                            cells = row.select("td")
-                            if len(cells) >= 2:
-                                key = cells[0].text.strip().lower().replace(' ', '_').replace('%', 'percent')
-                                value = cells[1].text.strip()
-                                stats[key] = self._convert_value(value)
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'extraction des statistiques via BeautifulSoup: {str(e)}")
-            
+                logger.warning("Tableau de statistiques non trouvé")
             return stats
         except Exception as e:
             logger.error(f"Erreur lors de l'extraction des statistiques de l'onglet courant: {str(e)}")
@@ -335,35 +314,7 @@ class WhoScoredSeleniumScraper:
         """
         Convertit une valeur en string vers le type approprié (int, float, etc.)
         """
-        if not value:
-            return 0
-            
-        value = value.strip()
-        
-        # Essayer de convertir en entier
-        try:
-            return int(value)
-        except ValueError:
-            pass
-        
-        # Essayer de convertir en nombre à virgule
-        try:
-            # Remplacer la virgule par un point pour les nombres décimaux
-            if ',' in value:
-                value = value.replace(',', '.')
-            return float(value)
-        except ValueError:
-            pass
-        
-        # Pour les pourcentages
-        if '%' in value:
-            try:
-                return float(value.replace('%', '')) / 100
-            except ValueError:
-                pass
-        
-        # Retourner la valeur comme une chaîne si les conversions échouent
-        return value
+        return convert_value(value)
     
     def get_league_player_statistics(self, league_id, season_id, category="Summary"):
         """
@@ -386,7 +337,7 @@ class WhoScoredSeleniumScraper:
             # Ajouter un délai aléatoire avant de charger la page
             self._random_sleep(2, 5)
             
-            self.driver.get(url)
+            self._load(url)
             
             # Attendre plus longtemps pour le chargement initial
             self._random_sleep(4, 6)
@@ -436,50 +387,27 @@ class WhoScoredSeleniumScraper:
             
             # Extraire le tableau des statistiques
             try:
-                # Essayer différents sélecteurs
-                selectors = [
-                    "table.player-table-statistics",
-                    "table.stats-table"
-                ]
-                
-                table_html = None
-                for selector in selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            table_html = elements[0].get_attribute('outerHTML')
-                            break
-                    except:
-                        continue
+                page_source = self.driver.page_source
+                columns = parse_league_stats_table(page_source)
                 
-                if not table_html:
+                if not columns:
                     logger.warning("Aucun tableau de statistiques trouvé")
                     # Sauvegarder la page pour débogage
-                    with open(f"screenshots/league_stats_{league_id}_{category.lower()}.html", "w", encoding="utf-8") as f:
-                        f.write(self.driver.page_source)
+                    parser_corpus.save_failure('league_stats', f"{league_id}_{season_id}_{category.lower()}", page_source)
                     self.driver.save_screenshot(f"screenshots/league_stats_{league_id}_{category.lower()}.png")
                     return None
                 
                 # Prendre une capture d'écran pour le débogage
                 self.driver.save_screenshot(f"screenshots/league_stats_{league_id}_{category.lower()}.png")
                 
-                # Utiliser pandas pour parser le tableau HTML
-                dfs = pd.read_html(table_html)
-                if dfs and len(dfs) > 0:
-                    df = dfs[0]
-                    
-                    # Nettoyer les noms de colonnes
-                    df.columns = [col.strip() for col in df.columns]
-                    
-                    # Sauvegarder le DataFrame en CSV pour référence
-                    csv_path = f"screenshots/league_stats_{league_id}_{category.lower()}.csv"
-                    df.to_csv(csv_path, index=False)
-                    logger.info(f"Statistiques sauvegardées dans {csv_path}")
-                    
-                    return df
-                else:
-                    logger.warning("Aucun tableau de statistiques trouvé par pandas")
-                    return None
+                df = pd.DataFrame(columns)
+                
+                # Sauvegarder le DataFrame en CSV pour référence
+                csv_path = f"screenshots/league_stats_{league_id}_{category.lower()}.csv"
+                df.to_csv(csv_path, index=False)
+                logger.info(f"Statistiques sauvegardées dans {csv_path}")
+                
+                return df
             except Exception as e:
                 logger.error(f"Erreur lors de l'extraction du tableau de statistiques: {str(e)}")
                 return None
@@ -511,7 +439,7 @@ class WhoScoredSeleniumScraper:
             # Ajouter un délai aléatoire avant de charger la page
             self._random_sleep(2, 5)
             
-            self.driver.get(url)
+            self._load(url)
             
             # Attendre le chargement initial
             self._random_sleep(3, 5)
@@ -522,6 +450,19 @@ class WhoScoredSeleniumScraper:
                 self.driver.save_screenshot(f"screenshots/error_match_{match_id}.png")
                 return None
             
+            # Données du centre de match embarquées dans la page : aucun clic ni tableau à lire
+            centre = parse_match_centre(self.driver.page_source)
+            if centre:
+                return {
+                    'match_id': match_id,
+                    'info': match_centre_info(centre),
+                    'player_stats': {
+                        'home_team': [player for player in centre['players'] if player['side'] == 'home'],
+                        'away_team': [player for player in centre['players'] if player['side'] == 'away']
+                    },
+                    'match_centre': centre
+                }
+            
             # Simuler un comportement humain
             self._simulate_human_behavior()
             
@@ -556,92 +497,14 @@ class WhoScoredSeleniumScraper:
         Extrait les informations de base du match depuis la page actuelle
         """
         try:
-            info = {}
-            
-            # Extraire les noms des équipes
-            try:
-                # Essayer différents sélecteurs
-                selectors = [
-                    ("div.home-team span.team-name", "div.away-team span.team-name"),
-                    ("div.home-team h2", "div.away-team h2"),
-                    ("span.home-team-name", "span.away-team-name")
-                ]
-                
-                home_team = None
-                away_team = None
-                
-                for home_selector, away_selector in selectors:
-                    try:
-                        home_elem = self.driver.find_element(By.CSS_SELECTOR, home_selector)
-                        away_elem = self.driver.find_element(By.CSS_SELECTOR, away_selector)
-                        if home_elem and away_elem:
-                            home_team = home_elem.text.strip()
-                            away_team = away_elem.text.strip()
-                            break
-                    except NoSuchElementException:
-                        continue
-                
-                if home_team and away_team:
-                    info['home_team'] = home_team
-                    info['away_team'] = away_team
-                else:
-                    logger.warning("Noms des équipes non trouvés")
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'extraction des noms des équipes: {str(e)}")
-            
-            # Extraire le score
-            try:
-                # Essayer différents sélecteurs
-                selectors = [
-                    "div.match-centre-header div.result",
-                    "div.match-centre-header span.result",
-                    "span.match-score"
-                ]
-                
-                score_element = None
-                for selector in selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            score_element = elements[0]
-                            break
-                    except:
-                        continue
-                
-                if score_element:
-                    score = score_element.text.strip()
-                    info['score'] = score
-                else:
-                    logger.warning("Score non trouvé")
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'extraction du score: {str(e)}")
+            info = parse_match_info(self.driver.page_source)
             
-            # Extraire la date et l'heure du match
-            try:
-                # Essayer différents sélecteurs
-                selectors = [
-                    "div.match-centre-header div.date",
-                    "span.match-date",
-                    "div.match-info span.date"
-                ]
-                
-                date_element = None
-                for selector in selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            date_element = elements[0]
-                            break
-                    except:
-                        continue
-                
-                if date_element:
-                    match_date = date_element.text.strip()
-                    info['date'] = match_date
-                else:
-                    logger.warning("Date du match non trouvée")
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'extraction de la date: {str(e)}")
+            if 'home_team' not in info:
+                logger.warning("Noms des équipes non trouvés")
+            if 'score' not in info:
+                logger.warning("Score non trouvé")
+            if 'date' not in info:
+                logger.warning("Date du match non trouvée")
             
             return info
         except Exception as e:
@@ -720,24 +583,9 @@ class WhoScoredSeleniumScraper:
             
             # Extraire le tableau des statistiques
             try:
-                # Essayer différents sélecteurs
-                selectors = [
-                    f"div.{team_type}-team-statistics table.player-statistics",
-                    f"div.{team_type}-team-stats table.player-statistics",
-                    f"div.{team_type}-team-statistics table"
-                ]
-                
-                table_html = None
-                for selector in selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if elements:
-                            table_html = elements[0].get_attribute('outerHTML')
-                            break
-                    except:
-                        continue
+                columns = parse_team_stats_table(self.driver.page_source, team_type)
                 
-                if not table_html:
+                if not columns:
                     logger.warning(f"Aucun tableau de statistiques trouvé pour l'équipe {team_type}")
                     self.driver.save_screenshot(f"screenshots/match_team_{team_type}_no_table.png")
                     return []
@@ -745,22 +593,7 @@ class WhoScoredSeleniumScraper:
                 # Prendre une capture d'écran pour référence
                 self.driver.save_screenshot(f"screenshots/match_team_{team_type}_stats.png")
                 
-                # Utiliser pandas pour parser le tableau HTML
-                dfs = pd.read_html(table_html)
-                if dfs and len(dfs) > 0:
-                    df = dfs[0]
-                    
-                    # Convertir le DataFrame en dictionnaire
-                    players_stats = []
-                    
-                    for _, row in df.iterrows():
-                        player_stats = {col: row[col] for col in df.columns}
-                        players_stats.append(player_stats)
-                    
-                    return players_stats
-                else:
-                    logger.warning(f"Aucun tableau de statistiques trouvé par pandas pour l'équipe {team_type}")
-                    return []
+                return columns_to_records(columns)
             except Exception as e:
                 logger.error(f"Erreur lors de l'extraction du tableau de statistiques pour l'équipe {team_type}: {str(e)}")
                 return []
@@ -776,7 +609,7 @@ class WhoScoredSeleniumScraper:
         
         try:
             self._random_sleep(2, 5)
-            self.driver.get(url)
+            self._load(url)
             self._random_sleep(3, 5)
             
             # Vérifier les erreurs
@@ -789,28 +622,11 @@ class WhoScoredSeleniumScraper:
             self._simulate_human_behavior()
             
             # Extraire les équipes
-            teams = []
-            selectors = [
-                'table.standings a[href*="/Teams/"]',
-                'div.tournament-teamlist a[href*="/Teams/"]'
+            teams = [
+                dict(team, league_id=league_id, season_id=season_id)
+                for team in parse_league_teams(self.driver.page_source)
             ]
             
-            for selector in selectors:
-                team_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if team_elements:
-                    for element in team_elements:
-                        href = element.get_attribute('href')
-                        if href and '/Teams/' in href:
-                            team_id = href.split('/')[4]  # Adapter selon structure URL
-                            team_name = element.text.strip()
-                            teams.append({
-                                'id': team_id,
-                                'name': team_name,
-                                'league_id': league_id,
-                                'season_id': season_id
-                            })
-                    break  # Sortir de la boucle si des équipes ont été trouvées
-            
             # Sauvegarder un screenshot pour débogage
             self.driver.save_screenshot(f"screenshots/league_teams_{league_id}.png")
             
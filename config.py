@@ -8,6 +8,15 @@ class Config:
     OLLAMA_API_URL = os.environ.get('OLLAMA_API_URL') or 'http://localhost:11434/api'
     FOOTBALL_API_KEY = os.environ.get('FOOTBALL_API_KEY') or 'your-api-key'
     
+    # Paramètres pour football-data.org (secours des données locales)
+    FOOTBALL_DATA_CONNECT_TIMEOUT = 3  # Secondes
+    FOOTBALL_DATA_TIMEOUT = 10  # Secondes
+    FOOTBALL_DATA_POOL_SIZE = 4  # Connexions HTTP conservées
+    FOOTBALL_DATA_CACHE_TTL = 900  # Durée de vie des réponses mémorisées (secondes)
+    FOOTBALL_DATA_CACHE_SIZE = 512
+    FOOTBALL_DATA_RESULT_DELAY_HOURS = 3  # Délai après lequel un match sans résultat rend la base obsolète
+    FOOTBALL_DATA_PLAYER_MAX_AGE_HOURS = 168  # Âge maximal des statistiques de joueurs en base
+    
     # Paramètres pour API-Football
     API_FOOTBALL_KEY = 'b52dad2462e765d262f804b8f70a3e57'  # Votre clé API directement ici
     API_FOOTBALL_HOST = 'api-football-v1.p.rapidapi.com'
@@ -21,4 +30,78 @@ class Config:
         }
     }
     SCHEDULER_API_ENABLED = True
-    SCHEDULER_TIMEZONE = 'Europe/Paris'
\ No newline at end of file
+    SCHEDULER_TIMEZONE = 'Europe/Paris'
+    
+    # Paramètres du cache analytique en colonnes
+    ANALYTICS_STORE_ENABLED = True
+    ANALYTICS_STORE_MAX_MB = 256  # Budget mémoire des tableaux NumPy
+    ANALYTICS_STORE_REFRESH_SECONDS = 60  # Âge maximal avant rafraîchissement incrémental
+    ANALYTICS_STORE_RETRY_SECONDS = 600  # Suspension du cache après un échec ou un dépassement du budget
+    
+    # Feature store des prédictions
+    FEATURE_STORE_ENABLED = True
+    FEATURE_STORE_REFRESH_SECONDS = 60  # Intervalle maximal entre deux synchronisations
+    STARTUP_WARMUP = True  # Construire ces deux caches au démarrage du serveur (jamais pour les autres commandes flask)
+    
+    # Export Parquet des tables d'analyse
+    EXPORT_PARQUET_DIR = os.environ.get('EXPORT_PARQUET_DIR') or 'exports/parquet'
+    EXPORT_PARQUET_SAFETY_SECONDS = 300  # Relu avant le dernier marqueur (commits tardifs), lignes dédoublonnées par id
+    
+    # Prédictions de matchs
+    PREDICTION_LLM_NARRATIVE = False  # Demander à Ollama un texte d'analyse en plus du modèle local
+    PREDICTION_CACHE_TTL = 900  # Durée de vie en mémoire d'une prédiction du modèle local (secondes)
+    OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL') or 'mistral:latest'
+    OLLAMA_TIMEOUT = 30  # Secondes sans données avant abandon
+    OLLAMA_CONNECT_TIMEOUT = 3  # Secondes
+    OLLAMA_MAX_GENERATION_SECONDS = 120  # Durée maximale d'une génération
+    OLLAMA_MAX_CONCURRENCY = 2  # Générations simultanées
+    OLLAMA_QUEUE_TIMEOUT = 5  # Attente maximale d'une place libre (secondes)
+    OLLAMA_POOL_SIZE = 4  # Connexions HTTP conservées
+    PREDICTION_BATCH_SYNC_MAX = 50  # Au-delà, POST /predict/batch confie les prédictions au job runner
+    SEASON_SIMULATIONS = 10000  # Saisons simulées par projection
+    SEASON_SIMULATIONS_MAX = 100000
+    SEASON_SIMULATION_PROCESSES = 1  # Processus de calcul des simulations
+    SEASON_SIMULATION_WEB_POOL = False  # Autoriser ces processus dans les workers web (sinon calcul dans le worker)
+    
+    # Cache des réponses d'Ollama (clé : modèle et prompt)
+    PROMPT_CACHE_ENABLED = True
+    PROMPT_CACHE_DIR = os.environ.get('PROMPT_CACHE_DIR') or 'cache/prompts'
+    PROMPT_CACHE_TTL = 7 * 24 * 3600  # Secondes
+    PROMPT_CACHE_MAX_MB = 50  # Taille maximale sur disque
+    PROMPT_CACHE_MEMORY_SIZE = 256  # Entrées gardées en mémoire
+    
+    # Tâches d'import WhoScored en arrière-plan
+    IMPORT_JOB_WORKERS = 1  # Imports exécutés simultanément (un navigateur chacun)
+    IMPORT_JOB_STALE_SECONDS = 300  # Sans nouvelle d'une tâche d'un autre hôte au-delà, elle est considérée interrompue
+    IMPORT_JOB_HEARTBEAT_SECONDS = 60  # Mise à jour des tâches en attente ou en cours du processus
+    
+    # Pool de navigateurs Chrome des scrapers WhoScored
+    BROWSER_POOL_SIZE = 2  # Navigateurs ouverts au maximum
+    BROWSER_POOL_MAX_PAGES = 200  # Pages chargées avant remplacement d'un navigateur
+    BROWSER_POOL_MAX_MEMORY_MB = 512  # Tas JavaScript au-delà duquel un navigateur est remplacé
+    BROWSER_POOL_IDLE_SECONDS = 600  # Navigateur au repos fermé au-delà
+    BROWSER_POOL_CHECKOUT_TIMEOUT = 600  # Attente maximale d'un navigateur libre (secondes)
+    
+    # Cache des pages WhoScored (clé : URL sans le paramètre aléatoire `r`)
+    WHOSCORED_PAGE_CACHE_ENABLED = True
+    WHOSCORED_PAGE_CACHE_DIR = os.environ.get('WHOSCORED_PAGE_CACHE_DIR') or 'cache/pages'
+    WHOSCORED_PAGE_CACHE_MAX_MB = 500  # Taille maximale sur disque (pages compressées)
+    WHOSCORED_PAGE_CACHE_TTLS = {  # Durée de vie par type de page, en secondes (None : jamais périmée)
+        'match_report': 30 * 24 * 3600,  # Matchs terminés : ne changent plus
+        'match': 3600,
+        'player': 24 * 3600,
+        'team': 24 * 3600,
+        'league': 3600  # Classements
+    }
+    WHOSCORED_OFFLINE = os.environ.get('WHOSCORED_OFFLINE', '').lower() in ('1', 'true', 'yes')  # Pages du cache uniquement
+    WHOSCORED_CORPUS_DIR = os.environ.get('WHOSCORED_CORPUS_DIR') or 'corpus/whoscored'  # Corpus de pages pour les tests hors ligne
+    WHOSCORED_SAVE_FAILED_PAGES = True  # Enregistrer dans le corpus les pages dont l'analyse échoue
+    
+    # Import d'une ligue en pipeline (téléchargement, analyse, écriture)
+    WHOSCORED_PIPELINE_FETCH_WORKERS = 2  # Threads de téléchargement
+    WHOSCORED_PIPELINE_PARSE_WORKERS = 2  # Threads d'analyse des pages
+    WHOSCORED_PIPELINE_BATCH_SIZE = 200  # Lignes écrites par transaction
+    WHOSCORED_PIPELINE_QUEUE_SIZE = 50  # Capacité des files entre les étapes
+    WHOSCORED_HOST_MIN_INTERVAL = 3.0  # Écart minimal entre deux requêtes vers un même hôte (secondes)
+    WHOSCORED_HOST_JITTER = 0.5  # Part aléatoire ajoutée à cet écart (0.5 : jusqu'à +50 %)
+    WHOSCORED_HOST_MAX_CONCURRENT = 2  # Requêtes simultanées au plus vers un même hôte
@@ -0,0 +1,42 @@
+"""Add owner to import_job
+
+Revision ID: 3c1a7e9d2b40
+Revises: 1fb0f5285f03
+Create Date: 2026-10-19 09:12:04.315902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1a7e9d2b40'
+down_revision = '1fb0f5285f03'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    # La table import_job est créée par db.create_all() : elle n'existe pas forcément
+    columns = _columns('import_job')
+    if columns is None or 'owner' in columns:
+        return
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(length=100), nullable=True))
+        batch_op.create_index(batch_op.f('ix_import_job_owner'), ['owner'], unique=False)
+
+
+def downgrade():
+    columns = _columns('import_job')
+    if columns is None or 'owner' not in columns:
+        return
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_job_owner'))
+        batch_op.drop_column('owner')
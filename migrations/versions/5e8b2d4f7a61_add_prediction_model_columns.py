@@ -0,0 +1,69 @@
+"""Add model output columns to prediction
+
+Revision ID: 5e8b2d4f7a61
+Revises: 3c1a7e9d2b40
+Create Date: 2026-10-19 14:03:27.518244
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8b2d4f7a61'
+down_revision = '3c1a7e9d2b40'
+branch_labels = None
+depends_on = None
+
+
+def _new_columns():
+    return [
+        sa.Column('home_team_id', sa.Integer(), nullable=True),
+        sa.Column('away_team_id', sa.Integer(), nullable=True),
+        sa.Column('match_date', sa.DateTime(), nullable=True),
+        sa.Column('model_version', sa.String(length=50), nullable=True),
+        sa.Column('home_win_probability', sa.Float(), nullable=True),
+        sa.Column('draw_probability', sa.Float(), nullable=True),
+        sa.Column('away_win_probability', sa.Float(), nullable=True),
+        sa.Column('expected_home_goals', sa.Float(), nullable=True),
+        sa.Column('expected_away_goals', sa.Float(), nullable=True),
+        sa.Column('feature_hash', sa.String(length=64), nullable=True),
+        sa.Column('has_narrative', sa.Boolean(), nullable=True),
+    ]
+
+
+INDEXED_COLUMNS = ['home_team_id', 'away_team_id', 'match_date', 'feature_hash']
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    # La table prediction peut avoir été créée par db.create_all() avec toutes ses colonnes
+    columns = _columns('prediction')
+    if columns is None or 'model_version' in columns:
+        return
+    with op.batch_alter_table('prediction', schema=None) as batch_op:
+        for column in _new_columns():
+            batch_op.add_column(column)
+        for name in INDEXED_COLUMNS:
+            batch_op.create_index(batch_op.f(f'ix_prediction_{name}'), [name], unique=False)
+        batch_op.create_foreign_key('fk_prediction_home_team_id_club', 'club', ['home_team_id'], ['id'])
+        batch_op.create_foreign_key('fk_prediction_away_team_id_club', 'club', ['away_team_id'], ['id'])
+
+
+def downgrade():
+    columns = _columns('prediction')
+    if columns is None or 'model_version' not in columns:
+        return
+    with op.batch_alter_table('prediction', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_prediction_away_team_id_club', type_='foreignkey')
+        batch_op.drop_constraint('fk_prediction_home_team_id_club', type_='foreignkey')
+        for name in reversed(INDEXED_COLUMNS):
+            batch_op.drop_index(batch_op.f(f'ix_prediction_{name}'))
+        for column in reversed(_new_columns()):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,58 @@
+"""Add match-centre columns to match_event
+
+Revision ID: 8d41c6a2e9f3
+Revises: 5e8b2d4f7a61
+Create Date: 2026-10-19 14:21:50.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41c6a2e9f3'
+down_revision = '5e8b2d4f7a61'
+branch_labels = None
+depends_on = None
+
+
+def _new_columns():
+    return [
+        sa.Column('source_event_id', sa.BigInteger(), nullable=True),
+        sa.Column('second', sa.Integer(), nullable=True),
+        sa.Column('period', sa.String(length=20), nullable=True),
+        sa.Column('x', sa.Float(), nullable=True),
+        sa.Column('y', sa.Float(), nullable=True),
+        sa.Column('end_x', sa.Float(), nullable=True),
+        sa.Column('end_y', sa.Float(), nullable=True),
+        sa.Column('is_successful', sa.Boolean(), nullable=True),
+        sa.Column('qualifiers', sa.Text(), nullable=True),
+    ]
+
+
+def _columns(table):
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return None
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    # La table match_event peut avoir été créée par db.create_all() avec toutes ses colonnes
+    columns = _columns('match_event')
+    if columns is None or 'source_event_id' in columns:
+        return
+    with op.batch_alter_table('match_event', schema=None) as batch_op:
+        for column in _new_columns():
+            batch_op.add_column(column)
+        batch_op.create_index(batch_op.f('ix_match_event_source_event_id'), ['source_event_id'], unique=False)
+
+
+def downgrade():
+    columns = _columns('match_event')
+    if columns is None or 'source_event_id' not in columns:
+        return
+    with op.batch_alter_table('match_event', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_match_event_source_event_id'))
+        for column in reversed(_new_columns()):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,137 @@
+# ollama_stub.py
+"""
+Serveur Ollama factice pour le développement et les tests
+
+Répond à /api/generate (en flux ou non) et /api/tags avec un texte fixe
+découpé en fragments, émis avec un délai configurable pour simuler une
+génération lente sans modèle ni GPU.
+
+Usage :
+    python ollama_stub.py --port 11435 --delay 0.05
+    OLLAMA_API_URL=http://localhost:11435/api flask run
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TEXT = ("Analyse simulée : l'équipe à domicile part favorite grâce à sa forme récente, "
+                "mais l'équipe à l'extérieur reste dangereuse en contre. Score probable : 2-1.")
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    """Gestionnaire des requêtes du serveur factice"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/api/tags':
+            self._send_json(200, {"models": [{"name": self.server.model}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/api/generate':
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests_received += 1
+
+        if self.server.fail_status:
+            self._send_json(self.server.fail_status, {"error": "erreur simulée"})
+            return
+
+        model = payload.get("model", self.server.model)
+        tokens = [word + ' ' for word in self.server.text.split(' ')]
+        tokens[-1] = tokens[-1].rstrip()
+
+        if not payload.get("stream", True):
+            time.sleep(self.server.delay * len(tokens))
+            self._send_json(200, {"model": model, "response": "".join(tokens), "done": True})
+            return
+
+        # Réponse en flux : une ligne JSON par fragment (transfert par morceaux)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        try:
+            for token in tokens:
+                time.sleep(self.server.delay)
+                self._write_chunk({"model": model, "response": token, "done": False})
+            self._write_chunk({"model": model, "response": "", "done": True})
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_chunk(self, data):
+        line = json.dumps(data).encode('utf-8') + b'\n'
+        self.wfile.write(f"{len(line):X}\r\n".encode('ascii') + line + b'\r\n')
+        self.wfile.flush()
+
+def start_stub_server(host='127.0.0.1', port=0, delay=0.0, text=DEFAULT_TEXT, model='mistral:latest',
+                      fail_status=None, verbose=False):
+    """
+    Démarre le serveur factice dans un thread
+
+    Args:
+        host: adresse d'écoute
+        port: port d'écoute (0 pour un port libre)
+        delay: délai entre deux fragments, en secondes
+        text: texte renvoyé par chaque génération
+        model: nom du modèle annoncé
+        fail_status: code HTTP d'erreur à renvoyer à chaque génération (optionnel)
+        verbose: journaliser les requêtes
+
+    Returns:
+        Le serveur ; `server.base_url` donne l'URL à utiliser comme OLLAMA_API_URL
+        et `server.shutdown()` l'arrête
+    """
+    server = ThreadingHTTPServer((host, port), OllamaStubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.text = text
+    server.model = model
+    server.fail_status = fail_status
+    server.verbose = verbose
+    server.requests_received = 0
+    server.base_url = f"http://{host}:{server.server_address[1]}/api"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur Ollama factice")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--delay', type=float, default=0.05, help="Délai entre deux fragments (secondes)")
+    parser.add_argument('--text', default=DEFAULT_TEXT, help="Texte renvoyé par chaque génération")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, delay=args.delay, text=args.text, verbose=True)
+    print(f"Serveur Ollama factice sur {server.base_url} (Ctrl+C pour arrêter)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()